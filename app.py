@@ -3,15 +3,38 @@ import json
 import logging
 import tempfile
 import time
-import glob
+import re
+import base64
+import hashlib
+import itertools
+import multiprocessing
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
-from flask import render_template, request, redirect, url_for, flash, session, jsonify, send_file
+from flask import (render_template, request, redirect, url_for, flash, session, jsonify, send_file, Response,
+                   g, abort, send_from_directory)
 
 from main import app
-from yt_scraper.api import YouTubeAPI
-from yt_scraper.utils import validate_youtube_url, extract_channel_id
-from yt_scraper.exporter import export_data
+from yt_scraper.api import YouTubeAPI, ClientPool, MAX_LOOKUP_VIDEOS, build_lookup_channel_data
+from yt_scraper.utils import (validate_youtube_url, extract_channel_id, extract_playlist_id, parse_video_ids,
+                              parse_duration_seconds, parse_formatted_duration)
+from yt_scraper.exporter import export_data, VIDEO_EXPORT_FIELDS, EXPORT_FORMATS, EXPORT_EXTENSIONS
+from yt_scraper.export_bundle import stream_bundle
+from yt_scraper.pipeline import iter_scrape, iter_playlist_scrape, iter_lookup, run_pipeline, SessionSink, TeeSink
+from yt_scraper.search import SearchIndexSink, index_session, is_indexed, remove_sessions, search as search_index
+from yt_scraper.links import LinkIndex, normalize_domain
+from yt_scraper.video_index import VideoIndex, SORT_FIELDS
+from yt_scraper.analytics import ChannelAnalytics
+from yt_scraper.record_store import RecordStore, write_record_store
+from yt_scraper.session_store import (write_session, read_session, session_path, session_base, session_disk_usage,
+                                      iter_session_files)
+from yt_scraper.tag_index import TagIndex, tag_index_path, TOP_K_ORDERS
+from yt_scraper.video_store import VideoStore
+from yt_scraper.watchlist import Watchlist, WatchlistScheduler, WATCHLIST_API_KEY, WATCHLIST_BACKFILL
+from yt_scraper.janitor import SessionJanitor
+from yt_scraper.metrics import (render_metrics, SESSION_IO_LATENCY, SESSION_IO_BYTES, EXPORT_LATENCY,
+                                EXPORT_BYTES, RESULTS_RENDER_LATENCY)
+from yt_scraper.profiler import (RequestProfile, list_profiles, PROFILING_ENABLED, PROFILE_DIR,
+                                 PROFILE_THRESHOLD_MS)
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -24,142 +47,256 @@ os.makedirs(SESSION_FILE_DIR, exist_ok=True)
 # Session cleanup configuration
 SESSION_MAX_AGE_HOURS = 24  # Files older than this will be deleted
 
+# Videos and comments of every session, stored once however many sessions hold them
+video_store = VideoStore()
+
+# Export bundle workers import this module again through main.py; only the serving process runs background jobs
+SERVING_PROCESS = multiprocessing.parent_process() is None
+
+def remove_session_data(session_ids):
+    """Drop removed sessions from search and release their videos in the shared store."""
+    remove_sessions(session_ids)
+    video_store.release(session_ids)
+
+# Expires old sessions, enforces the disk quota and removes leaked temp files in the background
+session_janitor = SessionJanitor(SESSION_FILE_DIR, SESSION_MAX_AGE_HOURS * 3600, on_remove=remove_session_data)
+if SERVING_PROCESS:
+    session_janitor.start()
+
+# Clients that resolved a channel for /resolve, taken over by the /scrape that follows on this worker
+client_pool = ClientPool()
+
+# Channels and videos whose statistics are refreshed on a schedule, polled when a key is configured
+watchlist = Watchlist()
+watchlist_scheduler = None
+if WATCHLIST_API_KEY and SERVING_PROCESS:
+    watchlist_scheduler = WatchlistScheduler(YouTubeAPI(WATCHLIST_API_KEY), watchlist)
+    watchlist_scheduler.start()
+
+# JSON API configuration
+API_DEFAULT_FIELDS = ('id', 'title', 'published_at', 'duration', 'view_count', 'like_count', 'comment_count',
+                      'engagement_rate', 'video_url')
+API_FIELDS = frozenset(VIDEO_EXPORT_FIELDS) | {'comments'}
+API_DEFAULT_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+SESSION_ID_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
 def store_session_data(data, session_id=None):
     """Store large session data in a file instead of in the cookie."""
     if not session_id:
         # Generate a random ID if none provided
         session_id = os.urandom(16).hex()
     
-    # Create a file path
-    file_path = os.path.join(SESSION_FILE_DIR, f"{session_id}.json")
+    # Precompute sort orders and filters once, instead of on every results page
+    video_index = None
+    if 'videos_data' in data:
+        video_index = VideoIndex.from_session(data)
+        if 'video_index' not in data:
+            data = dict(data, video_index=video_index.to_dict())
+        if 'analytics' not in data:
+            data = dict(data, analytics=ChannelAnalytics.from_session(data).to_dict())
     
     try:
-        # Write the data to the file
-        with open(file_path, 'w') as f:
-            json.dump(data, f)
+        # Compressed, and renamed into place so readers never see a partial file
+        stored_bytes = 0
+        with SESSION_IO_LATENCY.time(operation='write'):
+            if video_index is not None:
+                # The session holds references; videos already in the shared store are not written again
+                generation = os.urandom(8).hex()
+                video_refs, stored_bytes = video_store.put(session_id, data['videos_data'], generation)
+                stored = {key: value for key, value in data.items() if key != 'videos_data'}
+                stored['video_refs'] = video_refs
+                file_path = write_session(SESSION_FILE_DIR, session_id, stored)
+                video_store.prune(session_id, generation)
+                # Paged by the JSON API without loading the session file
+                base_path = session_base(SESSION_FILE_DIR, session_id)
+                write_record_store(base_path, video_refs, video_index)
+                TagIndex.from_videos(data['videos_data']).save(tag_index_path(base_path))
+            else:
+                file_path = write_session(SESSION_FILE_DIR, session_id, data)
+        SESSION_IO_BYTES.observe(os.path.getsize(file_path), operation='write')
+        # Shared video bytes count against the quota of the session that first stored them
+        session_janitor.track(session_id, session_disk_usage(SESSION_FILE_DIR, session_id) + stored_bytes)
         return session_id
     except Exception as e:
         logger.error(f"Error storing session data: {e}")
         return None
 
-def get_session_data(session_id):
-    """Retrieve session data from file."""
-    file_path = os.path.join(SESSION_FILE_DIR, f"{session_id}.json")
+def stream_session_data(channel_data, video_batches, session_id=None):
+    """Store session data by streaming video batches into the file as they arrive."""
+    if not session_id:
+        session_id = os.urandom(16).hex()
+    
+    file_path = session_path(SESSION_FILE_DIR, session_id)
     
+    # Not timed as session I/O: the batches arrive at the pace of the API calls.
+    # The scrape is indexed for full-text search on the way through.
+    session_sink = SessionSink(file_path, channel_data, video_store)
+    run_pipeline(video_batches, TeeSink(session_sink, SearchIndexSink(session_id, channel_data)))
+    SESSION_IO_BYTES.observe(os.path.getsize(file_path), operation='write')
+    session_janitor.track(session_id, session_disk_usage(SESSION_FILE_DIR, session_id) + session_sink.stored_bytes)
+    return session_id
+
+def get_session_data(session_id, expand_videos=True):
+    """Retrieve session data from file.
+
+    With expand_videos=False, videos held in the shared video store are left
+    as the session's 'video_refs' instead of being loaded into 'videos_data'.
+    """
     try:
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        return None
+        with SESSION_IO_LATENCY.time(operation='read'):
+            data, file_path = read_session(SESSION_FILE_DIR, session_id)
+            if data is not None and 'video_refs' in data and expand_videos:
+                data['videos_data'] = video_store.get(data.pop('video_refs'))
+        if file_path is not None:
+            SESSION_IO_BYTES.observe(os.path.getsize(file_path), operation='read')
+            session_janitor.touch(session_id)
+        return data
     except Exception as e:
         logger.error(f"Error retrieving session data: {e}")
         return None
 
 def cleanup_old_sessions():
-    """Clean up session files older than SESSION_MAX_AGE_HOURS"""
+    """Run one janitor sweep now: expired sessions, disk quota and leaked temp files"""
     try:
-        # Get the current time
-        now = time.time()
-        # Maximum file age in seconds
-        max_age = SESSION_MAX_AGE_HOURS * 3600
-        # Counter for deleted files
-        deleted_count = 0
-        
-        # Get all session files
-        session_files = glob.glob(os.path.join(SESSION_FILE_DIR, "*.json"))
-        
-        for file_path in session_files:
-            # Get file modification time
-            file_mtime = os.path.getmtime(file_path)
-            # Check if file is older than max age
-            if now - file_mtime > max_age:
-                try:
-                    os.remove(file_path)
-                    deleted_count += 1
-                except OSError as e:
-                    logger.error(f"Error deleting old session file {file_path}: {e}")
-        
-        if deleted_count > 0:
-            logger.info(f"Cleaned up {deleted_count} old session files")
-        
-        return deleted_count
+        result = session_janitor.sweep()
+        return result['expired'] + result['evicted']
     except Exception as e:
         logger.error(f"Error during session cleanup: {e}")
         return 0
 
+# Endpoints sampled automatically when a latency threshold is configured
+AUTO_PROFILED_ENDPOINTS = {'scrape', 'export', 'results'}
+# Request fields saved with a profile (never the API key)
+PROFILED_PARAMS = ('channel_url', 'start_date', 'end_date', 'export_format', 'page', 'view')
+
+@app.before_request
+def start_profiling():
+    """Start profiling when asked for by header or query flag, or for threshold capture"""
+    if not PROFILING_ENABLED:
+        return
+    if request.headers.get('X-Profile') == '1':
+        g.profile = RequestProfile('header', deterministic=True)
+    elif request.args.get('profile') == '1':
+        g.profile = RequestProfile('query', deterministic=True)
+    elif PROFILE_THRESHOLD_MS and request.endpoint in AUTO_PROFILED_ENDPOINTS:
+        g.profile = RequestProfile('threshold')
+
+@app.after_request
+def record_profiled_status(response):
+    if 'profile' in g:
+        g.profile_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_profiling(exc):
+    """Save the capture if it was requested explicitly or the request was slow"""
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+    duration_ms = profile.stop()
+    if profile.trigger == 'threshold' and duration_ms < PROFILE_THRESHOLD_MS:
+        return
+    params = {key: request.values[key] for key in PROFILED_PARAMS if key in request.values}
+    name = profile.save({
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': g.get('profile_status', 500),
+        'duration_ms': round(duration_ms, 1),
+        'params': params
+    })
+    if name:
+        logger.info(f"Saved profile {name} for {request.path} ({duration_ms:.0f} ms)")
 
 @app.route('/')
 def index():
     """Homepage and search form"""
-    # Run cleanup of old session files (non-blocking)
-    try:
-        # Run cleanup in background
-        cleanup_old_sessions()
-    except Exception as e:
-        logger.error(f"Error during session cleanup: {e}")
-    
+    # Old sessions are cleaned up by the background janitor
     return render_template('index.html')
 
 @app.route('/scrape', methods=['POST'])
 def scrape():
-    """Process the scrape request"""
-    # Run cleanup before creating new session data
-    try:
-        cleanup_old_sessions()
-    except Exception as e:
-        logger.error(f"Error during session cleanup: {e}")
-        
+    """Process the scrape request: a channel or playlist URL, or a list of video IDs"""
     channel_url = request.form.get('channel_url', '').strip()
     api_key = request.form.get('api_key', '').strip()
     start_date = request.form.get('start_date', '')
     end_date = request.form.get('end_date', '')
+    video_ids_text = request.form.get('video_ids', '')
+    video_ids_file = request.files.get('video_ids_file')
+    if video_ids_file and video_ids_file.filename:
+        video_ids_text += '\n' + video_ids_file.read().decode('utf-8', 'replace')
     
     # Validate inputs
-    if not channel_url or not api_key:
-        flash('Please provide both a channel URL and your API key.', 'danger')
+    if not (channel_url or video_ids_text.strip()) or not api_key:
+        flash('Please provide a channel or playlist URL (or a list of video IDs) and your API key.', 'danger')
         return redirect(url_for('index'))
     
     # Validate YouTube URL
-    if not validate_youtube_url(channel_url):
-        flash('Please enter a valid YouTube channel or video URL.', 'danger')
+    if not video_ids_text.strip() and not validate_youtube_url(channel_url):
+        flash('Please enter a valid YouTube channel, playlist or video URL.', 'danger')
         return redirect(url_for('index'))
     
     try:
-        # Initialize the API client
-        yt_api = YouTubeAPI(api_key)
+        # Initialize the API client, or take over the one that resolved the channel for the preview
+        yt_api = client_pool.take(api_key) or YouTubeAPI(api_key)
         
-        # Extract channel ID from URL
-        channel_id = extract_channel_id(yt_api, channel_url)
+        if video_ids_text.strip():
+            # Bulk lookup: the IDs go straight to the batched videos.list detail stage
+            video_ids, invalid = parse_video_ids(video_ids_text)
+            if invalid:
+                flash(f'Skipped {len(invalid)} entries that are not video IDs or video URLs '
+                      f'(e.g. {invalid[0][:60]}).', 'warning')
+            if not video_ids:
+                flash('No valid video IDs were provided.', 'danger')
+                return redirect(url_for('index'))
+            if MAX_LOOKUP_VIDEOS and len(video_ids) > MAX_LOOKUP_VIDEOS:
+                flash(f'Only the first {MAX_LOOKUP_VIDEOS} of {len(video_ids)} video IDs were looked up.', 'warning')
+                video_ids = video_ids[:MAX_LOOKUP_VIDEOS]
+            channel_data = build_lookup_channel_data(len(video_ids))
+            start_date = end_date = ''
+            batches = iter_lookup(yt_api, video_ids)
         
-        if not channel_id:
-            flash('Could not extract a valid channel ID from the provided URL.', 'danger')
-            return redirect(url_for('index'))
+        elif extract_playlist_id(channel_url):
+            playlist_id = extract_playlist_id(channel_url)
+            playlist = yt_api.get_playlist_data(playlist_id)
+            if not playlist:
+                flash('Could not find the playlist of the provided URL.', 'danger')
+                return redirect(url_for('index'))
+            
+            # The playlist owner's channel data, with the playlist itself alongside
+            channel_data = yt_api.get_channel_data(playlist['channel_id'])
+            if not channel_data:
+                flash('Failed to retrieve the channel data of the playlist owner.', 'danger')
+                return redirect(url_for('index'))
+            channel_data['playlist'] = playlist
+            batches = iter_playlist_scrape(yt_api, playlist_id, start_date, end_date)
         
-        # Get channel data
-        channel_data = yt_api.get_channel_data(channel_id)
+        else:
+            # Extract channel ID from URL
+            channel_id = extract_channel_id(yt_api, channel_url)
+            
+            if not channel_id:
+                flash('Could not extract a valid channel ID from the provided URL.', 'danger')
+                return redirect(url_for('index'))
+            
+            # Get channel data
+            channel_data = yt_api.get_channel_data(channel_id)
+            
+            if not channel_data:
+                flash('Failed to retrieve channel data. Please check your API key and channel URL.', 'danger')
+                return redirect(url_for('index'))
+            batches = iter_scrape(yt_api, channel_id, start_date, end_date)
         
-        if not channel_data:
-            flash('Failed to retrieve channel data. Please check your API key and channel URL.', 'danger')
-            return redirect(url_for('index'))
-        
-        # Get videos in date range
-        videos_data = yt_api.get_videos_in_date_range(channel_id, start_date, end_date)
-        
-        # Store large data in file-based session
-        session_data = {
-            'channel_data': channel_data,
-            'videos_data': videos_data
-        }
-        session_id = store_session_data(session_data)
-        
-        if not session_id:
-            flash('Failed to store session data.', 'danger')
-            return redirect(url_for('index'))
+        # Stream the videos straight into file-based session storage
+        session_id = stream_session_data(channel_data, batches)
         
         # Store references in cookie session
         session['data_session_id'] = session_id
         session['start_date'] = start_date
         session['end_date'] = end_date
+        # How the video list was fetched (playlist walk or date-bounded search), see yt_scraper/planner.py
+        session['scrape_plan'] = yt_api.plan.to_dict() if yt_api.plan else None
         
         # Instead of rendering here, redirect to the results route for page 1
         return redirect(url_for('results', page=1))
@@ -171,6 +308,68 @@ def scrape():
         flash(f'An error occurred: {str(e)}', 'danger')
         return redirect(url_for('index'))
 
+@app.route('/resolve', methods=['POST'])
+def resolve():
+    """Resolve a channel or playlist URL while the form is being filled in, for a preview before /scrape
+
+    Resolving warms the shared channel ID and channel metadata caches that
+    /scrape reads, and leaves the client with its open connection to the
+    scrape that follows. The preview has the channel's title and video count
+    and the estimated quota cost of scraping it over the chosen dates.
+    """
+    payload = request.get_json(silent=True) or request.form
+    channel_url = (payload.get('channel_url') or '').strip()
+    api_key = (payload.get('api_key') or '').strip()
+    start_date = payload.get('start_date') or ''
+    end_date = payload.get('end_date') or ''
+    if not channel_url or not api_key:
+        return jsonify({'error': 'Provide a channel or playlist URL and your API key.'}), 400
+    if not validate_youtube_url(channel_url):
+        return jsonify({'error': 'Please enter a valid YouTube channel, playlist or video URL.'}), 400
+    
+    try:
+        yt_api = client_pool.take(api_key) or YouTubeAPI(api_key)
+        units_before = yt_api.http.units
+        playlist = None
+        playlist_id = extract_playlist_id(channel_url)
+        if playlist_id:
+            playlist = yt_api.get_playlist_data(playlist_id)
+            if not playlist:
+                return jsonify({'error': 'Could not find the playlist of the provided URL.'}), 404
+            channel_id = playlist['channel_id']
+        else:
+            channel_id = extract_channel_id(yt_api, channel_url)
+            if not channel_id:
+                return jsonify({'error': 'Could not extract a valid channel ID from the provided URL.'}), 404
+        
+        channel_data = yt_api.get_channel_data(channel_id)
+        if not channel_data:
+            return jsonify({'error': 'Failed to retrieve the channel data.'}), 404
+        
+        if playlist:
+            estimate = yt_api.estimate_playlist_scrape(playlist)
+        elif start_date and end_date:
+            estimate = yt_api.estimate_scrape(channel_data, start_date, end_date)
+        else:
+            estimate = None
+        preview = {
+            'channel_id': channel_id,
+            'title': channel_data.get('title', ''),
+            'thumbnail_url': channel_data.get('thumbnail_url', ''),
+            'subscriber_count': channel_data.get('subscriber_count', 0),
+            'video_count': channel_data.get('video_count', 0),
+            'playlist': playlist,
+            'estimate': estimate,
+            # Quota spent resolving now, which the scrape will not spend again
+            'resolve_units': yt_api.http.units - units_before
+        }
+        client_pool.put(api_key, yt_api)
+        return jsonify(preview)
+    
+    except Exception as e:
+        logger.error(f"Error resolving {channel_url}: {e}")
+        return jsonify({'error': str(e)}), 502
+
 # These routes were removed as the database functionality is no longer needed
 
 @app.route('/export', methods=['POST'])
@@ -182,6 +381,8 @@ def export():
     
     # Get format
     export_format = request.form.get('export_format', 'csv')
+    if export_format == 'bundle':
+        return export_bundle()
     
     # Get data
     data = get_session_data(session['data_session_id'])
@@ -192,16 +393,23 @@ def export():
     try:
         # Export data
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        export_file = export_data(data['channel_data'], data['videos_data'], export_format, timestamp)
+        with EXPORT_LATENCY.time(format=export_format):
+            export_file = export_data(data['channel_data'], data['videos_data'], export_format, timestamp,
+                                      ChannelAnalytics.from_session(data).to_dict())
+        EXPORT_BYTES.inc(os.path.getsize(export_file), format=export_format)
         
         # Get filename
         channel_name = data['channel_data']['title'].replace(' ', '_')
-        filename = f"{channel_name}_{timestamp}.{export_format}"
-        if export_format == 'excel':
-            filename = f"{channel_name}_{timestamp}.xlsx"
+        filename = f"{channel_name}_{timestamp}.{EXPORT_EXTENSIONS.get(export_format, export_format)}"
         
-        # Send file
-        return send_file(export_file, 
+        # Send file from an open handle, so the file itself can be removed right away;
+        # anything left behind is swept up by the janitor
+        export_handle = open(export_file, 'rb')
+        try:
+            os.remove(export_file)
+        except OSError:
+            pass
+        return send_file(export_handle, 
                         as_attachment=True, 
                         download_name=filename)
     
@@ -210,6 +418,42 @@ def export():
         flash(f'Export failed: {str(e)}', 'danger')
         return redirect(url_for('results'))
 
+@app.route('/export/bundle', methods=['POST'])
+def export_bundle():
+    """Export data in several formats at once (formats, default all), generated in parallel into one zip"""
+    if 'data_session_id' not in session:
+        flash('No data available to export. Please perform a scrape first.', 'warning')
+        return redirect(url_for('index'))
+    
+    formats = request.form.getlist('formats') or list(EXPORT_FORMATS)
+    unsupported = [export_format for export_format in formats if export_format not in EXPORT_FORMATS]
+    if unsupported:
+        return jsonify({'error': f"Unsupported export format: {', '.join(unsupported)}. "
+                                 f"Available: {', '.join(EXPORT_FORMATS)}."}), 400
+    
+    data = get_session_data(session['data_session_id'])
+    if not data:
+        flash('Session data has expired. Please perform a new scrape.', 'warning')
+        return redirect(url_for('index'))
+    
+    def record_file(export_format, seconds, size):
+        EXPORT_LATENCY.observe(seconds, format=export_format)
+        EXPORT_BYTES.inc(size, format=export_format)
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    basename = f"{data['channel_data']['title'].replace(' ', '_')}_{timestamp}"
+    stream = stream_bundle(data['channel_data'], data['videos_data'], ChannelAnalytics.from_session(data).to_dict(),
+                           formats, basename, timestamp, on_file=record_file)
+    # Nothing is sent before the first file is in the zip, so a bundle of failed formats is still an error response
+    try:
+        first_chunk = next(stream)
+    except Exception as e:
+        logger.error(f"Bundle export error: {e}")
+        return jsonify({'error': f"Export failed: {e}"}), 500
+    response = Response(itertools.chain([first_chunk], stream), mimetype='application/zip')
+    response.headers.set('Content-Disposition', 'attachment', filename=f"{basename}.zip")
+    return response
+
 @app.route('/results')
 def results():
     """Show results from session data"""
@@ -217,9 +461,14 @@ def results():
         flash('No data available. Please perform a scrape first.', 'warning')
         return redirect(url_for('index'))
     
-    # Retrieve data from file storage
-    data = get_session_data(session['data_session_id'])
-    if not data:
+    # Retrieve data from file storage; the page's videos are read from the record store on their own
+    session_id = session['data_session_id']
+    data = get_session_data(session_id, expand_videos=False)
+    if data and ('video_index' not in data or 'analytics' not in data):
+        # Sessions stored without their indexes have them rebuilt from the videos
+        data = get_session_data(session_id)
+    store = get_record_store(session_id) if data else None
+    if not data or store is None:
         flash('Session data has expired. Please perform a new scrape.', 'warning')
         return redirect(url_for('index'))
     
@@ -227,41 +476,364 @@ def results():
     page = request.args.get('page', 1, type=int)
     view = request.args.get('view', 'card') # Get view preference, default to 'card'
     videos_per_page = 12
-    all_videos = data.get('videos_data', []) # Get all videos
-    total_videos = len(all_videos)
-    total_pages = (total_videos + videos_per_page - 1) // videos_per_page
+    video_index = VideoIndex.from_session(data)
     
-    # Ensure page number is valid
+    # Sorting and filtering, answered from the session's precomputed index
+    filters = get_results_filters()
+    query = {
+        'sort': filters.get('sort'),
+        'descending': filters.get('order', 'desc') == 'desc',
+        'tag': filters.get('tag'),
+        'min_duration': filters['min_duration'] * 60 if 'min_duration' in filters else None,
+        'max_duration': filters['max_duration'] * 60 if 'max_duration' in filters else None,
+        'published_after': filters.get('published_after'),
+        'published_before': filters.get('published_before')
+    }
     if page < 1:
         page = 1
-    elif page > total_pages and total_pages > 0:
+    positions, total_videos = query_page(store, video_index, query, (page - 1) * videos_per_page, videos_per_page)
+    total_pages = (total_videos + videos_per_page - 1) // videos_per_page
+    
+    # Ensure page number is valid
+    if page > total_pages and total_pages > 0:
         page = total_pages
+        positions, _ = query_page(store, video_index, query, (page - 1) * videos_per_page, videos_per_page)
     
-    start_index = (page - 1) * videos_per_page
-    end_index = start_index + videos_per_page
-    videos_to_display = all_videos[start_index:end_index] # Get slice for current page
+    videos_to_display = store.read(positions) # Only the current page's videos are loaded
     
     # Prepare display dates using the existing filter in the template
     start_date_display = session.get('start_date', '')
     end_date_display = session.get('end_date', '')
     
-    # Prepare summary statistics (using all videos)
-    summary = {
-        'total_views': sum(video.get('view_count', 0) for video in all_videos),
-        'total_likes': sum(video.get('like_count', 0) for video in all_videos),
-        'total_comments': sum(video.get('comment_count', 0) for video in all_videos),
-        'avg_engagement': sum(video.get('engagement_rate', 0) for video in all_videos) / total_videos if total_videos else 0
-    }
+    with RESULTS_RENDER_LATENCY.time():
+        return render_template('results.html', 
+                              channel=data['channel_data'], 
+                              videos=videos_to_display, # Pass only the slice for display
+                              total_videos=total_videos,
+                              summary=video_index.summary, # Summary statistics over all videos
+                              analytics=ChannelAnalytics.from_session(data).report,
+                              start_date=start_date_display,
+                              end_date=end_date_display,
+                              current_page=page,
+                              total_pages=total_pages,
+                              current_view=view, # Pass current view to template
+                              filters=filters,
+                              sort_options=list(SORT_FIELDS),
+                              export_formats=EXPORT_FORMATS,
+                              top_tags=video_index.top_tags())
+
+def query_page(store, video_index, query, offset, limit):
+    """Return (positions of one results page, number of matching videos) for a get_results_filters() query."""
+    filtered = query['tag'] or any(query[name] is not None for name in ('min_duration', 'max_duration')) or \
+        query['published_after'] or query['published_before']
+    if not filtered:
+        # A slice of the sort order stored in the record index
+        return store.positions(query['sort'], query['descending'], offset, limit), len(store)
+    return video_index.query(offset=offset, limit=limit, **query)
+
+def get_results_filters():
+    """Read the sort and filter parameters of the results page, dropping empty or invalid ones."""
+    filters = {}
+    sort = request.args.get('sort', '')
+    if sort in SORT_FIELDS:
+        filters['sort'] = sort
+        filters['order'] = 'asc' if request.args.get('order') == 'asc' else 'desc'
+    tag = request.args.get('tag', '').strip()
+    if tag:
+        filters['tag'] = tag
+    # Durations are given in minutes
+    for name in ('min_duration', 'max_duration'):
+        value = request.args.get(name, type=float)
+        if value is not None and value >= 0:
+            filters[name] = value
+    for name in ('published_after', 'published_before'):
+        value = request.args.get(name, '')
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+            filters[name] = value
+        except ValueError:
+            pass
+    return filters
+
+@app.route('/links')
+def links():
+    """Domains linked from the scraped video descriptions, or the videos linking to one domain"""
+    if 'data_session_id' not in session:
+        return jsonify({'error': 'No data available. Please perform a scrape first.'}), 404
     
-    return render_template('results.html', 
-                          channel=data['channel_data'], 
-                          videos=videos_to_display, # Pass only the slice for display
-                          summary=summary,
-                          start_date=start_date_display,
-                          end_date=end_date_display,
-                          current_page=page,
-                          total_pages=total_pages,
-                          current_view=view) # Pass current view to template
+    data = get_session_data(session['data_session_id'])
+    if not data:
+        return jsonify({'error': 'Session data has expired. Please perform a new scrape.'}), 404
+    
+    link_index = LinkIndex.from_session(data)
+    domain = request.args.get('domain', '').strip()
+    if not domain:
+        limit = request.args.get('limit', 100, type=int)
+        return jsonify({
+            'domains': [{'domain': name, 'video_count': count} for name, count in link_index.top_domains(limit)]
+        })
+    
+    domain = normalize_domain(domain)
+    video_ids = set(link_index.videos_linking_to(domain))
+    videos = [{
+        'id': video['id'],
+        'title': video.get('title', ''),
+        'video_url': video.get('video_url', f"https://www.youtube.com/watch?v={video['id']}"),
+        'urls': [url for url in video.get('description_urls', []) if normalize_domain(url) == domain]
+    } for video in data.get('videos_data', []) if video.get('id') in video_ids]
+    return jsonify({'domain': domain, 'videos': videos})
+
+def get_tag_index(session_id):
+    """Load a session's tag index, building it from the session file for sessions stored without one."""
+    path = tag_index_path(session_base(SESSION_FILE_DIR, session_id))
+    if not os.path.exists(path):
+        data = get_session_data(session_id)
+        if not data:
+            return None
+        TagIndex.from_videos(data.get('videos_data', [])).save(path)
+    return TagIndex.load(path)
+
+def get_all_tag_indexes():
+    """One tag index over every stored session that has one."""
+    indexes = []
+    for session_id, _ in iter_session_files(SESSION_FILE_DIR):
+        path = tag_index_path(session_base(SESSION_FILE_DIR, session_id))
+        try:
+            indexes.append(TagIndex.load(path))
+        except (OSError, ValueError, KeyError):
+            # Older sessions without a tag index, or one removed by the janitor meanwhile
+            continue
+    return TagIndex.merge(indexes)
+
+def get_tags_scope():
+    """The tag index a /tags request asks for (scope=session|all), or an error response."""
+    if request.args.get('scope', 'session') == 'all':
+        return get_all_tag_indexes(), None
+    session_id = session.get('data_session_id')
+    if not session_id:
+        return None, (jsonify({'error': 'No data available. Please perform a scrape first.'}), 404)
+    tag_index = get_tag_index(session_id)
+    if tag_index is None:
+        return None, (jsonify({'error': 'Session data has expired. Please perform a new scrape.'}), 404)
+    return tag_index, None
+
+@app.route('/tags')
+def tags():
+    """Top tags of the current scrape (or every scrape), or the videos with the given tags and related tags"""
+    tag_index, error = get_tags_scope()
+    if error:
+        return error
+    limit = max(1, min(request.args.get('limit', 20, type=int), 1000))
+    tag_names = [tag for tag in request.args.getlist('tag') if tag.strip()]
+    if tag_names:
+        video_ids = tag_index.videos_with(*tag_names)
+        return jsonify({
+            'tags': tag_names,
+            'video_count': len(video_ids),
+            'videos': video_ids,
+            'co_occurring': tag_index.co_occurring(tag_names[0], limit) if len(tag_names) == 1 else []
+        })
+    
+    by = request.args.get('by', 'count')
+    if by not in TOP_K_ORDERS:
+        return jsonify({'error': f"Unknown order: {by}. Use one of {', '.join(TOP_K_ORDERS)}."}), 400
+    return jsonify({'by': by, 'tags': tag_index.top_tags(limit, by)})
+
+@app.route('/tags/pairs')
+def tag_pairs():
+    """Tags most often used together in the current scrape (or every scrape)"""
+    tag_index, error = get_tags_scope()
+    if error:
+        return error
+    limit = max(1, min(request.args.get('limit', 20, type=int), 1000))
+    return jsonify({'pairs': tag_index.top_pairs(limit)})
+
+@app.route('/search')
+def search():
+    """Full-text search over video titles, descriptions, tags and comments"""
+    query = request.args.get('q', '').strip()
+    scope = request.args.get('scope', 'session')
+    limit = request.args.get('limit', 20, type=int)
+    if not query:
+        return jsonify({'error': 'Missing search query (q).'}), 400
+    
+    session_id = None
+    if scope != 'all':
+        # Search the current scrape
+        session_id = session.get('data_session_id')
+        if not session_id:
+            return jsonify({'error': 'No data available. Please perform a scrape first.'}), 404
+        if not is_indexed(session_id):
+            # Sessions stored before search indexing existed are indexed on first search
+            data = get_session_data(session_id)
+            if not data:
+                return jsonify({'error': 'Session data has expired. Please perform a new scrape.'}), 404
+            index_session(session_id, data)
+    
+    return jsonify(search_index(query, session_id=session_id, limit=limit))
+
+def get_record_store(session_id):
+    """Open a session's record store, building it from the session file for sessions stored without one."""
+    base_path = session_base(SESSION_FILE_DIR, session_id)
+    if not RecordStore.exists(base_path):
+        data = get_session_data(session_id)
+        if not data:
+            return None
+        write_record_store(base_path, data.get('videos_data', []), VideoIndex.from_session(data))
+    return RecordStore(base_path, video_store)
+
+def encode_cursor(version, sort, order, offset):
+    """Opaque cursor for the page starting at offset."""
+    payload = json.dumps([version, sort, order, offset], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """(version, sort, order, offset) of a cursor; raises ValueError for malformed cursors."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        version, sort, order, offset = json.loads(payload)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(offset, int) or offset < 0 or (sort is not None and sort not in SORT_FIELDS):
+        raise ValueError("Invalid cursor")
+    return version, sort, order, offset
+
+@app.route('/api/sessions/<session_id>/videos')
+def api_session_videos(session_id):
+    """One page of a session's videos as compact JSON, with cursor pagination and HTTP caching.
+    
+    Query parameters: fields (comma-separated, or * for every field), sort (one of
+    SORT_FIELDS), order (asc or desc), limit and cursor (the next_cursor of the
+    previous page, which fixes the sort order).
+    """
+    if not SESSION_ID_PATTERN.fullmatch(session_id):
+        return jsonify({'error': 'Invalid session ID.'}), 400
+    
+    fields = request.args.get('fields', '')
+    if fields == '*':
+        fields = None
+    else:
+        fields = [field.strip() for field in fields.split(',') if field.strip()] or list(API_DEFAULT_FIELDS)
+        unknown = [field for field in fields if field not in API_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+    limit = max(1, min(request.args.get('limit', API_DEFAULT_PAGE_SIZE, type=int), API_MAX_PAGE_SIZE))
+    sort = request.args.get('sort') or None
+    if sort is not None and sort not in SORT_FIELDS:
+        return jsonify({'error': f"Unknown sort: {sort}. Use one of {', '.join(SORT_FIELDS)}."}), 400
+    order = 'asc' if request.args.get('order') == 'asc' else 'desc'
+    
+    store = get_record_store(session_id)
+    if store is None:
+        return jsonify({'error': 'Session not found or expired.'}), 404
+    session_janitor.touch(session_id)
+    
+    offset = 0
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            version, cursor_sort, cursor_order, offset = decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if version != store.version:
+            return jsonify({'error': 'Cursor is from an older version of this session. Start from the first page.'}), 400
+        if 'sort' in request.args and (sort != cursor_sort or order != cursor_order):
+            return jsonify({'error': 'Cursor does not match the requested sort order.'}), 400
+        sort, order = cursor_sort, cursor_order
+    if sort is None:
+        order = 'asc'
+    
+    # The ETag covers the stored data and everything that shapes the page, so a
+    # revalidation is answered before any record is read
+    page_key = json.dumps([store.version, sort, order, offset, limit, fields])
+    etag = hashlib.sha1(page_key.encode('utf-8')).hexdigest()
+    last_modified = int(store.modified)
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = request.if_modified_since is not None and \
+            request.if_modified_since.timestamp() >= last_modified
+    if not_modified:
+        response = Response(status=304)
+    else:
+        positions = store.positions(sort, descending=order == 'desc', offset=offset, limit=limit)
+        videos = store.read(positions)
+        if fields is not None:
+            videos = [{field: video.get(field) for field in fields} for video in videos]
+        next_offset = offset + len(positions)
+        body = {
+            'session_id': session_id,
+            'total': store.count,
+            'sort': sort,
+            'order': order,
+            'videos': videos,
+            'next_cursor': encode_cursor(store.version, sort, order, next_offset) if next_offset < store.count else None
+        }
+        response = Response(json.dumps(body, separators=(',', ':')), mimetype='application/json')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/watchlist')
+def watchlist_status():
+    """Watched channels and videos, the poll load by video age and the quota spent today"""
+    status = watchlist.status()
+    status['scheduler'] = watchlist_scheduler is not None
+    return jsonify(status)
+
+@app.route('/watchlist', methods=['POST'])
+def watchlist_add():
+    """Watch a channel (channel_url, with an optional backfill count) and/or videos (video_ids)"""
+    payload = request.get_json(silent=True) or request.form
+    channel_url = (payload.get('channel_url') or '').strip()
+    video_ids_text = payload.get('video_ids') or ''
+    if isinstance(video_ids_text, list):
+        video_ids_text = '\n'.join(video_ids_text)
+    video_ids, invalid = parse_video_ids(video_ids_text)
+    if invalid:
+        return jsonify({'error': f"Not video IDs or video URLs: {', '.join(invalid[:5])}"}), 400
+    if not channel_url and not video_ids:
+        return jsonify({'error': 'Provide a channel_url and/or video_ids to watch.'}), 400
+    
+    result = {'channel_id': None, 'videos_added': 0}
+    if channel_url:
+        if not validate_youtube_url(channel_url):
+            return jsonify({'error': 'Please enter a valid YouTube channel URL.'}), 400
+        try:
+            backfill = max(0, int(payload.get('backfill', WATCHLIST_BACKFILL)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'backfill must be a number of videos.'}), 400
+        # Only /channel/ URLs resolve without an API call
+        api_key = (payload.get('api_key') or '').strip()
+        youtube_api = YouTubeAPI(api_key) if api_key else getattr(watchlist_scheduler, 'youtube_api', None)
+        channel_id = extract_channel_id(youtube_api, channel_url)
+        if not channel_id:
+            return jsonify({'error': 'Could not resolve the channel of the URL (an api_key may be needed).'}), 400
+        watchlist.watch_channel(channel_id, backfill=backfill)
+        result['channel_id'] = channel_id
+    if video_ids:
+        result['videos_added'] = watchlist.watch_videos(video_ids)
+    return jsonify(result)
+
+@app.route('/watchlist/remove', methods=['POST'])
+def watchlist_remove():
+    """Stop watching channels (channel_ids, with the videos found through them) and videos (video_ids)"""
+    payload = request.get_json(silent=True) or request.form
+    channel_ids = payload.get('channel_ids') or []
+    video_ids = payload.get('video_ids') or []
+    if isinstance(channel_ids, str):
+        channel_ids = [channel_id for channel_id in re.split(r'[\s,]+', channel_ids) if channel_id]
+    if isinstance(video_ids, str):
+        video_ids = parse_video_ids(video_ids)[0]
+    return jsonify({'videos_removed': watchlist.unwatch(channel_ids, video_ids)})
+
+@app.route('/watchlist/videos/<video_id>')
+def watchlist_video_history(video_id):
+    """Statistics history of a watched video, newest first"""
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    return jsonify({'video_id': video_id, 'history': watchlist.history(video_id, limit)})
 
 @app.route('/progress')
 def progress():
@@ -287,6 +859,31 @@ def admin_cleanup_sessions():
             "message": f"Error during cleanup: {str(e)}"
         }), 500
 
+@app.route('/admin/watchlist/run')
+def admin_watchlist_run():
+    """Admin route to poll the due watchlist channels and videos now"""
+    if watchlist_scheduler is None:
+        return jsonify({"success": False, "message": "No watchlist API key is configured (YT_WATCHLIST_API_KEY)"}), 503
+    return jsonify({"success": True, "result": watchlist_scheduler.run_once()})
+
+@app.route('/admin/profiles')
+def admin_profiles():
+    """Admin route to list captured request profiles"""
+    profiles = list_profiles()
+    return jsonify({"count": len(profiles), "profiles": profiles})
+
+@app.route('/admin/profiles/<path:filename>')
+def admin_profile_artifact(filename):
+    """Admin route to download a profile artifact (.prof, .collapsed or .json)"""
+    if not filename.endswith(('.prof', '.collapsed', '.json')):
+        abort(404)
+    return send_from_directory(os.path.abspath(PROFILE_DIR), filename, as_attachment=True)
+
+@app.route('/metrics')
+def metrics():
+    """Expose scrape, storage and export metrics in Prometheus text format"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 # Template filters for formatting
 @app.template_filter('format_number')
 def format_number(value):
@@ -320,34 +917,22 @@ def format_date(value):
     return value
 
 @app.template_filter('format_duration')
-def format_duration(iso_duration):
-    """Format ISO 8601 duration to human-readable format."""
-    if not iso_duration or not isinstance(iso_duration, str):
+def format_duration(duration):
+    """Format an ISO 8601 or already formatted (MM:SS / HH:MM:SS) duration to human-readable format."""
+    if not duration or not isinstance(duration, str):
         return ""
     
-    # Remove PT from the beginning
-    duration = iso_duration.replace('PT', '')
-    
-    hours = 0
-    minutes = 0
-    seconds = 0
-    
-    # Extract hours
-    if 'H' in duration:
-        hours_part = duration.split('H')[0]
-        hours = int(hours_part)
-        duration = duration.split('H')[1]
-    
-    # Extract minutes
-    if 'M' in duration:
-        minutes_part = duration.split('M')[0]
-        minutes = int(minutes_part)
-        duration = duration.split('M')[1]
-    
-    # Extract seconds
-    if 'S' in duration:
-        seconds_part = duration.split('S')[0]
-        seconds = int(seconds_part)
+    try:
+        # Session data stores durations already formatted; only raw API values start with P
+        if duration.startswith('P'):
+            total_seconds = parse_duration_seconds(duration)
+        else:
+            total_seconds = parse_formatted_duration(duration)
+    except Exception:
+        return duration
+    
+    hours, remainder = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
     
     # Format based on duration
     if hours > 0:
@@ -0,0 +1,88 @@
+"""
+Latency of the channel analytics report on large channels.
+
+Times ChannelAnalytics over synthetic sessions of several sizes, split into
+collecting the columns from the session video dicts and computing the report
+with NumPy, against the same distributions and per-hour, per-weekday and
+per-tag medians computed with plain Python lists.
+
+Usage (from the repository root):
+    python -m benchmarks.analytics --sizes 1000 10000 50000
+"""
+import logging
+import argparse
+import statistics
+from datetime import datetime
+
+from yt_scraper.analytics import ChannelAnalytics, PERCENTILES, DISTRIBUTION_FIELDS
+from yt_scraper.fake_api import SyntheticChannel
+from yt_scraper.records import records_to_dicts
+from benchmarks.common import measure, write_results
+from benchmarks.records_memory import build_records
+
+
+def python_reference(videos):
+    """The report's distributions and group medians, computed per video in Python."""
+    distributions = {}
+    for name, field in DISTRIBUTION_FIELDS.items():
+        values = sorted(video.get(field) or 0 for video in videos)
+        cuts = statistics.quantiles(values, n=100, method='inclusive')
+        distributions[name] = {f"p{pct}": cuts[pct - 1] for pct in PERCENTILES}
+        distributions[name]['mean'] = sum(values) / len(values)
+    groups = {'hour': {}, 'weekday': {}, 'tag': {}}
+    for video in videos:
+        published = datetime.strptime(video['published_at'][:19], '%Y-%m-%dT%H:%M:%S')
+        views = video.get('view_count') or 0
+        groups['hour'].setdefault(published.hour, []).append(views)
+        groups['weekday'].setdefault(published.weekday(), []).append(views)
+        for tag in dict.fromkeys(tag.lower() for tag in video.get('tags') or ()):
+            groups['tag'].setdefault(tag, []).append(views)
+    medians = {kind: {key: statistics.median(values) for key, values in members.items()}
+               for kind, members in groups.items()}
+    return distributions, medians
+
+
+def bench_size(videos_count, repeat):
+    channel = SyntheticChannel('UCanalytics0000000000000', videos_count, upload_interval_hours=7)
+    videos = records_to_dicts(build_records(channel, videos_count, 0))
+
+    def collect():
+        analytics = ChannelAnalytics()
+        for video in videos:
+            analytics.add(video)
+        return analytics
+
+    collect_stats, _ = measure(collect, repeat)
+    total_stats, analytics = measure(lambda: ChannelAnalytics.from_videos(videos), repeat)
+    reference_stats, _ = measure(lambda: python_reference(videos), repeat)
+    return {
+        'collect': collect_stats,
+        'from_videos': total_stats,
+        'python_reference': reference_stats,
+        'tags': len(analytics.report.get('tags', []))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the channel analytics report.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='Videos per session')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/analytics-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = {'sizes': {}}
+    for size in args.sizes:
+        stats = bench_size(size, args.repeat)
+        results['sizes'][str(size)] = stats
+        compute_ms = stats['from_videos']['p50_ms'] - stats['collect']['p50_ms']
+        print(f"  {size:>7} videos  collect p50 {stats['collect']['p50_ms']:>8.1f} ms  "
+              f"compute ~{compute_ms:>7.1f} ms  total p50 {stats['from_videos']['p50_ms']:>8.1f} ms  "
+              f"python reference p50 {stats['python_reference']['p50_ms']:>8.1f} ms")
+
+    path = write_results('analytics', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
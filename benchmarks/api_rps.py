@@ -0,0 +1,149 @@
+"""
+Throughput of the JSON results API under concurrent load.
+
+Stores one synthetic session, serves the app from a threaded werkzeug server
+on an ephemeral port and drives /api/sessions/<id>/videos with several
+keep-alive clients at once: the first page, deep cursor pages, a wide
+projection and ETag revalidations (304). Also times reading one page from the
+record store against loading the whole session file, in process.
+
+Usage (from the repository root):
+    python -m benchmarks.api_rps --videos 20000 --clients 8 --seconds 5
+"""
+import os
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import http.client
+
+from werkzeug.serving import make_server
+
+import app as webapp
+from yt_scraper.fake_api import SyntheticChannel
+from yt_scraper.records import records_to_dicts
+from yt_scraper.record_store import RecordStore
+from yt_scraper.session_store import session_base
+from yt_scraper.janitor import SessionJanitor
+from benchmarks.common import measure, summarize, write_results
+from benchmarks.records_memory import build_records
+
+SESSION_ID = 'benchapi'
+
+
+def store_session(videos, comments):
+    channel = SyntheticChannel('UCapi0000000000000000000', videos, title='Synthetic channel')
+    data = {'channel_data': {'id': channel.id, 'title': channel.title},
+            'videos_data': records_to_dicts(build_records(channel, videos, comments))}
+    webapp.store_session_data(data, SESSION_ID)
+
+
+def scenarios(base, videos):
+    """name -> (path, headers) of each load scenario."""
+    conn = http.client.HTTPConnection(*base)
+    conn.request('GET', f"/api/sessions/{SESSION_ID}/videos")
+    response = conn.getresponse()
+    response.read()
+    etag = response.getheader('ETag')
+    # A cursor near the end of the views order, as reached by walking every page
+    store = RecordStore(session_base(webapp.SESSION_FILE_DIR, SESSION_ID))
+    deep_cursor = webapp.encode_cursor(store.version, 'views', 'desc', max(0, videos - 100))
+    conn.close()
+    path = f"/api/sessions/{SESSION_ID}/videos"
+    return {
+        'first_page': (path, {}),
+        'deep_cursor_page': (f"{path}?cursor={deep_cursor}", {}),
+        'projection_500': (f"{path}?fields=id,view_count,engagement_rate&sort=engagement&limit=500", {}),
+        'all_fields': (f"{path}?fields=*&sort=date", {}),
+        'not_modified': (path, {'If-None-Match': etag})
+    }
+
+
+def run_load(base, path, headers, clients, seconds):
+    """Hit one path from several keep-alive clients for a while; returns (requests, latencies, errors)."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        conn = http.client.HTTPConnection(*base)
+        samples = []
+        failures = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status not in (200, 304):
+                    failures += 1
+            except (OSError, http.client.HTTPException):
+                failures += 1
+                conn.close()
+                conn = http.client.HTTPConnection(*base)
+                continue
+            samples.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(samples)
+            errors.append(failures)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), latencies, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the JSON results API under concurrent load.')
+    parser.add_argument('--videos', type=int, default=20000)
+    parser.add_argument('--comments', type=int, default=0, help='Comments per video')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent keep-alive clients')
+    parser.add_argument('--seconds', type=float, default=5, help='Load duration per scenario')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/api_rps-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    work_dir = tempfile.mkdtemp(prefix='bench_api_')
+    webapp.SESSION_FILE_DIR = work_dir
+    webapp.session_janitor = SessionJanitor(work_dir, webapp.SESSION_MAX_AGE_HOURS * 3600,
+                                            db_path=os.path.join(work_dir, 'janitor.db'))
+    server = make_server('127.0.0.1', 0, webapp.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    try:
+        server_thread.start()
+        store_session(args.videos, args.comments)
+        base = ('127.0.0.1', server.server_port)
+        results = {'videos': args.videos, 'clients': args.clients, 'scenarios': {}}
+
+        store = RecordStore(session_base(work_dir, SESSION_ID))
+        page_stats, _ = measure(lambda: store.read(store.positions('views', True, args.videos // 2, 50)), repeat=50)
+        load_stats, _ = measure(lambda: webapp.get_session_data(SESSION_ID), repeat=5)
+        results['page_read'] = page_stats
+        results['full_session_load'] = load_stats
+        print(f"Page of 50 from the record store: p50 {page_stats['p50_ms']:.2f} ms; "
+              f"whole session load: p50 {load_stats['p50_ms']:.2f} ms")
+
+        for name, (path, headers) in scenarios(base, args.videos).items():
+            count, latencies, errors = run_load(base, path, headers, args.clients, args.seconds)
+            stats = summarize(latencies)
+            stats['rps'] = round(count / args.seconds, 1)
+            stats['errors'] = errors
+            results['scenarios'][name] = stats
+            print(f"  {name:<18} {stats['rps']:>8.1f} req/s  p50 {stats['p50_ms']:>7.2f} ms  "
+                  f"p99 {stats['p99_ms']:>7.2f} ms  errors {errors}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    path = write_results('api_rps', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Scrape throughput of the async engine against the sync engine.
+
+Serves several synthetic channels from a local FakeYouTubeServer with a fixed
+per-request latency, then scrapes all of them:
+
+- sync: YouTubeAPI, one channel after another,
+- sync_threads: YouTubeAPI, one client and thread per channel,
+- async: AsyncYouTubeAPI, every channel at once from one event loop over one
+  connection pool (scrape_channels).
+
+The ETag cache is off for every engine, so each run makes the same API calls.
+
+Usage (from the repository root):
+    python -m benchmarks.async_engine --channels 8 --videos 1000 --latency 0.02
+"""
+import time
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
+
+from yt_scraper.api import YouTubeAPI
+from yt_scraper.async_api import scrape_channels
+from yt_scraper.pipeline import iter_scrape, run_pipeline, ListSink
+from yt_scraper.fake_api import FakeYouTubeBackend, FakeYouTubeServer, SyntheticChannel
+from benchmarks.common import RssIncrease, write_results
+
+START_DATE = '2000-01-01'
+END_DATE = '2100-12-31'
+
+
+def scrape_sync(api_endpoint, channel_id):
+    api = YouTubeAPI('benchmark-key', http=httplib2.Http(), api_endpoint=api_endpoint)
+    return len(run_pipeline(iter_scrape(api, channel_id, START_DATE, END_DATE), ListSink()))
+
+
+def run_sync(api_endpoint, channel_ids):
+    return sum(scrape_sync(api_endpoint, channel_id) for channel_id in channel_ids)
+
+
+def run_sync_threads(api_endpoint, channel_ids):
+    with ThreadPoolExecutor(max_workers=len(channel_ids)) as pool:
+        return sum(pool.map(lambda channel_id: scrape_sync(api_endpoint, channel_id), channel_ids))
+
+
+def run_async(api_endpoint, channel_ids):
+    jobs = [(channel_id, START_DATE, END_DATE) for channel_id in channel_ids]
+    results = asyncio.run(scrape_channels('benchmark-key', jobs, api_endpoint=api_endpoint, cache=False))
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return sum(len(videos) for videos in results)
+
+
+ENGINES = {
+    'sync': run_sync,
+    'sync_threads': run_sync_threads,
+    'async': run_async
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the async scrape engine against the sync engine.')
+    parser.add_argument('--channels', type=int, default=8)
+    parser.add_argument('--videos', type=int, default=1000, help='Videos per channel')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds the fake API waits per request')
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/async_engine-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    channels = [SyntheticChannel(f"UCasync{number:017d}", args.videos) for number in range(args.channels)]
+    backend = FakeYouTubeBackend(channels, latency=args.latency)
+    channel_ids = [channel.id for channel in channels]
+    results = {'channels': args.channels, 'videos_per_channel': args.videos, 'latency_s': args.latency,
+               'engines': {}}
+
+    with FakeYouTubeServer(backend) as server:
+        for name in args.engines:
+            backend.reset_counters()
+            with RssIncrease() as rss:
+                start = time.perf_counter()
+                videos = ENGINES[name](server.api_endpoint, channel_ids)
+                seconds = time.perf_counter() - start
+            requests = sum(backend.calls.values())
+            results['engines'][name] = {
+                'seconds': round(seconds, 3),
+                'videos': videos,
+                'api_calls': dict(backend.calls),
+                'requests_per_s': round(requests / seconds, 1),
+                'videos_per_s': round(videos / seconds, 1),
+                'rss_increase_mb': rss.mb
+            }
+            print(f"  {name:<13} {seconds:>8.2f} s  {videos:>7} videos  {requests:>6} calls  "
+                  f"{requests / seconds:>8.1f} req/s")
+
+    path = write_results('async_engine', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
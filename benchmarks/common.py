@@ -0,0 +1,163 @@
+"""Shared helpers for the benchmark scripts: timing, percentiles, memory and result files."""
+import os
+import gc
+import sys
+import ctypes
+import ctypes.util
+import json
+import time
+import platform
+import resource
+import subprocess
+import tracemalloc
+from contextlib import nullcontext
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    ms = [s * 1000 for s in samples]
+    return {
+        'runs': len(ms),
+        'mean_ms': round(sum(ms) / len(ms), 3) if ms else 0.0,
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p90_ms': round(percentile(ms, 90), 3),
+        'p99_ms': round(percentile(ms, 99), 3),
+        'max_ms': round(max(ms), 3) if ms else 0.0
+    }
+
+
+def peak_rss_mb():
+    """High-water resident set size of this process in MB."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    if sys.platform == 'darwin':
+        return round(usage / (1024 * 1024), 2)
+    return round(usage / 1024, 2)
+
+
+def _status_kb(field):
+    """A kB field of /proc/self/status (Linux), or None."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _release_free_memory():
+    """Collect garbage and hand freed heap pages back to the OS (glibc), so RSS starts from the live set."""
+    gc.collect()
+    libc_name = ctypes.util.find_library('c')
+    if sys.platform.startswith('linux') and libc_name:
+        try:
+            ctypes.CDLL(libc_name).malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+def _reset_peak_rss():
+    """Reset this process's high-water RSS mark (Linux); False where that is not possible."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return _status_kb('VmHWM') is not None
+
+
+class RssIncrease:
+    """Context manager: how far resident memory rose above its level at the start of the block, in MB (self.mb).
+
+    Freed memory is handed back to the OS first, so memory left over from
+    earlier work does not hide the block's own. On Linux the kernel's
+    high-water mark is then reset, so this is the block's own peak. Elsewhere
+    only the process-wide peak can be read, and this is how much the block
+    raised it: 0 if it stayed below an earlier peak.
+    """
+
+    def __enter__(self):
+        _release_free_memory()
+        self._exact = _reset_peak_rss()
+        self._start = _status_kb('VmRSS') / 1024 if self._exact else peak_rss_mb()
+        self.mb = 0.0
+        return self
+
+    def __exit__(self, *exc_info):
+        end = _status_kb('VmHWM') / 1024 if self._exact else peak_rss_mb()
+        self.mb = round(max(0.0, end - self._start), 2)
+
+
+def measure(func, repeat=5, warmup=1):
+    """Time func() over several runs, then trace the allocations of one more run.
+
+    Timing runs happen without tracemalloc so its overhead does not skew latency.
+    The rise in resident memory is taken over the last timed run, after warmup.
+    Returns (summary dict, result of the last call).
+    """
+    result = None
+    for _ in range(warmup):
+        result = func()
+    samples = []
+    rss = RssIncrease()
+    for run in range(repeat):
+        with rss if run == repeat - 1 else nullcontext():
+            start = time.perf_counter()
+            result = func()
+            samples.append(time.perf_counter() - start)
+    stats = summarize(samples)
+
+    tracemalloc.start()
+    try:
+        func()
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats['alloc_peak_kb'] = round(peak / 1024, 1)
+    stats['alloc_blocks'] = sum(stat.count for stat in snapshot.statistics('filename'))
+    stats['rss_increase_mb'] = rss.mb
+    return stats, result
+
+
+def environment():
+    """Describe the code version and machine a result file was produced on."""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                  text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = 'unknown'
+    return {
+        'git_revision': revision,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def write_results(name, results, output=None):
+    """Write results as JSON to output, or to benchmarks/results/<name>-<revision>.json."""
+    payload = {'benchmark': name, 'environment': environment(), 'results': results}
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{payload['environment']['git_revision']}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    return output
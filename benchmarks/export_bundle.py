@@ -0,0 +1,108 @@
+"""
+Wall-clock time of a multi-format export bundle against exporting the formats one after another.
+
+Builds a synthetic channel scrape, then for every run:
+
+- sequential: export_data() once per format on this thread, as separate
+  /export requests would, and the sum of their times,
+- bundle: stream_bundle() with its process pool, consuming the whole zip.
+
+Reports the p50 time of each format, their sum, the bundle time and its
+ratio to the slowest format, and the bytes of the files and of the zip. The
+bundle can only approach the slowest format with as many free cores as
+formats; the CPU count is recorded with the results.
+
+Usage (from the repository root):
+    python -m benchmarks.export_bundle --videos 3000 --comments 20 --runs 3
+"""
+import os
+import time
+import logging
+import argparse
+import statistics
+
+from yt_scraper.exporter import export_data, EXPORT_FORMATS
+from yt_scraper.export_bundle import stream_bundle
+from yt_scraper.analytics import ChannelAnalytics
+from yt_scraper.fake_api import SyntheticChannel
+from yt_scraper.records import records_to_dicts
+from benchmarks.common import write_results
+from benchmarks.records_memory import build_records
+
+
+def run_sequential(channel_data, videos, analytics, formats):
+    seconds, sizes = {}, {}
+    for export_format in formats:
+        start = time.perf_counter()
+        path = export_data(channel_data, videos, export_format, 'benchmark', analytics)
+        seconds[export_format] = time.perf_counter() - start
+        sizes[export_format] = os.path.getsize(path)
+        os.remove(path)
+    return seconds, sizes
+
+
+def run_bundle(channel_data, videos, analytics, formats, workers):
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    for chunk in stream_bundle(channel_data, videos, analytics, formats, 'benchmark', 'benchmark', workers=workers):
+        if first_byte is None and chunk:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    return time.perf_counter() - start, first_byte, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel export bundles against sequential exports.')
+    parser.add_argument('--videos', type=int, default=3000)
+    parser.add_argument('--comments', type=int, default=20, help='Comments per video')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--formats', nargs='+', default=list(EXPORT_FORMATS), choices=EXPORT_FORMATS)
+    parser.add_argument('--workers', type=int, default=4, help='Bundle process pool size')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/export_bundle-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    channel = SyntheticChannel('UCexportbundle00000000000', args.videos, title='Synthetic channel')
+    videos = records_to_dicts(build_records(channel, args.videos, args.comments))
+    channel_data = {'id': channel.id, 'title': channel.title}
+    analytics = ChannelAnalytics.from_videos(videos).to_dict()
+
+    format_seconds = {export_format: [] for export_format in args.formats}
+    sequential_seconds, bundle_seconds, first_byte_seconds = [], [], []
+    for _ in range(args.runs):
+        seconds, sizes = run_sequential(channel_data, videos, analytics, args.formats)
+        for export_format, value in seconds.items():
+            format_seconds[export_format].append(value)
+        sequential_seconds.append(sum(seconds.values()))
+        elapsed, first_byte, zip_bytes = run_bundle(channel_data, videos, analytics, args.formats, args.workers)
+        bundle_seconds.append(elapsed)
+        first_byte_seconds.append(first_byte)
+
+    formats = {export_format: {'p50_s': round(statistics.median(values), 3), 'bytes': sizes[export_format]}
+               for export_format, values in format_seconds.items()}
+    slowest = max(stats['p50_s'] for stats in formats.values())
+    bundle = round(statistics.median(bundle_seconds), 3)
+    results = {
+        'videos': args.videos, 'comments': args.comments, 'runs': args.runs, 'workers': args.workers,
+        'formats': formats,
+        'sequential_p50_s': round(statistics.median(sequential_seconds), 3),
+        'bundle_p50_s': bundle,
+        'bundle_first_byte_p50_s': round(statistics.median(first_byte_seconds), 3),
+        'bundle_to_slowest': round(bundle / slowest, 2) if slowest else None,
+        'files_bytes': sum(sizes.values()),
+        'zip_bytes': zip_bytes
+    }
+    for export_format, stats in formats.items():
+        print(f"  {export_format:<8} p50 {stats['p50_s']:>7.3f} s  {stats['bytes'] / 2 ** 20:>7.1f} MiB")
+    print(f"  sequential {results['sequential_p50_s']:.3f} s, bundle {bundle:.3f} s "
+          f"({results['bundle_to_slowest']}x the slowest format, first byte after "
+          f"{results['bundle_first_byte_p50_s']:.3f} s), zip {zip_bytes / 2 ** 20:.1f} MiB of "
+          f"{results['files_bytes'] / 2 ** 20:.1f} MiB, {os.cpu_count()} CPUs")
+
+    path = write_results('export_bundle', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
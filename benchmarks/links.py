@@ -0,0 +1,86 @@
+"""
+Throughput of the description link stage on large channels with long descriptions.
+
+Compares the batch link stage (extraction, domain normalization and the
+channel link index) with the per-video inline regex it replaced.
+
+Usage (from the repository root):
+    python -m benchmarks.links --videos 50000 --description-bytes 4000
+"""
+import re
+import random
+import logging
+import argparse
+
+from yt_scraper.records import VideoRecord
+from yt_scraper.links import iter_video_links, LinkIndex
+from benchmarks.common import measure, write_results
+
+# The pattern the video details loop used to run for every video
+LEGACY_URL_PATTERN = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+
+WORDS = ('episode', 'today', 'we', 'talk', 'about', 'the', 'new', 'release', 'and', 'thanks', 'to', 'our',
+         'sponsor', 'subscribe', 'for', 'more', 'videos', 'like', 'comment', 'share')
+DOMAINS = ('example.com', 'www.patreon.com', 'twitter.com', 'www.instagram.com', 'amzn.to', 'bit.ly',
+           'github.com', 'discord.gg', 'shop.example.org', 'www.youtube.com')
+
+
+def build_videos(count, description_bytes, seed=0):
+    """Synthetic videos whose descriptions mix prose with a handful of links."""
+    rng = random.Random(seed)
+    videos = []
+    for index in range(count):
+        parts = []
+        size = 0
+        while size < description_bytes:
+            if rng.random() < 0.03:
+                part = f"https://{rng.choice(DOMAINS)}/{rng.choice(WORDS)}/{rng.randrange(10000)}"
+            else:
+                part = rng.choice(WORDS)
+            parts.append(part)
+            size += len(part) + 1
+        # Roughly a third of real descriptions have no links at all
+        description = ' '.join(parts) if index % 3 else ' '.join(p for p in parts if '://' not in p)
+        videos.append(VideoRecord(f"vid{index:08d}", f"Video {index}", description, '2024-01-01T00:00:00Z'))
+    return videos
+
+
+def legacy_stage(videos):
+    for video in videos:
+        video.description_urls = re.findall(LEGACY_URL_PATTERN, video.description)
+    return sum(len(video.description_urls) for video in videos)
+
+
+def link_stage(videos):
+    batches = (videos[i:i + 50] for i in range(0, len(videos), 50))
+    index = LinkIndex()
+    for batch in iter_video_links(batches):
+        for video in batch:
+            index.add(video.id, video.description_domains)
+    return sum(len(video.description_urls) for video in videos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark description link extraction.')
+    parser.add_argument('--videos', type=int, default=50000)
+    parser.add_argument('--description-bytes', type=int, default=4000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/links-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    videos = build_videos(args.videos, args.description_bytes)
+    results = {'videos': args.videos, 'description_bytes': args.description_bytes}
+    for name, stage in (('legacy_inline_regex', legacy_stage), ('link_stage', link_stage)):
+        stats, url_count = measure(lambda: stage(videos), repeat=args.repeat)
+        stats['urls'] = url_count
+        stats['videos_per_second'] = round(args.videos / (stats['p50_ms'] / 1000))
+        results[name] = stats
+        print(f"{name:<20} p50 {stats['p50_ms']:>10.1f} ms  {stats['videos_per_second']:>9} videos/s  "
+              f"{url_count} urls")
+    path = write_results('links', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Cost of targeted video lookups against scraping the channels they belong to.
+
+Picks a sample of video IDs spread across several large synthetic channels
+served by a local FakeYouTubeServer with a fixed per-request latency, then
+gets their statistics three ways:
+
+- channel_scrapes: scrape every channel the sample touches over the date
+  range spanning the sample (the only option before bulk lookups),
+- lookup_sync: YouTubeAPI, the IDs straight into the videos.list detail stage,
+- lookup_async: lookup_videos, the same with several detail calls in flight.
+
+For each it reports wall time, API calls and quota units. The ETag cache is
+off so every run makes the same calls.
+
+Usage (from the repository root):
+    python -m benchmarks.lookup --channels 5 --videos 20000 --sample 5000 --latency 0.02
+"""
+import time
+import random
+import asyncio
+import logging
+import argparse
+
+import httplib2
+
+from yt_scraper.api import YouTubeAPI
+from yt_scraper.async_api import lookup_videos
+from yt_scraper.pipeline import iter_scrape, iter_lookup, run_pipeline, ListSink
+from yt_scraper.fake_api import FakeYouTubeBackend, FakeYouTubeServer, SyntheticChannel
+from benchmarks.common import write_results
+
+
+def run_channel_scrapes(api_endpoint, channels, video_ids):
+    published = sorted(channel.published_at(channel.index_of(video_id)) for channel in channels
+                       for video_id in video_ids if channel.index_of(video_id) is not None)
+    start_date, end_date = published[0].strftime('%Y-%m-%d'), published[-1].strftime('%Y-%m-%d')
+    wanted = set(video_ids)
+    found = 0
+    for channel in channels:
+        api = YouTubeAPI('benchmark-key', http=httplib2.Http(), api_endpoint=api_endpoint)
+        videos = run_pipeline(iter_scrape(api, channel.id, start_date, end_date, max_videos=0), ListSink())
+        found += sum(video.id in wanted for video in videos)
+    return found
+
+
+def run_lookup_sync(api_endpoint, channels, video_ids):
+    api = YouTubeAPI('benchmark-key', http=httplib2.Http(), api_endpoint=api_endpoint)
+    return len(run_pipeline(iter_lookup(api, video_ids), ListSink()))
+
+
+def run_lookup_async(api_endpoint, channels, video_ids):
+    return len(asyncio.run(lookup_videos('benchmark-key', video_ids, api_endpoint=api_endpoint, cache=False)))
+
+
+MODES = {
+    'channel_scrapes': run_channel_scrapes,
+    'lookup_sync': run_lookup_sync,
+    'lookup_async': run_lookup_async
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk video lookups against channel scrapes.')
+    parser.add_argument('--channels', type=int, default=5, help='Synthetic channels the sample is drawn from')
+    parser.add_argument('--videos', type=int, default=20000, help='Videos per channel')
+    parser.add_argument('--sample', type=int, default=5000, help='Video IDs looked up')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds per fake API request')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/lookup-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    channels = [SyntheticChannel(f"UClookup{number:016d}", args.videos, upload_interval_hours=6)
+                for number in range(args.channels)]
+    rng = random.Random(0)
+    video_ids = [channel.video_id(index) for channel in channels
+                 for index in rng.sample(range(args.videos), args.sample // args.channels)]
+    rng.shuffle(video_ids)
+    backend = FakeYouTubeBackend(channels, latency=args.latency)
+
+    results = {'channels': args.channels, 'videos_per_channel': args.videos, 'sample': len(video_ids),
+               'latency': args.latency, 'modes': {}}
+    with FakeYouTubeServer(backend) as server:
+        for mode in args.modes:
+            backend.reset_counters()
+            start = time.perf_counter()
+            found = MODES[mode](server.api_endpoint, channels, video_ids)
+            seconds = time.perf_counter() - start
+            results['modes'][mode] = {'seconds': round(seconds, 3), 'found': found, 'calls': dict(backend.calls),
+                                      'quota_units': backend.quota_used}
+            print(f"  {mode:<16} {seconds:>8.2f} s  {sum(backend.calls.values()):>6} calls  "
+                  f"{backend.quota_used:>7} units  {found} of {len(video_ids)} videos")
+
+    path = write_results('lookup', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
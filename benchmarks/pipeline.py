@@ -0,0 +1,150 @@
+"""
+End-to-end benchmark of the scrape -> store -> render -> export pipeline.
+
+Every stage runs against synthetic channels served by the offline fake API,
+so no key or network is needed. For each channel size the report contains
+latency percentiles, API calls and quota units, the rise in resident memory
+over a run (rss_increase_mb) and traced allocations per stage.
+
+Usage (from the repository root):
+    python -m benchmarks.pipeline --sizes 100 3000 50000 --repeat 5
+"""
+import os
+import shutil
+import logging
+import argparse
+import tempfile
+from functools import partial
+from datetime import timedelta
+
+import app as webapp
+from yt_scraper.api import YouTubeAPI
+from yt_scraper.utils import extract_channel_id
+from yt_scraper.exporter import export_data
+from yt_scraper.pipeline import iter_scrape
+from yt_scraper.session_store import session_path
+from yt_scraper.janitor import SessionJanitor
+from yt_scraper.search import SearchIndexSink, remove_sessions
+from yt_scraper.video_store import VideoStore
+from yt_scraper.fake_api import FakeYouTubeBackend, ReplayHttp, SyntheticChannel
+from benchmarks.common import measure, write_results
+
+DEFAULT_SIZES = [100, 3000, 50000]
+EXPORT_FORMATS = ['csv', 'json', 'excel']
+
+
+def run_stage(backend, func, repeat):
+    """Measure one stage and attach the API calls and quota of a single run."""
+    backend.reset_counters()
+    stats, result = measure(func, repeat=repeat)
+    runs = repeat + 2  # warmup + timed runs + traced run
+    stats['api_calls'] = {endpoint: count // runs for endpoint, count in backend.calls.items()}
+    stats['quota_units'] = backend.quota_used // runs
+    return stats, result
+
+
+def bench_channel(size, repeat, session_dir):
+    """Run every pipeline stage against one synthetic channel of the given size."""
+    channel = SyntheticChannel(f"UCbench{size:017d}", size, handle=f"bench{size}")
+    backend = FakeYouTubeBackend([channel])
+    api = YouTubeAPI('benchmark-key', http=ReplayHttp(backend))
+    # Cover the whole channel so every video falls in the date range
+    start_date = (channel.created_at - timedelta(days=1)).date().isoformat()
+    end_date = channel.latest.date().isoformat()
+    stages = {}
+
+    stages['extract_channel_id'], channel_id = run_stage(
+        backend, lambda: extract_channel_id(api, f"https://www.youtube.com/@bench{size}"), repeat)
+    stages['get_channel_data'], channel_data = run_stage(
+        backend, lambda: api.get_channel_data(channel_id), repeat)
+    stages['get_videos_in_date_range'], videos_data = run_stage(
+        backend, lambda: api.get_videos_in_date_range(channel_id, start_date, end_date), repeat)
+
+    # The streaming path scrapes straight into the session file without building the list
+    stages['stream_session_data'], _ = run_stage(
+        backend, lambda: webapp.stream_session_data(
+            channel_data, iter_scrape(api, channel_id, start_date, end_date), f"stream{size}"), repeat)
+
+    data = {'channel_data': channel_data, 'videos_data': videos_data}
+    session_id = 'bench' + str(size)
+    stages['store_session_data'], _ = run_stage(
+        backend, lambda: webapp.store_session_data(data, session_id), repeat)
+    stages['store_session_data']['file_bytes'] = os.path.getsize(session_path(session_dir, session_id))
+    stages['get_session_data'], _ = run_stage(backend, lambda: webapp.get_session_data(session_id), repeat)
+
+    client = webapp.app.test_client()
+    with client.session_transaction() as sess:
+        sess['data_session_id'] = session_id
+        sess['start_date'] = start_date
+        sess['end_date'] = end_date
+
+    def render_results(query='page=1'):
+        response = client.get(f"/results?{query}")
+        assert response.status_code == 200, response.status_code
+        return len(response.data)
+    stages['render_results'], page_bytes = run_stage(backend, render_results, repeat)
+    stages['render_results']['response_bytes'] = page_bytes
+    # Sorted and filtered pages are served from the session's precomputed index
+    stages['render_results_sorted'], _ = run_stage(
+        backend, lambda: render_results('page=3&sort=engagement&order=desc'), repeat)
+    stages['render_results_filtered'], _ = run_stage(
+        backend, lambda: render_results('page=2&sort=views&tag=tutorial&min_duration=2&max_duration=20'), repeat)
+
+    for export_format in EXPORT_FORMATS:
+        def export():
+            path = export_data(channel_data, videos_data, export_format, 'benchmark')
+            size_bytes = os.path.getsize(path)
+            os.unlink(path)
+            return size_bytes
+        # Excel is slow on large channels; fewer runs still give a usable spread
+        runs = repeat if export_format != 'excel' or len(videos_data) <= 3000 else max(1, repeat // 2)
+        stats, file_bytes = run_stage(backend, export, runs)
+        stats['file_bytes'] = file_bytes
+        stages[f"export_{export_format}"] = stats
+
+    return {'channel_videos': size, 'videos_scraped': len(videos_data), 'stages': stages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrape/store/render/export pipeline.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Synthetic channel sizes (number of videos)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per stage')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/pipeline-<rev>.json)')
+    args = parser.parse_args()
+
+    # The modules log at DEBUG; keep the benchmark output readable
+    logging.disable(logging.WARNING)
+
+    session_dir = tempfile.mkdtemp(prefix='bench_sessions_')
+    originals = {name: getattr(webapp, name) for name in
+                 ('SESSION_FILE_DIR', 'session_janitor', 'video_store', 'SearchIndexSink', 'remove_sessions')}
+    # Sessions, their shared videos and the search index all live in the temporary directory
+    search_db = os.path.join(session_dir, 'search.db')
+    webapp.SESSION_FILE_DIR = session_dir
+    webapp.video_store = VideoStore(os.path.join(session_dir, 'videos.db'))
+    webapp.SearchIndexSink = partial(SearchIndexSink, db_path=search_db)
+    webapp.remove_sessions = partial(remove_sessions, db_path=search_db)
+    webapp.session_janitor = SessionJanitor(session_dir, webapp.SESSION_MAX_AGE_HOURS * 3600,
+                                            db_path=os.path.join(session_dir, 'janitor.db'),
+                                            on_remove=webapp.remove_session_data)
+    try:
+        results = []
+        for size in args.sizes:
+            print(f"Benchmarking channel with {size} videos...")
+            result = bench_channel(size, args.repeat, session_dir)
+            for stage, stats in result['stages'].items():
+                print(f"  {stage:<26} p50 {stats['p50_ms']:>10.2f} ms  p99 {stats['p99_ms']:>10.2f} ms  "
+                      f"calls {sum(stats['api_calls'].values()):>5}  rss +{stats['rss_increase_mb']:>7.1f} MB")
+            results.append(result)
+    finally:
+        for name, value in originals.items():
+            setattr(webapp, name, value)
+        shutil.rmtree(session_dir, ignore_errors=True)
+
+    path = write_results('pipeline', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Accuracy and payoff of the listing planner.
+
+Lists the videos of date windows on synthetic channels from the offline fake
+API with each strategy forced (uploads playlist walk, date-bounded search) and
+with the planner choosing, before and after a playlist walk has recorded
+position hints for the channel. For every run it reports the planner's
+estimate against the quota units and calls actually spent on listing and
+video details, and whether the planner picked the cheaper strategy.
+
+Scenarios:
+
+- huge: a large, old channel with narrow windows near the newest upload, in
+  the middle and near the oldest,
+- small: a small channel with a window covering all of it,
+- dormant: a channel that was created long before it started uploading, so
+  the steady-upload-rate estimate misplaces windows until hints correct it.
+
+Usage (from the repository root):
+    python -m benchmarks.planner --videos 100000
+"""
+import os
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from datetime import timedelta
+
+from yt_scraper.api import YouTubeAPI
+from yt_scraper.planner import PlaylistHints
+from yt_scraper.fake_api import FakeYouTubeBackend, ReplayHttp, SyntheticChannel
+from benchmarks.common import write_results
+
+
+def day(channel, days_ago):
+    return (channel.latest - timedelta(days=days_ago)).strftime('%Y-%m-%d')
+
+
+def build_scenarios(videos):
+    huge = SyntheticChannel('UCplanhuge00000000000000', videos, upload_interval_hours=2)
+    span = videos * 2 / 24
+    small = SyntheticChannel('UCplansmall0000000000000', max(1, videos // 200))
+    dormant = SyntheticChannel('UCplandormant00000000000', videos // 5, upload_interval_hours=6)
+    # Ten idle years before the first upload
+    dormant.created_at -= timedelta(days=3650)
+    dormant_span = dormant.video_count * 6 / 24
+    return [
+        ('huge_recent', huge, day(huge, 3), day(huge, 0)),
+        ('huge_middle', huge, day(huge, span / 2 + 1), day(huge, span / 2)),
+        ('huge_oldest', huge, day(huge, span - 2), day(huge, span - 3)),
+        ('small_all', small, day(small, small.video_count + 31), day(small, 0)),
+        ('dormant_old', dormant, day(dormant, dormant_span * 0.4 + 1), day(dormant, dormant_span * 0.4))
+    ]
+
+
+def list_videos(backend, hints, channel, start_date, end_date, strategy):
+    """List and fetch details for one window; returns the plan and what the run cost."""
+    api = YouTubeAPI('benchmark-key', http=ReplayHttp(backend), hints=hints)
+    backend.reset_counters()
+    start = time.perf_counter()
+    videos = sum(len(batch) for batch in api.iter_video_details(
+        api.iter_videos_in_date_range(channel.id, start_date, end_date, max_videos=0, strategy=strategy)))
+    seconds = time.perf_counter() - start
+    calls = {endpoint: count for endpoint, count in backend.calls.items() if endpoint != 'channels'}
+    # The channels.list lookup is the same for every strategy and is left out of the plan
+    units = backend.quota_used - backend.calls.get('channels', 0)
+    chosen = api.plan.estimates[api.plan.strategy]
+    return {
+        'strategy': api.plan.strategy,
+        'hints_used': api.plan.hints_used,
+        'estimated_window_videos': api.plan.window_videos,
+        'videos': videos,
+        'estimated_units': chosen['units'],
+        'units': units,
+        'estimated_calls': chosen['calls'],
+        'calls': calls,
+        'estimated_seconds': chosen['seconds'],
+        'seconds': round(seconds, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the listing planner against forced strategies.')
+    parser.add_argument('--videos', type=int, default=100000, help='Videos of the huge channel')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/planner-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    scenarios = build_scenarios(args.videos)
+    backend = FakeYouTubeBackend({channel.id: channel for _, channel, _, _ in scenarios}.values())
+    work_dir = tempfile.mkdtemp(prefix='bench_planner_')
+    results = {'videos': args.videos, 'scenarios': {}}
+    try:
+        for name, channel, start_date, end_date in scenarios:
+            hints = PlaylistHints(os.path.join(work_dir, f"{name}.db"))
+            runs = {'auto_cold': list_videos(backend, hints, channel, start_date, end_date, 'auto')}
+            # The forced walk records hints, which the second planned run can use
+            for strategy in ('playlist', 'search'):
+                runs[strategy] = list_videos(backend, hints, channel, start_date, end_date, strategy)
+            runs['auto_hints'] = list_videos(backend, hints, channel, start_date, end_date, 'auto')
+            cheapest = min(runs['playlist']['units'], runs['search']['units'])
+            for run in (runs['auto_cold'], runs['auto_hints']):
+                run['regret_units'] = run['units'] - cheapest
+            results['scenarios'][name] = {'channel_videos': channel.video_count, 'start_date': start_date,
+                                          'end_date': end_date, 'runs': runs}
+
+            print(f"{name}: {channel.video_count} videos, window {start_date} - {end_date}, "
+                  f"{runs['playlist']['videos']} in range")
+            for run_name, run in runs.items():
+                regret = f"  regret {run['regret_units']:>5}" if 'regret_units' in run else ''
+                print(f"  {run_name:<10} -> {run['strategy']:<8} est {run['estimated_units']:>6} units, "
+                      f"spent {run['units']:>6} units in {sum(run['calls'].values()):>5} calls{regret}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    path = write_results('planner', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Per-record memory of VideoRecord/CommentRecord against the plain dicts the
+scraper used to keep in RAM.
+
+Usage (from the repository root):
+    python -m benchmarks.records_memory --videos 3000 --comments 20
+"""
+import gc
+import json
+import argparse
+import tracemalloc
+
+from yt_scraper.records import VideoRecord, CommentRecord
+from yt_scraper.fake_api import SyntheticChannel
+from benchmarks.common import write_results
+
+
+def build_records(channel, count, comments):
+    """Build records the way the scrape pipeline does, from API resources."""
+    records = []
+    for index in range(count):
+        record = VideoRecord.from_playlist_item(channel.playlist_item(index))
+        record.apply_video_resource(channel.video_resource(index))
+        record.description_urls = ()
+        record.comments = [CommentRecord.from_api(channel.comment_thread(index, position))
+                           for position in range(comments)]
+        records.append(record)
+    return records
+
+
+def measured(factory):
+    """Return (object, bytes allocated while building it and still alive)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = factory()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare record classes with plain dicts in memory.')
+    parser.add_argument('--videos', type=int, default=3000)
+    parser.add_argument('--comments', type=int, default=20, help='Comments per video')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/records_memory-<rev>.json)')
+    args = parser.parse_args()
+
+    channel = SyntheticChannel('UCrecords000000000000000', args.videos)
+    records, records_bytes = measured(lambda: build_records(channel, args.videos, args.comments))
+    payload = json.dumps([record.to_dict() for record in records])
+    del records
+    # Dicts as they come back from a session file, the form the app used to hold them in
+    dicts, dicts_bytes = measured(lambda: json.loads(payload))
+
+    result = {
+        'videos': args.videos,
+        'comments_per_video': args.comments,
+        'dict_bytes_per_video': round(dicts_bytes / args.videos),
+        'record_bytes_per_video': round(records_bytes / args.videos),
+        'reduction': round(1 - records_bytes / dicts_bytes, 3)
+    }
+    print(f"dicts:   {result['dict_bytes_per_video']:>8} bytes per video (with {args.comments} comments)")
+    print(f"records: {result['record_bytes_per_video']:>8} bytes per video")
+    print(f"reduction: {result['reduction'] * 100:.1f}%")
+    path = write_results('records_memory', result, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Time from submitting the scrape form to the results redirect, with and without a /resolve beforehand.
+
+Drives the Flask app against the fake API with a fixed latency per call. For
+each URL form (an @handle, resolved with a 100-unit search; a video URL; a
+/channel/ URL) and each trial, a fresh synthetic channel is scraped over its
+last few days of uploads, either:
+
+- cold: POST /scrape only, which resolves the channel itself, or
+- speculative: POST /resolve first, as the index page does while the dates
+  and API key are filled in, then POST /scrape.
+
+Reports the p50 /scrape latency both ways, the p50 /resolve latency, and the
+quota units spent per scrape both ways (resolving early must not spend
+more). The fake transport opens no connections, so the TCP/TLS handshakes a
+warm client saves against the real API are not part of these numbers.
+
+Usage (from the repository root):
+    python -m benchmarks.resolve --trials 10 --latency 0.08 --days 3
+"""
+import time
+import logging
+import argparse
+import statistics
+from datetime import timedelta
+
+import app as web
+from yt_scraper.api import YouTubeAPI, open_channel_cache
+from yt_scraper.fake_api import FakeYouTubeBackend, ReplayHttp, SyntheticChannel
+from benchmarks.common import write_results
+
+URL_FORMS = {
+    'handle': lambda channel: f"https://www.youtube.com/@{channel.handle}",
+    'video': lambda channel: f"https://www.youtube.com/watch?v={channel.video_id(0)}",
+    'channel': lambda channel: f"https://www.youtube.com/channel/{channel.id}"
+}
+
+
+def run(form, speculative, trials, latency, days, serial):
+    channels = [SyntheticChannel(f"UCresolve{form[:3]}{int(speculative)}{serial + number:012d}", 2000,
+                                 handle=f"resolve{form}{int(speculative)}{serial + number}", upload_interval_hours=8)
+                for number in range(trials)]
+    backend = FakeYouTubeBackend(channels, latency=latency)
+    web.YouTubeAPI = lambda api_key: YouTubeAPI(api_key, http=ReplayHttp(backend), channel_cache=open_channel_cache())
+    client = web.app.test_client()
+    scrape_seconds, resolve_seconds, units = [], [], []
+    for channel in channels:
+        form_data = {'channel_url': URL_FORMS[form](channel), 'api_key': 'benchmark-key',
+                     'start_date': (channel.latest - timedelta(days=days)).date().isoformat(),
+                     'end_date': channel.latest.date().isoformat()}
+        quota_before = backend.quota_used
+        if speculative:
+            start = time.perf_counter()
+            response = client.post('/resolve', data=form_data)
+            resolve_seconds.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.get_json()
+        start = time.perf_counter()
+        response = client.post('/scrape', data=form_data)
+        scrape_seconds.append(time.perf_counter() - start)
+        assert response.status_code == 302 and '/results' in response.location, response.location
+        units.append(backend.quota_used - quota_before)
+    return {
+        'scrape_p50_ms': round(statistics.median(scrape_seconds) * 1000, 1),
+        'resolve_p50_ms': round(statistics.median(resolve_seconds) * 1000, 1) if resolve_seconds else None,
+        'units_per_scrape': round(statistics.mean(units), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /scrape latency with and without a speculative /resolve.')
+    parser.add_argument('--trials', type=int, default=10, help='Channels scraped per URL form and mode')
+    parser.add_argument('--latency', type=float, default=0.08, help='Seconds per fake API call')
+    parser.add_argument('--days', type=int, default=3, help='Days of uploads scraped')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/resolve-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    # Channel IDs and handles are unique per run, so the shared caches start cold for every trial
+    serial = int(time.time()) % 10 ** 8 * 100
+    results = {'trials': args.trials, 'latency': args.latency, 'days': args.days, 'forms': {}}
+    for form in URL_FORMS:
+        cold = run(form, False, args.trials, args.latency, args.days, serial)
+        speculative = run(form, True, args.trials, args.latency, args.days, serial)
+        results['forms'][form] = {'cold': cold, 'speculative': speculative}
+        print(f"  {form:<8} /scrape p50 cold {cold['scrape_p50_ms']:>7.1f} ms, after /resolve "
+              f"{speculative['scrape_p50_ms']:>7.1f} ms (/resolve {speculative['resolve_p50_ms']:.1f} ms); "
+              f"units per scrape {cold['units_per_scrape']} cold, {speculative['units_per_scrape']} with /resolve")
+
+    path = write_results('resolve', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Indexing throughput and query latency of the full-text search index.
+
+Indexes several synthetic channels into a fresh search database, with
+comments attached to every video, then times ranked searches scoped to one
+session and across all of them.
+
+Usage (from the repository root):
+    python -m benchmarks.search --channels 10 --videos 2000 --comments 20
+"""
+import os
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+from yt_scraper.search import SearchIndexSink, search
+from yt_scraper.fake_api import SyntheticChannel
+from benchmarks.common import measure, write_results
+from benchmarks.records_memory import build_records
+
+QUERIES = ['episode', 'comment 7', 'tutorial', 'synthetic channel episode 42', 'epi']
+
+
+def index_channel(db_path, session_id, channel, videos, comments):
+    sink = SearchIndexSink(session_id, {'id': channel.id, 'title': channel.title}, db_path)
+    records = build_records(channel, videos, comments)
+    for start in range(0, len(records), 50):
+        sink.write(records[start:start + 50])
+    sink.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark full-text search indexing and queries.')
+    parser.add_argument('--channels', type=int, default=10)
+    parser.add_argument('--videos', type=int, default=2000, help='Videos per channel')
+    parser.add_argument('--comments', type=int, default=20, help='Comments per video')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed runs per query')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/search-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    work_dir = tempfile.mkdtemp(prefix='bench_search_')
+    db_path = os.path.join(work_dir, 'search.db')
+    try:
+        start = time.perf_counter()
+        for number in range(args.channels):
+            channel = SyntheticChannel(f"UCsearch{number:016d}", args.videos, title=f"Synthetic channel {number}")
+            index_channel(db_path, f"session{number}", channel, args.videos, args.comments)
+        index_seconds = time.perf_counter() - start
+        total_comments = args.channels * args.videos * args.comments
+        results = {
+            'channels': args.channels,
+            'videos': args.channels * args.videos,
+            'comments': total_comments,
+            'index_seconds': round(index_seconds, 2),
+            'db_bytes': os.path.getsize(db_path),
+            'queries': {}
+        }
+        print(f"Indexed {results['videos']} videos and {total_comments} comments in {index_seconds:.1f}s")
+
+        for query in QUERIES:
+            for scope, session_id in (('session', 'session0'), ('all', None)):
+                stats, hits = measure(lambda: search(query, session_id=session_id, db_path=db_path),
+                                      repeat=args.repeat)
+                stats['video_hits'] = len(hits['videos'])
+                stats['comment_hits'] = len(hits['comments'])
+                results['queries'][f"{query} [{scope}]"] = stats
+                print(f"  {query + ' [' + scope + ']':<42} p50 {stats['p50_ms']:>8.2f} ms  "
+                      f"p99 {stats['p99_ms']:>8.2f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    path = write_results('search', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Disk footprint and load latency of session files.
+
+Stores the same synthetic session in the original flat layout (uncompressed
+json.dump) and with each session store codec, then times writing and loading
+every variant and reports the file sizes. With orjson installed, the codecs
+are also measured with the standard json module for comparison.
+
+Usage (from the repository root):
+    python -m benchmarks.session_storage --videos 3000 --comments 20
+"""
+import os
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+
+from yt_scraper import session_store
+from yt_scraper.fake_api import SyntheticChannel
+from yt_scraper.records import records_to_dicts
+from yt_scraper.video_index import VideoIndex
+from benchmarks.common import measure, write_results
+from benchmarks.records_memory import build_records
+
+
+def build_session(videos, comments):
+    channel = SyntheticChannel('UCstorage000000000000000', videos, title='Synthetic channel')
+    videos_data = records_to_dicts(build_records(channel, videos, comments))
+    return {'channel_data': {'id': channel.id, 'title': channel.title}, 'videos_data': videos_data,
+            'video_index': VideoIndex.from_videos(videos_data).to_dict()}
+
+
+def bench_legacy(work_dir, data, repeat):
+    """The original layout: json.dump into <root>/<session_id>.json, read back with json.load."""
+    path = os.path.join(work_dir, 'legacy.json')
+
+    def write():
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    def load():
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    write_stats, _ = measure(write, repeat)
+    load_stats, _ = measure(load, repeat)
+    return {'file_bytes': os.path.getsize(path), 'write': write_stats, 'load': load_stats}
+
+
+def bench_codec(work_dir, data, codec, repeat):
+    session_id = f"bench-{codec}"
+
+    def write():
+        return session_store.write_session(work_dir, session_id, data, codec=codec)
+
+    write_stats, path = measure(write, repeat)
+    load_stats, _ = measure(lambda: session_store.read_session(work_dir, session_id), repeat)
+    return {'file_bytes': os.path.getsize(path), 'write': write_stats, 'load': load_stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark session file size and load latency.')
+    parser.add_argument('--videos', type=int, default=3000)
+    parser.add_argument('--comments', type=int, default=20, help='Comments per video')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per variant')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/session_storage-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    data = build_session(args.videos, args.comments)
+    codecs = [codec for codec in session_store.CODEC_EXTENSIONS
+              if codec != 'zstd' or session_store.zstandard is not None]
+    encoders = ['orjson', 'json'] if session_store.orjson is not None else ['json']
+    work_dir = tempfile.mkdtemp(prefix='bench_storage_')
+    fast_json = session_store.orjson
+    try:
+        variants = {'legacy_json': bench_legacy(work_dir, data, args.repeat)}
+        for encoder in encoders:
+            session_store.orjson = fast_json if encoder == 'orjson' else None
+            for codec in codecs:
+                variants[f"{codec}+{encoder}"] = bench_codec(work_dir, data, codec, args.repeat)
+    finally:
+        session_store.orjson = fast_json
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    legacy = variants['legacy_json']
+    print(f"Session with {args.videos} videos and {args.comments} comments per video")
+    for name, stats in variants.items():
+        stats['size_ratio'] = round(stats['file_bytes'] / legacy['file_bytes'], 3)
+        print(f"  {name:<14} {stats['file_bytes'] / 1e6:>8.2f} MB ({stats['size_ratio']:>5.1%})  "
+              f"write p50 {stats['write']['p50_ms']:>8.1f} ms  load p50 {stats['load']['p50_ms']:>8.1f} ms")
+
+    results = {'videos': args.videos, 'comments': args.comments, 'variants': variants}
+    path = write_results('session_storage', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
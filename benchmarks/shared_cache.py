@@ -0,0 +1,109 @@
+"""
+Hit rate and latency of per-process against shared caches as workers are added.
+
+Forks 1, 2, 4 and 8 worker processes that each serve a share of the same
+stream of lookups (keys drawn with a skewed popularity, as channel IDs and API
+responses are), resolving a miss by storing the value. Each worker has either:
+
+- local: its own in-memory cache (MemoryClient), cold in every other worker,
+- sqlite: the SQLite cache shared by all of them (SQLiteCache).
+
+Reports the overall hit rate and the p50 get/set latency per worker count.
+
+Usage (from the repository root):
+    python -m benchmarks.shared_cache --lookups 20000 --keys 5000 --workers 1 2 4 8
+"""
+import os
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import statistics
+import multiprocessing
+
+from yt_scraper.shared_cache import SQLiteCache, NetworkCache, MemoryClient
+from benchmarks.common import write_results
+
+VALUE_BYTES = 2000
+
+
+def key_stream(lookups, keys, seed=0):
+    rng = random.Random(seed)
+    # Zipf-like popularity: a few keys are looked up far more often than the rest
+    weights = [1 / (rank + 1) for rank in range(keys)]
+    return [f"key{index}" for index in rng.choices(range(keys), weights, k=lookups)]
+
+
+def open_backend(backend, db_path):
+    if backend == 'sqlite':
+        return SQLiteCache('bench', 10 ** 6, 10 ** 10, db_path=db_path)
+    return NetworkCache('bench', MemoryClient(10 ** 6, 10 ** 10))
+
+
+def run_worker(args):
+    backend, db_path, stream = args
+    logging.disable(logging.WARNING)
+    cache = open_backend(backend, db_path)
+    value = os.urandom(VALUE_BYTES)
+    hits = 0
+    get_times, set_times = [], []
+    for key in stream:
+        start = time.perf_counter()
+        found = cache.get(key)
+        get_times.append(time.perf_counter() - start)
+        if found is not None:
+            hits += 1
+            continue
+        start = time.perf_counter()
+        cache.set(key, value)
+        set_times.append(time.perf_counter() - start)
+    return hits, get_times, set_times
+
+
+def run(backend, workers, stream, work_dir):
+    db_path = os.path.join(work_dir, f"{backend}-{workers}.db")
+    # Requests are spread over the workers, as gunicorn spreads them
+    shares = [stream[worker::workers] for worker in range(workers)]
+    with multiprocessing.get_context('fork').Pool(workers) as pool:
+        results = pool.map(run_worker, [(backend, db_path, share) for share in shares])
+    hits = sum(result[0] for result in results)
+    get_times = [t for result in results for t in result[1]]
+    set_times = [t for result in results for t in result[2]]
+    return {
+        'hit_rate': round(hits / len(stream), 4),
+        'get_p50_us': round(statistics.median(get_times) * 1e6, 1),
+        'set_p50_us': round(statistics.median(set_times) * 1e6, 1) if set_times else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-process against shared caches.')
+    parser.add_argument('--lookups', type=int, default=20000, help='Lookups over all workers')
+    parser.add_argument('--keys', type=int, default=5000, help='Distinct keys')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Worker counts')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/shared_cache-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    stream = key_stream(args.lookups, args.keys)
+    work_dir = tempfile.mkdtemp(prefix='bench_shared_cache_')
+    results = {'lookups': args.lookups, 'keys': args.keys, 'workers': {}}
+    try:
+        for workers in args.workers:
+            results['workers'][str(workers)] = {}
+            for backend in ('local', 'sqlite'):
+                stats = run(backend, workers, stream, work_dir)
+                results['workers'][str(workers)][backend] = stats
+                print(f"  {workers} workers  {backend:<7} hit rate {stats['hit_rate']:>6.1%}  "
+                      f"get p50 {stats['get_p50_us']:>7.1f} us  set p50 {stats['set_p50_us']:>7.1f} us")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    path = write_results('shared_cache', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
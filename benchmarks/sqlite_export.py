@@ -0,0 +1,127 @@
+"""
+Ad-hoc queries over a SQLite export against re-parsing the JSON export.
+
+Exports a synthetic channel scrape as JSON and as SQLite, then answers the
+same questions from each: the JSON file is loaded and scanned in Python, as
+a downstream tool must do with a flat file, while the SQLite file is opened
+and queried through its indexes. Reports the export times and sizes, the
+p50 latency of each query both ways, and the memory the JSON load takes.
+
+Usage (from the repository root):
+    python -m benchmarks.sqlite_export --videos 50000 --comments 2
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import tracemalloc
+
+from yt_scraper.exporter import export_data
+from yt_scraper.analytics import ChannelAnalytics
+from yt_scraper.fake_api import SyntheticChannel
+from yt_scraper.records import records_to_dicts
+from benchmarks.common import measure, write_results
+from benchmarks.records_memory import build_records
+
+
+def json_queries(cutoff, tag):
+    """name -> function answering the query from a loaded JSON export."""
+    return {
+        'top_10_by_views': lambda data: sorted(data['videos'], key=lambda video: video['view_count'], reverse=True)[:10],
+        'published_since': lambda data: [video for video in data['videos'] if video['published_at'] >= cutoff],
+        'videos_with_tag': lambda data: [video['id'] for video in data['videos']
+                                         if tag in (item.lower() for item in video.get('tags', []))],
+        'title_search': lambda data: [video['id'] for video in data['videos']
+                                      if re.search(r'\bepisode 4242\b', video['title'], re.IGNORECASE)]
+    }
+
+
+SQLITE_QUERIES = {
+    'top_10_by_views': ('SELECT * FROM videos ORDER BY view_count DESC LIMIT 10', ()),
+    'published_since': ('SELECT * FROM videos WHERE published_at >= ?', ('cutoff',)),
+    'videos_with_tag': ('SELECT video_id FROM tags WHERE tag = ?', ('tag',)),
+    'title_search': ("SELECT rowid FROM videos_fts WHERE videos_fts MATCH 'title:\"episode 4242\"'", ())
+}
+
+
+def query_file(path, sql, arguments):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql, arguments).fetchall()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark queries over SQLite exports against JSON exports.')
+    parser.add_argument('--videos', type=int, default=50000)
+    parser.add_argument('--comments', type=int, default=2, help='Comments per video')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/sqlite_export-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    channel = SyntheticChannel('UCsqliteexport00000000000', args.videos, title='Synthetic channel')
+    videos = records_to_dicts(build_records(channel, args.videos, args.comments))
+    channel_data = {'id': channel.id, 'title': channel.title}
+    analytics = ChannelAnalytics.from_videos(videos).to_dict()
+    # The most recent tenth of the videos
+    cutoff = sorted(video['published_at'] for video in videos)[-max(1, args.videos // 10)]
+    params = {'cutoff': cutoff, 'tag': 'gaming'}
+
+    paths = {}
+    results = {'videos': args.videos, 'comments': args.comments, 'exports': {}, 'queries': {}}
+    try:
+        for export_format in ('json', 'sqlite'):
+            start = time.perf_counter()
+            paths[export_format] = export_data(channel_data, videos, export_format, 'benchmark', analytics)
+            results['exports'][export_format] = {'seconds': round(time.perf_counter() - start, 2),
+                                                 'bytes': os.path.getsize(paths[export_format])}
+
+        def load_json():
+            with open(paths['json'], encoding='utf-8') as jsonfile:
+                return json.load(jsonfile)
+
+        tracemalloc.start()
+        loaded = load_json()
+        json_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results['json_load_mb'] = round(json_memory / 2 ** 20, 1)
+        load_timing, _ = measure(load_json, repeat=args.repeat)
+        results['json_load_p50_ms'] = load_timing['p50_ms']
+
+        conn = sqlite3.connect(paths['sqlite'])
+        try:
+            for name, query in json_queries(cutoff, params['tag']).items():
+                sql, arguments = SQLITE_QUERIES[name]
+                arguments = [params[argument] for argument in arguments]
+                json_rows = len(query(loaded))
+                sqlite_rows = len(conn.execute(sql, arguments).fetchall())
+                json_timing, _ = measure(lambda: query(loaded), repeat=args.repeat)
+                # Each query opens the file anew, as an analyst's one-off query would
+                sqlite_timing, _ = measure(lambda: query_file(paths['sqlite'], sql, arguments), repeat=args.repeat)
+                results['queries'][name] = {'rows': [json_rows, sqlite_rows],
+                                            'json_scan_p50_ms': json_timing['p50_ms'],
+                                            'sqlite_p50_ms': sqlite_timing['p50_ms']}
+        finally:
+            conn.close()
+    finally:
+        for path in paths.values():
+            os.remove(path)
+
+    for export_format, stats in results['exports'].items():
+        print(f"  export {export_format:<7} {stats['seconds']:>6.2f} s  {stats['bytes'] / 2 ** 20:>7.1f} MiB")
+    print(f"  JSON load p50 {results['json_load_p50_ms']:.0f} ms, {results['json_load_mb']} MB in memory")
+    for name, stats in results['queries'].items():
+        print(f"  {name:<16} rows {stats['rows']}  JSON scan p50 {stats['json_scan_p50_ms']:>9.2f} ms (after the load)  "
+              f"SQLite p50 {stats['sqlite_p50_ms']:>8.2f} ms")
+
+    path = write_results('sqlite_export', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
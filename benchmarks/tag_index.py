@@ -0,0 +1,92 @@
+"""
+Build, storage and query latency of the tag inverted index.
+
+Builds one TagIndex per synthetic channel session, saves and reloads them,
+merges them into a cross-channel index and times the queries served by
+/tags and /tags/pairs, against answering the same top-tags and tag lookups
+by scanning the session video dicts in Python.
+
+Usage (from the repository root):
+    python -m benchmarks.tag_index --channels 10 --videos 5000
+"""
+import os
+import logging
+import argparse
+import tempfile
+
+from yt_scraper.tag_index import TagIndex
+from yt_scraper.fake_api import SyntheticChannel
+from yt_scraper.records import records_to_dicts
+from benchmarks.common import measure, write_results
+from benchmarks.records_memory import build_records
+
+
+def scan_top_tags(sessions, limit):
+    """Top tags by video count, counted over every session's videos."""
+    counts = {}
+    for videos in sessions:
+        for video in videos:
+            for tag in dict.fromkeys(tag.strip().lower() for tag in video.get('tags') or ()):
+                counts[tag] = counts.get(tag, 0) + 1
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def scan_videos_with(sessions, tag):
+    return [video['id'] for videos in sessions for video in videos
+            if tag in (other.strip().lower() for other in video.get('tags') or ())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the tag inverted index.')
+    parser.add_argument('--channels', type=int, default=10, help='Sessions (channels) to merge')
+    parser.add_argument('--videos', type=int, default=5000, help='Videos per session')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/tag_index-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    sessions = []
+    for number in range(args.channels):
+        channel = SyntheticChannel(f"UCtags{number:018d}", args.videos, upload_interval_hours=7)
+        sessions.append(records_to_dicts(build_records(channel, args.videos, 0)))
+
+    results = {'channels': args.channels, 'videos_per_channel': args.videos}
+    results['build'], indexes = measure(lambda: [TagIndex.from_videos(videos) for videos in sessions], args.repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, f"{number}.tags") for number in range(len(indexes))]
+        results['save'], _ = measure(lambda: [index.save(path) for index, path in zip(indexes, paths)], args.repeat)
+        results['index_bytes'] = sum(os.path.getsize(path) for path in paths)
+        results['load'], loaded = measure(lambda: [TagIndex.load(path) for path in paths], args.repeat)
+    results['merge'], merged = measure(lambda: TagIndex.merge(loaded), args.repeat)
+
+    tag = merged.top_tags(1)[0]['tag']
+    queries = {
+        'top_tags_count': lambda: merged.top_tags(20),
+        'top_tags_views': lambda: merged.top_tags(20, 'views'),
+        'top_tags_engagement': lambda: merged.top_tags(20, 'engagement'),
+        'videos_with': lambda: merged.videos_with(tag),
+        'co_occurring': lambda: merged.co_occurring(tag),
+        'top_pairs': lambda: merged.top_pairs(20),
+        'scan_top_tags': lambda: scan_top_tags(sessions, 20),
+        'scan_videos_with': lambda: scan_videos_with(sessions, tag)
+    }
+    results['tags'] = len(merged)
+    results['queries'] = {}
+    for name, query in queries.items():
+        # The first query computes the cached aggregates; time the steady state
+        query()
+        results['queries'][name], _ = measure(query, args.repeat)
+
+    print(f"  {args.channels} channels x {args.videos} videos, {len(merged)} tags, "
+          f"{results['index_bytes'] / 1024:.0f} KiB of indexes")
+    for name in ('build', 'save', 'load', 'merge'):
+        print(f"  {name:<22} p50 {results[name]['p50_ms']:>8.1f} ms")
+    for name, stats in results['queries'].items():
+        print(f"  {name:<22} p50 {stats['p50_ms']:>8.2f} ms")
+
+    path = write_results('tag_index', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Disk use and write/read latency of sessions with private videos against the shared video store.
+
+Stores the same synthetic channel scrape as several sessions, as when several
+analysts scrape one channel on the same day, with a share of the videos'
+statistics changed between scrapes. Each session is stored two ways:
+
+- private: the session file and record segment each hold the full videos,
+- shared: the videos go into a VideoStore; the session file and record
+  segment hold [video ID, digest] references.
+
+Reports the total bytes on disk, the p50 time to write a session and to load
+one back with its videos, and the time to expire all of them.
+
+Usage (from the repository root):
+    python -m benchmarks.video_store --sessions 10 --videos 3000 --comments 20 --changed 0.1
+"""
+import os
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import statistics
+
+from yt_scraper import session_store
+from yt_scraper.record_store import write_record_store
+from yt_scraper.video_index import VideoIndex
+from yt_scraper.video_store import VideoStore
+from yt_scraper.fake_api import SyntheticChannel
+from yt_scraper.records import records_to_dicts
+from benchmarks.common import write_results
+from benchmarks.records_memory import build_records
+
+
+def scrapes(videos, comments, sessions, changed, seed=0):
+    """The videos of each session: the first scrape, then ones with a share of view counts moved on."""
+    channel = SyntheticChannel('UCvideostore000000000000', videos, title='Synthetic channel')
+    base = records_to_dicts(build_records(channel, videos, comments))
+    rng = random.Random(seed)
+    result = [base]
+    for _ in range(sessions - 1):
+        moved = set(rng.sample(range(videos), int(videos * changed)))
+        result.append([dict(video, view_count=video['view_count'] + 1) if index in moved else video
+                       for index, video in enumerate(base)])
+    return channel, result
+
+
+def write_private(root, store, session_id, channel_data, videos):
+    video_index = VideoIndex.from_videos(videos)
+    session_store.write_session(root, session_id, {'channel_data': channel_data, 'videos_data': videos,
+                                                   'video_index': video_index.to_dict()})
+    write_record_store(session_store.session_base(root, session_id), videos, video_index)
+
+
+def write_shared(root, store, session_id, channel_data, videos):
+    video_index = VideoIndex.from_videos(videos)
+    refs, _ = store.put(session_id, videos)
+    session_store.write_session(root, session_id, {'channel_data': channel_data, 'video_refs': refs,
+                                                   'video_index': video_index.to_dict()})
+    write_record_store(session_store.session_base(root, session_id), refs, video_index)
+
+
+def load_private(root, store, session_id):
+    return session_store.read_session(root, session_id)[0]['videos_data']
+
+
+def load_shared(root, store, session_id):
+    return store.get(session_store.read_session(root, session_id)[0]['video_refs'])
+
+
+MODES = {
+    'private': (write_private, load_private),
+    'shared': (write_shared, load_shared)
+}
+
+
+def disk_bytes(directory):
+    return sum(os.path.getsize(os.path.join(path, name)) for path, _, names in os.walk(directory) for name in names)
+
+
+def run(mode, work_dir, channel, sessions):
+    write, load = MODES[mode]
+    root = os.path.join(work_dir, mode)
+    store = VideoStore(os.path.join(root, 'videos.db'))
+    channel_data = {'id': channel.id, 'title': channel.title}
+    session_ids = [f"{mode}-{number}" for number in range(len(sessions))]
+    write_times, load_times = [], []
+    for session_id, videos in zip(session_ids, sessions):
+        start = time.perf_counter()
+        write(root, store, session_id, channel_data, videos)
+        write_times.append(time.perf_counter() - start)
+    for session_id in session_ids:
+        start = time.perf_counter()
+        load(root, store, session_id)
+        load_times.append(time.perf_counter() - start)
+    total = disk_bytes(root)
+    start = time.perf_counter()
+    for session_id in session_ids:
+        session_store.delete_session(root, session_id)
+    if mode == 'shared':
+        store.release(session_ids)
+    expire_seconds = time.perf_counter() - start
+    return {
+        'disk_bytes': total,
+        'write_p50_ms': round(statistics.median(write_times) * 1000, 2),
+        'load_p50_ms': round(statistics.median(load_times) * 1000, 2),
+        'expire_ms': round(expire_seconds * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark private session videos against the shared video store.')
+    parser.add_argument('--sessions', type=int, default=10, help='Sessions storing the same channel')
+    parser.add_argument('--videos', type=int, default=3000)
+    parser.add_argument('--comments', type=int, default=20, help='Comments per video')
+    parser.add_argument('--changed', type=float, default=0.1, help='Share of videos whose statistics change per scrape')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/video_store-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    channel, sessions = scrapes(args.videos, args.comments, args.sessions, args.changed)
+    work_dir = tempfile.mkdtemp(prefix='bench_video_store_')
+    results = {'sessions': args.sessions, 'videos': args.videos, 'comments': args.comments,
+               'changed': args.changed, 'modes': {}}
+    try:
+        for mode in MODES:
+            stats = run(mode, work_dir, channel, sessions)
+            results['modes'][mode] = stats
+            print(f"  {mode:<8} {stats['disk_bytes'] / 2 ** 20:>8.1f} MiB  write p50 {stats['write_p50_ms']:>8.1f} ms  "
+                  f"load p50 {stats['load_p50_ms']:>8.1f} ms  expire {stats['expire_ms']:>8.1f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    path = write_results('video_store', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
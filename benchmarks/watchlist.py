@@ -0,0 +1,210 @@
+"""
+Simulated days of the watchlist scheduler against the local fake API.
+
+Watches several synthetic channels with a large back catalogue that keep
+uploading on a simulated clock, and runs the scheduler every --tick simulated
+seconds for --days days, once per daily quota budget. Reports for each budget:
+
+- quota units spent per day and the API calls made, with the mean number of
+  IDs per videos.list call,
+- videos refreshed per day,
+- per video age, the median time between polls of a video and the 95th
+  percentile of how late polls were against the age-based schedule,
+- how long new uploads waited for their first poll,
+- the scheduler's own run time,
+
+against the units a daily full scrape of the same channels would spend.
+
+Usage (from the repository root):
+    python -m benchmarks.watchlist --channels 20 --backlog 2500 --days 3 --quota 5000 2000
+"""
+import os
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timezone
+
+from yt_scraper import watchlist as watchlist_module
+from yt_scraper.api import YouTubeAPI
+from yt_scraper.watchlist import Watchlist, WatchlistScheduler, poll_interval, AGE_BUCKETS, BATCH_SIZE
+from yt_scraper.fake_api import FakeYouTubeBackend, ReplayHttp, SyntheticChannel
+from benchmarks.common import percentile, write_results
+
+START = datetime(2024, 6, 1, tzinfo=timezone.utc).timestamp()
+
+
+class SimulatedClock:
+    def __init__(self, now):
+        self.now = now
+
+
+class GrowingChannel(SyntheticChannel):
+    """A synthetic channel that uploads a video every interval of simulated time, with stable video IDs.
+
+    Video IDs are numbered by upload rather than by playlist position, so
+    they do not shift as new videos arrive on top.
+    """
+
+    def __init__(self, channel_id, backlog, clock, upload_interval_hours, phase=0):
+        # phase shifts the upload times, so channels do not all upload at the same moment
+        super().__init__(channel_id, backlog, latest=datetime.fromtimestamp(clock.now - phase, timezone.utc),
+                         upload_interval_hours=upload_interval_hours)
+        self.clock = clock
+        self.first_upload = self.latest - self.interval * (backlog - 1)
+
+    @property
+    def video_count(self):
+        elapsed = self.clock.now - self.first_upload.timestamp()
+        return int(elapsed // self.interval.total_seconds()) + 1
+
+    @video_count.setter
+    def video_count(self, value):
+        # Set by SyntheticChannel.__init__; the count follows the clock instead
+        pass
+
+    def video_id(self, index):
+        return f"{self.video_prefix}{self.video_count - 1 - index:08d}"
+
+    def index_of(self, video_id):
+        if len(video_id) != 11 or not video_id.startswith(self.video_prefix):
+            return None
+        try:
+            serial = int(video_id[3:])
+        except ValueError:
+            return None
+        count = self.video_count
+        return count - 1 - serial if 0 <= serial < count else None
+
+    def published_at(self, index):
+        return self.first_upload + self.interval * (self.video_count - 1 - index)
+
+
+def age_label(age):
+    return next(label for label, limit in AGE_BUCKETS if age <= limit)
+
+
+def poll_stats(db_path, start):
+    """Gaps between polls and their lateness by video age, and the first-poll delay of new uploads."""
+    watchlist = Watchlist(db_path)
+    conn = watchlist._connect()
+    try:
+        published = dict(conn.execute('SELECT video_id, published_at FROM watched_videos'))
+        rows = conn.execute('SELECT video_id, polled_at FROM video_stats ORDER BY video_id, polled_at').fetchall()
+    finally:
+        conn.close()
+    gaps = {label: [] for label, _ in AGE_BUCKETS}
+    lateness = {label: [] for label, _ in AGE_BUCKETS}
+    first_poll_delays = []
+    previous_id = previous_poll = None
+    for video_id, polled_at in rows:
+        published_at = published.get(video_id)
+        if published_at is None:
+            continue
+        if video_id != previous_id:
+            if published_at > start:
+                first_poll_delays.append(polled_at - published_at)
+        else:
+            age = previous_poll - published_at
+            label = age_label(age)
+            gaps[label].append(polled_at - previous_poll)
+            lateness[label].append(max(0.0, polled_at - previous_poll - poll_interval(age)))
+        previous_id, previous_poll = video_id, polled_at
+    by_age = {label: {'gaps': len(gaps[label]),
+                      'median_gap_hours': round(statistics.median(gaps[label]) / 3600, 2) if gaps[label] else None,
+                      'p95_late_minutes': round(percentile(lateness[label], 95) / 60, 1) if lateness[label] else None}
+              for label, _ in AGE_BUCKETS}
+    delays = {'uploads': len(first_poll_delays),
+              'median_minutes': round(statistics.median(first_poll_delays) / 60, 1) if first_poll_delays else None,
+              'p95_minutes': round(percentile(first_poll_delays, 95) / 60, 1) if first_poll_delays else None}
+    return by_age, delays
+
+
+def simulate(args, daily_quota, work_dir):
+    clock = SimulatedClock(START)
+    channels = [GrowingChannel(f"UCwatch{number:017d}", args.backlog, clock, args.upload_hours,
+                               phase=number * 1777 % int(args.upload_hours * 3600))
+                for number in range(args.channels)]
+    backend = FakeYouTubeBackend(channels)
+    api = YouTubeAPI('benchmark-key', http=ReplayHttp(backend))
+    db_path = os.path.join(work_dir, f"watchlist-{daily_quota}.db")
+    watchlist = Watchlist(db_path, daily_quota=daily_quota)
+    scheduler = WatchlistScheduler(api, watchlist, interval=0)
+    for channel in channels:
+        watchlist.watch_channel(channel.id, backfill=args.backlog, now=clock.now)
+
+    totals = {'channel_pages': 0, 'new_videos': 0, 'video_calls': 0, 'videos_refreshed': 0}
+    run_seconds = []
+    end = START + args.days * 86400
+    while clock.now < end:
+        start = time.perf_counter()
+        result = scheduler.run_once(now=clock.now)
+        run_seconds.append(time.perf_counter() - start)
+        for key, value in result.items():
+            totals[key] += value
+        clock.now += args.tick
+
+    conn = watchlist._connect()
+    try:
+        units_by_day = dict(conn.execute('SELECT day, units FROM quota_spent ORDER BY day'))
+    finally:
+        conn.close()
+    by_age, new_uploads = poll_stats(db_path, START)
+    status = watchlist.status(now=clock.now)
+    videos = status['videos']
+    return {
+        'videos_watched': videos,
+        'units_by_day': units_by_day,
+        'calls': dict(backend.calls),
+        'ids_per_videos_call': round(totals['videos_refreshed'] / max(totals['video_calls'], 1), 1),
+        'videos_refreshed_per_day': round(totals['videos_refreshed'] / args.days),
+        'steady_state_calls_per_day': status['calls_per_day'],
+        'by_age': by_age,
+        'new_uploads': new_uploads,
+        'scheduler_seconds_per_day': round(sum(run_seconds) / args.days, 2),
+        'full_scrape_units_per_day': 2 * -(-videos // BATCH_SIZE)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate the watchlist scheduler against the fake API.')
+    parser.add_argument('--channels', type=int, default=20, help='Watched channels')
+    parser.add_argument('--backlog', type=int, default=2500, help='Existing videos per channel, all watched')
+    parser.add_argument('--upload-hours', type=float, default=8, help='Simulated hours between uploads per channel')
+    parser.add_argument('--days', type=int, default=3, help='Simulated days')
+    parser.add_argument('--tick', type=int, default=60, help='Simulated seconds between scheduler runs')
+    parser.add_argument('--quota', type=int, nargs='+', default=[5000, 2000], help='Daily quota budgets to simulate')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/watchlist-<rev>.json)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    # History is kept for the whole simulation
+    watchlist_module.HISTORY_DAYS = max(watchlist_module.HISTORY_DAYS, args.days + 1)
+    work_dir = tempfile.mkdtemp(prefix='bench_watchlist_')
+    results = {'channels': args.channels, 'backlog': args.backlog, 'upload_hours': args.upload_hours,
+               'days': args.days, 'tick': args.tick, 'budgets': {}}
+    try:
+        for daily_quota in args.quota:
+            stats = simulate(args, daily_quota, work_dir)
+            results['budgets'][str(daily_quota)] = stats
+            print(f"  budget {daily_quota} units/day: {stats['videos_watched']} videos, units by day "
+                  f"{list(stats['units_by_day'].values())}, {stats['ids_per_videos_call']} IDs per call, "
+                  f"{stats['videos_refreshed_per_day']} refreshes/day "
+                  f"(a daily full scrape: {stats['full_scrape_units_per_day']} units)")
+            for label, bucket in stats['by_age'].items():
+                print(f"    age <= {label:<6} {bucket['gaps']:>7} gaps  median {bucket['median_gap_hours']} h  "
+                      f"p95 late {bucket['p95_late_minutes']} min")
+            print(f"    new uploads: {stats['new_uploads']['uploads']}, first poll after median "
+                  f"{stats['new_uploads']['median_minutes']} min, p95 {stats['new_uploads']['p95_minutes']} min; "
+                  f"scheduler {stats['scheduler_seconds_per_day']} s/day")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    path = write_results('watchlist', results, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Setup form validation
     setupFormValidation();
     
+    // Resolve the channel while the rest of the form is filled in
+    setupChannelPreview();
+    
     // Setup progress tracking for scraping
     setupProgressTracking();
     
@@ -66,10 +69,13 @@ function setupFormValidation() {
         scrapeForm.addEventListener('submit', function(event) {
             const channelUrl = document.getElementById('channel-url').value.trim();
             const apiKey = document.getElementById('api-key').value.trim();
+            const videoIds = document.getElementById('video-ids');
+            const videoIdsFile = document.getElementById('video-ids-file');
+            const hasVideoIds = (videoIds && videoIds.value.trim()) || (videoIdsFile && videoIdsFile.files.length);
             
-            if (!channelUrl) {
+            if (!channelUrl && !hasVideoIds) {
                 event.preventDefault();
-                alert('Please enter a YouTube channel URL');
+                alert('Please enter a YouTube channel or playlist URL, or video IDs to look up');
                 return false;
             }
             
@@ -80,7 +86,7 @@ function setupFormValidation() {
             }
             
             // Simple URL validation
-            if (!isValidYouTubeUrl(channelUrl)) {
+            if (!hasVideoIds && !isValidYouTubeUrl(channelUrl)) {
                 event.preventDefault();
                 alert('Please enter a valid YouTube channel URL');
                 return false;
@@ -95,6 +101,96 @@ function setupFormValidation() {
     }
 }
 
+function setupChannelPreview() {
+    const channelUrlInput = document.getElementById('channel-url');
+    const apiKeyInput = document.getElementById('api-key');
+    const startDateInput = document.getElementById('start-date');
+    const endDateInput = document.getElementById('end-date');
+    const preview = document.getElementById('channel-preview');
+    
+    if (!channelUrlInput || !apiKeyInput || !preview) {
+        return;
+    }
+    
+    let timer = null;
+    let controller = null;
+    let lastRequest = '';
+    
+    // Each resolution can spend quota, so only settled input is resolved, and only once
+    function schedule(delay) {
+        clearTimeout(timer);
+        timer = setTimeout(resolveChannel, delay);
+    }
+    
+    function resolveChannel() {
+        const channelUrl = channelUrlInput.value.trim();
+        const apiKey = apiKeyInput.value.trim();
+        if (!channelUrl || !apiKey || !isValidYouTubeUrl(channelUrl)) {
+            return;
+        }
+        
+        const formData = new FormData();
+        formData.append('channel_url', channelUrl);
+        formData.append('api_key', apiKey);
+        formData.append('start_date', startDateInput ? startDateInput.value : '');
+        formData.append('end_date', endDateInput ? endDateInput.value : '');
+        const requestKey = [channelUrl, apiKey, formData.get('start_date'), formData.get('end_date')].join('|');
+        if (requestKey === lastRequest) {
+            return;
+        }
+        lastRequest = requestKey;
+        
+        if (controller) {
+            controller.abort();
+        }
+        controller = new AbortController();
+        preview.classList.remove('d-none', 'text-danger');
+        preview.textContent = 'Looking up channel...';
+        
+        fetch('/resolve', { method: 'POST', body: formData, signal: controller.signal })
+            .then(response => response.json())
+            .then(data => renderChannelPreview(preview, data))
+            .catch(error => {
+                if (error.name !== 'AbortError') {
+                    console.error('Error resolving channel:', error);
+                    preview.classList.add('d-none');
+                    lastRequest = '';
+                }
+            });
+    }
+    
+    channelUrlInput.addEventListener('input', () => schedule(800));
+    channelUrlInput.addEventListener('change', () => schedule(0));
+    apiKeyInput.addEventListener('change', () => schedule(0));
+    [startDateInput, endDateInput].forEach(input => {
+        if (input) {
+            input.addEventListener('change', () => schedule(300));
+        }
+    });
+}
+
+function renderChannelPreview(preview, data) {
+    if (data.error) {
+        preview.classList.add('text-danger');
+        preview.textContent = data.error;
+        return;
+    }
+    
+    const parts = [];
+    if (data.playlist) {
+        parts.push(`Playlist "${data.playlist.title}" by ${data.title}, ${data.playlist.item_count.toLocaleString()} videos`);
+    } else {
+        parts.push(`${data.title}: ${data.video_count.toLocaleString()} videos, ${data.subscriber_count.toLocaleString()} subscribers`);
+    }
+    if (data.estimate) {
+        const estimate = data.estimate;
+        const prefix = data.playlist ? 'at most ' : '~';
+        parts.push(`${prefix}${estimate.videos.toLocaleString()} videos to scrape, ` +
+                   `${prefix}${estimate.units.toLocaleString()} quota units (${estimate.strategy})`);
+    }
+    preview.textContent = parts.join(' — ');
+}
+
 function isValidYouTubeUrl(url) {
     // Very basic validation - just check if it contains youtube.com or youtu.be
     return url.includes('youtube.com') || url.includes('youtu.be');
@@ -225,9 +321,63 @@ function updatePaginationLinks(currentView) {
         url.searchParams.set('view', currentView);
         link.href = url.toString();
     });
+    // Keep the view when sort or filters are applied
+    const viewInput = document.getElementById('viewInput');
+    if (viewInput) {
+        viewInput.value = currentView;
+    }
+}
+
+// Full-text search box on the results page
+function setupSearch() {
+    const searchForm = document.getElementById('searchForm');
+    const searchResults = document.getElementById('searchResults');
+    if (!searchForm || !searchResults) {
+        return;
+    }
+    
+    searchForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        const params = new URLSearchParams(new FormData(searchForm));
+        fetch(searchForm.action + '?' + params.toString())
+            .then(response => response.json())
+            .then(data => {
+                searchResults.classList.remove('d-none');
+                if (data.error) {
+                    searchResults.innerHTML = `<div class="alert alert-warning mb-0">${escapeHtml(data.error)}</div>`;
+                    return;
+                }
+                // Snippets come back HTML-escaped with matches in <mark>
+                const videoHits = data.videos.map(hit => `
+                    <li class="list-group-item bg-dark text-white">
+                        <a href="${escapeHtml(hit.video_url)}" target="_blank">${escapeHtml(hit.title)}</a>
+                        <div class="small text-muted">${hit.snippet}</div>
+                    </li>`).join('');
+                const commentHits = data.comments.map(hit => `
+                    <li class="list-group-item bg-dark text-white">
+                        <span class="small">${escapeHtml(hit.author)} on
+                            <a href="${escapeHtml(hit.video_url)}" target="_blank">${escapeHtml(hit.video_title)}</a></span>
+                        <div class="small text-muted">${hit.snippet}</div>
+                    </li>`).join('');
+                searchResults.innerHTML = `
+                    <p class="small text-muted mb-2">${data.videos.length} videos and ${data.comments.length} comments (${data.took_ms} ms)</p>
+                    ${videoHits ? `<h3 class="h6">Videos</h3><ul class="list-group mb-3">${videoHits}</ul>` : ''}
+                    ${commentHits ? `<h3 class="h6">Comments</h3><ul class="list-group">${commentHits}</ul>` : ''}`;
+            })
+            .catch(error => {
+                console.error('Search failed:', error);
+            });
+    });
+}
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text == null ? '' : String(text);
+    return div.innerHTML;
 }
 
 // Add event listener to document ready
 document.addEventListener('DOMContentLoaded', function() {
     setupViewToggle();
+    setupSearch();
 });
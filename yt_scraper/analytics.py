@@ -0,0 +1,281 @@
+"""
+Channel analytics over the videos of a scrape.
+
+ChannelAnalytics collects one column per metric (publish time, views, likes,
+comments, engagement, duration, tag memberships) as videos stream in, then
+computes everything with NumPy in one pass over the columns:
+
+- upload cadence from the actual publish times: uploads per week over the
+  scraped range and over its last 90 days, and the gaps between uploads,
+- view, like, comment and engagement distributions (mean and percentiles),
+- the publish hour and weekday (UTC) whose videos get the most views,
+- videos and performance per duration bucket,
+- performance of the most used tags against the channel median.
+
+The report is a plain dict, stored with the session and read by the results
+page and the exporters.
+"""
+import logging
+import numpy as np
+from .utils import parse_formatted_duration
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+# Recent cadence is measured over this many days before the newest upload
+RECENT_DAYS = 90
+# Hours, weekdays and tags with fewer videos than this are not ranked
+MIN_GROUP_VIDEOS = 3
+TOP_TAGS = 25
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+# (label, lower bound in seconds); each bucket runs up to the next bound
+DURATION_BUCKETS = (
+    ('< 1 min', 0),
+    ('1-4 min', 60),
+    ('4-10 min', 240),
+    ('10-20 min', 600),
+    ('20-60 min', 1200),
+    ('60+ min', 3600)
+)
+DISTRIBUTION_FIELDS = {
+    'views': 'view_count',
+    'likes': 'like_count',
+    'comments': 'comment_count',
+    'engagement': 'engagement_rate'
+}
+
+DAY = 86400.0
+
+
+def _duration_seconds(video):
+    try:
+        return parse_formatted_duration(video.get('duration') or '0')
+    except ValueError:
+        return 0
+
+
+def _round(value, digits=2):
+    return round(float(value), digits)
+
+
+def _distribution(values):
+    stats = {'mean': _round(values.mean()), 'min': _round(values.min()), 'max': _round(values.max())}
+    for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        stats[f"p{percentile}"] = _round(value)
+    return stats
+
+
+def _group_medians(groups, values, group_count):
+    """Median of values per group id in [0, group_count) (NaN for empty groups), without a Python loop."""
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    medians = np.full(group_count, np.nan)
+    present = counts > 0
+    low = starts[present] + (counts[present] - 1) // 2
+    high = starts[present] + counts[present] // 2
+    medians[present] = (sorted_values[low] + sorted_values[high]) / 2
+    return medians
+
+
+def _group_table(groups, views, engagement, group_count):
+    """Video count, median views and mean engagement per group id."""
+    counts = np.bincount(groups, minlength=group_count)
+    medians = _group_medians(groups, views, group_count)
+    engagement_sums = np.bincount(groups, weights=engagement, minlength=group_count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_engagement = np.where(counts > 0, engagement_sums / np.maximum(counts, 1), np.nan)
+    return counts, medians, mean_engagement
+
+
+def _group_rows(labels, counts, medians, mean_engagement):
+    return [{
+        'label': label,
+        'videos': int(count),
+        'median_views': _round(median) if count else 0,
+        'mean_engagement': _round(engagement) if count else 0
+    } for label, count, median, engagement in zip(labels, counts, medians, mean_engagement)]
+
+
+def _best(rows):
+    """Label of the row with the highest median views among those with enough videos."""
+    ranked = [row for row in rows if row['videos'] >= MIN_GROUP_VIDEOS] or [row for row in rows if row['videos']]
+    return max(ranked, key=lambda row: row['median_views'])['label'] if ranked else None
+
+
+class ChannelAnalytics:
+    """Columnar metrics of a session's videos and the analytics report computed from them."""
+
+    def __init__(self, report=None):
+        self.report = report or {}
+        self._reset()
+
+    def _reset(self):
+        self._published = []
+        self._views = []
+        self._likes = []
+        self._comments = []
+        self._engagement = []
+        self._durations = []
+        self._tag_ids = {}
+        self._tag_codes = []  # tag id per (video, tag) membership
+        self._tag_videos = []  # video position per membership
+
+    @classmethod
+    def from_videos(cls, videos):
+        analytics = cls()
+        for video in videos:
+            analytics.add(video)
+        analytics.finish()
+        return analytics
+
+    @classmethod
+    def from_session(cls, data):
+        """The report stored with a session, or one computed from its videos (older sessions)."""
+        if 'analytics' in data:
+            return cls(data['analytics'])
+        return cls.from_videos(data.get('videos_data', []))
+
+    def add(self, video):
+        """Add the next session video dict."""
+        position = len(self._views)
+        self._published.append((video.get('published_at') or '')[:19])
+        self._views.append(video.get('view_count') or 0)
+        self._likes.append(video.get('like_count') or 0)
+        self._comments.append(video.get('comment_count') or 0)
+        self._engagement.append(video.get('engagement_rate') or 0)
+        self._durations.append(_duration_seconds(video))
+        for tag in dict.fromkeys(tag.lower() for tag in video.get('tags') or ()):
+            self._tag_codes.append(self._tag_ids.setdefault(tag, len(self._tag_ids)))
+            self._tag_videos.append(position)
+
+    def finish(self):
+        """Compute the report from the collected columns."""
+        columns = {
+            'view_count': np.array(self._views, dtype=np.int64),
+            'like_count': np.array(self._likes, dtype=np.int64),
+            'comment_count': np.array(self._comments, dtype=np.int64),
+            'engagement_rate': np.array(self._engagement, dtype=np.float64)
+        }
+        published = np.array(self._published, dtype='datetime64[s]')
+        durations = np.array(self._durations, dtype=np.int64)
+        count = len(durations)
+        self.report = {'video_count': count}
+        if count:
+            views = columns['view_count'].astype(np.float64)
+            engagement = columns['engagement_rate']
+            self.report['distributions'] = {name: _distribution(columns[field])
+                                            for name, field in DISTRIBUTION_FIELDS.items()}
+            self.report['cadence'] = self._cadence(published)
+            self.report['publish_times'] = self._publish_times(published, views, engagement)
+            self.report['duration_buckets'] = self._duration_buckets(durations, views, engagement)
+            self.report['tags'] = self._tags(views, engagement)
+        logger.debug(f"Computed analytics over {count} videos and {len(self._tag_ids)} tags")
+        self._reset()
+        return self
+
+    def to_dict(self):
+        return self.report
+
+    @staticmethod
+    def _cadence(published):
+        times = published[~np.isnat(published)].astype(np.int64)
+        if not len(times):
+            return {}
+        times.sort()
+        first, last = times[0], times[-1]
+        span_days = (last - first) / DAY
+        gaps = np.diff(times) / DAY
+        recent = np.count_nonzero(times > last - RECENT_DAYS * DAY)
+        cadence = {
+            'first_upload': str(np.datetime64(int(first), 's')) + 'Z',
+            'last_upload': str(np.datetime64(int(last), 's')) + 'Z',
+            'span_days': _round(span_days, 1),
+            'uploads_per_week': _round(len(gaps) / span_days * 7) if span_days > 0 else None,
+            'recent_uploads_per_week': _round(recent / min(RECENT_DAYS, span_days) * 7) if span_days > 0 else None,
+            'gap_days': None,
+            'longest_gap': None
+        }
+        if len(gaps):
+            longest = int(np.argmax(gaps))
+            cadence['gap_days'] = {'mean': _round(gaps.mean()), 'median': _round(np.median(gaps)),
+                                   'p90': _round(np.percentile(gaps, 90)), 'max': _round(gaps[longest])}
+            cadence['longest_gap'] = {'days': _round(gaps[longest]),
+                                      'after': str(np.datetime64(int(times[longest]), 's')) + 'Z',
+                                      'before': str(np.datetime64(int(times[longest + 1]), 's')) + 'Z'}
+        return cadence
+
+    @staticmethod
+    def _publish_times(published, views, engagement):
+        known = ~np.isnat(published)
+        if not known.any():
+            return {}
+        seconds = published[known].astype(np.int64)
+        hours = (seconds // 3600) % 24
+        # 1970-01-01 was a Thursday
+        weekdays = (seconds // 86400 + 3) % 7
+        by_hour = _group_rows([f"{hour:02d}:00" for hour in range(24)],
+                              *_group_table(hours, views[known], engagement[known], 24))
+        by_weekday = _group_rows(WEEKDAYS, *_group_table(weekdays, views[known], engagement[known], 7))
+        return {'timezone': 'UTC', 'best_hour': _best(by_hour), 'best_weekday': _best(by_weekday),
+                'by_hour': by_hour, 'by_weekday': by_weekday}
+
+    @staticmethod
+    def _duration_buckets(durations, views, engagement):
+        bounds = np.array([bound for _, bound in DURATION_BUCKETS[1:]])
+        buckets = np.searchsorted(bounds, durations, side='right')
+        return _group_rows([label for label, _ in DURATION_BUCKETS],
+                           *_group_table(buckets, views, engagement, len(DURATION_BUCKETS)))
+
+    def _tags(self, views, engagement):
+        if not self._tag_codes:
+            return []
+        codes = np.array(self._tag_codes, dtype=np.int64)
+        positions = np.array(self._tag_videos, dtype=np.int64)
+        names = list(self._tag_ids)
+        counts, medians, mean_engagement = _group_table(codes, views[positions], engagement[positions], len(names))
+        channel_median = float(np.median(views))
+        # Most used first, ties by name
+        order = sorted(np.flatnonzero(counts >= min(MIN_GROUP_VIDEOS, counts.max())),
+                       key=lambda code: (-counts[code], names[code]))[:TOP_TAGS]
+        return [{
+            'tag': names[code],
+            'videos': int(counts[code]),
+            'median_views': _round(medians[code]),
+            'mean_engagement': _round(mean_engagement[code]),
+            'views_vs_median': _round(medians[code] / channel_median) if channel_median else None
+        } for code in order]
+
+
+def report_rows(report):
+    """Flatten a report into (metric, value) rows for tabular exports."""
+    rows = [('video_count', report.get('video_count', 0))]
+    cadence = report.get('cadence') or {}
+    for key in ('first_upload', 'last_upload', 'span_days', 'uploads_per_week', 'recent_uploads_per_week'):
+        if key in cadence:
+            rows.append((f"cadence.{key}", cadence[key]))
+    for stat, value in (cadence.get('gap_days') or {}).items():
+        rows.append((f"cadence.gap_days.{stat}", value))
+    for key, value in (cadence.get('longest_gap') or {}).items():
+        rows.append((f"cadence.longest_gap.{key}", value))
+    for name, stats in (report.get('distributions') or {}).items():
+        for stat, value in stats.items():
+            rows.append((f"{name}.{stat}", value))
+    publish_times = report.get('publish_times') or {}
+    if publish_times:
+        rows.append(('best_publish_hour_utc', publish_times['best_hour']))
+        rows.append(('best_publish_weekday_utc', publish_times['best_weekday']))
+        for group in ('by_weekday', 'by_hour'):
+            for row in publish_times[group]:
+                for stat in ('videos', 'median_views', 'mean_engagement'):
+                    rows.append((f"publish_{group[3:]}[{row['label']}].{stat}", row[stat]))
+    for row in report.get('duration_buckets') or []:
+        for stat in ('videos', 'median_views', 'mean_engagement'):
+            rows.append((f"duration[{row['label']}].{stat}", row[stat]))
+    for row in report.get('tags') or []:
+        for stat in ('videos', 'median_views', 'mean_engagement', 'views_vs_median'):
+            rows.append((f"tag[{row['tag']}].{stat}", row[stat]))
+    return rows
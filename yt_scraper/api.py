@@ -1,21 +1,244 @@
+import os
+import json
+import time
 import logging
-import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import isodate
 from urllib.parse import urlparse, parse_qs
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from .utils import format_duration, format_iso_date, format_iso_time
+from .records import ChannelRecord, VideoRecord, CommentRecord, records_to_dicts
+from .http_cache import CachingHttp, InstrumentedHttp
+from .shared_cache import open_cache
+from .metrics import API_RETRIES
+from .utils import parse_durations_seconds
+from .links import iter_video_links
+from .planner import PlaylistHints, plan_for_channel, plan_listing, split_window, halve_window, SEARCH_RESULT_LIMIT
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Alternative API base URL, e.g. a local fake server (http://127.0.0.1:8765/)
+YOUTUBE_API_ENDPOINT = os.environ.get('YT_API_ENDPOINT')
+
+# Quota units charged per call of each API endpoint
+QUOTA_COSTS = {
+    'channels': 1,
+    'playlists': 1,
+    'playlistItems': 1,
+    'videos': 1,
+    'commentThreads': 1,
+    'search': 100
+}
+
+# Default cap on videos collected per scrape (set YT_MAX_VIDEOS_TO_PROCESS=0 to lift it)
+MAX_VIDEOS_TO_PROCESS = int(os.environ.get('YT_MAX_VIDEOS_TO_PROCESS', '3000'))
+
+# Seconds an idle client waits in the ClientPool for the scrape that follows its channel resolution
+CLIENT_POOL_TTL = int(os.environ.get('YT_CLIENT_POOL_TTL', '300'))
+CLIENT_POOL_SIZE = 32
+
+# Channel metadata is served from the shared 'channels' cache for this long (0 turns that off)
+CHANNEL_DATA_TTL = int(os.environ.get('YT_CHANNEL_DATA_TTL', '600'))
+CHANNEL_CACHE_MAX_ENTRIES = 20000
+CHANNEL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Comments are only fetched for detail batches of at most this many videos
+COMMENTS_BATCH_LIMIT = 10
+
+# Bounds used for the empty ends of a scrape's date range
+OPEN_RANGE = ('1970-01-01', '9999-12-31')
+
+# Cap on video IDs looked up at once (set YT_MAX_LOOKUP_VIDEOS=0 to lift it)
+MAX_LOOKUP_VIDEOS = int(os.environ.get('YT_MAX_LOOKUP_VIDEOS', '10000'))
+
+
+def build_channel_record(channel):
+    """ChannelRecord for a channels.list item, with its estimated upload frequency."""
+    record = ChannelRecord.from_api(channel)
+    
+    # Calculate upload frequency (estimated based on video count and channel age)
+    try:
+        published_at_str = channel['snippet']['publishedAt']
+        # Handle different datetime formats (with or without milliseconds)
+        try:
+            if '.' in published_at_str:
+                # Format with milliseconds
+                published_at = datetime.strptime(published_at_str.split('.')[0] + 'Z', '%Y-%m-%dT%H:%M:%SZ')
+            else:
+                # Format without milliseconds
+                published_at = datetime.strptime(published_at_str, '%Y-%m-%dT%H:%M:%SZ')
+        except ValueError:
+            # Fallback with flexible parsing
+            published_at = datetime.fromisoformat(published_at_str.replace('Z', '+00:00'))
+        
+        days_since_creation = max(1, (datetime.now() - published_at).days)  # Ensure at least 1 day
+        uploads_per_day = int(channel['statistics'].get('videoCount', 0)) / days_since_creation
+        uploads_per_week = uploads_per_day * 7
+        uploads_per_month = uploads_per_day * 30
+        
+        record.upload_frequency = {
+            'per_day': round(uploads_per_day, 2),
+            'per_week': round(uploads_per_week, 2),
+            'per_month': round(uploads_per_month, 2)
+        }
+    except Exception as e:
+        logger.warning(f"Could not calculate upload frequency: {e}")
+        record.upload_frequency = {
+            'per_day': 0,
+            'per_week': 0,
+            'per_month': 0
+        }
+    return record
+
+
+def open_channel_cache():
+    """The shared cache of channel metadata and resolved channel IDs (see shared_cache.py)."""
+    return open_cache('channels', CHANNEL_CACHE_MAX_ENTRIES, CHANNEL_CACHE_MAX_BYTES)
+
+
+def cached_channel_data(cache, channel_id):
+    if cache is None or not CHANNEL_DATA_TTL:
+        return None
+    data = cache.get(f"data:{channel_id}")
+    return json.loads(data) if data is not None else None
+
+
+def cache_channel_data(cache, channel_id, channel_data):
+    if cache is not None and CHANNEL_DATA_TTL:
+        cache.set(f"data:{channel_id}", json.dumps(channel_data).encode('utf-8'), ttl=CHANNEL_DATA_TTL)
+
+
+def build_playlist_data(playlist):
+    """Summary of a playlists.list item, stored with the channel data of a playlist scrape."""
+    snippet = playlist['snippet']
+    return {
+        'id': playlist['id'],
+        'title': snippet.get('title', ''),
+        'channel_id': snippet.get('channelId', ''),
+        'channel_title': snippet.get('channelTitle', ''),
+        'item_count': int(playlist.get('contentDetails', {}).get('itemCount', 0)),
+        'url': f"https://www.youtube.com/playlist?list={playlist['id']}"
+    }
+
+
+def build_lookup_channel_data(video_count):
+    """Channel data standing in for a bulk video lookup, whose videos may come from any number of channels."""
+    data = ChannelRecord(id='', title='Video lookup', description=f"Statistics for {video_count} requested videos.",
+                         custom_url='', published_at='', country='', view_count=0, subscriber_count=0,
+                         video_count=video_count, topic_categories=[], thumbnail_url='', banner_url='').to_dict()
+    data['url'] = ''
+    data['lookup'] = {'requested': video_count}
+    return data
+
+
+def drop_missing_videos(batch):
+    """The videos of a detail batch that videos.list returned (deleted, private and mistyped IDs are not)."""
+    found = [video for video in batch if video.has_details]
+    if len(found) < len(batch):
+        logger.warning(f"{len(batch) - len(found)} of {len(batch)} requested videos were not found")
+    return found
+
+
+def comment_fetch_videos(videos, batch_size=50):
+    """How many of a scrape's videos get comments: those of a trailing batch of at most COMMENTS_BATCH_LIMIT."""
+    trailing = videos % batch_size
+    return trailing if trailing <= COMMENTS_BATCH_LIMIT else 0
+
+
+def date_range_bounds(start_date, end_date):
+    """ISO timestamps bounding a date range (dates or datetimes), for comparing with publishedAt.
+
+    An empty start or end date leaves that end of the range open.
+    """
+    start_date = start_date or OPEN_RANGE[0]
+    end_date = end_date or OPEN_RANGE[1]
+    start_date_iso = start_date.isoformat() + 'Z' if isinstance(start_date, datetime) else start_date + 'T00:00:00Z'
+    end_date_iso = end_date.isoformat() + 'Z' if isinstance(end_date, datetime) else end_date + 'T23:59:59Z'
+    return start_date_iso, end_date_iso
+
+
+def playlist_videos_in_range(items, start_date_iso, end_date_iso):
+    """VideoRecords for the playlistItems of one page published within the range, in order."""
+    videos = []
+    for item in items:
+        # Handle videos where the publishedAt field might be missing
+        if 'videoPublishedAt' not in item['contentDetails']:
+            continue
+        
+        # Check if video is within date range
+        if start_date_iso <= item['contentDetails']['videoPublishedAt'] <= end_date_iso:
+            videos.append(VideoRecord.from_playlist_item(item))
+    return videos
+
+
+def playlist_page_before_range(items, start_date_iso):
+    """Whether every dated video of an uploads playlist page is older than the range.
+
+    The playlist runs newest first, so no later page can reach back into the range.
+    """
+    dates = [item['contentDetails']['videoPublishedAt'] for item in items
+             if 'videoPublishedAt' in item['contentDetails']]
+    return bool(dates) and max(dates) < start_date_iso
+
+
+def search_videos_in_range(items, start_date_iso, end_date_iso, seen):
+    """VideoRecords for the video results of one search page within the range, skipping IDs in seen."""
+    videos = []
+    for item in items:
+        video_id = item['id'].get('videoId')
+        if not video_id or video_id in seen:
+            continue
+        if start_date_iso <= item['snippet']['publishedAt'] <= end_date_iso:
+            seen.add(video_id)
+            videos.append(VideoRecord.from_search_result(item))
+    return videos
+
+
+def apply_video_details(batch, items):
+    """Update a batch of VideoRecords in place from the items of a videos.list response."""
+    # Map detailed data back to our list
+    id_to_index = {video.id: idx for idx, video in enumerate(batch)}
+    # Parse the whole batch's durations in one pass
+    durations = parse_durations_seconds(item.get('contentDetails', {}).get('duration', 'PT0S')
+                                        for item in items)
+    
+    for item, duration_seconds in zip(items, durations):
+        video_id = item['id']
+        if video_id in id_to_index:
+            idx = id_to_index[video_id]
+            
+            try:
+                # Add additional data to the video
+                batch[idx].apply_video_resource(item, duration_seconds)
+            except Exception as detail_error:
+                logger.error(f"Error processing video details for {video_id}: {detail_error}")
+
+
 class YouTubeAPI:
-    def __init__(self, api_key):
-        """Initialize the YouTube API client."""
+    def __init__(self, api_key, http=None, api_endpoint=YOUTUBE_API_ENDPOINT, hints=None, channel_cache=None):
+        """Initialize the YouTube API client.
+
+        Requests go through an ETag cache by default so repeated fetches of
+        unchanged resources are answered with 304 Not Modified. Channel
+        metadata and resolved channel IDs are kept in channel_cache, by default
+        the shared 'channels' cache when the default transport is used. hints
+        holds the playlist positions the listing planner learns from (see
+        planner.py). Both caches are shared by every worker process.
+        """
         self.api_key = api_key
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+        self.hints = hints if hints is not None else PlaylistHints()
+        if channel_cache is None and http is None:
+            channel_cache = open_channel_cache()
+        self.channel_cache = channel_cache
+        self.plan = None
+        self.http = InstrumentedHttp(http if http is not None else CachingHttp(), QUOTA_COSTS)
+        client_options = {'api_endpoint': api_endpoint} if api_endpoint else None
+        self.youtube = build('youtube', 'v3', developerKey=api_key, http=self.http,
+                             client_options=client_options)
         self.progress = {'status': 'Initializing', 'progress': 0}
         
     def get_progress(self):
@@ -26,6 +249,11 @@ class YouTubeAPI:
         """Fetch channel-level data for the given channel ID."""
         self.progress = {'status': 'Fetching channel data', 'progress': 10}
         
+        cached = cached_channel_data(self.channel_cache, channel_id)
+        if cached is not None:
+            self.progress = {'status': 'Channel data fetched successfully', 'progress': 20}
+            return cached
+        
         try:
             # Get channel details
             channel_response = self.youtube.channels().list(
@@ -37,67 +265,8 @@ class YouTubeAPI:
                 logger.error(f"No channel found with ID: {channel_id}")
                 return None
             
-            channel = channel_response['items'][0]
-            
-            # Extract basic channel info
-            custom_url = channel['snippet'].get('customUrl', '')
-            channel_url = f"https://www.youtube.com/channel/{channel['id']}"
-            
-            # If a custom URL exists, use it instead
-            if custom_url:
-                channel_url = f"https://www.youtube.com/{custom_url}"
-            
-            channel_published_at = channel['snippet']['publishedAt']
-            channel_data = {
-                'id': channel['id'],
-                'title': channel['snippet']['title'],
-                'description': channel['snippet']['description'],
-                'custom_url': custom_url,
-                'url': channel_url,
-                'published_at': channel_published_at,
-                'published_date': format_iso_date(channel_published_at),
-                'published_time': format_iso_time(channel_published_at),
-                'country': channel['snippet'].get('country', 'Unknown'),
-                'view_count': int(channel['statistics'].get('viewCount', 0)),
-                'subscriber_count': int(channel['statistics'].get('subscriberCount', 0)),
-                'video_count': int(channel['statistics'].get('videoCount', 0)),
-                'topic_categories': channel.get('topicDetails', {}).get('topicCategories', []),
-                'thumbnail_url': channel['snippet']['thumbnails'].get('high', {}).get('url', ''),
-                'banner_url': channel.get('brandingSettings', {}).get('image', {}).get('bannerExternalUrl', '')
-            }
-            
-            # Calculate upload frequency (estimated based on video count and channel age)
-            try:
-                published_at_str = channel['snippet']['publishedAt']
-                # Handle different datetime formats (with or without milliseconds)
-                try:
-                    if '.' in published_at_str:
-                        # Format with milliseconds
-                        published_at = datetime.strptime(published_at_str.split('.')[0] + 'Z', '%Y-%m-%dT%H:%M:%SZ')
-                    else:
-                        # Format without milliseconds
-                        published_at = datetime.strptime(published_at_str, '%Y-%m-%dT%H:%M:%SZ')
-                except ValueError:
-                    # Fallback with flexible parsing
-                    published_at = datetime.fromisoformat(published_at_str.replace('Z', '+00:00'))
-                
-                days_since_creation = max(1, (datetime.now() - published_at).days)  # Ensure at least 1 day
-                uploads_per_day = int(channel['statistics'].get('videoCount', 0)) / days_since_creation
-                uploads_per_week = uploads_per_day * 7
-                uploads_per_month = uploads_per_day * 30
-                
-                channel_data['upload_frequency'] = {
-                    'per_day': round(uploads_per_day, 2),
-                    'per_week': round(uploads_per_week, 2),
-                    'per_month': round(uploads_per_month, 2)
-                }
-            except Exception as e:
-                logger.warning(f"Could not calculate upload frequency: {e}")
-                channel_data['upload_frequency'] = {
-                    'per_day': 0,
-                    'per_week': 0,
-                    'per_month': 0
-                }
+            channel_data = build_channel_record(channel_response['items'][0]).to_dict()
+            cache_channel_data(self.channel_cache, channel_id, channel_data)
             
             self.progress = {'status': 'Channel data fetched successfully', 'progress': 20}
             return channel_data
@@ -114,38 +283,278 @@ class YouTubeAPI:
             logger.error(f"Error fetching channel data: {e}")
             raise Exception(f"Failed to fetch channel data: {str(e)}")
     
-    def get_videos_in_date_range(self, channel_id, start_date, end_date):
+    def get_playlist_data(self, playlist_id):
+        """Fetch a playlist's title, owner and size, or None if there is no such playlist."""
+        self.progress = {'status': 'Fetching playlist data', 'progress': 10}
+        
+        try:
+            playlist_response = self.youtube.playlists().list(
+                part='snippet,contentDetails',
+                id=playlist_id
+            ).execute()
+        except HttpError as e:
+            logger.error(f"HTTP error when fetching playlist data: {e}")
+            if e.resp.status == 403:
+                raise Exception("API quota exceeded or insufficient permissions")
+            elif e.resp.status == 404:
+                return None
+            raise Exception(f"API error: {e}")
+        
+        if not playlist_response['items']:
+            logger.error(f"No playlist found with ID: {playlist_id}")
+            return None
+        return build_playlist_data(playlist_response['items'][0])
+    
+    def get_videos_in_date_range(self, channel_id, start_date, end_date, max_videos=None):
         """Get all videos for a channel within the specified date range."""
+        try:
+            batches = self.iter_video_comments(iter_video_links(self.iter_video_details(
+                self.iter_videos_in_date_range(channel_id, start_date, end_date, max_videos))))
+            videos = [video for batch in batches for video in records_to_dicts(batch)]
+
+            if not videos:
+                logger.warning("No videos found in the specified date range.")
+            return videos
+        
+        except HttpError as e:
+            logger.error(f"HTTP error when fetching videos: {e}")
+            if e.resp.status == 403:
+                raise Exception("API quota exceeded or insufficient permissions")
+            else:
+                raise Exception(f"API error: {e}")
+        except Exception as e:
+            logger.error(f"Error fetching videos: {e}")
+            raise Exception(f"Failed to fetch videos: {str(e)}")
+    
+    def iter_videos_in_date_range(self, channel_id, start_date, end_date, max_videos=None, batch_size=50,
+                                  strategy=None):
+        """Yield VideoRecords for the channel's videos in the date range, in batches of up to batch_size.
+
+        The planner chooses between walking the uploads playlist and a
+        date-bounded search (strategy forces one, see planner.py); the chosen
+        plan is kept in self.plan. Either way videos arrive newest first and
+        only a page and a batch are held in memory. max_videos defaults to
+        MAX_VIDEOS_TO_PROCESS; 0 lifts the limit.
+        """
+        if max_videos is None:
+            max_videos = MAX_VIDEOS_TO_PROCESS
         self.progress = {'status': 'Fetching video list', 'progress': 30}
         
+        # Convert dates to ISO format for API
+        start_date_iso, end_date_iso = date_range_bounds(start_date, end_date)
+        
+        # Get uploads playlist ID (all videos are in this playlist), and the channel's size and age for planning
+        channel_response = self.youtube.channels().list(
+            part='snippet,contentDetails,statistics',
+            id=channel_id
+        ).execute()
+        
+        if not channel_response['items']:
+            logger.error(f"No channel found with ID: {channel_id}")
+            return
+        
+        channel = channel_response['items'][0]
+        uploads_playlist_id = channel['contentDetails']['relatedPlaylists']['uploads']
+        
+        # Get total video count to check if it's a large channel
+        total_video_count = int(channel['statistics'].get('videoCount', 0))
+        logger.debug(f"Channel has {total_video_count} total videos")
+        
+        self.plan = plan_for_channel(channel, start_date_iso, end_date_iso, max_videos, self.hints, strategy)
+        logger.info(f"Listing videos of {channel_id}: {self.plan!r}")
+        if self.plan.strategy == 'search':
+            videos = self._iter_search_results(channel_id, split_window(start_date_iso, end_date_iso,
+                                                                        self.plan.search_windows),
+                                               start_date_iso, end_date_iso)
+        else:
+            videos = self._iter_uploads_playlist(channel_id, uploads_playlist_id, total_video_count,
+                                                 start_date_iso, end_date_iso)
+        
+        batch = []
+        found = 0
         try:
-            # Convert dates to ISO format for API
-            start_date_iso = start_date.isoformat() + 'Z' if isinstance(start_date, datetime) else start_date + 'T00:00:00Z'
-            end_date_iso = end_date.isoformat() + 'Z' if isinstance(end_date, datetime) else end_date + 'T23:59:59Z'
-            
-            # Get uploads playlist ID (all videos are in this playlist)
-            channel_response = self.youtube.channels().list(
-                part='contentDetails,statistics',
-                id=channel_id
-            ).execute()
-            
-            if not channel_response['items']:
-                logger.error(f"No channel found with ID: {channel_id}")
-                return []
-            
-            uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-            
-            # Get total video count to check if it's a large channel
-            total_video_count = int(channel_response['items'][0]['statistics'].get('videoCount', 0))
-            logger.debug(f"Channel has {total_video_count} total videos")
-            
-            # Limit the number of videos to process
-            MAX_VIDEOS_TO_PROCESS = 3000
+            for video in videos:
+                batch.append(video)
+                found += 1
+                if len(batch) == batch_size:
+                    self.progress = {'status': f'Found {found} videos in date range so far', 'progress': 40}
+                    yield batch
+                    batch = []
+                # Limit the number of videos collected
+                if max_videos and found >= max_videos:
+                    logger.warning(f"Reached video limit ({max_videos}). Stopping further collection.")
+                    break
+        finally:
+            videos.close()
+        
+        if batch:
+            yield batch
+        self.progress = {'status': f'Found {found} videos in date range', 'progress': 50}
+    
+    def estimate_scrape(self, channel_data, start_date, end_date, max_videos=None):
+        """Estimated quota cost of scraping a channel over the date range, without any API call.
+
+        channel_data is the get_channel_data() dict. Prices the listing the
+        planner would choose with the playlist hints recorded so far, plus the
+        channels.list call that starts it and one comment page per video of a
+        trailing batch small enough to get comments (see iter_video_comments).
+        """
+        if max_videos is None:
+            max_videos = MAX_VIDEOS_TO_PROCESS
+        start_date_iso, end_date_iso = date_range_bounds(start_date, end_date)
+        video_count = int(channel_data.get('video_count') or 0)
+        samples = self.hints.lookup(channel_data['id'], video_count) if self.hints is not None else ()
+        plan = plan_listing(video_count, channel_data.get('published_at'), start_date_iso, end_date_iso,
+                            max_videos, samples)
+        videos = min(plan.window_videos, max_videos) if max_videos else plan.window_videos
+        listing = plan.estimates[plan.strategy]
+        comment_units = comment_fetch_videos(videos) * QUOTA_COSTS['commentThreads']
+        return {
+            'strategy': plan.strategy,
+            'videos': videos,
+            'listing_units': QUOTA_COSTS['channels'] + listing['units'],
+            'comment_units': comment_units,
+            'units': QUOTA_COSTS['channels'] + listing['units'] + comment_units,
+            'listing_seconds': listing['seconds']
+        }
+    
+    def estimate_playlist_scrape(self, playlist_data, max_videos=None):
+        """Estimated quota cost of scraping a whole playlist (a get_playlist_data() dict).
+
+        The date range of a playlist scrape is applied to the listed videos,
+        so every page is read; details are priced for every video, comments
+        for a trailing batch small enough to get them (see iter_video_comments).
+        """
+        if max_videos is None:
+            max_videos = MAX_VIDEOS_TO_PROCESS
+        item_count = playlist_data.get('item_count', 0)
+        videos = min(item_count, max_videos) if max_videos else item_count
+        pages = -(-item_count // 50) or 1
+        listing_units = pages * QUOTA_COSTS['playlistItems'] + -(-videos // 50) * QUOTA_COSTS['videos']
+        comment_units = comment_fetch_videos(videos) * QUOTA_COSTS['commentThreads']
+        return {
+            'strategy': 'playlist',
+            'videos': videos,
+            'listing_units': listing_units,
+            'comment_units': comment_units,
+            'units': listing_units + comment_units,
+            'listing_seconds': None
+        }
+    
+    def iter_playlist_videos(self, playlist_id, start_date, end_date, max_videos=None, batch_size=50):
+        """Yield VideoRecords for a playlist's videos published in the date range, in batches of up to batch_size.
+
+        Playlists other than a channel's uploads are not ordered by date, so
+        every page is read. Empty dates leave that end of the range open.
+        max_videos defaults to MAX_VIDEOS_TO_PROCESS; 0 lifts the limit.
+        """
+        if max_videos is None:
+            max_videos = MAX_VIDEOS_TO_PROCESS
+        self.progress = {'status': 'Fetching playlist videos', 'progress': 30}
+        start_date_iso, end_date_iso = date_range_bounds(start_date, end_date)
+        
+        batch = []
+        found = 0
+        scanned = 0
+        next_page_token = None
+        while True:
+            try:
+                playlist_response = self.youtube.playlistItems().list(
+                    part='snippet,contentDetails',
+                    playlistId=playlist_id,
+                    maxResults=50,
+                    pageToken=next_page_token
+                ).execute()
+            except HttpError as e:
+                logger.error(f"HTTP error when fetching playlist items: {e}")
+                if e.resp.status == 403:
+                    logger.warning("API quota limit reached. Continuing with videos collected so far.")
+                    break
+                raise
             
-            # Get videos from uploads playlist
-            videos = []
-            next_page_token = None
+            scanned += len(playlist_response['items'])
+            for video in playlist_videos_in_range(playlist_response['items'], start_date_iso, end_date_iso):
+                batch.append(video)
+                found += 1
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+                if max_videos and found >= max_videos:
+                    logger.warning(f"Reached video limit ({max_videos}). Stopping further collection.")
+                    break
+            self.progress = {'status': f'Scanned {scanned} videos of the playlist', 'progress': 40}
             
+            next_page_token = playlist_response.get('nextPageToken')
+            if not next_page_token or (max_videos and found >= max_videos):
+                break
+        
+        if batch:
+            yield batch
+        self.progress = {'status': f'Found {found} videos in the playlist', 'progress': 50}
+    
+    def iter_videos_by_id(self, video_ids, batch_size=50):
+        """Yield bare VideoRecords for explicit video IDs, in batches of up to batch_size for the detail stage.
+
+        No listing calls are made: a lookup costs one videos.list call per
+        batch, which also fills in each video's title and publish date.
+        """
+        for start in range(0, len(video_ids), batch_size):
+            self.progress = {'status': f'Looking up videos {start + 1}-{min(start + batch_size, len(video_ids))} '
+                                       f'of {len(video_ids)}', 'progress': 40}
+            yield [VideoRecord(video_id, '', '', '') for video_id in video_ids[start:start + batch_size]]
+    
+    def get_playlist_page(self, playlist_id, page_token=None):
+        """One page of a playlist's video IDs: ([(video ID, videoPublishedAt)], next page token).
+
+        One quota unit; the watchlist uses it to find new uploads. A missing
+        playlist is an empty page.
+        """
+        try:
+            playlist_response = self.youtube.playlistItems().list(
+                part='contentDetails',
+                playlistId=playlist_id,
+                maxResults=50,
+                pageToken=page_token
+            ).execute()
+        except HttpError as e:
+            logger.error(f"HTTP error when fetching playlist items: {e}")
+            if e.resp.status == 403:
+                raise Exception("API quota exceeded or insufficient permissions")
+            elif e.resp.status == 404:
+                return [], None
+            raise Exception(f"API error: {e}")
+        videos = [(item['contentDetails']['videoId'], item['contentDetails'].get('videoPublishedAt', ''))
+                  for item in playlist_response['items']]
+        return videos, playlist_response.get('nextPageToken')
+    
+    def get_video_statistics(self, video_ids, snippet=False):
+        """videos.list items of up to 50 video IDs keyed by ID, with statistics and, if asked, the snippet.
+
+        One quota unit however many IDs are passed. Deleted and private
+        videos are missing from the result.
+        """
+        try:
+            video_response = self.youtube.videos().list(
+                part='snippet,statistics' if snippet else 'statistics',
+                id=','.join(video_ids)
+            ).execute()
+        except HttpError as e:
+            logger.error(f"HTTP error when fetching video statistics: {e}")
+            if e.resp.status == 403:
+                raise Exception("API quota exceeded or insufficient permissions")
+            raise Exception(f"API error: {e}")
+        return {item['id']: item for item in video_response.get('items', [])}
+    
+    def _iter_uploads_playlist(self, channel_id, uploads_playlist_id, video_count, start_date_iso, end_date_iso):
+        """Yield the range's VideoRecords from the uploads playlist, stopping after the first page older than it.
+
+        The position and date of each page's first video are recorded as
+        hints for planning later scrapes of the channel.
+        """
+        samples = []
+        scanned = 0
+        next_page_token = None
+        try:
             while True:
                 try:
                     playlist_response = self.youtube.playlistItems().list(
@@ -154,228 +563,127 @@ class YouTubeAPI:
                         maxResults=50,
                         pageToken=next_page_token
                     ).execute()
-                    
-                    # Process each video in the page
-                    for item in playlist_response['items']:
-                        # Handle videos where the publishedAt field might be missing
-                        if 'videoPublishedAt' not in item['contentDetails']:
-                            continue
-                            
-                        published_at = item['contentDetails']['videoPublishedAt']
-                        
-                        # Check if video is within date range
-                        if start_date_iso <= published_at <= end_date_iso:
-                            video_id = item['contentDetails']['videoId']
-                            video_published_at = published_at
-                            videos.append({
-                                'id': video_id,
-                                'title': item['snippet']['title'],
-                                'description': item['snippet']['description'],
-                                'published_at': video_published_at,
-                                'published_date': format_iso_date(video_published_at),
-                                'published_time': format_iso_time(video_published_at),
-                                'thumbnail_url': item['snippet']['thumbnails'].get('high', {}).get('url', '')
-                            })
-                    
-                    # Limit the number of videos collected
-                    if len(videos) >= MAX_VIDEOS_TO_PROCESS:
-                        logger.warning(f"Reached video limit ({MAX_VIDEOS_TO_PROCESS}). Stopping further collection.")
-                        break
-
-                    next_page_token = playlist_response.get('nextPageToken')
-                    if not next_page_token:
-                        break
-                    
                 except HttpError as e:
                     logger.error(f"HTTP error when fetching playlist items: {e}")
-                    # If we hit an API quota error, break out of the loop with what we have
+                    # If we hit an API quota error, stop with what we have
                     if e.resp.status == 403:
                         logger.warning("API quota limit reached. Continuing with videos collected so far.")
                         break
                     raise
-                
                 except Exception as e:
                     logger.error(f"Error fetching playlist items: {e}")
                     # Continue with the videos we've collected so far
                     break
-            
-            # Ensure the limit is strictly enforced (in case batch fetching goes slightly over)
-            if len(videos) > MAX_VIDEOS_TO_PROCESS:
-                logger.info(f"Trimming video list from {len(videos)} to {MAX_VIDEOS_TO_PROCESS}")
-                videos = videos[:MAX_VIDEOS_TO_PROCESS]
-
-            # Update progress
-            video_count = len(videos)
-            self.progress = {'status': f'Found {video_count} videos in date range', 'progress': 50}
-            
-            if video_count == 0:
-                logger.warning("No videos found in the specified date range.")
-                return []
                 
-            # Get detailed data for each video
-            return self._get_video_details(videos)
-        
-        except HttpError as e:
-            logger.error(f"HTTP error when fetching videos: {e}")
-            if e.resp.status == 403:
-                raise Exception("API quota exceeded or insufficient permissions")
+                items = playlist_response['items']
+                if items and 'videoPublishedAt' in items[0]['contentDetails']:
+                    samples.append((scanned, items[0]['contentDetails']['videoPublishedAt']))
+                scanned += len(items)
+                
+                # Process each video in the page
+                yield from playlist_videos_in_range(items, start_date_iso, end_date_iso)
+                self.progress = {'status': f'Scanned {scanned} videos of the uploads playlist', 'progress': 40}
+                
+                if playlist_page_before_range(items, start_date_iso):
+                    break
+                next_page_token = playlist_response.get('nextPageToken')
+                if not next_page_token:
+                    break
+        finally:
+            self.hints.record(channel_id, video_count, samples)
+    
+    def _iter_search_results(self, channel_id, windows, start_date_iso, end_date_iso):
+        """Yield the range's VideoRecords from date-bounded searches over windows (newest first).
+
+        A window holding more videos than one query can page through is
+        halved and searched again.
+        """
+        windows = list(windows)
+        seen = set()
+        searched = 0
+        while windows:
+            published_after, published_before = windows.pop(0)
+            next_page_token = None
+            while True:
+                try:
+                    search_response = self.youtube.search().list(
+                        part='snippet',
+                        channelId=channel_id,
+                        type='video',
+                        order='date',
+                        publishedAfter=published_after,
+                        publishedBefore=published_before,
+                        maxResults=50,
+                        pageToken=next_page_token
+                    ).execute()
+                except HttpError as e:
+                    logger.error(f"HTTP error when searching videos: {e}")
+                    if e.resp.status == 403:
+                        logger.warning("API quota limit reached. Continuing with videos collected so far.")
+                        return
+                    raise
+                except Exception as e:
+                    logger.error(f"Error searching videos: {e}")
+                    return
+                
+                if (next_page_token is None
+                        and search_response.get('pageInfo', {}).get('totalResults', 0) > SEARCH_RESULT_LIMIT):
+                    halves = halve_window(published_after, published_before)
+                    if halves:
+                        logger.debug(f"Splitting search window {published_after} - {published_before}")
+                        windows[:0] = halves
+                        break
+                
+                searched += len(search_response['items'])
+                yield from search_videos_in_range(search_response['items'], start_date_iso, end_date_iso, seen)
+                self.progress = {'status': f'Searched {searched} videos in date range', 'progress': 40}
+                
+                next_page_token = search_response.get('nextPageToken')
+                if not next_page_token:
+                    break
+    
+    def iter_video_details(self, batches):
+        """Add statistics and content details to each batch of videos as it arrives."""
+        processed = 0
+        for batch in batches:
+            self.progress = {'status': f'Fetching details for videos {processed+1}-{processed+len(batch)}',
+                             'progress': 60}
+            self._fetch_video_details(batch)
+            processed += len(batch)
+            yield batch
+        self.progress = {'status': 'Video data collection complete', 'progress': 100}
+    
+    def iter_video_comments(self, batches, max_results=20):
+        """Attach comments to each batch of videos as it arrives.
+
+        Comments are only fetched for small batches to reduce API usage.
+        """
+        for batch in batches:
+            if len(batch) <= COMMENTS_BATCH_LIMIT:
+                for video in batch:
+                    try:
+                        video.comments = self._get_video_comments(video.id, max_results=max_results)
+                    except Exception as e:
+                        logger.warning(f"Could not get comments for video {video.id}: {e}")
+                        video.comments = []
             else:
-                raise Exception(f"API error: {e}")
-        except Exception as e:
-            logger.error(f"Error fetching videos: {e}")
-            raise Exception(f"Failed to fetch videos: {str(e)}")
+                logger.info(f"Skipping comment retrieval for large batch of {len(batch)} videos to reduce API usage")
+                for video in batch:
+                    video.comments = []
+            yield batch
     
     def _get_video_details(self, videos):
         """Get detailed information for a list of videos."""
-        total_videos = len(videos)
-        if total_videos == 0:
+        if not videos:
             return []
         
+        # YouTube API allows up to 50 videos per request
+        batch_size = 50
+        records = [VideoRecord.from_dict(video) for video in videos]
+        batches = (records[i:i+batch_size] for i in range(0, len(records), batch_size))
         try:
-            # Process videos in batches to respect API limits
-            batch_size = 50  # YouTube API allows up to 50 videos per request
-            detailed_videos = []
-            
-            # Set a maximum number of attempts for each batch
-            MAX_ATTEMPTS = 3
-            
-            for i in range(0, total_videos, batch_size):
-                batch = videos[i:i+batch_size]
-                
-                # Update progress
-                progress_pct = 50 + (i / total_videos) * 40
-                self.progress = {'status': f'Fetching details for videos {i+1}-{i+len(batch)} of {total_videos}', 
-                                'progress': progress_pct}
-                
-                # Extract video IDs for the batch
-                video_ids = [video['id'] for video in batch]
-                
-                # Try multiple times with error handling
-                attempt = 0
-                success = False
-                
-                while attempt < MAX_ATTEMPTS and not success:
-                    try:
-                        # Get video details
-                        video_response = self.youtube.videos().list(
-                            part='snippet,contentDetails,statistics',
-                            id=','.join(video_ids)
-                        ).execute()
-                        
-                        # If we get here, the API call was successful
-                        success = True
-                        
-                        # Map detailed data back to our list
-                        id_to_index = {video['id']: idx for idx, video in enumerate(batch)}
-                        
-                        for item in video_response.get('items', []):
-                            video_id = item['id']
-                            if video_id in id_to_index:
-                                idx = id_to_index[video_id]
-                                
-                                try:
-                                    # Add additional data to the video
-                                    batch[idx].update({
-                                        'duration': format_duration(item['contentDetails'].get('duration', 'PT0S')),
-                                        'dimension': item['contentDetails'].get('dimension', 'N/A'),
-                                        'definition': item['contentDetails'].get('definition', 'N/A'),
-                                        'caption': item['contentDetails'].get('caption', 'N/A') == 'true',
-                                        'licensed_content': item['contentDetails'].get('licensedContent', False),
-                                        'projection': item['contentDetails'].get('projection', 'N/A'),
-                                        'view_count': int(item['statistics'].get('viewCount', 0)),
-                                        'like_count': int(item['statistics'].get('likeCount', 0)),
-                                        'comment_count': int(item['statistics'].get('commentCount', 0)),
-                                        'tags': item['snippet'].get('tags', []),
-                                        'category_id': item['snippet'].get('categoryId', 'N/A'),
-                                        'live_broadcast_content': item['snippet'].get('liveBroadcastContent', 'none'),
-                                        'default_language': item['snippet'].get('defaultLanguage', 'N/A'),
-                                        'localized': item['snippet'].get('localized', {}),
-                                        'default_audio_language': item['snippet'].get('defaultAudioLanguage', 'N/A'),
-                                        'video_url': f"https://www.youtube.com/watch?v={video_id}"
-                                    })
-                                    
-                                    # Calculate engagement rate
-                                    view_count = batch[idx].get('view_count', 0)
-                                    if view_count > 0:
-                                        likes = batch[idx].get('like_count', 0)
-                                        comments = batch[idx].get('comment_count', 0)
-                                        batch[idx]['engagement_rate'] = ((likes + comments) / view_count) * 100
-                                    else:
-                                        batch[idx]['engagement_rate'] = 0
-                                        
-                                    # Extract URLs from description
-                                    description = batch[idx].get('description', '')
-                                    urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', 
-                                                    description)
-                                    batch[idx]['description_urls'] = urls
-                                except Exception as detail_error:
-                                    logger.error(f"Error processing video details for {video_id}: {detail_error}")
-                                    # Ensure the video has at least engagement_rate set to avoid template errors
-                                    if 'engagement_rate' not in batch[idx]:
-                                        batch[idx]['engagement_rate'] = 0
-                        
-                        # Get comments for each video in the batch (if available)
-                        # Skip comments for large batches to reduce API calls
-                        if len(batch) <= 10:
-                            for video in batch:
-                                try:
-                                    video['comments'] = self._get_video_comments(video['id'], max_results=20)
-                                except Exception as e:
-                                    logger.warning(f"Could not get comments for video {video['id']}: {e}")
-                                    video['comments'] = []
-                        else:
-                            logger.info(f"Skipping comment retrieval for large batch of {len(batch)} videos to reduce API usage")
-                            for video in batch:
-                                video['comments'] = []
-                        
-                    except HttpError as e:
-                        attempt += 1
-                        logger.error(f"HTTP error when fetching video details (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
-                        
-                        # If quota exceeded, no point in retrying
-                        if e.resp.status == 403:
-                            logger.warning("API quota exceeded. Skipping further requests for this batch.")
-                            # Skip retries for quota errors
-                            attempt = MAX_ATTEMPTS
-                            # Add minimal data so the template doesn't break
-                            for video in batch:
-                                if 'engagement_rate' not in video:
-                                    video['engagement_rate'] = 0
-                                if 'comments' not in video:
-                                    video['comments'] = []
-                        
-                        # For other errors, wait briefly before retrying
-                        elif attempt < MAX_ATTEMPTS:
-                            import time
-                            time.sleep(2)  # Wait 2 seconds before retry
-                    
-                    except Exception as e:
-                        attempt += 1
-                        logger.error(f"General error when fetching video details (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
-                        
-                        # Add minimal data so the template doesn't break
-                        for video in batch:
-                            if 'engagement_rate' not in video:
-                                video['engagement_rate'] = 0
-                            if 'comments' not in video:
-                                video['comments'] = []
-                                
-                        # For errors, wait briefly before retrying
-                        if attempt < MAX_ATTEMPTS:
-                            import time
-                            time.sleep(2)  # Wait 2 seconds before retry
-                
-                # If we couldn't get details after MAX_ATTEMPTS, use basic info we already have
-                if not success:
-                    logger.warning(f"Failed to get detailed data for batch after {MAX_ATTEMPTS} attempts. Using basic data.")
-                    
-                # Add the batch to detailed_videos regardless of success
-                # This ensures we always return at least the basic data we had
-                detailed_videos.extend(batch)
-            
-            self.progress = {'status': 'Video data collection complete', 'progress': 100}
-            return detailed_videos
-            
+            batches = self.iter_video_comments(iter_video_links(self.iter_video_details(batches)))
+            return [video for batch in batches for video in records_to_dicts(batch)]
         except HttpError as e:
             logger.error(f"HTTP error when fetching video details: {e}")
             if e.resp.status == 403:
@@ -386,6 +694,59 @@ class YouTubeAPI:
             logger.error(f"Error fetching video details: {e}")
             raise Exception(f"Failed to fetch video details: {str(e)}")
     
+    def _fetch_video_details(self, batch):
+        """Fetch details for one batch of up to 50 VideoRecords and update them in place."""
+        # Set a maximum number of attempts for each batch
+        MAX_ATTEMPTS = 3
+        
+        # Extract video IDs for the batch
+        video_ids = [video.id for video in batch]
+        
+        # Try multiple times with error handling
+        attempt = 0
+        success = False
+        
+        while attempt < MAX_ATTEMPTS and not success:
+            try:
+                # Get video details
+                video_response = self.youtube.videos().list(
+                    part='snippet,contentDetails,statistics',
+                    id=','.join(video_ids)
+                ).execute()
+                
+                # If we get here, the API call was successful
+                success = True
+                apply_video_details(batch, video_response.get('items', []))
+                
+            except HttpError as e:
+                attempt += 1
+                logger.error(f"HTTP error when fetching video details (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+                
+                # If quota exceeded, no point in retrying
+                if e.resp.status == 403:
+                    logger.warning("API quota exceeded. Skipping further requests for this batch.")
+                    # Skip retries for quota errors
+                    attempt = MAX_ATTEMPTS
+                
+                # For other errors, wait briefly before retrying
+                elif attempt < MAX_ATTEMPTS:
+                    API_RETRIES.inc(endpoint='videos')
+                    time.sleep(2)  # Wait 2 seconds before retry
+            
+            except Exception as e:
+                attempt += 1
+                logger.error(f"General error when fetching video details (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+                
+                # For errors, wait briefly before retrying
+                if attempt < MAX_ATTEMPTS:
+                    API_RETRIES.inc(endpoint='videos')
+                    time.sleep(2)  # Wait 2 seconds before retry
+        
+        # If we couldn't get details after MAX_ATTEMPTS, use basic info we already have
+        if not success:
+            logger.warning(f"Failed to get detailed data for batch after {MAX_ATTEMPTS} attempts. Using basic data.")
+        return success
+    
     def _get_video_comments(self, video_id, max_results=20):
         """Get comments for a video, limited to max_results."""
         try:
@@ -402,20 +763,7 @@ class YouTubeAPI:
                 ).execute()
                 
                 for item in comment_response['items']:
-                    comment = item['snippet']['topLevelComment']['snippet']
-                    comment_published_at = comment['publishedAt']
-                    comment_updated_at = comment['updatedAt']
-                    comments.append({
-                        'author': comment['authorDisplayName'],
-                        'text': comment['textDisplay'],
-                        'like_count': comment['likeCount'],
-                        'published_at': comment_published_at,
-                        'published_date': format_iso_date(comment_published_at),
-                        'published_time': format_iso_time(comment_published_at),
-                        'updated_at': comment_updated_at,
-                        'updated_date': format_iso_date(comment_updated_at),
-                        'updated_time': format_iso_time(comment_updated_at)
-                    })
+                    comments.append(CommentRecord.from_api(item))
                 
                 next_page_token = comment_response.get('nextPageToken')
                 if not next_page_token or len(comments) >= max_results:
@@ -434,3 +782,34 @@ class YouTubeAPI:
         except Exception as e:
             logger.warning(f"Error fetching comments for video {video_id}: {e}")
             return []
+
+
+class ClientPool:
+    """Idle YouTubeAPI clients by API key, handed from a channel resolution to the scrape that follows.
+
+    A client that has resolved a channel already holds an open connection to
+    the API, so the scrape taking it over skips the TCP and TLS handshakes.
+    take() removes the client from the pool, so only one request uses it at
+    a time; clients idle for longer than ttl are dropped.
+    """
+
+    def __init__(self, ttl=CLIENT_POOL_TTL, max_size=CLIENT_POOL_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clients = OrderedDict()  # api key -> (client, parked at)
+        self._lock = threading.Lock()
+
+    def put(self, api_key, client):
+        with self._lock:
+            self._clients.pop(api_key, None)
+            self._clients[api_key] = (client, time.monotonic())
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+
+    def take(self, api_key):
+        """The idle client of api_key, or None."""
+        with self._lock:
+            entry = self._clients.pop(api_key, None)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        return entry[0]
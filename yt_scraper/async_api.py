@@ -0,0 +1,604 @@
+"""
+Asynchronous scrape engine.
+
+AsyncYouTubeAPI has the same surface as YouTubeAPI, with coroutines and async
+generators in place of blocking calls, and talks to the Data API over one
+pooled aiohttp session. Within a scrape, the uploads playlist is paged by a
+producer task while detail batches and comment fetches run as concurrent tasks,
+bounded by semaphores; batches still come out in playlist order.
+
+Several AsyncYouTubeAPI instances can share one session (and so one connection
+pool), which lets a single process drive many scrapes at once:
+
+    results = asyncio.run(scrape_channels(api_key, [(channel_id, start, end), ...]))
+
+Bulk lookups of explicit video IDs skip listing and go straight to the
+concurrent detail stage:
+
+    videos = asyncio.run(lookup_videos(api_key, video_ids))
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from urllib.parse import urlencode
+import aiohttp
+from .api import (YOUTUBE_API_ENDPOINT, QUOTA_COSTS, MAX_VIDEOS_TO_PROCESS, COMMENTS_BATCH_LIMIT,
+                  build_channel_record, build_playlist_data, date_range_bounds, playlist_videos_in_range,
+                  playlist_page_before_range, search_videos_in_range, apply_video_details,
+                  drop_missing_videos, open_channel_cache, cached_channel_data, cache_channel_data)
+from .planner import PlaylistHints, plan_for_channel, split_window, halve_window, SEARCH_RESULT_LIMIT
+from .records import VideoRecord, CommentRecord, records_to_dicts
+from .links import apply_video_links
+from .http_cache import ETagCache, CACHED_HEADERS, cache_key
+from .metrics import API_REQUESTS, API_LATENCY, API_QUOTA_UNITS, API_RETRIES, HTTP_CACHE_REQUESTS
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+YOUTUBE_API_ROOT = 'https://youtube.googleapis.com/'
+
+# Connections in the shared pool, and API requests in flight per scrape
+ASYNC_MAX_CONNECTIONS = int(os.environ.get('YT_ASYNC_MAX_CONNECTIONS', '64'))
+ASYNC_MAX_REQUESTS = int(os.environ.get('YT_ASYNC_MAX_REQUESTS', '16'))
+# Detail batches and comment fetches in flight per scrape
+DETAIL_CONCURRENCY = 4
+COMMENT_CONCURRENCY = 8
+# Playlist pages fetched ahead of the detail stage
+PLAYLIST_PREFETCH = 4
+REQUEST_TIMEOUT = 60
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 2
+
+
+class AsyncHttpError(Exception):
+    """An API call answered with an HTTP error status."""
+
+    def __init__(self, status, reason, message):
+        super().__init__(f"HTTP {status} {reason}: {message}")
+        self.status = status
+        self.reason = reason
+
+
+def _http_error(status, body):
+    try:
+        error = json.loads(body)['error']
+        reason = (error.get('errors') or [{}])[0].get('reason', '')
+        message = error.get('message', '')
+    except (ValueError, KeyError, TypeError, AttributeError):
+        reason, message = '', body[:200].decode('utf-8', 'replace')
+    return AsyncHttpError(status, reason, message)
+
+
+async def _prefetch(batches, depth):
+    """Run an async generator ahead of its consumer in a task, buffering up to depth items."""
+    queue = asyncio.Queue(maxsize=depth)
+    done = object()
+
+    async def produce():
+        try:
+            async for batch in batches:
+                await queue.put(batch)
+        except BaseException as e:
+            await queue.put(e)
+            return
+        await queue.put(done)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+
+
+async def _ordered_map(func, batches, concurrency):
+    """Apply a coroutine function to each batch with up to concurrency calls in flight, yielding in order."""
+    pending = deque()
+    try:
+        async for batch in batches:
+            pending.append(asyncio.ensure_future(func(batch)))
+            if len(pending) >= concurrency:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _drop_missing(batches):
+    async for batch in batches:
+        found = drop_missing_videos(batch)
+        if found:
+            yield found
+
+
+class AsyncYouTubeAPI:
+    def __init__(self, api_key, session=None, cache=None, api_endpoint=YOUTUBE_API_ENDPOINT,
+                 max_requests=ASYNC_MAX_REQUESTS, hints=None):
+        """Initialize the async YouTube API client.
+
+        Pass a shared aiohttp session to pool connections across scrapes; one
+        is created on first use otherwise, and closed by close(). Requests are
+        revalidated through the same ETag cache as YouTubeAPI, and channel
+        metadata is kept in the same shared channel cache; cache=False turns
+        both off. hints is shared with the listing planner as in YouTubeAPI.
+        """
+        self.api_key = api_key
+        # One small SQLite read and write per scrape, done inline
+        self.hints = hints if hints is not None else PlaylistHints()
+        self.plan = None
+        self.base_url = (api_endpoint or YOUTUBE_API_ROOT) + 'youtube/v3/'
+        self.cache = ETagCache() if cache is None else (cache or None)
+        self.channel_cache = open_channel_cache() if self.cache is not None else None
+        self.progress = {'status': 'Initializing', 'progress': 0}
+        self._session = session
+        self._owns_session = session is None
+        self._requests = asyncio.Semaphore(max_requests)
+        self._comments = asyncio.Semaphore(COMMENT_CONCURRENCY)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def get_progress(self):
+        """Get the current progress of data collection."""
+        return self.progress
+
+    async def _get(self, endpoint, **params):
+        """GET one API endpoint and return the decoded JSON body, raising AsyncHttpError on errors."""
+        if self._session is None:
+            self._session = create_session()
+        query = {name: value for name, value in params.items() if value is not None}
+        query.update(key=self.api_key, alt='json')
+        url = f"{self.base_url}{endpoint}?{urlencode(query)}"
+        key = cache_key(url) if self.cache is not None else None
+        # The shared caches do blocking I/O (SQLite or Redis), so they run off the event loop
+        cached = await asyncio.to_thread(self.cache.get, key) if key else None
+        headers = {'If-None-Match': cached[0]['etag']} if cached and cached[0].get('etag') else None
+
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            async with self._requests:
+                async with self._session.get(url, headers=headers) as response:
+                    body = await response.read()
+                    status = str(response.status)
+                    etag = response.headers.get('ETag')
+                    response_headers = {name: response.headers[name] for name in CACHED_HEADERS
+                                        if name in response.headers}
+        finally:
+            API_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+            API_REQUESTS.inc(endpoint=endpoint, status=status)
+            API_QUOTA_UNITS.inc(QUOTA_COSTS.get(endpoint, 1), endpoint=endpoint)
+
+        if key:
+            if status == '304' and cached:
+                HTTP_CACHE_REQUESTS.inc(result='hit')
+                return json.loads(cached[1])
+            HTTP_CACHE_REQUESTS.inc(result='miss')
+        if int(status) >= 400:
+            raise _http_error(int(status), body)
+        if key and status == '200' and etag:
+            await asyncio.to_thread(self.cache.put, key, {'etag': etag, 'headers': response_headers}, body)
+        return json.loads(body)
+
+    async def get_channel_data(self, channel_id):
+        """Fetch channel-level data for the given channel ID."""
+        self.progress = {'status': 'Fetching channel data', 'progress': 10}
+
+        cached = await asyncio.to_thread(cached_channel_data, self.channel_cache, channel_id)
+        if cached is not None:
+            self.progress = {'status': 'Channel data fetched successfully', 'progress': 20}
+            return cached
+
+        try:
+            channel_response = await self._get('channels', part='snippet,contentDetails,statistics,brandingSettings',
+                                               id=channel_id)
+            if not channel_response['items']:
+                logger.error(f"No channel found with ID: {channel_id}")
+                return None
+
+            channel_data = build_channel_record(channel_response['items'][0]).to_dict()
+            await asyncio.to_thread(cache_channel_data, self.channel_cache, channel_id, channel_data)
+            self.progress = {'status': 'Channel data fetched successfully', 'progress': 20}
+            return channel_data
+
+        except AsyncHttpError as e:
+            logger.error(f"HTTP error when fetching channel data: {e}")
+            if e.status == 403:
+                raise Exception("API quota exceeded or insufficient permissions")
+            elif e.status == 404:
+                raise Exception("Channel not found")
+            else:
+                raise Exception(f"API error: {e}")
+        except Exception as e:
+            logger.error(f"Error fetching channel data: {e}")
+            raise Exception(f"Failed to fetch channel data: {str(e)}")
+
+    async def get_playlist_data(self, playlist_id):
+        """Fetch a playlist's title, owner and size, or None if there is no such playlist."""
+        self.progress = {'status': 'Fetching playlist data', 'progress': 10}
+        try:
+            playlist_response = await self._get('playlists', part='snippet,contentDetails', id=playlist_id)
+        except AsyncHttpError as e:
+            logger.error(f"HTTP error when fetching playlist data: {e}")
+            if e.status == 403:
+                raise Exception("API quota exceeded or insufficient permissions")
+            elif e.status == 404:
+                return None
+            raise Exception(f"API error: {e}")
+        if not playlist_response['items']:
+            logger.error(f"No playlist found with ID: {playlist_id}")
+            return None
+        return build_playlist_data(playlist_response['items'][0])
+
+    async def get_videos_in_date_range(self, channel_id, start_date, end_date, max_videos=None):
+        """Get all videos for a channel within the specified date range."""
+        try:
+            videos = []
+            async for batch in self.iter_scrape(channel_id, start_date, end_date, max_videos):
+                videos.extend(records_to_dicts(batch))
+            if not videos:
+                logger.warning("No videos found in the specified date range.")
+            return videos
+
+        except AsyncHttpError as e:
+            logger.error(f"HTTP error when fetching videos: {e}")
+            if e.status == 403:
+                raise Exception("API quota exceeded or insufficient permissions")
+            else:
+                raise Exception(f"API error: {e}")
+        except Exception as e:
+            logger.error(f"Error fetching videos: {e}")
+            raise Exception(f"Failed to fetch videos: {str(e)}")
+
+    def iter_scrape(self, channel_id, start_date, end_date, max_videos=None):
+        """Chain the playlist, detail, link and comment stages into one async generator of video batches."""
+        batches = _prefetch(self.iter_videos_in_date_range(channel_id, start_date, end_date, max_videos),
+                            PLAYLIST_PREFETCH)
+        return self.iter_video_comments(self.iter_video_details(batches))
+
+    def iter_playlist_scrape(self, playlist_id, start_date, end_date, max_videos=None):
+        """The stages of iter_scrape over the videos of any playlist."""
+        batches = _prefetch(self.iter_playlist_videos(playlist_id, start_date, end_date, max_videos),
+                            PLAYLIST_PREFETCH)
+        return self.iter_video_comments(self.iter_video_details(batches))
+
+    def iter_lookup(self, video_ids):
+        """The detail, link and comment stages over explicit video IDs, skipping listing.
+
+        Up to DETAIL_CONCURRENCY videos.list calls are in flight; videos the API does not return are dropped.
+        """
+        return self.iter_video_comments(_drop_missing(self.iter_video_details(self.iter_videos_by_id(video_ids))))
+
+    async def iter_videos_in_date_range(self, channel_id, start_date, end_date, max_videos=None, batch_size=50,
+                                        strategy=None):
+        """Yield VideoRecords for the channel's videos in the date range, in batches of up to batch_size.
+
+        The listing strategy is planned as in YouTubeAPI and kept in self.plan.
+        Page tokens are opaque, so pages are fetched one after another; run
+        this through _prefetch to overlap it with the later stages.
+        """
+        if max_videos is None:
+            max_videos = MAX_VIDEOS_TO_PROCESS
+        self.progress = {'status': 'Fetching video list', 'progress': 30}
+        start_date_iso, end_date_iso = date_range_bounds(start_date, end_date)
+
+        channel_response = await self._get('channels', part='snippet,contentDetails,statistics', id=channel_id)
+        if not channel_response['items']:
+            logger.error(f"No channel found with ID: {channel_id}")
+            return
+        channel = channel_response['items'][0]
+        uploads_playlist_id = channel['contentDetails']['relatedPlaylists']['uploads']
+        total_video_count = int(channel['statistics'].get('videoCount', 0))
+
+        self.plan = plan_for_channel(channel, start_date_iso, end_date_iso, max_videos, self.hints, strategy)
+        logger.info(f"Listing videos of {channel_id}: {self.plan!r}")
+        if self.plan.strategy == 'search':
+            videos = self._iter_search_results(channel_id, split_window(start_date_iso, end_date_iso,
+                                                                        self.plan.search_windows),
+                                               start_date_iso, end_date_iso)
+        else:
+            videos = self._iter_uploads_playlist(channel_id, uploads_playlist_id, total_video_count,
+                                                 start_date_iso, end_date_iso)
+
+        batch = []
+        found = 0
+        try:
+            async for video in videos:
+                batch.append(video)
+                found += 1
+                if len(batch) == batch_size:
+                    self.progress = {'status': f'Found {found} videos in date range so far', 'progress': 40}
+                    yield batch
+                    batch = []
+                if max_videos and found >= max_videos:
+                    logger.warning(f"Reached video limit ({max_videos}). Stopping further collection.")
+                    break
+        finally:
+            await videos.aclose()
+
+        if batch:
+            yield batch
+        self.progress = {'status': f'Found {found} videos in date range', 'progress': 50}
+
+    async def iter_playlist_videos(self, playlist_id, start_date, end_date, max_videos=None, batch_size=50):
+        """Yield VideoRecords for a playlist's videos published in the date range, reading every page."""
+        if max_videos is None:
+            max_videos = MAX_VIDEOS_TO_PROCESS
+        self.progress = {'status': 'Fetching playlist videos', 'progress': 30}
+        start_date_iso, end_date_iso = date_range_bounds(start_date, end_date)
+
+        batch = []
+        found = 0
+        scanned = 0
+        next_page_token = None
+        while True:
+            try:
+                playlist_response = await self._get('playlistItems', part='snippet,contentDetails',
+                                                    playlistId=playlist_id, maxResults=50,
+                                                    pageToken=next_page_token)
+            except AsyncHttpError as e:
+                logger.error(f"HTTP error when fetching playlist items: {e}")
+                if e.status == 403:
+                    logger.warning("API quota limit reached. Continuing with videos collected so far.")
+                    break
+                raise
+
+            scanned += len(playlist_response['items'])
+            for video in playlist_videos_in_range(playlist_response['items'], start_date_iso, end_date_iso):
+                batch.append(video)
+                found += 1
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+                if max_videos and found >= max_videos:
+                    logger.warning(f"Reached video limit ({max_videos}). Stopping further collection.")
+                    break
+            self.progress = {'status': f'Scanned {scanned} videos of the playlist', 'progress': 40}
+
+            next_page_token = playlist_response.get('nextPageToken')
+            if not next_page_token or (max_videos and found >= max_videos):
+                break
+
+        if batch:
+            yield batch
+        self.progress = {'status': f'Found {found} videos in the playlist', 'progress': 50}
+
+    async def iter_videos_by_id(self, video_ids, batch_size=50):
+        """Yield bare VideoRecords for explicit video IDs, in batches of up to batch_size for the detail stage."""
+        for start in range(0, len(video_ids), batch_size):
+            yield [VideoRecord(video_id, '', '', '') for video_id in video_ids[start:start + batch_size]]
+
+    async def _iter_uploads_playlist(self, channel_id, uploads_playlist_id, video_count, start_date_iso,
+                                     end_date_iso):
+        """Yield the range's VideoRecords from the uploads playlist, stopping after the first page older than it."""
+        samples = []
+        scanned = 0
+        next_page_token = None
+        try:
+            while True:
+                try:
+                    playlist_response = await self._get('playlistItems', part='snippet,contentDetails',
+                                                        playlistId=uploads_playlist_id, maxResults=50,
+                                                        pageToken=next_page_token)
+                except AsyncHttpError as e:
+                    logger.error(f"HTTP error when fetching playlist items: {e}")
+                    # If we hit an API quota error, stop with what we have
+                    if e.status == 403:
+                        logger.warning("API quota limit reached. Continuing with videos collected so far.")
+                        break
+                    raise
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    logger.error(f"Error fetching playlist items: {e}")
+                    # Continue with the videos we've collected so far
+                    break
+
+                items = playlist_response['items']
+                if items and 'videoPublishedAt' in items[0]['contentDetails']:
+                    samples.append((scanned, items[0]['contentDetails']['videoPublishedAt']))
+                scanned += len(items)
+                for video in playlist_videos_in_range(items, start_date_iso, end_date_iso):
+                    yield video
+                self.progress = {'status': f'Scanned {scanned} videos of the uploads playlist', 'progress': 40}
+
+                if playlist_page_before_range(items, start_date_iso):
+                    break
+                next_page_token = playlist_response.get('nextPageToken')
+                if not next_page_token:
+                    break
+        finally:
+            self.hints.record(channel_id, video_count, samples)
+
+    async def _iter_search_results(self, channel_id, windows, start_date_iso, end_date_iso):
+        """Yield the range's VideoRecords from date-bounded searches, halving windows too dense for one query."""
+        windows = list(windows)
+        seen = set()
+        searched = 0
+        while windows:
+            published_after, published_before = windows.pop(0)
+            next_page_token = None
+            while True:
+                try:
+                    search_response = await self._get('search', part='snippet', channelId=channel_id, type='video',
+                                                      order='date', publishedAfter=published_after,
+                                                      publishedBefore=published_before, maxResults=50,
+                                                      pageToken=next_page_token)
+                except AsyncHttpError as e:
+                    logger.error(f"HTTP error when searching videos: {e}")
+                    if e.status == 403:
+                        logger.warning("API quota limit reached. Continuing with videos collected so far.")
+                        return
+                    raise
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    logger.error(f"Error searching videos: {e}")
+                    return
+
+                if (next_page_token is None
+                        and search_response.get('pageInfo', {}).get('totalResults', 0) > SEARCH_RESULT_LIMIT):
+                    halves = halve_window(published_after, published_before)
+                    if halves:
+                        logger.debug(f"Splitting search window {published_after} - {published_before}")
+                        windows[:0] = halves
+                        break
+
+                searched += len(search_response['items'])
+                for video in search_videos_in_range(search_response['items'], start_date_iso, end_date_iso, seen):
+                    yield video
+                self.progress = {'status': f'Searched {searched} videos in date range', 'progress': 40}
+
+                next_page_token = search_response.get('nextPageToken')
+                if not next_page_token:
+                    break
+
+    async def iter_video_details(self, batches):
+        """Add statistics, content details and description links to batches, several fetched at a time."""
+        async def details(batch):
+            await self._fetch_video_details(batch)
+            return apply_video_links(batch)
+
+        processed = 0
+        async for batch in _ordered_map(details, batches, DETAIL_CONCURRENCY):
+            processed += len(batch)
+            self.progress = {'status': f'Fetched details for {processed} videos', 'progress': 60}
+            yield batch
+        self.progress = {'status': 'Video data collection complete', 'progress': 100}
+
+    async def iter_video_comments(self, batches, max_results=20):
+        """Attach comments to each batch of videos, fetching a batch's videos concurrently.
+
+        Comments are only fetched for small batches to reduce API usage.
+        """
+        async def comments(batch):
+            if len(batch) > COMMENTS_BATCH_LIMIT:
+                logger.info(f"Skipping comment retrieval for large batch of {len(batch)} videos to reduce API usage")
+                for video in batch:
+                    video.comments = []
+                return batch
+            fetched = await asyncio.gather(*(self._get_video_comments(video.id, max_results) for video in batch))
+            for video, video_comments in zip(batch, fetched):
+                video.comments = video_comments
+            return batch
+
+        async for batch in _ordered_map(comments, batches, DETAIL_CONCURRENCY):
+            yield batch
+
+    async def _fetch_video_details(self, batch):
+        """Fetch details for one batch of up to 50 VideoRecords and update them in place."""
+        video_ids = ','.join(video.id for video in batch)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                video_response = await self._get('videos', part='snippet,contentDetails,statistics', id=video_ids)
+                apply_video_details(batch, video_response.get('items', []))
+                return True
+            except AsyncHttpError as e:
+                logger.error(f"HTTP error when fetching video details (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+                # If quota exceeded, no point in retrying
+                if e.status == 403:
+                    logger.warning("API quota exceeded. Skipping further requests for this batch.")
+                    break
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"General error when fetching video details (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+            if attempt < MAX_ATTEMPTS:
+                API_RETRIES.inc(endpoint='videos')
+                await asyncio.sleep(RETRY_DELAY)
+
+        logger.warning(f"Failed to get detailed data for batch after {MAX_ATTEMPTS} attempts. Using basic data.")
+        return False
+
+    async def _get_video_comments(self, video_id, max_results=20):
+        """Get comments for a video, limited to max_results."""
+        comments = []
+        next_page_token = None
+        try:
+            async with self._comments:
+                while len(comments) < max_results:
+                    comment_response = await self._get('commentThreads', part='snippet', videoId=video_id,
+                                                       maxResults=min(100, max_results - len(comments)),
+                                                       pageToken=next_page_token)
+                    comments.extend(CommentRecord.from_api(item) for item in comment_response['items'])
+                    next_page_token = comment_response.get('nextPageToken')
+                    if not next_page_token or len(comments) >= max_results:
+                        break
+            return comments
+        except AsyncHttpError as e:
+            # Comments may be disabled for some videos
+            if e.status == 403:
+                logger.warning(f"Comments are disabled for video {video_id}")
+            else:
+                logger.warning(f"Error fetching comments for video {video_id}: {e}")
+            return []
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.warning(f"Error fetching comments for video {video_id}: {e}")
+            return []
+
+
+def create_session(max_connections=ASYNC_MAX_CONNECTIONS):
+    """aiohttp session with one bounded, keep-alive connection pool (call from a running event loop)."""
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max_connections),
+                                 timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT))
+
+
+async def run_pipeline_async(batches, sink):
+    """Feed every batch of an async generator into a sink and return the sink's result."""
+    try:
+        async for batch in batches:
+            sink.write(batch)
+    except BaseException:
+        sink.abort()
+        raise
+    return sink.close()
+
+
+async def scrape_channels(api_key, jobs, sink_factory=None, api_endpoint=YOUTUBE_API_ENDPOINT,
+                          max_connections=ASYNC_MAX_CONNECTIONS, cache=None):
+    """Scrape several channels at once over one connection pool.
+
+    jobs are (channel_id, start_date, end_date) tuples. Each scrape streams
+    into sink_factory(channel_id, channel_data) (a ListSink by default).
+    Returns one result per job, in order: the sink's result, or the exception
+    that failed that scrape.
+    """
+    from .pipeline import ListSink
+    if sink_factory is None:
+        sink_factory = lambda channel_id, channel_data: ListSink()
+
+    async with create_session(max_connections) as session:
+        async def scrape(channel_id, start_date, end_date):
+            api = AsyncYouTubeAPI(api_key, session=session, cache=cache, api_endpoint=api_endpoint)
+            channel_data = await api.get_channel_data(channel_id)
+            if channel_data is None:
+                raise Exception(f"Channel not found: {channel_id}")
+            return await run_pipeline_async(api.iter_scrape(channel_id, start_date, end_date),
+                                            sink_factory(channel_id, channel_data))
+
+        return await asyncio.gather(*(scrape(*job) for job in jobs), return_exceptions=True)
+
+
+async def lookup_videos(api_key, video_ids, sink=None, api_endpoint=YOUTUBE_API_ENDPOINT,
+                        max_connections=ASYNC_MAX_CONNECTIONS, cache=None):
+    """Fetch details (and links and comments) for explicit video IDs, several batches at a time.
+
+    Streams into sink (a ListSink by default) and returns the sink's result.
+    """
+    from .pipeline import ListSink
+    async with create_session(max_connections) as session:
+        api = AsyncYouTubeAPI(api_key, session=session, cache=cache, api_endpoint=api_endpoint)
+        return await run_pipeline_async(api.iter_lookup(video_ids), sink if sink is not None else ListSink())
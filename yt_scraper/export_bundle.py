@@ -0,0 +1,185 @@
+"""
+Multi-format export bundles, generated in parallel and streamed as one zip.
+
+The session is loaded and its analytics computed once by the request; each
+requested format is then written by its own worker of a process pool, so a
+bundle takes about as long as its slowest format instead of the sum of all of
+them. Workers are started by a forkserver that has the exporter modules
+imported already, rather than forked from the request's worker: forking a
+process with running threads (the janitor, metrics and scheduler threads,
+other requests) can leave a lock held forever in the child. The session is
+pickled to each worker through the pool initializer. A format that does not
+finish within BUNDLE_TIMEOUT seconds of the previous one is reported as
+failed and its worker stopped.
+
+Each file is added to the zip as soon as its format is written, so the first
+bytes go out when the fastest format is done. CSV and JSON are deflated;
+Excel and Parquet files are compressed already and are stored as they are.
+A manifest.json closes the archive with the size and generation time of
+each file, and the error of any format that failed, as the response is
+already streaming by then.
+"""
+import os
+import json
+import time
+import zipfile
+import logging
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from .exporter import export_data, EXPORT_EXTENSIONS
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+BUNDLE_WORKERS = int(os.environ.get('YT_BUNDLE_WORKERS', '4'))
+BUNDLE_TIMEOUT = int(os.environ.get('YT_BUNDLE_TIMEOUT', '600'))  # seconds to wait for the next format
+STREAM_CHUNK_SIZE = 1024 * 1024
+# Formats whose files are compressed already and gain nothing from deflate
+COMPRESSED_FORMATS = {'excel', 'parquet'}
+
+# The (channel_data, videos_data, analytics) of the bundle, set in each pool worker
+_bundle_session = None
+
+
+def _set_bundle_session(session):
+    global _bundle_session
+    _bundle_session = session
+
+
+def _export_format(export_format, timestamp):
+    """Write one format of the worker's session; returns (file path, seconds taken)."""
+    channel_data, videos_data, analytics = _bundle_session
+    start = time.perf_counter()
+    path = export_data(channel_data, videos_data, export_format, timestamp, analytics)
+    return path, time.perf_counter() - start
+
+
+def _pool_context():
+    # Where there is no forkserver (Windows), the default start method spawns the workers
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return None
+    context = multiprocessing.get_context('forkserver')
+    # Only takes effect before the forkserver's first start; every worker then starts with these imported
+    context.set_forkserver_preload(['yt_scraper.exporter', 'yt_scraper.export_bundle'])
+    return context
+
+
+def _as_finished(futures, timeout):
+    """Yield futures as they finish, raising TimeoutError if none finishes within timeout seconds."""
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            raise TimeoutError(f"No format finished within {timeout}s")
+        yield from done
+
+
+def _stop_workers(executor):
+    # ProcessPoolExecutor has no public way to stop a running task
+    for process in list((getattr(executor, '_processes', None) or {}).values()):
+        process.terminate()
+
+
+class _ZipStream:
+    """Write-only, unseekable file for zipfile, drained by the response generator."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def stream_bundle(channel_data, videos_data, analytics, formats, basename, timestamp,
+                  workers=BUNDLE_WORKERS, on_file=None, timeout=BUNDLE_TIMEOUT):
+    """Yield the bytes of a zip with one export file per format, each named basename.<extension>.
+
+    on_file(export_format, seconds, size) is called for every file added,
+    e.g. to record metrics. Nothing is yielded before the first file is
+    written, and if no format could be exported an Exception is raised
+    instead, so a caller can answer with an error before streaming.
+    """
+    formats = list(dict.fromkeys(formats))
+    stream = _ZipStream()
+    manifest = {'channel': channel_data.get('title', ''), 'video_count': len(videos_data),
+                'exported_at': datetime.now().isoformat(), 'files': [], 'errors': {}}
+    executor = ProcessPoolExecutor(max_workers=max(1, min(workers, len(formats))), mp_context=_pool_context(),
+                                   initializer=_set_bundle_session,
+                                   initargs=((channel_data, videos_data, analytics),))
+    futures = {executor.submit(_export_format, export_format, timestamp): export_format
+               for export_format in formats}
+    timed_out = False
+    try:
+        with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            try:
+                for future in _as_finished(futures, timeout):
+                    export_format = futures[future]
+                    try:
+                        path, seconds = future.result()
+                    except Exception as e:
+                        logger.error(f"Bundle export of {export_format} failed: {e}")
+                        manifest['errors'][export_format] = str(e)
+                        continue
+
+                    try:
+                        info = zipfile.ZipInfo(f"{basename}.{EXPORT_EXTENSIONS[export_format]}",
+                                               date_time=time.localtime()[:6])
+                        info.compress_type = (zipfile.ZIP_STORED if export_format in COMPRESSED_FORMATS
+                                              else zipfile.ZIP_DEFLATED)
+                        # The size up front tells zipfile whether the entry needs ZIP64
+                        info.file_size = size = os.path.getsize(path)
+                        with open(path, 'rb') as source, archive.open(info, 'w') as target:
+                            while True:
+                                chunk = source.read(STREAM_CHUNK_SIZE)
+                                if not chunk:
+                                    break
+                                target.write(chunk)
+                                data = stream.drain()
+                                if data:
+                                    yield data
+                    finally:
+                        _remove(path)
+
+                    manifest['files'].append({'name': info.filename, 'format': export_format, 'bytes': size,
+                                              'seconds': round(seconds, 3)})
+                    logger.debug(f"Added {info.filename} to bundle ({size} bytes, written in {seconds:.2f}s)")
+                    if on_file is not None:
+                        on_file(export_format, seconds, size)
+            except TimeoutError as e:
+                timed_out = True
+                for future, export_format in futures.items():
+                    if not future.done():
+                        logger.error(f"Bundle export of {export_format} failed: {e}")
+                        manifest['errors'][export_format] = str(e)
+            if not manifest['files']:
+                raise Exception("No format could be exported: " +
+                                '; '.join(f"{name}: {error}" for name, error in manifest['errors'].items()))
+            archive.writestr('manifest.json', json.dumps(manifest, indent=2, ensure_ascii=False))
+        yield stream.drain()
+    finally:
+        if timed_out:
+            _stop_workers(executor)
+        executor.shutdown(wait=True, cancel_futures=True)
+        # Files of formats finished after the client went away
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                _remove(future.result()[0])
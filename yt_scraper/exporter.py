@@ -1,25 +1,43 @@
 import os
 import json
 import csv
+import shutil
+import sqlite3
 import pandas as pd
 import tempfile
 import logging
 from datetime import datetime
+from .records import records_to_dicts
+from .analytics import ChannelAnalytics, report_rows
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def export_data(channel_data, videos_data, export_format, timestamp):
-    """Export data to the specified format."""
+def export_data(channel_data, videos_data, export_format, timestamp, analytics=None):
+    """Export data to the specified format.
+
+    analytics is the session's analytics report; it is computed from
+    videos_data when not given.
+    """
     try:
         logger.debug(f"Exporting data in {export_format} format")
         if export_format == 'csv':
-            return export_to_csv(channel_data, videos_data, timestamp)
+            return export_to_csv(channel_data, videos_data, timestamp, analytics)
         elif export_format == 'json':
-            return export_to_json(channel_data, videos_data, timestamp)
+            return export_to_json(channel_data, videos_data, timestamp, analytics)
         elif export_format == 'excel':
-            return export_to_excel(channel_data, videos_data, timestamp)
+            return export_to_excel(channel_data, videos_data, timestamp, analytics)
+        elif export_format == 'parquet':
+            return export_to_parquet(channel_data, videos_data, timestamp, analytics)
+        elif export_format == 'sqlite':
+            return export_to_sqlite(channel_data, videos_data, timestamp, analytics)
         else:
             raise ValueError(f"Unsupported export format: {export_format}")
     except Exception as e:
@@ -28,118 +46,175 @@ def export_data(channel_data, videos_data, export_format, timestamp):
         logger.error(traceback.format_exc())
         raise
 
-def export_to_csv(channel_data, videos_data, timestamp):
+# Export files are written to the system temp directory under this prefix, so
+# leftovers can be told apart from other programs' files and cleaned up
+EXPORT_TEMP_PREFIX = 'yt_export_'
+
+# Formats export_data() can write here; Parquet is left out where pyarrow is not installed
+EXPORT_FORMATS = ('csv', 'json', 'excel', 'sqlite') + (('parquet',) if pyarrow is not None else ())
+
+# File extension of each export format
+EXPORT_EXTENSIONS = {'csv': 'csv', 'json': 'json', 'excel': 'xlsx', 'parquet': 'parquet', 'sqlite': 'sqlite'}
+
+# Whether SQLite exports include FTS5 tables over video titles, descriptions and comment texts
+SQLITE_EXPORT_FTS = os.environ.get('YT_SQLITE_EXPORT_FTS', '1') != '0'
+
+# Columns of the videos section when they can't be derived from the data up front
+VIDEO_EXPORT_FIELDS = sorted([
+    'id', 'title', 'description', 'published_at', 'published_date', 'published_time', 'thumbnail_url',
+    'duration', 'dimension', 'definition', 'caption', 'licensed_content', 'projection', 'view_count',
+    'like_count', 'comment_count', 'tags', 'category_id', 'live_broadcast_content', 'default_language',
+    'localized', 'default_audio_language', 'video_url', 'engagement_rate', 'description_urls',
+    'description_domains'
+])
+
+COMMENT_EXPORT_FIELDS = ['video_id', 'video_title', 'author', 'text', 'like_count',
+                         'published_at', 'published_date', 'published_time',
+                         'updated_at', 'updated_date', 'updated_time']
+
+def export_to_csv(channel_data, videos_data, timestamp, analytics=None):
     """Export data to CSV format."""
     logger.debug("Starting CSV export...")
-    # Create a temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.csv')
+    # Determine all possible video fields by combining fields from all videos
+    video_fields = set()
+    for video in videos_data:
+        for key in video.keys():
+            if key != 'comments':  # Handle comments separately
+                video_fields.add(key)
     
+    sink = CsvExportSink(channel_data, sorted(video_fields), analytics)
     try:
-        # Open the file for writing
-        with open(temp_file.name, 'w', newline='', encoding='utf-8') as csvfile:
-            # Create CSV writer
-            writer = csv.writer(csvfile)
-            
-            # Write channel section header
-            writer.writerow(['CHANNEL DATA'])
-            writer.writerow(['Field', 'Value'])
-            
-            # Write channel data
-            for key, value in channel_data.items():
-                if key == 'upload_frequency':
-                    writer.writerow(['upload_frequency_per_day', value.get('per_day', 0)])
-                    writer.writerow(['upload_frequency_per_week', value.get('per_week', 0)])
-                    writer.writerow(['upload_frequency_per_month', value.get('per_month', 0)])
-                elif isinstance(value, list):
-                    writer.writerow([key, ', '.join(str(item) for item in value)])
-                elif isinstance(value, dict):
-                    writer.writerow([key, json.dumps(value)])
-                else:
-                    writer.writerow([key, value])
-            
-            # Add a blank row
-            writer.writerow([])
-            
-            # Write videos section header
-            writer.writerow(['VIDEOS DATA'])
-            
-            # Determine all possible video fields by combining fields from all videos
-            video_fields = set()
-            for video in videos_data:
-                for key in video.keys():
-                    if key != 'comments':  # Handle comments separately
-                        video_fields.add(key)
-            
-            # Convert to ordered list and write header row
-            video_fields = sorted(list(video_fields))
-            writer.writerow(video_fields)
-            
-            # Write video data
-            for video in videos_data:
-                row = []
-                for field in video_fields:
-                    value = video.get(field, '')
-                    if field in ['tags', 'description_urls'] and isinstance(value, list):
-                        row.append(', '.join(str(item) for item in value))
-                    elif isinstance(value, dict):
-                        row.append(json.dumps(value))
-                    else:
-                        row.append(str(value))
-                writer.writerow(row)
-                
-            # Add a blank row
-            writer.writerow([])
-            
-            # Write comments section if available
-            writer.writerow(['COMMENTS DATA'])
-            # Update header row for comments
-            writer.writerow(['video_id', 'video_title', 'author', 'text', 'like_count', 
-                             'published_at', 'published_date', 'published_time', 
-                             'updated_at', 'updated_date', 'updated_time'])
-            
-            for video in videos_data:
-                video_id = video.get('id', '')
-                video_title = video.get('title', '')
-                
-                for comment in video.get('comments', []):
-                    # Extract data including new fields
-                    writer.writerow([
-                        video_id,
-                        video_title,
-                        comment.get('author', ''),
-                        comment.get('text', '').replace('\n', ' '),
-                        comment.get('like_count', 0),
-                        comment.get('published_at', ''), # Original ISO
-                        comment.get('published_date', ''), # Formatted Date
-                        comment.get('published_time', ''), # Formatted Time
-                        comment.get('updated_at', ''), # Original ISO
-                        comment.get('updated_date', ''), # Formatted Date
-                        comment.get('updated_time', '') # Formatted Time
-                    ])
-        
-        logger.debug(f"CSV export completed to file: {temp_file.name}")
-        return temp_file.name
-    
+        sink.write(videos_data)
+        file_path = sink.close()
+        logger.debug(f"CSV export completed to file: {file_path}")
+        return file_path
     except Exception as e:
-        # Ensure we clean up the temporary file in case of error
-        if os.path.exists(temp_file.name):
-            os.unlink(temp_file.name)
+        sink.abort()
         logger.error(f"Error exporting to CSV: {e}")
         import traceback
         logger.error(traceback.format_exc())
         raise
 
-def export_to_json(channel_data, videos_data, timestamp):
+class CsvExportSink:
+    """Writes a CSV export incrementally as batches of videos arrive.
+
+    Comment rows go to a side file and are appended after the videos section
+    on close, so neither videos nor comments have to be held in memory. The
+    analytics section comes last; without a precomputed report it is
+    computed from the videos as they pass.
+    """
+
+    def __init__(self, channel_data, video_fields=VIDEO_EXPORT_FIELDS, analytics=None):
+        self.video_fields = list(video_fields)
+        self.analytics = ChannelAnalytics(analytics) if analytics is not None else None
+        self._analytics_builder = ChannelAnalytics() if analytics is None else None
+        # Create temporary files for the export and the buffered comments section
+        self.temp_file = tempfile.NamedTemporaryFile(delete=False, prefix=EXPORT_TEMP_PREFIX, suffix='.csv')
+        self.temp_file.close()
+        self._csvfile = open(self.temp_file.name, 'w', newline='', encoding='utf-8')
+        self._comments_file = tempfile.TemporaryFile('w+', newline='', encoding='utf-8')
+        self.writer = csv.writer(self._csvfile)
+        self.comments_writer = csv.writer(self._comments_file)
+        
+        # Write channel section header
+        self.writer.writerow(['CHANNEL DATA'])
+        self.writer.writerow(['Field', 'Value'])
+        
+        # Write channel data
+        for key, value in channel_data.items():
+            if key == 'upload_frequency':
+                self.writer.writerow(['upload_frequency_per_day', value.get('per_day', 0)])
+                self.writer.writerow(['upload_frequency_per_week', value.get('per_week', 0)])
+                self.writer.writerow(['upload_frequency_per_month', value.get('per_month', 0)])
+            elif isinstance(value, list):
+                self.writer.writerow([key, ', '.join(str(item) for item in value)])
+            elif isinstance(value, dict):
+                self.writer.writerow([key, json.dumps(value)])
+            else:
+                self.writer.writerow([key, value])
+        
+        # Add a blank row
+        self.writer.writerow([])
+        
+        # Write videos section header
+        self.writer.writerow(['VIDEOS DATA'])
+        self.writer.writerow(self.video_fields)
+
+    def write(self, batch):
+        """Write one batch of videos (dicts or VideoRecords) and buffer their comments."""
+        for video in records_to_dicts(batch):
+            if self._analytics_builder is not None:
+                self._analytics_builder.add(video)
+            row = []
+            for field in self.video_fields:
+                value = video.get(field, '')
+                if field in ['tags', 'description_urls', 'description_domains'] and isinstance(value, list):
+                    row.append(', '.join(str(item) for item in value))
+                elif isinstance(value, dict):
+                    row.append(json.dumps(value))
+                else:
+                    row.append(str(value))
+            self.writer.writerow(row)
+            
+            video_id = video.get('id', '')
+            video_title = video.get('title', '')
+            for comment in video.get('comments', []):
+                self.comments_writer.writerow([
+                    video_id,
+                    video_title,
+                    comment.get('author', ''),
+                    comment.get('text', '').replace('\n', ' '),
+                    comment.get('like_count', 0),
+                    comment.get('published_at', ''), # Original ISO
+                    comment.get('published_date', ''), # Formatted Date
+                    comment.get('published_time', ''), # Formatted Time
+                    comment.get('updated_at', ''), # Original ISO
+                    comment.get('updated_date', ''), # Formatted Date
+                    comment.get('updated_time', '') # Formatted Time
+                ])
+
+    def close(self):
+        """Append the comments and analytics sections and return the path of the finished file."""
+        # Add a blank row
+        self.writer.writerow([])
+        
+        # Write comments section
+        self.writer.writerow(['COMMENTS DATA'])
+        self.writer.writerow(COMMENT_EXPORT_FIELDS)
+        self._comments_file.seek(0)
+        shutil.copyfileobj(self._comments_file, self._csvfile)
+        self._comments_file.close()
+        
+        # Write analytics section
+        if self.analytics is None:
+            self.analytics = self._analytics_builder.finish()
+        self.writer.writerow([])
+        self.writer.writerow(['ANALYTICS DATA'])
+        self.writer.writerow(['Metric', 'Value'])
+        self.writer.writerows(report_rows(self.analytics.report))
+        self._csvfile.close()
+        return self.temp_file.name
+
+    def abort(self):
+        """Discard the partial export."""
+        self._comments_file.close()
+        self._csvfile.close()
+        # Ensure we clean up the temporary file in case of error
+        if os.path.exists(self.temp_file.name):
+            os.unlink(self.temp_file.name)
+
+def export_to_json(channel_data, videos_data, timestamp, analytics=None):
     """Export data to JSON format."""
     logger.debug("Starting JSON export...")
     # Create a temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.json')
+    temp_file = tempfile.NamedTemporaryFile(delete=False, prefix=EXPORT_TEMP_PREFIX, suffix='.json')
     
     try:
         # Prepare the export data structure
         export_data = {
             'channel': channel_data,
             'videos': videos_data,
+            'analytics': analytics if analytics is not None else ChannelAnalytics.from_videos(videos_data).report,
             'metadata': {
                 'exported_at': datetime.now().isoformat(),
                 'video_count': len(videos_data)
@@ -162,11 +237,11 @@ def export_to_json(channel_data, videos_data, timestamp):
         logger.error(traceback.format_exc())
         raise
 
-def export_to_excel(channel_data, videos_data, timestamp):
+def export_to_excel(channel_data, videos_data, timestamp, analytics=None):
     """Export data to Excel format."""
     logger.debug("Starting Excel export...")
     # Create a temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
+    temp_file = tempfile.NamedTemporaryFile(delete=False, prefix=EXPORT_TEMP_PREFIX, suffix='.xlsx')
     
     try:
         # Create Excel writer
@@ -244,9 +319,7 @@ def export_to_excel(channel_data, videos_data, timestamp):
             if comments_data:
                 comments_df = pd.DataFrame(comments_data)
                 # Update column order for comments sheet
-                comments_df = comments_df[['video_id', 'video_title', 'author', 'text', 'like_count', 
-                                         'published_at', 'published_date', 'published_time', 
-                                         'updated_at', 'updated_date', 'updated_time']] 
+                comments_df = comments_df[COMMENT_EXPORT_FIELDS]
                 comments_df.to_excel(writer, sheet_name='Comments Data', index=False)
             
             # Add a summary sheet
@@ -266,17 +339,31 @@ def export_to_excel(channel_data, videos_data, timestamp):
             total_views = sum(video.get('view_count', 0) for video in videos_data)
             total_likes = sum(video.get('like_count', 0) for video in videos_data)
             total_comments = sum(video.get('comment_count', 0) for video in videos_data)
-            avg_engagement = sum(video.get('engagement_rate', 0) for video in videos_data) / len(videos_data) if videos_data else 0
+            if analytics is None:
+                analytics = ChannelAnalytics.from_videos(videos_data).report
+            engagement = analytics.get('distributions', {}).get('engagement', {})
+            cadence = analytics.get('cadence') or {}
+            publish_times = analytics.get('publish_times') or {}
             
             summary_data.extend([
                 ['Total Views (Export)', total_views],
                 ['Total Likes (Export)', total_likes],
                 ['Total Comments (Export)', total_comments],
-                ['Average Engagement Rate', f"{avg_engagement:.2f}%"]
+                ['Average Engagement Rate', f"{engagement.get('mean', 0):.2f}%"],
+                ['Median Views', analytics.get('distributions', {}).get('views', {}).get('p50', 0)],
+                ['Uploads per Week', cadence.get('uploads_per_week')],
+                ['Uploads per Week (last 90 days)', cadence.get('recent_uploads_per_week')],
+                ['Median Days Between Uploads', (cadence.get('gap_days') or {}).get('median')],
+                ['Best Publish Hour (UTC)', publish_times.get('best_hour')],
+                ['Best Publish Weekday (UTC)', publish_times.get('best_weekday')]
             ])
             
             summary_df = pd.DataFrame(summary_data, columns=['Metric', 'Value'])
             summary_df.to_excel(writer, sheet_name='Summary', index=False)
+            
+            # Full analytics report
+            analytics_df = pd.DataFrame(report_rows(analytics), columns=['Metric', 'Value'])
+            analytics_df.to_excel(writer, sheet_name='Analytics', index=False)
         
         logger.debug(f"Excel export completed to file: {temp_file.name}")
         return temp_file.name
@@ -289,3 +376,191 @@ def export_to_excel(channel_data, videos_data, timestamp):
         import traceback
         logger.error(traceback.format_exc())
         raise
+
+def _flatten(item, skip=()):
+    """A dict with its nested dicts turned into prefixed keys, as in the Excel export."""
+    row = {}
+    for key, value in item.items():
+        if key in skip:
+            continue
+        if isinstance(value, dict):
+            for subkey, subvalue in value.items():
+                row[f"{key}_{subkey}"] = subvalue
+        else:
+            row[key] = value
+    return row
+
+def export_to_parquet(channel_data, videos_data, timestamp, analytics=None):
+    """Export data to Parquet format.
+
+    One row per video, with its comments as a nested list column. The channel
+    data and the analytics report are stored as JSON in the file's metadata.
+    """
+    if pyarrow is None:
+        raise ValueError("Parquet export needs the pyarrow package")
+    logger.debug("Starting Parquet export...")
+    temp_file = tempfile.NamedTemporaryFile(delete=False, prefix=EXPORT_TEMP_PREFIX, suffix='.parquet')
+    temp_file.close()
+    
+    try:
+        # Nested dicts become prefixed columns as in the Excel export; lists stay list columns
+        table = pyarrow.Table.from_pylist([_flatten(video) for video in videos_data])
+        
+        if analytics is None:
+            analytics = ChannelAnalytics.from_videos(videos_data).report
+        metadata = dict(table.schema.metadata or {})
+        metadata.update({
+            b'channel': json.dumps(channel_data, ensure_ascii=False, default=str).encode('utf-8'),
+            b'analytics': json.dumps(analytics, ensure_ascii=False, default=str).encode('utf-8'),
+            b'exported_at': datetime.now().isoformat().encode('utf-8')
+        })
+        table = table.replace_schema_metadata(metadata)
+        pyarrow.parquet.write_table(table, temp_file.name, compression='zstd')
+        
+        logger.debug(f"Parquet export completed to file: {temp_file.name}")
+        return temp_file.name
+    
+    except Exception as e:
+        # Ensure we clean up the temporary file in case of error
+        if os.path.exists(temp_file.name):
+            os.unlink(temp_file.name)
+        logger.error(f"Error exporting to Parquet: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        raise
+
+def _sqlite_type(value):
+    if value is None:
+        return None
+    if isinstance(value, (bool, int)):
+        return 'INTEGER'
+    if isinstance(value, float):
+        return 'REAL'
+    return 'TEXT'
+
+def _sqlite_value(value):
+    # Lists are stored as JSON, which SQLite's json_each() can query
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def _sqlite_columns(rows):
+    """Column name -> declared type of dict rows, in first-seen order; INTEGER widens to REAL, other mixes to TEXT."""
+    types = {}
+    for row in rows:
+        for key, value in row.items():
+            current, new = types.get(key), _sqlite_type(value)
+            if current is None or new is None or current == new:
+                types[key] = current or new
+            elif {current, new} == {'INTEGER', 'REAL'}:
+                types[key] = 'REAL'
+            else:
+                types[key] = 'TEXT'
+    return {key: column_type or 'TEXT' for key, column_type in types.items()}
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def _insert_rows(conn, table, columns, first, rows, verb='INSERT', constraints=(), options=''):
+    """Create table with the first (name, declaration) columns and the typed columns of rows, and bulk-insert rows."""
+    declared = dict(first)
+    names = list(declared) + [name for name in columns if name not in declared]
+    definitions = [f"{_quote(name)} {declared.get(name) or columns[name]}" for name in names]
+    conn.execute(f"CREATE TABLE {table} ({', '.join(definitions + list(constraints))}) {options}")
+    # An INTEGER PRIMARY KEY left out of the rows is assigned by SQLite
+    names = [name for name in names if name in columns]
+    if not rows:
+        return names
+    conn.executemany(f"{verb} INTO {table} ({', '.join(map(_quote, names))}) VALUES ({', '.join('?' * len(names))})",
+                     ([_sqlite_value(row.get(name)) for name in names] for row in rows))
+    return names
+
+def export_to_sqlite(channel_data, videos_data, timestamp, analytics=None, fts=SQLITE_EXPORT_FTS):
+    """Export data to a SQLite database.
+
+    Normalized tables: channel (one row), videos (keyed by video ID),
+    comments and tags (one row per video and tag), plus the analytics report
+    as (metric, value) rows. Columns are typed from the values; lists are
+    stored as JSON. Videos are indexed on published_at and view_count, tags
+    on the tag (case-insensitive) and comments on their video. With fts,
+    videos_fts and comments_fts are FTS5 indexes over the video titles and
+    descriptions and the comment texts, joined on the videos' rowid and the
+    comments' id.
+    """
+    logger.debug("Starting SQLite export...")
+    temp_file = tempfile.NamedTemporaryFile(delete=False, prefix=EXPORT_TEMP_PREFIX, suffix='.sqlite')
+    temp_file.close()
+    
+    try:
+        channel_row = _flatten(channel_data)
+        video_rows = [_flatten(video, skip=('comments', 'tags')) for video in videos_data]
+        comment_rows = [dict(comment, video_id=video.get('id'))
+                        for video in videos_data for comment in video.get('comments', [])]
+        tag_rows = [{'video_id': video.get('id'), 'tag': tag, 'position': position}
+                    for video in videos_data for position, tag in enumerate(video.get('tags') or [])]
+        if analytics is None:
+            analytics = ChannelAnalytics.from_videos(videos_data).report
+        analytics_rows = [{'metric': metric, 'value': value} for metric, value in report_rows(analytics)]
+        
+        conn = sqlite3.connect(temp_file.name, isolation_level=None)
+        try:
+            # Nobody reads the file until it is complete, so it is built without a journal
+            conn.execute('PRAGMA journal_mode=OFF')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('BEGIN')
+            _insert_rows(conn, 'channel', _sqlite_columns([channel_row]), [('id', 'TEXT PRIMARY KEY')], [channel_row])
+            video_columns = _insert_rows(conn, 'videos', _sqlite_columns(video_rows), [('id', 'TEXT PRIMARY KEY')],
+                                         video_rows, verb='INSERT OR IGNORE')
+            # Tags compare case-insensitively, as in the tag index
+            _insert_rows(conn, 'tags', {'video_id': 'TEXT', 'tag': 'TEXT', 'position': 'INTEGER'},
+                         [('video_id', 'TEXT NOT NULL REFERENCES videos (id)'), ('tag', 'TEXT NOT NULL COLLATE NOCASE'),
+                          ('position', 'INTEGER NOT NULL')], tag_rows, verb='INSERT OR IGNORE',
+                         constraints=['PRIMARY KEY (video_id, tag)'], options='WITHOUT ROWID')
+            # The comments table has its usual columns even when there are no comments
+            comment_types = dict.fromkeys(COMMENT_EXPORT_FIELDS[2:], 'TEXT')
+            comment_types.update({'like_count': 'INTEGER'}, **_sqlite_columns(comment_rows))
+            comment_columns = _insert_rows(conn, 'comments', comment_types,
+                                           [('id', 'INTEGER PRIMARY KEY'),
+                                            ('video_id', 'TEXT NOT NULL REFERENCES videos (id)')], comment_rows)
+            _insert_rows(conn, 'analytics', {'metric': 'TEXT NOT NULL', 'value': ''}, [], analytics_rows)
+            
+            # Indexes are built once after the bulk insert rather than updated row by row
+            for column in ('published_at', 'view_count'):
+                if column in video_columns:
+                    conn.execute(f"CREATE INDEX videos_{column} ON videos ({column})")
+            conn.execute('CREATE INDEX tags_tag ON tags (tag)')
+            conn.execute('CREATE INDEX comments_video_id ON comments (video_id)')
+            if fts:
+                _create_sqlite_fts(conn, video_columns, comment_columns)
+            conn.execute('COMMIT')
+            # Statistics for the query planner of whoever opens the file
+            conn.execute('ANALYZE')
+        finally:
+            conn.close()
+        
+        logger.debug(f"SQLite export completed to file: {temp_file.name}")
+        return temp_file.name
+    
+    except Exception as e:
+        # Ensure we clean up the temporary file in case of error
+        if os.path.exists(temp_file.name):
+            os.unlink(temp_file.name)
+        logger.error(f"Error exporting to SQLite: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        raise
+
+def _create_sqlite_fts(conn, video_columns, comment_columns):
+    """Add external-content FTS5 tables over the videos' and comments' text columns, if SQLite has FTS5."""
+    indexes = [('videos_fts', 'videos', 'rowid', [name for name in ('title', 'description') if name in video_columns]),
+               ('comments_fts', 'comments', 'id', [name for name in ('text',) if name in comment_columns])]
+    for fts_table, table, rowid, columns in indexes:
+        if not columns:
+            continue
+        try:
+            conn.execute(f"CREATE VIRTUAL TABLE {fts_table} USING fts5({', '.join(columns)}, content='{table}', "
+                         f"content_rowid='{rowid}', tokenize='unicode61 remove_diacritics 2')")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Skipping the full-text tables of the SQLite export: {e}")
+            return
+        conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
@@ -0,0 +1,576 @@
+"""
+Offline stand-in for the YouTube Data API v3.
+
+Three pieces make scrapes reproducible without a key or network:
+
+- RecordingHttp wraps a real transport and saves every response as a fixture file.
+- FakeYouTubeBackend answers channels, playlistItems, videos, commentThreads and
+  search requests from recorded fixtures and from synthetic channels, with
+  configurable latency and error injection.
+- ReplayHttp plugs the backend straight into YouTubeAPI(http=...), while
+  FakeYouTubeServer serves it over HTTP for YouTubeAPI(api_endpoint=...).
+
+Run a server from the command line with:
+    python -m yt_scraper.fake_api --port 8765 --channel UCfakechannel000000000:100000
+"""
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+import httplib2
+from .api import QUOTA_COSTS
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Query parameters that never change the content of a response
+IGNORED_PARAMS = ('key', 'alt', 'prettyPrint')
+
+# The real search endpoint stops paging after roughly this many results
+SEARCH_RESULT_LIMIT = 500
+
+TAG_VOCABULARY = ['tutorial', 'review', 'vlog', 'gaming', 'music', 'tech', 'news',
+                  'howto', 'comedy', 'science', 'travel', 'food', 'sports', 'diy']
+
+
+def endpoint_from_uri(uri):
+    """Return the endpoint name (e.g. 'videos') and the query parameters of a request URL."""
+    parts = urlsplit(uri)
+    endpoint = parts.path.rstrip('/').rsplit('/', 1)[-1]
+    params = {k: v for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in IGNORED_PARAMS}
+    return endpoint, params
+
+
+def fixture_key(endpoint, params):
+    """Stable key identifying one recorded request."""
+    return endpoint + '?' + '&'.join(f"{k}={params[k]}" for k in sorted(params))
+
+
+def error_payload(status, reason, message):
+    """Build an error body shaped like the real API's."""
+    return {'error': {'code': status, 'message': message,
+                      'errors': [{'domain': 'youtube', 'reason': reason, 'message': message}]}}
+
+
+def _iso(dt):
+    return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _parse_iso(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class SyntheticChannel:
+    """Deterministic channel whose videos are generated on demand from their index.
+
+    Video 0 is the newest upload, so indexes follow the uploads playlist order.
+    Nothing is materialized up front, which keeps 100k-video channels cheap.
+    """
+
+    def __init__(self, channel_id, video_count, title=None, latest=None, upload_interval_hours=24.0,
+                 username=None, handle=None):
+        self.id = channel_id
+        self.video_count = video_count
+        self.title = title or f"Synthetic Channel {channel_id[-6:]}"
+        self.username = username
+        self.handle = handle
+        self.latest = latest or datetime.now(timezone.utc).replace(microsecond=0)
+        self.interval = timedelta(hours=upload_interval_hours)
+        self.created_at = self.latest - self.interval * video_count - timedelta(days=30)
+        self.uploads_playlist_id = 'UU' + channel_id[2:]
+        # Three characters of the ID mark the channel, the other eight the index
+        self.video_prefix = hashlib.md5(channel_id.encode('utf-8')).hexdigest()[:3]
+
+    def video_id(self, index):
+        return f"{self.video_prefix}{index:08d}"
+
+    def index_of(self, video_id):
+        if len(video_id) != 11 or not video_id.startswith(self.video_prefix):
+            return None
+        try:
+            index = int(video_id[3:])
+        except ValueError:
+            return None
+        return index if 0 <= index < self.video_count else None
+
+    def published_at(self, index):
+        return self.latest - self.interval * index
+
+    def index_range(self, after=None, before=None):
+        """Indexes of videos published within [after, before], newest first."""
+        first, last = 0, self.video_count - 1
+        seconds = self.interval.total_seconds()
+        if before is not None and before < self.latest:
+            first = max(first, int(-(-(self.latest - before).total_seconds() // seconds)))
+        if after is not None:
+            last = min(last, int((self.latest - after).total_seconds() // seconds))
+        return range(first, last + 1)
+
+    def channel_resource(self):
+        return {
+            'kind': 'youtube#channel',
+            'id': self.id,
+            'snippet': {
+                'title': self.title,
+                'description': f"Synthetic channel with {self.video_count} videos.",
+                'customUrl': f"@{self.handle}" if self.handle else '',
+                'publishedAt': _iso(self.created_at),
+                'country': 'US',
+                'thumbnails': {'high': {'url': f"https://example.invalid/{self.id}/high.jpg"}}
+            },
+            'contentDetails': {'relatedPlaylists': {'likes': '', 'uploads': self.uploads_playlist_id}},
+            'statistics': {
+                'viewCount': str(self.video_count * 15000),
+                'subscriberCount': str(self.video_count * 120),
+                'hiddenSubscriberCount': False,
+                'videoCount': str(self.video_count)
+            },
+            'brandingSettings': {'image': {'bannerExternalUrl': f"https://example.invalid/{self.id}/banner.jpg"}}
+        }
+
+    def _title(self, index):
+        return f"{self.title} episode {self.video_count - index}"
+
+    def _description(self, index):
+        lines = [f"Episode {self.video_count - index} of {self.title}."]
+        if index % 3 == 0:
+            lines.append(f"Links: https://example.com/ep/{index} and http://www.example.org/ref?id={index}")
+        return '\n'.join(lines)
+
+    def _thumbnails(self, video_id):
+        return {'high': {'url': f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}}
+
+    def playlist_resource(self):
+        return {
+            'kind': 'youtube#playlist',
+            'id': self.uploads_playlist_id,
+            'snippet': {
+                'publishedAt': _iso(self.created_at),
+                'channelId': self.id,
+                'title': f"Uploads from {self.title}",
+                'description': '',
+                'thumbnails': self._thumbnails(self.video_id(0)),
+                'channelTitle': self.title
+            },
+            'contentDetails': {'itemCount': self.video_count}
+        }
+
+    def playlist_item(self, index):
+        video_id = self.video_id(index)
+        published = _iso(self.published_at(index))
+        return {
+            'kind': 'youtube#playlistItem',
+            'id': f"PI{video_id}",
+            'snippet': {
+                'publishedAt': published,
+                'channelId': self.id,
+                'title': self._title(index),
+                'description': self._description(index),
+                'thumbnails': self._thumbnails(video_id),
+                'playlistId': self.uploads_playlist_id,
+                'position': index,
+                'resourceId': {'kind': 'youtube#video', 'videoId': video_id}
+            },
+            'contentDetails': {'videoId': video_id, 'videoPublishedAt': published}
+        }
+
+    def video_resource(self, index):
+        video_id = self.video_id(index)
+        views = (index * 7919) % 1000000 + 100
+        seconds = 60 + (index * 37) % 3600
+        hours, remainder = divmod(seconds, 3600)
+        minutes, secs = divmod(remainder, 60)
+        duration = 'PT' + (f"{hours}H" if hours else '') + (f"{minutes}M" if minutes else '') + f"{secs}S"
+        tags = [TAG_VOCABULARY[(index + k * 5) % len(TAG_VOCABULARY)] for k in range(index % 4)]
+        return {
+            'kind': 'youtube#video',
+            'id': video_id,
+            'snippet': {
+                'publishedAt': _iso(self.published_at(index)),
+                'channelId': self.id,
+                'title': self._title(index),
+                'description': self._description(index),
+                'thumbnails': self._thumbnails(video_id),
+                'channelTitle': self.title,
+                'tags': tags,
+                'categoryId': str(20 + index % 8),
+                'liveBroadcastContent': 'none',
+                'defaultAudioLanguage': 'en',
+                'localized': {'title': self._title(index), 'description': self._description(index)}
+            },
+            'contentDetails': {
+                'duration': duration,
+                'dimension': '2d',
+                'definition': 'hd' if index % 5 else 'sd',
+                'caption': 'true' if index % 2 else 'false',
+                'licensedContent': bool(index % 3),
+                'projection': 'rectangular'
+            },
+            'statistics': {
+                'viewCount': str(views),
+                'likeCount': str(views // (20 + index % 30)),
+                'favoriteCount': '0',
+                'commentCount': str(index % 25)
+            }
+        }
+
+    def comments_disabled(self, index):
+        return index % 17 == 16
+
+    def comment_count(self, index):
+        return index % 25
+
+    def comment_thread(self, index, position):
+        video_id = self.video_id(index)
+        published = _iso(self.published_at(index) + timedelta(minutes=10 * (position + 1)))
+        return {
+            'kind': 'youtube#commentThread',
+            'id': f"CT{video_id}{position:04d}",
+            'snippet': {
+                'videoId': video_id,
+                'topLevelComment': {
+                    'kind': 'youtube#comment',
+                    'id': f"C{video_id}{position:04d}",
+                    'snippet': {
+                        'authorDisplayName': f"viewer{(index + position) % 997}",
+                        'textDisplay': f"Comment {position} on {self._title(index)}",
+                        'textOriginal': f"Comment {position} on {self._title(index)}",
+                        'likeCount': (index + position) % 50,
+                        'publishedAt': published,
+                        'updatedAt': published
+                    }
+                },
+                'totalReplyCount': 0
+            }
+        }
+
+    def search_result(self, index):
+        video_id = self.video_id(index)
+        return {
+            'kind': 'youtube#searchResult',
+            'id': {'kind': 'youtube#video', 'videoId': video_id},
+            'snippet': {
+                'publishedAt': _iso(self.published_at(index)),
+                'channelId': self.id,
+                'title': self._title(index),
+                'description': self._description(index)[:160],
+                'thumbnails': self._thumbnails(video_id),
+                'channelTitle': self.title
+            }
+        }
+
+
+class FakeYouTubeBackend:
+    """Answers YouTube Data API requests from fixtures and synthetic channels.
+
+    latency is a number of seconds, or a (min, max) tuple, slept before each answer.
+    errors maps an endpoint name to a list of HTTP statuses returned, in order,
+    by its next calls. error_rate injects error_status at random on any call.
+    """
+
+    def __init__(self, channels=None, fixtures=None, latency=0, errors=None,
+                 error_rate=0.0, error_status=500, seed=0):
+        self.channels = {}
+        self.fixtures = dict(fixtures or {})
+        self.latency = latency
+        self.errors = {endpoint: deque(statuses) for endpoint, statuses in (errors or {}).items()}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.quota_used = 0
+        self._lock = threading.Lock()
+        for channel in channels or []:
+            self.add_channel(channel)
+
+    def add_channel(self, channel):
+        self.channels[channel.id] = channel
+        return channel
+
+    def inject_errors(self, endpoint, *statuses):
+        """Make the next calls to endpoint fail with the given HTTP statuses."""
+        with self._lock:
+            self.errors.setdefault(endpoint, deque()).extend(statuses)
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.quota_used = 0
+
+    def handle(self, endpoint, params):
+        """Return (status, payload) for one API request."""
+        with self._lock:
+            self.calls[endpoint] += 1
+            self.quota_used += QUOTA_COSTS.get(endpoint, 1)
+            queued = self.errors.get(endpoint)
+            injected = queued.popleft() if queued else None
+            if injected is None and self.error_rate and self.random.random() < self.error_rate:
+                injected = self.error_status
+
+        if self.latency:
+            if isinstance(self.latency, (tuple, list)):
+                time.sleep(self.random.uniform(*self.latency))
+            else:
+                time.sleep(self.latency)
+
+        if injected:
+            if injected == 403:
+                return 403, error_payload(403, 'quotaExceeded', 'The request cannot be completed because you have exceeded your quota.')
+            return injected, error_payload(injected, 'backendError', 'Injected error.')
+
+        recorded = self.fixtures.get(fixture_key(endpoint, params))
+        if recorded is not None:
+            return recorded['status'], recorded['body']
+
+        handler = getattr(self, f"_handle_{endpoint}", None)
+        if handler is None:
+            return 404, error_payload(404, 'notFound', f"Unknown endpoint: {endpoint}")
+        return handler(params)
+
+    def _find_video(self, video_id):
+        for channel in self.channels.values():
+            index = channel.index_of(video_id)
+            if index is not None:
+                return channel, index
+        return None, None
+
+    def _page(self, params, total, max_allowed=50):
+        offset = int(params.get('pageToken') or 0)
+        size = min(int(params.get('maxResults', 5)), max_allowed)
+        end = min(offset + size, total)
+        next_token = str(end) if end < total else None
+        return offset, end, next_token
+
+    def _list_response(self, kind, items, total=None, next_token=None):
+        response = {
+            'kind': f"youtube#{kind}ListResponse",
+            'etag': hashlib.md5(json.dumps(items, sort_keys=True).encode('utf-8')).hexdigest(),
+            'items': items,
+            'pageInfo': {'totalResults': len(items) if total is None else total, 'resultsPerPage': len(items)}
+        }
+        if next_token:
+            response['nextPageToken'] = next_token
+        return response
+
+    def _handle_channels(self, params):
+        items = []
+        if 'id' in params:
+            for channel_id in params['id'].split(','):
+                if channel_id in self.channels:
+                    items.append(self.channels[channel_id].channel_resource())
+        elif 'forUsername' in params:
+            for channel in self.channels.values():
+                if channel.username and channel.username.lower() == params['forUsername'].lower():
+                    items.append(channel.channel_resource())
+        return 200, self._list_response('channel', items)
+
+    def _handle_playlists(self, params):
+        items = [channel.playlist_resource() for playlist_id in params.get('id', '').split(',')
+                 for channel in self.channels.values() if channel.uploads_playlist_id == playlist_id]
+        return 200, self._list_response('playlist', items)
+
+    def _handle_playlistItems(self, params):
+        playlist_id = params.get('playlistId', '')
+        channel = next((c for c in self.channels.values() if c.uploads_playlist_id == playlist_id), None)
+        if channel is None:
+            return 404, error_payload(404, 'playlistNotFound', f"Playlist {playlist_id} not found.")
+        offset, end, next_token = self._page(params, channel.video_count)
+        items = [channel.playlist_item(i) for i in range(offset, end)]
+        return 200, self._list_response('playlistItem', items, channel.video_count, next_token)
+
+    def _handle_videos(self, params):
+        items = []
+        for video_id in params.get('id', '').split(','):
+            channel, index = self._find_video(video_id)
+            if channel is not None:
+                items.append(channel.video_resource(index))
+        return 200, self._list_response('video', items)
+
+    def _handle_commentThreads(self, params):
+        channel, index = self._find_video(params.get('videoId', ''))
+        if channel is None:
+            return 404, error_payload(404, 'videoNotFound', 'Video not found.')
+        if channel.comments_disabled(index):
+            return 403, error_payload(403, 'commentsDisabled', 'Comments are disabled for this video.')
+        offset, end, next_token = self._page(params, channel.comment_count(index), max_allowed=100)
+        items = [channel.comment_thread(index, position) for position in range(offset, end)]
+        return 200, self._list_response('commentThread', items, channel.comment_count(index), next_token)
+
+    def _handle_search(self, params):
+        if params.get('type') == 'channel':
+            query = params.get('q', '').lower().lstrip('@')
+            items = []
+            for channel in self.channels.values():
+                names = [channel.title.lower(), (channel.handle or '').lower(), (channel.username or '').lower()]
+                if query and any(query in name for name in names if name):
+                    items.append({
+                        'kind': 'youtube#searchResult',
+                        'id': {'kind': 'youtube#channel', 'channelId': channel.id},
+                        'snippet': {'channelId': channel.id, 'title': channel.title,
+                                    'publishedAt': _iso(channel.created_at)}
+                    })
+            items = items[:int(params.get('maxResults', 5))]
+            return 200, self._list_response('search', items)
+
+        channel = self.channels.get(params.get('channelId', ''))
+        if channel is None:
+            return 200, self._list_response('search', [])
+        after = _parse_iso(params['publishedAfter']) if params.get('publishedAfter') else None
+        before = _parse_iso(params['publishedBefore']) if params.get('publishedBefore') else None
+        matching = channel.index_range(after, before)
+        total = min(len(matching), SEARCH_RESULT_LIMIT)
+        offset, end, next_token = self._page(params, total)
+        items = [channel.search_result(matching[i]) for i in range(offset, end)]
+        return 200, self._list_response('search', items, len(matching), next_token)
+
+
+class ReplayHttp:
+    """httplib2-compatible transport that answers requests from a FakeYouTubeBackend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.timeout = None
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        endpoint, params = endpoint_from_uri(uri)
+        status, payload = self.backend.handle(endpoint, params)
+        content = json.dumps(payload).encode('utf-8')
+        etag = '"' + hashlib.md5(content).hexdigest() + '"'
+        if status == 200 and (headers or {}).get('if-none-match') == etag:
+            return httplib2.Response({'status': '304', 'etag': etag}), b''
+        info = {'status': str(status), 'content-type': 'application/json; charset=UTF-8'}
+        if status == 200:
+            info['etag'] = etag
+        return httplib2.Response(info), content
+
+    def close(self):
+        pass
+
+
+class RecordingHttp:
+    """Wraps a real transport and saves each GET response as a fixture file."""
+
+    def __init__(self, http, fixture_dir):
+        self.http = http
+        self.fixture_dir = fixture_dir
+        os.makedirs(fixture_dir, exist_ok=True)
+
+    def __getattr__(self, name):
+        return getattr(self.http, name)
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        resp, content = self.http.request(uri, method=method, body=body, headers=headers, **kwargs)
+        if method == 'GET' and resp.status != 304:
+            endpoint, params = endpoint_from_uri(uri)
+            key = fixture_key(endpoint, params)
+            try:
+                fixture = {'endpoint': endpoint, 'params': params, 'status': resp.status,
+                           'body': json.loads(content)}
+                digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+                path = os.path.join(self.fixture_dir, f"{endpoint}-{digest}.json")
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(fixture, f, indent=2, ensure_ascii=False)
+            except (ValueError, OSError) as e:
+                logger.warning(f"Could not record response for {endpoint}: {e}")
+        return resp, content
+
+
+def load_fixtures(fixture_dir):
+    """Load fixture files written by RecordingHttp into a dict for FakeYouTubeBackend."""
+    fixtures = {}
+    for name in sorted(os.listdir(fixture_dir)):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(fixture_dir, name), encoding='utf-8') as f:
+            fixture = json.load(f)
+        fixtures[fixture_key(fixture['endpoint'], fixture['params'])] = fixture
+    return fixtures
+
+
+class _FakeAPIRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients with a connection pool reuse their connections
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        endpoint, params = endpoint_from_uri(self.path)
+        status, payload = self.server.backend.handle(endpoint, params)
+        content = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logger.debug("fake api: " + format % args)
+
+
+class FakeYouTubeServer:
+    """Serves a FakeYouTubeBackend over HTTP on a background thread."""
+
+    def __init__(self, backend, host='127.0.0.1', port=0):
+        self.backend = backend
+        self.httpd = ThreadingHTTPServer((host, port), _FakeAPIRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.backend = backend
+        self._thread = None
+
+    @property
+    def api_endpoint(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fake YouTube Data API server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--channel', action='append', default=[],
+                        help='Synthetic channel as CHANNEL_ID:VIDEO_COUNT (repeatable)')
+    parser.add_argument('--fixtures', help='Directory of recorded fixture files')
+    parser.add_argument('--latency', type=float, default=0, help='Seconds to wait before each response')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of calls that fail')
+    parser.add_argument('--error-status', type=int, default=500)
+    args = parser.parse_args()
+
+    channels = []
+    for spec in args.channel:
+        channel_id, _, count = spec.partition(':')
+        channels.append(SyntheticChannel(channel_id, int(count or 100)))
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else None
+    backend = FakeYouTubeBackend(channels, fixtures, latency=args.latency,
+                                 error_rate=args.error_rate, error_status=args.error_status)
+    server = FakeYouTubeServer(backend, args.host, args.port)
+    print(f"Fake YouTube API listening on {server.api_endpoint}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import httplib2
+from .metrics import API_REQUESTS, API_LATENCY, API_QUOTA_UNITS, HTTP_CACHE_REQUESTS
+from .shared_cache import open_cache
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Cache storage configuration
+HTTP_CACHE_DIR = os.environ.get('YT_HTTP_CACHE_DIR', 'http_cache')
+HTTP_CACHE_MAX_ENTRIES = 5000
+HTTP_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 200 MB
+
+# Response headers worth keeping alongside a cached body
+CACHED_HEADERS = ('content-type', 'etag', 'last-modified')
+
+
+def endpoint_name(uri):
+    """Return the API endpoint (e.g. 'playlistItems') a request URL targets."""
+    return urlsplit(uri).path.rstrip('/').rsplit('/', 1)[-1]
+
+
+def cache_key(uri):
+    """Build a cache key for a request URL, ignoring the API key parameter."""
+    parts = urlsplit(uri)
+    # The same resource is identical for every API key, so leave the key out.
+    # This also keeps keys out of anything written to disk.
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'key')
+    normalized = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class ETagCache:
+    """Bounded store of ETags and response bodies, shared by every worker process.
+
+    Entries live in the 'http' cache of the configured shared backend (see
+    shared_cache.py), which evicts the least recently used ones beyond the bounds.
+    """
+
+    def __init__(self, cache=None, max_entries=HTTP_CACHE_MAX_ENTRIES, max_bytes=HTTP_CACHE_MAX_BYTES):
+        self.cache = cache if cache is not None else open_cache('http', max_entries, max_bytes)
+
+    def get(self, key):
+        """Return the cached entry (meta dict, body bytes) for key, or None."""
+        data = self.cache.get(key)
+        if data is None:
+            return None
+        try:
+            meta, body = data.split(b'\n', 1)
+            return json.loads(meta), body
+        except ValueError as e:
+            logger.debug(f"Dropping unreadable cache entry {key}: {e}")
+            self.cache.delete(key)
+            return None
+
+    def put(self, key, meta, body):
+        """Store an entry; it never expires, but is revalidated on every use."""
+        self.cache.set(key, json.dumps(meta).encode('utf-8') + b'\n' + body)
+
+    def __len__(self):
+        return len(self.cache)
+
+
+class CachingHttp:
+    """httplib2-compatible transport that revalidates GET requests with If-None-Match.
+
+    A 304 Not Modified answer is turned back into a 200 carrying the cached body,
+    so the API client never sees the difference.
+    """
+
+    def __init__(self, cache=None, http=None):
+        self.cache = cache if cache is not None else ETagCache()
+        self.http = http if http is not None else httplib2.Http()
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        # Delegate everything else (timeout, close, credentials, ...) to the wrapped client
+        return getattr(self.http, name)
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        if method != 'GET':
+            return self.http.request(uri, method=method, body=body, headers=headers, **kwargs)
+
+        key = cache_key(uri)
+        cached = self.cache.get(key)
+        headers = dict(headers or {})
+        if cached and cached[0].get('etag'):
+            headers['if-none-match'] = cached[0]['etag']
+
+        resp, content = self.http.request(uri, method=method, body=body, headers=headers, **kwargs)
+
+        if resp.status == 304 and cached:
+            self.hits += 1
+            HTTP_CACHE_REQUESTS.inc(result='hit')
+            meta, cached_body = cached
+            cached_resp = httplib2.Response(dict(meta.get('headers', {}), status='200'))
+            cached_resp.fromcache = True
+            return cached_resp, cached_body
+
+        self.misses += 1
+        HTTP_CACHE_REQUESTS.inc(result='miss')
+        etag = resp.get('etag')
+        if resp.status == 200 and etag:
+            meta = {
+                'etag': etag,
+                'headers': {name: resp[name] for name in CACHED_HEADERS if name in resp}
+            }
+            self.cache.put(key, meta, content)
+        return resp, content
+
+
+class InstrumentedHttp:
+    """httplib2-compatible transport recording call counts, latency and quota per endpoint."""
+
+    def __init__(self, http, quota_costs=None):
+        self.http = http
+        self.quota_costs = quota_costs or {}
+        # Quota units spent through this transport
+        self.units = 0
+
+    def __getattr__(self, name):
+        return getattr(self.http, name)
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        endpoint = endpoint_name(uri)
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            resp, content = self.http.request(uri, method=method, body=body, headers=headers, **kwargs)
+            # Report revalidated responses with the status that actually came over the wire
+            status = '304' if getattr(resp, 'fromcache', False) else str(resp.status)
+            return resp, content
+        finally:
+            API_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+            API_REQUESTS.inc(endpoint=endpoint, status=status)
+            units = self.quota_costs.get(endpoint, 1)
+            self.units += units
+            API_QUOTA_UNITS.inc(units, endpoint=endpoint)
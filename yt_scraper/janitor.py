@@ -0,0 +1,247 @@
+"""
+Background expiry of stored sessions.
+
+Sessions are registered in a small SQLite table when they are written, with
+their expiry time, last access and size on disk. A janitor thread wakes up
+periodically and:
+
+- deletes the sessions whose expiry time has passed, found through an index
+  on expires_at rather than by listing and stat'ing the session directory,
+- evicts the least recently used sessions while the total size is above the
+  disk quota,
+- removes temporary files left behind by interrupted session writes and
+  export files that were never cleaned up.
+
+The table is shared by every worker process, so it does not matter which one
+wrote or read a session, or which one runs the sweep.
+"""
+import os
+import glob
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from .session_store import delete_session, iter_session_files, iter_temp_files, session_disk_usage
+from .exporter import EXPORT_TEMP_PREFIX
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+JANITOR_DB_PATH = os.environ.get('YT_JANITOR_DB', os.path.join('session_data', 'janitor.db'))
+JANITOR_INTERVAL = float(os.environ.get('YT_JANITOR_INTERVAL', 300))  # seconds between sweeps
+SESSION_QUOTA_BYTES = int(float(os.environ.get('YT_SESSION_QUOTA_MB', 2048)) * 1024 * 1024)
+# Temporary files this old belong to writes that will never finish
+TEMP_FILE_MAX_AGE = 3600
+# The temp file scan walks the shard directories, so it runs less often than the sweep
+TEMP_SWEEP_INTERVAL = 3600
+# Access times are only written when they moved by more than this, so reads rarely write
+TOUCH_RESOLUTION = 60
+SWEEP_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at);
+CREATE INDEX IF NOT EXISTS sessions_lru ON sessions (last_access);
+CREATE TABLE IF NOT EXISTS janitor_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SessionJanitor:
+    """Tracks stored sessions and expires them from a background thread."""
+
+    def __init__(self, root, max_age_seconds, db_path=JANITOR_DB_PATH, quota_bytes=SESSION_QUOTA_BYTES,
+                 interval=JANITOR_INTERVAL, on_remove=None):
+        self.root = root
+        self.max_age_seconds = max_age_seconds
+        self.db_path = db_path
+        self.quota_bytes = quota_bytes
+        self.interval = interval
+        self.on_remove = on_remove  # called with the IDs of removed sessions, e.g. to drop them from search
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        self._touched = {}
+        self._last_temp_sweep = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _connect(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self._schema_lock:
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+        return conn
+
+    def track(self, session_id, size=None, now=None):
+        """Register a session that was just written, expiring max_age_seconds from now."""
+        now = time.time() if now is None else now
+        if size is None:
+            size = session_disk_usage(self.root, session_id)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)',
+                             (session_id, now + self.max_age_seconds, now, size))
+        finally:
+            conn.close()
+        self._touched[session_id] = now
+
+    def touch(self, session_id, now=None):
+        """Record a read of the session, for least-recently-used eviction."""
+        now = time.time() if now is None else now
+        if now - self._touched.get(session_id, 0) < TOUCH_RESOLUTION:
+            return
+        if len(self._touched) > 10000:
+            self._touched.clear()
+        self._touched[session_id] = now
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('UPDATE sessions SET last_access = ? WHERE session_id = ?', (now, session_id))
+        except sqlite3.Error as e:
+            logger.warning(f"Could not record access to session {session_id}: {e}")
+        finally:
+            conn.close()
+
+    def reconcile(self):
+        """Register session files stored before the janitor tracked them (once per database)."""
+        conn = self._connect()
+        try:
+            if conn.execute("SELECT 1 FROM janitor_state WHERE key = 'reconciled'").fetchone():
+                return 0
+            rows = []
+            for session_id, path in iter_session_files(self.root):
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+                rows.append((session_id, mtime + self.max_age_seconds, mtime,
+                             session_disk_usage(self.root, session_id)))
+            with conn:
+                conn.executemany('INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?)', rows)
+                conn.execute("INSERT OR REPLACE INTO janitor_state VALUES ('reconciled', ?)", (str(time.time()),))
+            logger.info(f"Janitor registered {len(rows)} existing sessions")
+            return len(rows)
+        finally:
+            conn.close()
+
+    def _remove(self, conn, session_ids):
+        for session_id in session_ids:
+            try:
+                delete_session(self.root, session_id)
+            except OSError as e:
+                logger.error(f"Error deleting session {session_id}: {e}")
+        with conn:
+            conn.executemany('DELETE FROM sessions WHERE session_id = ?', [(session_id,) for session_id in session_ids])
+        for session_id in session_ids:
+            self._touched.pop(session_id, None)
+
+    def expire(self, conn, now):
+        """Delete every session past its expiry time; returns their IDs."""
+        expired = []
+        while True:
+            batch = [row[0] for row in conn.execute(
+                'SELECT session_id FROM sessions WHERE expires_at <= ? ORDER BY expires_at LIMIT ?',
+                (now, SWEEP_BATCH))]
+            if not batch:
+                return expired
+            self._remove(conn, batch)
+            expired.extend(batch)
+
+    def enforce_quota(self, conn):
+        """Evict least recently used sessions until the total size fits the quota; returns their IDs."""
+        if not self.quota_bytes:
+            return []
+        total = conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM sessions').fetchone()[0]
+        evicted = []
+        while total > self.quota_bytes:
+            batch = []
+            for session_id, size in conn.execute(
+                    'SELECT session_id, bytes FROM sessions ORDER BY last_access LIMIT ?', (SWEEP_BATCH,)):
+                batch.append(session_id)
+                total -= size
+                if total <= self.quota_bytes:
+                    break
+            if not batch:
+                break
+            self._remove(conn, batch)
+            evicted.extend(batch)
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} sessions to stay within the {self.quota_bytes} byte quota")
+        return evicted
+
+    def remove_temp_files(self, now):
+        """Delete stale temporary files of session writes and exports; returns how many were removed."""
+        paths = list(iter_temp_files(self.root))
+        paths.extend(glob.glob(os.path.join(tempfile.gettempdir(), f"{EXPORT_TEMP_PREFIX}*")))
+        removed = 0
+        for path in paths:
+            try:
+                if now - os.path.getmtime(path) > TEMP_FILE_MAX_AGE:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def sweep(self, now=None, temp_files=True):
+        """Run one expiry, quota and temp file pass; returns what was removed."""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            expired = self.expire(conn, now)
+            evicted = self.enforce_quota(conn)
+        finally:
+            conn.close()
+        removed = expired + evicted
+        if removed:
+            logger.info(f"Janitor removed {len(expired)} expired and {len(evicted)} evicted sessions")
+            if self.on_remove is not None:
+                self.on_remove(removed)
+        temp_count = self.remove_temp_files(now) if temp_files else 0
+        return {'expired': len(expired), 'evicted': len(evicted), 'temp_files': temp_count}
+
+    def start(self):
+        """Start the background sweep thread (once per process)."""
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name='session-janitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            self.reconcile()
+        except Exception as e:
+            logger.error(f"Janitor could not register existing sessions: {e}")
+        while True:
+            try:
+                now = time.time()
+                temp_files = now - self._last_temp_sweep >= TEMP_SWEEP_INTERVAL
+                if temp_files:
+                    self._last_temp_sweep = now
+                self.sweep(now, temp_files=temp_files)
+            except Exception as e:
+                logger.error(f"Error during session janitor sweep: {e}")
+            if self._stop.wait(self.interval):
+                return
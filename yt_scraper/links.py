@@ -0,0 +1,156 @@
+"""
+Link extraction from video descriptions.
+
+The link stage runs once per batch of videos in the scrape pipeline, filling in
+each video's description URLs and their normalized domains. A LinkIndex
+collects those per channel so it can answer which videos link to which domains.
+"""
+import re
+import logging
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# An http(s) URL runs until whitespace or a character that can't appear unescaped in one;
+# the host part is captured so domains don't need a second parse
+URL_PATTERN = re.compile(r"(https?://([^\s<>\"'`{}|\\^\[\]/?#]*)[^\s<>\"'`{}|\\^\[\]]*)")
+# Case-insensitive matching is several times slower, so it's only used when a text has an uppercase scheme
+URL_PATTERN_ANY_CASE = re.compile(URL_PATTERN.pattern, re.IGNORECASE)
+# Sentence punctuation that commonly follows a URL in running text
+TRAILING_PUNCTUATION = '.,;:!?*'
+TRIMMED_CHARACTERS = frozenset(TRAILING_PUNCTUATION + ')')
+
+
+def _trim(url):
+    """Drop trailing punctuation and an unbalanced closing parenthesis, e.g. from '(see https://x.com).'"""
+    while True:
+        stripped = url.rstrip(TRAILING_PUNCTUATION)
+        if stripped.endswith(')') and stripped.count(')') > stripped.count('('):
+            stripped = stripped[:-1]
+        if stripped == url:
+            return url
+        url = stripped
+
+
+def extract_links(text):
+    """Return (url, normalized domain) pairs for the http(s) URLs in a piece of text, in order."""
+    # Most descriptions have no links; skip the regex scan for them
+    if not text or '://' not in text:
+        return []
+    pattern = URL_PATTERN_ANY_CASE if 'HTTP' in text or 'Http' in text else URL_PATTERN
+    links = []
+    for url, host in pattern.findall(text):
+        if url[-1] in TRIMMED_CHARACTERS:
+            url = _trim(url)
+            # Trimming can reach into the host when the URL has no path, e.g. 'https://x.com.'
+            host_start = url.find('://') + 3
+            if len(url) <= host_start:
+                continue
+            host = host[:len(url) - host_start]
+        elif not host:
+            continue
+        links.append((url, _normalize_netloc(host)))
+    return links
+
+
+def extract_urls(text):
+    """Return the http(s) URLs in a piece of text, in order of appearance."""
+    return [url for url, _ in extract_links(text)]
+
+
+@lru_cache(maxsize=16384)
+def _normalize_netloc(netloc):
+    host = netloc.rsplit('@', 1)[-1].lower()
+    if host.startswith('['):
+        return host.split(']', 1)[0] + ']'  # IPv6 literal
+    host = host.split(':', 1)[0].rstrip('.')
+    if host.startswith('www.'):
+        host = host[len('www.'):]
+    return host
+
+
+def normalize_domain(url):
+    """Return the lowercase host of a URL without port, credentials or a leading 'www.'."""
+    if '://' not in url:
+        # Also accept bare domains, e.g. from a query parameter
+        url = '//' + url
+    try:
+        return _normalize_netloc(urlsplit(url).netloc)
+    except ValueError:
+        return ''
+
+
+def url_domains(urls):
+    """Distinct normalized domains of a list of URLs, in order of first appearance."""
+    domains = dict.fromkeys(normalize_domain(url) for url in urls)
+    domains.pop('', None)
+    return tuple(domains)
+
+
+def apply_video_links(batch):
+    """Set description_urls and description_domains on one batch of VideoRecords."""
+    for video in batch:
+        links = extract_links(video.description)
+        video.description_urls = tuple(url for url, _ in links)
+        domains = dict.fromkeys(domain for _, domain in links)
+        domains.pop('', None)
+        video.description_domains = tuple(domains)
+    return batch
+
+
+def iter_video_links(batches):
+    """Pipeline stage: set description_urls and description_domains on each batch of VideoRecords."""
+    for batch in batches:
+        yield apply_video_links(batch)
+
+
+class LinkIndex:
+    """Per-channel index from linked domain to the IDs of the videos linking to it."""
+
+    def __init__(self, videos_by_domain=None):
+        self.videos_by_domain = {domain: list(video_ids) for domain, video_ids in (videos_by_domain or {}).items()}
+
+    @classmethod
+    def from_videos(cls, videos):
+        """Build the index from session video dicts (or VideoRecords)."""
+        index = cls()
+        for video in videos:
+            if isinstance(video, dict):
+                domains = video.get('description_domains')
+                if domains is None:
+                    # Sessions stored before domains were extracted
+                    domains = url_domains(video.get('description_urls') or extract_urls(video.get('description', '')))
+                index.add(video.get('id', ''), domains)
+            else:
+                index.add(video.id, video.description_domains or ())
+        return index
+
+    @classmethod
+    def from_session(cls, data):
+        """The index stored with a session, or one rebuilt from its videos."""
+        if 'link_index' in data:
+            return cls(data['link_index'])
+        return cls.from_videos(data.get('videos_data', []))
+
+    def add(self, video_id, domains):
+        for domain in domains:
+            self.videos_by_domain.setdefault(domain, []).append(video_id)
+
+    def videos_linking_to(self, domain):
+        """IDs of the videos whose descriptions link to the domain."""
+        return self.videos_by_domain.get(normalize_domain(domain), [])
+
+    def top_domains(self, limit=None):
+        """(domain, number of videos) pairs, most linked first."""
+        counts = sorted(((domain, len(video_ids)) for domain, video_ids in self.videos_by_domain.items()),
+                        key=lambda item: (-item[1], item[0]))
+        return counts[:limit] if limit else counts
+
+    def to_dict(self):
+        return self.videos_by_domain
+
+    def __len__(self):
+        return len(self.videos_by_domain)
@@ -0,0 +1,324 @@
+"""
+Low-overhead counters and histograms exposed in Prometheus text format.
+
+Each process keeps its metrics in memory and a background thread writes a
+snapshot to METRICS_DIR/metrics-<pid>.json every few seconds. render_metrics()
+merges the snapshots of every process, so /metrics reports the same totals
+whichever gunicorn worker answers. When a worker starts, the snapshots of
+dead processes are folded into metrics-dead.json and deleted, so their counts
+stay in the totals without a file per worker ever started, and a reused PID
+does not overwrite the counts of the process that had it before.
+"""
+import os
+import json
+import atexit
+import time
+import glob
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.environ.get('YT_METRICS_DIR', 'metrics_data')
+METRICS_FLUSH_INTERVAL = 5  # seconds between snapshot writes per process
+DEAD_SNAPSHOT = 'metrics-dead.json'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760, 104857600)
+
+
+class Registry:
+    """Process-local metric store with periodic snapshots for cross-process merging."""
+
+    def __init__(self, metrics_dir=METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self.metrics = {}
+        self._values = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._dirty = False
+        self._reaped = False
+        self._thread = None
+        self._stop = threading.Event()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def _check_fork(self):
+        # A forked worker must not re-report what its parent already wrote
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._values = {}
+            self._lock = threading.Lock()
+            self._dirty = False
+            self._reaped = False
+            # Threads do not survive a fork; the child starts its own flusher
+            self._thread = None
+            self._stop = threading.Event()
+
+    def update(self, key, apply):
+        """Apply a change to one series; the flush thread writes it out."""
+        self._check_fork()
+        with self._lock:
+            apply(self._values, key)
+            self._dirty = True
+        if self._thread is None:
+            self.start()
+
+    def start(self):
+        """Start the background flush thread (once per process)."""
+        with self._lock:
+            if self._thread is not None or self.flush_interval <= 0:
+                return
+            self._thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        # Idle workers still publish their last updates
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(key): value for key, value in self._values.items()}
+
+    def flush(self):
+        """Write this process's snapshot to the shared metrics directory."""
+        self._check_fork()
+        if not self._reaped:
+            self._reaped = True
+            self._reap()
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            path = os.path.join(self.metrics_dir, f"metrics-{self._pid}.json")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot: {e}")
+
+    @contextmanager
+    def _directory_lock(self, exclusive):
+        # Readers never see a dead snapshot both folded and still in place
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        with open(os.path.join(self.metrics_dir, 'metrics.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _reap(self):
+        """Fold the snapshots of dead processes, and a stale one under this PID, into DEAD_SNAPSHOT."""
+        dead = []
+        for path in glob.glob(os.path.join(self.metrics_dir, 'metrics-*.json')):
+            pid = os.path.basename(path)[len('metrics-'):-len('.json')]
+            if pid.isdigit() and (int(pid) == self._pid or not _pid_alive(int(pid))):
+                dead.append(path)
+        if not dead:
+            return
+        dead_path = os.path.join(self.metrics_dir, DEAD_SNAPSHOT)
+        try:
+            with self._directory_lock(exclusive=True):
+                # Another worker may have folded some of them meanwhile
+                dead = [path for path in dead if os.path.exists(path)]
+                if not dead:
+                    return
+                tmp_path = f"{dead_path}.{self._pid}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(_merge_snapshots([dead_path] + dead), f)
+                os.replace(tmp_path, dead_path)
+                for path in dead:
+                    os.remove(path)
+            logger.debug(f"Folded {len(dead)} metrics snapshots of exited processes into {DEAD_SNAPSHOT}")
+        except OSError as e:
+            logger.warning(f"Could not fold metrics snapshots of exited processes: {e}")
+
+    def collect(self):
+        """Merge the snapshots of all processes into {(name, labels): value}."""
+        self.flush()
+        try:
+            with self._directory_lock(exclusive=False):
+                merged = _merge_snapshots(glob.glob(os.path.join(self.metrics_dir, 'metrics-*.json')))
+        except OSError as e:
+            logger.warning(f"Could not read metrics snapshots: {e}")
+            merged = {}
+        collected = {}
+        for key, value in merged.items():
+            name, labels = json.loads(key)
+            collected[(name, tuple(tuple(pair) for pair in labels))] = value
+        return collected
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge_snapshots(paths):
+    """Sum snapshot files series by series; unreadable or missing files are skipped."""
+    merged = {}
+    for path in paths:
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for key, value in snapshot.items():
+            if key not in merged:
+                merged[key] = value
+            elif isinstance(value, list):
+                merged[key] = [a + b for a, b in zip(merged[key], value)]
+            else:
+                merged[key] += value
+    return merged
+
+
+REGISTRY = Registry()
+# Don't lose the last few seconds of updates when a worker exits
+atexit.register(REGISTRY.flush)
+
+
+def _label_key(name, labelnames, labels):
+    return (name, tuple((label, str(labels.get(label, ''))) for label in labelnames))
+
+
+class Counter:
+    """Monotonically increasing count."""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        def apply(values, key):
+            values[key] = values.get(key, 0) + amount
+        self.registry.update(_label_key(self.name, self.labelnames, labels), apply)
+
+
+class Histogram:
+    """Distribution of observations over fixed buckets, plus their sum and count."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.registry = registry
+        registry.register(self)
+
+    def observe(self, value, **labels):
+        # Stored as per-bucket counts (last slot is +Inf) followed by sum and count
+        index = bisect.bisect_left(self.buckets, value)
+
+        def apply(values, key):
+            series = values.get(key)
+            if series is None:
+                series = values[key] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+        self.registry.update(_label_key(self.name, self.labelnames, labels), apply)
+
+    def time(self, **labels):
+        """Context manager observing the duration of its block in seconds."""
+        return _Timer(self, labels)
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (f'{k}="' + str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics(registry=REGISTRY):
+    """Render all metrics of all processes in the Prometheus text exposition format."""
+    merged = registry.collect()
+    lines = []
+    for name, metric in sorted(registry.metrics.items()):
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        series = sorted((labels, value) for (series_name, labels), value in merged.items() if series_name == name)
+        for labels, value in series:
+            if metric.kind == 'counter':
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            bounds = [str(b) for b in metric.buckets] + ['+Inf']
+            for bound, count in zip(bounds, value[:-2]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+    return '\n'.join(lines) + '\n'
+
+
+# Metrics of the scrape, storage and export hot paths
+API_REQUESTS = Counter('yt_api_requests_total', 'YouTube API calls by endpoint and HTTP status.', ['endpoint', 'status'])
+API_LATENCY = Histogram('yt_api_request_duration_seconds', 'YouTube API call latency.', ['endpoint'])
+API_QUOTA_UNITS = Counter('yt_api_quota_units_total', 'YouTube API quota units spent.', ['endpoint'])
+API_RETRIES = Counter('yt_api_retries_total', 'YouTube API calls retried after an error.', ['endpoint'])
+HTTP_CACHE_REQUESTS = Counter('yt_http_cache_requests_total', 'ETag cache lookups by result.', ['result'])
+CACHE_REQUESTS = Counter('yt_cache_requests_total', 'Shared cache lookups by cache name and result.',
+                         ['cache', 'result'])
+SESSION_IO_LATENCY = Histogram('yt_session_io_duration_seconds', 'Session file read and write time.', ['operation'])
+SESSION_IO_BYTES = Histogram('yt_session_io_bytes', 'Session file size per read or write.', ['operation'],
+                             buckets=SIZE_BUCKETS)
+EXPORT_LATENCY = Histogram('yt_export_duration_seconds', 'Export generation time.', ['format'])
+EXPORT_BYTES = Counter('yt_export_bytes_total', 'Bytes of exported files.', ['format'])
+RESULTS_RENDER_LATENCY = Histogram('yt_results_render_duration_seconds', 'Results page render time.')
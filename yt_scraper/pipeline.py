@@ -0,0 +1,189 @@
+"""
+Streaming scrape pipeline.
+
+A scrape is a chain of generator stages, each passing bounded batches of videos
+downstream:
+
+    uploads playlist pages -> detail batches -> description links -> comments -> sink
+
+Playlist scrapes list any playlist's pages instead, and bulk lookups start
+from batches of explicit video IDs, skipping listing altogether.
+
+The sink writes every batch out as soon as it arrives, so memory use stays flat
+no matter how many videos the channel has.
+"""
+import os
+import logging
+from googleapiclient.errors import HttpError
+from .api import drop_missing_videos
+from .records import records_to_dicts
+from .links import iter_video_links, LinkIndex
+from .video_index import VideoIndex
+from .analytics import ChannelAnalytics
+from .tag_index import TagIndex, tag_index_path
+from .record_store import RecordStoreWriter
+from .session_store import SessionFileWriter, dumps
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+def iter_scrape(youtube_api, channel_id, start_date, end_date, max_videos=None):
+    """Chain the playlist, detail and comment stages into one generator of video batches."""
+    return _iter_detail_stages(youtube_api,
+                               youtube_api.iter_videos_in_date_range(channel_id, start_date, end_date, max_videos))
+
+
+def iter_playlist_scrape(youtube_api, playlist_id, start_date, end_date, max_videos=None):
+    """The stages of iter_scrape over the videos of any playlist."""
+    return _iter_detail_stages(youtube_api,
+                               youtube_api.iter_playlist_videos(playlist_id, start_date, end_date, max_videos))
+
+
+def iter_lookup(youtube_api, video_ids):
+    """The detail, link and comment stages over explicit video IDs, skipping channel and playlist listing.
+
+    Videos the API does not return (deleted, private or mistyped IDs) are dropped.
+    """
+    return _iter_detail_stages(youtube_api, youtube_api.iter_videos_by_id(video_ids), drop_missing=True)
+
+
+def _iter_detail_stages(youtube_api, batches, drop_missing=False):
+    batches = youtube_api.iter_video_details(batches)
+    if drop_missing:
+        batches = (found for found in map(drop_missing_videos, batches) if found)
+    batches = iter_video_links(batches)
+    try:
+        yield from youtube_api.iter_video_comments(batches)
+    except HttpError as e:
+        logger.error(f"HTTP error when fetching videos: {e}")
+        if e.resp.status == 403:
+            raise Exception("API quota exceeded or insufficient permissions")
+        raise Exception(f"API error: {e}")
+
+
+def run_pipeline(batches, sink):
+    """Feed every batch into the sink and return the sink's result."""
+    try:
+        for batch in batches:
+            sink.write(batch)
+    except BaseException:
+        sink.abort()
+        raise
+    return sink.close()
+
+
+class ListSink:
+    """Collects all videos (as compact VideoRecords) into a list, for callers that need them in memory."""
+
+    def __init__(self):
+        self.videos = []
+
+    def write(self, batch):
+        self.videos.extend(batch)
+
+    def close(self):
+        return self.videos
+
+    def abort(self):
+        self.videos = []
+
+
+class SessionSink:
+    """Streams channel and video data into a session file as batches arrive.
+
+    The file has the same layout as a json.dump of
+    {'channel_data': ..., 'videos_data': [...], 'link_index': {...},
+    'video_index': {...}, 'analytics': {...}}, compressed by the session
+    store codec of file_path. The link and sort/filter indexes and the
+    analytics columns are built as videos pass through and written last.
+    Data goes to a temporary file that is renamed into place on close, so
+    readers never see a partial session.
+
+    Every video is also appended to the session's record segment, which the
+    JSON API pages through without loading the session file, and to the tag
+    index stored next to it.
+
+    With a video_store, the videos go into that shared store and the session
+    file and record segment hold 'video_refs' ([video ID, digest] pairs) in
+    place of 'videos_data'.
+    """
+
+    def __init__(self, file_path, channel_data, video_store=None):
+        self.file_path = file_path
+        self.video_store = video_store
+        self.video_count = 0
+        self.stored_bytes = 0
+        self.link_index = LinkIndex()
+        self.video_index = VideoIndex()
+        self.analytics = ChannelAnalytics()
+        self.tag_index = TagIndex()
+        self._file = SessionFileWriter(file_path)
+        self.records = RecordStoreWriter(self._file.base_path)
+        # Session files are named after their session (session_store.session_base)
+        self.session_id = os.path.basename(self._file.base_path)
+        # Tags this write's references, so those of an earlier version of the session can be pruned
+        self.generation = os.urandom(8).hex()
+        self._existed = os.path.exists(file_path)
+        self._file.write(b'{"channel_data":')
+        self._file.write(dumps(channel_data))
+        self._file.write(b',"videos_data":[' if video_store is None else b',"video_refs":[')
+
+    def write(self, batch):
+        videos = records_to_dicts(batch)
+        stored = videos
+        if self.video_store is not None:
+            stored, written = self.video_store.put(self.session_id, videos, self.generation)
+            self.stored_bytes += written
+        for video, item in zip(videos, stored):
+            if self.video_count:
+                self._file.write(b',')
+            self._file.write(dumps(item))
+            self.link_index.add(video['id'], video.get('description_domains', ()))
+            self.video_index.add(video)
+            self.analytics.add(video)
+            self.tag_index.add(video)
+            self.records.add(item)
+            self.video_count += 1
+
+    def close(self):
+        self._file.write(b'],"link_index":')
+        self._file.write(dumps(self.link_index.to_dict()))
+        self._file.write(b',"video_index":')
+        self._file.write(dumps(self.video_index.finish().to_dict()))
+        self._file.write(b',"analytics":')
+        self._file.write(dumps(self.analytics.finish().to_dict()))
+        self._file.write(b'}')
+        self.records.close(self.video_index.orders)
+        self.tag_index.finish().save(tag_index_path(self._file.base_path))
+        self._file.commit()
+        if self.video_store is not None and self._existed:
+            self.video_store.prune(self.session_id, self.generation)
+        logger.debug(f"Streamed {self.video_count} videos to {self.file_path}")
+        return self.video_count
+
+    def abort(self):
+        self._file.discard()
+        self.records.abort()
+        if self.video_store is not None and not self._existed:
+            self.video_store.release([self.session_id])
+
+
+class TeeSink:
+    """Feeds every batch to several sinks; close() returns the first sink's result."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, batch):
+        for sink in self.sinks:
+            sink.write(batch)
+
+    def close(self):
+        results = [sink.close() for sink in self.sinks]
+        return results[0]
+
+    def abort(self):
+        for sink in self.sinks:
+            sink.abort()
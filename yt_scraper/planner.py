@@ -0,0 +1,262 @@
+"""
+Cost-based choice of how to list a channel's videos in a date range.
+
+There are two ways to find the videos of a date window:
+
+- walk the uploads playlist from the newest video down to the window start,
+  at 1 quota unit per page of 50 (cheap per page, but a window far in the
+  past of a large channel means paging through everything newer first),
+- page a date-bounded search, at 100 units per page of 50 (expensive per
+  page, but it only returns the window; a query stops at ~500 results, so
+  dense windows are split into several queries).
+
+The planner estimates where the window lies in the uploads playlist from the
+channel's video count and age, assuming a steady upload rate, refined by
+playlist-position hints recorded on earlier walks of the same channel. It then
+prices both strategies in quota units and latency and picks the cheaper.
+"""
+import os
+import math
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from .http_cache import HTTP_CACHE_DIR
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+PLANNER_DB_PATH = os.environ.get('YT_PLANNER_DB', os.path.join(HTTP_CACHE_DIR, 'planner.db'))
+# 'auto' lets the planner choose; 'playlist' or 'search' forces a strategy
+SCRAPE_STRATEGY = os.environ.get('YT_SCRAPE_STRATEGY', 'auto')
+STRATEGIES = ('playlist', 'search')
+
+PAGE_SIZE = 50
+PLAYLIST_PAGE_UNITS = 1
+SEARCH_PAGE_UNITS = 100
+DETAIL_BATCH_UNITS = 1
+# A search query stops paging after roughly this many results
+SEARCH_RESULT_LIMIT = 500
+# Headroom on estimated window sizes for search, whose cost grows fastest with the estimate
+SEARCH_SAFETY = 1.25
+# Typical seconds per call, for the latency estimate
+CALL_LATENCY = {'playlistItems': 0.15, 'search': 0.35, 'videos': 0.2}
+# Plans within this many units of each other are decided by latency
+UNIT_TOLERANCE = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS playlist_hints (
+    channel_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    published_at TEXT NOT NULL,
+    video_count INTEGER NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (channel_id, position)
+);
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+
+def _parse_time(value):
+    """Timestamp of an RFC 3339 'YYYY-MM-DDTHH:MM:SS...Z' string."""
+    return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class PlaylistHints:
+    """Known (playlist position, publish time) points of channels' uploads playlists, kept in SQLite."""
+
+    def __init__(self, db_path=PLANNER_DB_PATH):
+        self.db_path = db_path
+
+    def _connect(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        with _schema_lock:
+            if self.db_path not in _schema_ready:
+                conn.executescript(SCHEMA)
+                _schema_ready.add(self.db_path)
+        return conn
+
+    def record(self, channel_id, video_count, samples):
+        """Store (position, publishedAt) samples taken while walking the playlist at video_count videos."""
+        if not samples:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany('INSERT OR REPLACE INTO playlist_hints VALUES (?, ?, ?, ?, ?)',
+                                     [(channel_id, position, published_at, video_count, time.time())
+                                      for position, published_at in samples])
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not record playlist hints for {channel_id}: {e}")
+
+    def lookup(self, channel_id, video_count):
+        """(position, timestamp) samples shifted to the current video count, newest first."""
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute('SELECT position, published_at, video_count FROM playlist_hints '
+                                    'WHERE channel_id = ?', (channel_id,)).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read playlist hints for {channel_id}: {e}")
+            return []
+        # Uploads since a sample was taken went in above it and pushed it down the playlist
+        samples = {}
+        for position, published_at, count in rows:
+            shifted = position + max(0, video_count - count)
+            if shifted < video_count:
+                samples[shifted] = _parse_time(published_at)
+        return sorted(samples.items())
+
+
+class ListingPlan:
+    """The chosen strategy with the estimates behind it."""
+
+    def __init__(self, strategy, reason, estimates, window_videos, hints_used, search_windows=1):
+        self.strategy = strategy
+        self.reason = reason
+        self.estimates = estimates  # strategy -> {'units', 'calls', 'seconds'}
+        self.window_videos = window_videos
+        self.hints_used = hints_used
+        self.search_windows = search_windows
+
+    def to_dict(self):
+        return {
+            'strategy': self.strategy,
+            'reason': self.reason,
+            'estimated_window_videos': self.window_videos,
+            'hints_used': self.hints_used,
+            'search_windows': self.search_windows,
+            'estimates': self.estimates
+        }
+
+    def __repr__(self):
+        chosen = self.estimates.get(self.strategy, {})
+        return (f"ListingPlan({self.strategy}: ~{self.window_videos} videos, ~{chosen.get('units')} units, "
+                f"~{chosen.get('seconds')}s; {self.reason})")
+
+
+def estimate_position(timestamp, video_count, created_at, now, samples=()):
+    """Estimated number of videos published after timestamp, i.e. its position in the uploads playlist.
+
+    Interpolates between known samples (position, timestamp), and assumes a
+    steady upload rate between the newest sample and now and between the
+    oldest sample and the channel's creation.
+    """
+    points = [(0, now)] + [point for point in samples if point[1] <= now] + [(video_count, created_at)]
+    # Keep the points consistent: positions grow as timestamps fall
+    consistent = [points[0]]
+    for position, when in points[1:]:
+        if position >= consistent[-1][0] and when <= consistent[-1][1]:
+            consistent.append((position, when))
+    if timestamp >= now:
+        return 0
+    if timestamp <= created_at:
+        return video_count
+    for (newer_position, newer_time), (older_position, older_time) in zip(consistent, consistent[1:]):
+        if older_time <= timestamp <= newer_time:
+            if newer_time == older_time:
+                return older_position
+            fraction = (newer_time - timestamp) / (newer_time - older_time)
+            return newer_position + fraction * (older_position - newer_position)
+    return video_count
+
+
+def plan_listing(video_count, created_at, start_iso, end_iso, max_videos=None, samples=(), now=None,
+                 strategy=SCRAPE_STRATEGY):
+    """Price the playlist walk and the date-bounded search for a window and pick the cheaper.
+
+    created_at, start_iso and end_iso are RFC 3339 strings; samples are
+    playlist hints from PlaylistHints.lookup.
+    """
+    now = time.time() if now is None else now
+    created = _parse_time(created_at) if created_at else now - 365 * 86400
+    start, end = _parse_time(start_iso), _parse_time(end_iso)
+    newer_than_end = estimate_position(end, video_count, created, now, samples)
+    newer_than_start = estimate_position(start, video_count, created, now, samples)
+    window_videos = max(0.0, newer_than_start - newer_than_end)
+    wanted = min(window_videos, max_videos) if max_videos else window_videos
+
+    # Walk: every page down to the window start (or the video cap), plus the page that shows it has been passed
+    walk_depth = min(newer_than_start, newer_than_end + wanted) if max_videos else newer_than_start
+    walk_pages = min(math.ceil(video_count / PAGE_SIZE), math.ceil(walk_depth / PAGE_SIZE) + 1) or 1
+    # Search: enough pages for the window with headroom, one query per ~SEARCH_RESULT_LIMIT videos
+    search_results = wanted * SEARCH_SAFETY
+    search_windows = max(1, math.ceil(window_videos * SEARCH_SAFETY / SEARCH_RESULT_LIMIT))
+    search_pages = max(search_windows, math.ceil(search_results / PAGE_SIZE))
+    # Both fetch details for the same videos
+    detail_calls = math.ceil(wanted / PAGE_SIZE)
+
+    estimates = {
+        'playlist': {
+            'calls': walk_pages + detail_calls,
+            'units': walk_pages * PLAYLIST_PAGE_UNITS + detail_calls * DETAIL_BATCH_UNITS,
+            'seconds': round(walk_pages * CALL_LATENCY['playlistItems'] + detail_calls * CALL_LATENCY['videos'], 2)
+        },
+        'search': {
+            'calls': search_pages + detail_calls,
+            'units': search_pages * SEARCH_PAGE_UNITS + detail_calls * DETAIL_BATCH_UNITS,
+            'seconds': round(search_pages * CALL_LATENCY['search'] + detail_calls * CALL_LATENCY['videos'], 2)
+        }
+    }
+
+    if strategy in STRATEGIES:
+        chosen, reason = strategy, 'forced by configuration'
+    else:
+        walk, search = estimates['playlist'], estimates['search']
+        if abs(walk['units'] - search['units']) <= UNIT_TOLERANCE:
+            chosen = 'playlist' if walk['seconds'] <= search['seconds'] else 'search'
+            reason = 'similar quota cost, lower latency'
+        else:
+            chosen = 'playlist' if walk['units'] < search['units'] else 'search'
+            reason = 'lower quota cost'
+    return ListingPlan(chosen, reason, estimates, round(window_videos), len(samples), search_windows)
+
+
+def plan_for_channel(channel, start_iso, end_iso, max_videos=None, hints=None, strategy=None):
+    """Plan the listing of a channels.list item's videos in [start_iso, end_iso] (needs snippet and statistics)."""
+    video_count = int(channel.get('statistics', {}).get('videoCount', 0))
+    created_at = channel.get('snippet', {}).get('publishedAt')
+    samples = hints.lookup(channel['id'], video_count) if hints is not None else ()
+    return plan_listing(video_count, created_at, start_iso, end_iso, max_videos, samples,
+                        strategy=strategy or SCRAPE_STRATEGY)
+
+
+def split_window(start_iso, end_iso, parts):
+    """Split [start, end] into parts consecutive, non-overlapping windows, newest first."""
+    start, end = _parse_time(start_iso), _parse_time(end_iso)
+    if parts <= 1 or end - start < parts:
+        return [(start_iso, end_iso)]
+    step = (end - start) / parts
+    bounds = [start + step * k for k in range(parts)] + [end]
+    windows = []
+    for k in range(parts, 0, -1):
+        lower = math.ceil(bounds[k - 1]) + (1 if k > 1 else 0)
+        upper = math.floor(bounds[k]) if k < parts else end
+        windows.append((_format_time(lower) if k > 1 else start_iso, _format_time(upper) if k < parts else end_iso))
+    return windows
+
+
+def halve_window(start_iso, end_iso):
+    """Split a window that holds more than one search query can return; None when it is too short to split."""
+    start, end = _parse_time(start_iso), _parse_time(end_iso)
+    if end - start < 2:
+        return None
+    middle = start + (end - start) // 2
+    return (_format_time(middle + 1), end_iso), (start_iso, _format_time(middle))
@@ -0,0 +1,136 @@
+"""
+Per-request profiling for slow scrapes and exports.
+
+A RequestProfile samples the stack of the thread serving a request at a fixed
+interval, producing flamegraph-ready collapsed stacks, and can additionally run
+cProfile for a deterministic call profile. Captures are saved to PROFILE_DIR
+together with the request's scrape parameters.
+"""
+import os
+import sys
+import json
+import time
+import cProfile
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Profiling is opt-in: YT_PROFILING=1 enables the hooks
+PROFILING_ENABLED = os.environ.get('YT_PROFILING', '') == '1'
+PROFILE_DIR = os.environ.get('YT_PROFILE_DIR', 'profiles')
+# Requests slower than this are captured automatically (0 disables)
+PROFILE_THRESHOLD_MS = float(os.environ.get('YT_PROFILE_THRESHOLD_MS', '0') or 0)
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+MAX_PROFILES = 200  # oldest captures are deleted beyond this
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread."""
+
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """Profiling state for one request: always a stack sampler, optionally cProfile."""
+
+    def __init__(self, trigger, deterministic=False):
+        self.trigger = trigger
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.sampler = StackSampler(threading.get_ident()).start()
+        self.profiler = None
+        if deterministic:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self):
+        """Stop profiling and return the elapsed time in milliseconds."""
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.sampler.stop()
+        return (time.perf_counter() - self.start) * 1000
+
+    def save(self, metadata, profile_dir=PROFILE_DIR):
+        """Write the capture's artifacts and metadata; return the capture name."""
+        os.makedirs(profile_dir, exist_ok=True)
+        name = f"{self.started_at.strftime('%Y%m%d_%H%M%S_%f')}_{metadata.get('endpoint') or 'request'}"
+        artifacts = []
+        try:
+            with open(os.path.join(profile_dir, f"{name}.collapsed"), 'w') as f:
+                f.write(self.sampler.collapsed())
+            artifacts.append(f"{name}.collapsed")
+            if self.profiler is not None:
+                self.profiler.dump_stats(os.path.join(profile_dir, f"{name}.prof"))
+                artifacts.append(f"{name}.prof")
+            metadata = dict(metadata, name=name, trigger=self.trigger, samples=self.sampler.samples,
+                            started_at=self.started_at.isoformat(), artifacts=artifacts)
+            with open(os.path.join(profile_dir, f"{name}.json"), 'w') as f:
+                json.dump(metadata, f, indent=2)
+        except OSError as e:
+            logger.error(f"Error saving profile {name}: {e}")
+            return None
+        prune_profiles(profile_dir)
+        return name
+
+
+def list_profiles(profile_dir=PROFILE_DIR):
+    """Metadata of all saved captures, newest first."""
+    if not os.path.isdir(profile_dir):
+        return []
+    profiles = []
+    for file_name in sorted(os.listdir(profile_dir), reverse=True):
+        if not file_name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(profile_dir, file_name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable profile metadata {file_name}: {e}")
+    return profiles
+
+
+def prune_profiles(profile_dir=PROFILE_DIR, keep=MAX_PROFILES):
+    """Delete the oldest captures beyond the keep limit."""
+    names = sorted(f[:-len('.json')] for f in os.listdir(profile_dir) if f.endswith('.json'))
+    for name in names[:-keep] if len(names) > keep else []:
+        for suffix in ('.json', '.collapsed', '.prof'):
+            try:
+                os.remove(os.path.join(profile_dir, name + suffix))
+            except OSError:
+                pass
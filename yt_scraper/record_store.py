@@ -0,0 +1,161 @@
+"""
+Indexed per-record storage for session videos.
+
+Next to each session file, the session sink writes a record segment
+(<session>.records: one compact JSON video, or [video ID, digest] reference
+into the shared video store, per line) and an index
+(<session>.idx) holding the byte offset of every record and the precomputed
+sort orders. A page of videos can then be read with a few seeks, without
+deserializing the whole session.
+
+Index layout (little-endian):
+    magic b'YTRIDX1\\n' | count: uint64 | offsets: (count + 1) x uint64 |
+    one order per SORT_FIELDS entry: count x uint32 video positions, ascending
+"""
+import os
+import json
+import struct
+import logging
+from array import array
+from .video_index import SORT_FIELDS
+from .video_store import is_ref
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC = b'YTRIDX1\n'
+HEADER = struct.Struct('<8sQ')
+ORDER_NAMES = tuple(SORT_FIELDS)
+
+
+def _little_endian(values):
+    if array('I').itemsize != 4 or array('Q').itemsize != 8:
+        raise Exception("Unsupported platform integer sizes for the record index")
+    if struct.pack('=I', 1) != struct.pack('<I', 1):
+        values.byteswap()
+    return values
+
+
+class RecordStoreWriter:
+    """Writes a session's record segment and index as videos stream in."""
+
+    def __init__(self, base_path):
+        self.records_path = f"{base_path}.records"
+        self.index_path = f"{base_path}.idx"
+        self._records_tmp = f"{self.records_path}.{os.getpid()}.tmp"
+        self._index_tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        directory = os.path.dirname(base_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self._records_tmp, 'wb')
+        self._offsets = array('Q', [0])
+
+    def add(self, video):
+        """Append one session video dict or video store reference."""
+        line = json.dumps(video, separators=(',', ':')).encode('utf-8') + b'\n'
+        self._file.write(line)
+        self._offsets.append(self._offsets[-1] + len(line))
+
+    def close(self, orders):
+        """Write the index with the given sort orders and move both files into place."""
+        self._file.close()
+        count = len(self._offsets) - 1
+        with open(self._index_tmp, 'wb') as f:
+            f.write(HEADER.pack(INDEX_MAGIC, count))
+            f.write(_little_endian(self._offsets).tobytes())
+            for name in ORDER_NAMES:
+                f.write(_little_endian(array('I', orders[name])).tobytes())
+        # Records first: a reader only trusts a segment once its index exists
+        os.replace(self._records_tmp, self.records_path)
+        os.replace(self._index_tmp, self.index_path)
+        return count
+
+    def abort(self):
+        self._file.close()
+        for path in (self._records_tmp, self._index_tmp):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def write_record_store(base_path, videos, video_index):
+    """Write the segment and index for a list of session video dicts in one go."""
+    writer = RecordStoreWriter(base_path)
+    try:
+        for video in videos:
+            writer.add(video)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close(video_index.orders)
+
+
+class RecordStore:
+    """Random access to one session's stored videos.
+
+    Segments of references are read through video_store (a VideoStore).
+    """
+
+    def __init__(self, base_path, video_store=None):
+        self.video_store = video_store
+        self.records_path = f"{base_path}.records"
+        self.index_path = f"{base_path}.idx"
+        with open(self.index_path, 'rb') as f:
+            magic, self.count = HEADER.unpack(f.read(HEADER.size))
+        if magic != INDEX_MAGIC:
+            raise Exception(f"Not a record index: {self.index_path}")
+        stat = os.stat(self.index_path)
+        self.modified = stat.st_mtime
+        # Changes whenever the session is rewritten; used for ETags and cursors
+        self.version = f"{self.count:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    @classmethod
+    def exists(cls, base_path):
+        return os.path.exists(f"{base_path}.idx") and os.path.exists(f"{base_path}.records")
+
+    def __len__(self):
+        return self.count
+
+    def _read_uint(self, f, offset, itemsize, start, stop):
+        values = array('Q' if itemsize == 8 else 'I')
+        if stop <= start:
+            return values
+        f.seek(offset + start * itemsize)
+        values.frombytes(f.read((stop - start) * itemsize))
+        return _little_endian(values)
+
+    def positions(self, sort=None, descending=False, offset=0, limit=50):
+        """Video positions of one page in the given sort order (playlist order for None)."""
+        start = max(0, min(offset, self.count))
+        stop = min(start + limit, self.count)
+        if sort is None:
+            return list(range(start, stop))
+        if descending:
+            # The stored orders are ascending; a descending page is a reversed slice from the end
+            start, stop = self.count - stop, self.count - start
+        order_offset = HEADER.size + (self.count + 1) * 8 + ORDER_NAMES.index(sort) * self.count * 4
+        with open(self.index_path, 'rb') as f:
+            page = list(self._read_uint(f, order_offset, 4, start, stop))
+        return page[::-1] if descending else page
+
+    def read(self, positions):
+        """The stored video dicts at the given positions, in that order."""
+        if not positions:
+            return []
+        with open(self.index_path, 'rb') as f:
+            spans = []
+            for position in positions:
+                bounds = self._read_uint(f, HEADER.size, 8, position, position + 2)
+                spans.append((bounds[0], bounds[1] - bounds[0]))
+        videos = []
+        with open(self.records_path, 'rb') as f:
+            for start, length in spans:
+                f.seek(start)
+                videos.append(json.loads(f.read(length)))
+        if videos and is_ref(videos[0]):
+            if self.video_store is None:
+                raise Exception(f"{self.records_path} holds video store references but no store was given")
+            return self.video_store.get(videos)
+        return videos
@@ -0,0 +1,338 @@
+"""
+Compact record types for channels, videos and comments.
+
+Records use __slots__ instead of per-instance dicts, store counts as ints and
+tags as tuples of interned strings, and compute derived fields (formatted
+dates and times, video URL, duration string, engagement rate) on access
+instead of storing them. to_dict() produces the same dicts the scraper has
+always stored in sessions and passed to the exporters.
+"""
+import sys
+from .utils import (format_iso_date, format_iso_time, format_iso_datetimes, format_seconds,
+                    parse_duration_seconds, parse_formatted_duration)
+
+
+def _intern(value):
+    # Enumerated values (definition, language, category...) repeat across videos
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class CommentRecord:
+    """A top-level comment on a video."""
+    __slots__ = ('author', 'text', 'like_count', 'published_at', 'updated_at')
+
+    def __init__(self, author, text, like_count, published_at, updated_at):
+        self.author = author
+        self.text = text
+        self.like_count = like_count
+        self.published_at = published_at
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_api(cls, item):
+        """Build a record from a commentThreads().list item."""
+        comment = item['snippet']['topLevelComment']['snippet']
+        return cls(comment['authorDisplayName'], comment['textDisplay'], comment['likeCount'],
+                   comment['publishedAt'], comment['updatedAt'])
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('author', ''), data.get('text', ''), data.get('like_count', 0),
+                   data.get('published_at', ''), data.get('updated_at', ''))
+
+    @property
+    def published_date(self):
+        return format_iso_date(self.published_at)
+
+    @property
+    def published_time(self):
+        return format_iso_time(self.published_at)
+
+    @property
+    def updated_date(self):
+        return format_iso_date(self.updated_at)
+
+    @property
+    def updated_time(self):
+        return format_iso_time(self.updated_at)
+
+    def to_dict(self, formatted=None):
+        """The session/export dict; formatted maps timestamps to preformatted (date, time) pairs."""
+        if formatted is None:
+            formatted = format_iso_datetimes((self.published_at, self.updated_at))
+        published_date, published_time = formatted[self.published_at]
+        updated_date, updated_time = formatted[self.updated_at]
+        return {
+            'author': self.author,
+            'text': self.text,
+            'like_count': self.like_count,
+            'published_at': self.published_at,
+            'published_date': published_date,
+            'published_time': published_time,
+            'updated_at': self.updated_at,
+            'updated_date': updated_date,
+            'updated_time': updated_time
+        }
+
+
+class VideoRecord:
+    """A video with its playlist snippet and, once fetched, its details and comments."""
+    __slots__ = ('id', 'title', 'description', 'published_at', 'thumbnail_url', 'has_details',
+                 'duration_seconds', 'dimension', 'definition', 'caption', 'licensed_content', 'projection',
+                 'view_count', 'like_count', 'comment_count', 'tags', 'category_id', 'live_broadcast_content',
+                 'default_language', 'localized_title', 'localized_description', 'default_audio_language',
+                 'description_urls', 'description_domains', 'comments')
+
+    def __init__(self, id, title, description, published_at, thumbnail_url=''):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.published_at = published_at
+        self.thumbnail_url = thumbnail_url
+        self.has_details = False
+        self.duration_seconds = 0
+        self.dimension = self.definition = self.projection = 'N/A'
+        self.caption = self.licensed_content = False
+        self.view_count = self.like_count = self.comment_count = 0
+        self.tags = ()
+        self.category_id = self.default_language = self.default_audio_language = 'N/A'
+        self.live_broadcast_content = 'none'
+        self.localized_title = self.localized_description = None
+        self.description_urls = None
+        self.description_domains = None
+        self.comments = None
+
+    @classmethod
+    def from_playlist_item(cls, item):
+        """Build a record from a playlistItems().list item."""
+        snippet = item['snippet']
+        return cls(item['contentDetails']['videoId'], snippet['title'], snippet['description'],
+                   item['contentDetails']['videoPublishedAt'],
+                   snippet['thumbnails'].get('high', {}).get('url', ''))
+
+    @classmethod
+    def from_search_result(cls, item):
+        """Build a record from a search().list video result (its description is truncated until details are applied)."""
+        snippet = item['snippet']
+        return cls(item['id']['videoId'], snippet['title'], snippet['description'], snippet['publishedAt'],
+                   snippet['thumbnails'].get('high', {}).get('url', ''))
+
+    def apply_video_resource(self, item, duration_seconds=None):
+        """Fill in details from a videos().list item.
+
+        duration_seconds can be passed in when the batch's durations were parsed together.
+        """
+        content = item['contentDetails']
+        statistics = item['statistics']
+        snippet = item['snippet']
+        # Search results only carry a shortened description; the videos resource has the full text
+        self.title = snippet.get('title', self.title)
+        self.description = snippet.get('description', self.description)
+        # Records built from a bare video ID (bulk lookups) have no listing data yet
+        if not self.published_at:
+            self.published_at = snippet.get('publishedAt', '')
+        if not self.thumbnail_url:
+            self.thumbnail_url = snippet.get('thumbnails', {}).get('high', {}).get('url', '')
+        if duration_seconds is None:
+            try:
+                duration_seconds = parse_duration_seconds(content.get('duration', 'PT0S'))
+            except Exception:
+                duration_seconds = 0
+        self.duration_seconds = duration_seconds
+        self.dimension = _intern(content.get('dimension', 'N/A'))
+        self.definition = _intern(content.get('definition', 'N/A'))
+        self.caption = content.get('caption', 'N/A') == 'true'
+        self.licensed_content = content.get('licensedContent', False)
+        self.projection = _intern(content.get('projection', 'N/A'))
+        self.view_count = int(statistics.get('viewCount', 0))
+        self.like_count = int(statistics.get('likeCount', 0))
+        self.comment_count = int(statistics.get('commentCount', 0))
+        self.tags = tuple(sys.intern(tag) for tag in snippet.get('tags', []))
+        self.category_id = _intern(snippet.get('categoryId', 'N/A'))
+        self.live_broadcast_content = _intern(snippet.get('liveBroadcastContent', 'none'))
+        self.default_language = _intern(snippet.get('defaultLanguage', 'N/A'))
+        localized = snippet.get('localized', {})
+        self.localized_title = localized.get('title')
+        self.localized_description = localized.get('description')
+        self.default_audio_language = _intern(snippet.get('defaultAudioLanguage', 'N/A'))
+        self.has_details = True
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a record from a stored session dict."""
+        record = cls(data.get('id', ''), data.get('title', ''), data.get('description', ''),
+                     data.get('published_at', ''), data.get('thumbnail_url', ''))
+        if 'view_count' in data:
+            record.duration_seconds = parse_formatted_duration(data.get('duration', '00:00'))
+            for field in ('dimension', 'definition', 'caption', 'licensed_content', 'projection', 'view_count',
+                          'like_count', 'comment_count', 'category_id', 'live_broadcast_content',
+                          'default_language', 'default_audio_language'):
+                if field in data:
+                    setattr(record, field, _intern(data[field]))
+            record.tags = tuple(sys.intern(tag) for tag in data.get('tags', []))
+            localized = data.get('localized', {})
+            record.localized_title = localized.get('title')
+            record.localized_description = localized.get('description')
+            record.has_details = True
+        if 'description_urls' in data:
+            record.description_urls = tuple(data['description_urls'])
+        if 'description_domains' in data:
+            record.description_domains = tuple(data['description_domains'])
+        if 'comments' in data:
+            record.comments = [CommentRecord.from_dict(comment) for comment in data['comments']]
+        return record
+
+    @property
+    def published_date(self):
+        return format_iso_date(self.published_at)
+
+    @property
+    def published_time(self):
+        return format_iso_time(self.published_at)
+
+    @property
+    def video_url(self):
+        return f"https://www.youtube.com/watch?v={self.id}"
+
+    @property
+    def duration(self):
+        return format_seconds(self.duration_seconds)
+
+    @property
+    def localized(self):
+        if self.localized_title is None and self.localized_description is None:
+            return {}
+        return {'title': self.localized_title, 'description': self.localized_description}
+
+    @property
+    def engagement_rate(self):
+        if self.view_count > 0:
+            return ((self.like_count + self.comment_count) / self.view_count) * 100
+        return 0
+
+    def timestamps(self):
+        """All ISO timestamps of the video and its comments, for batch formatting."""
+        yield self.published_at
+        for comment in self.comments or ():
+            yield comment.published_at
+            yield comment.updated_at
+
+    def to_dict(self, formatted=None):
+        """The session/export dict for this video, with derived fields filled in.
+
+        formatted maps timestamps to preformatted (date, time) pairs, see records_to_dicts().
+        """
+        if formatted is None:
+            formatted = format_iso_datetimes(self.timestamps())
+        published_date, published_time = formatted[self.published_at]
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'published_at': self.published_at,
+            'published_date': published_date,
+            'published_time': published_time,
+            'thumbnail_url': self.thumbnail_url
+        }
+        if self.has_details:
+            data.update({
+                'duration': self.duration,
+                'dimension': self.dimension,
+                'definition': self.definition,
+                'caption': self.caption,
+                'licensed_content': self.licensed_content,
+                'projection': self.projection,
+                'view_count': self.view_count,
+                'like_count': self.like_count,
+                'comment_count': self.comment_count,
+                'tags': list(self.tags),
+                'category_id': self.category_id,
+                'live_broadcast_content': self.live_broadcast_content,
+                'default_language': self.default_language,
+                'localized': self.localized,
+                'default_audio_language': self.default_audio_language,
+                'video_url': self.video_url
+            })
+        data['engagement_rate'] = self.engagement_rate
+        if self.description_urls is not None:
+            data['description_urls'] = list(self.description_urls)
+        if self.description_domains is not None:
+            data['description_domains'] = list(self.description_domains)
+        if self.comments is not None:
+            data['comments'] = [comment.to_dict(formatted) for comment in self.comments]
+        return data
+
+
+def records_to_dicts(videos):
+    """Convert a batch of videos to session dicts, formatting all their timestamps in one pass."""
+    formatted = format_iso_datetimes(timestamp for video in videos if isinstance(video, VideoRecord)
+                                     for timestamp in video.timestamps())
+    return [video.to_dict(formatted) if isinstance(video, VideoRecord) else video for video in videos]
+
+
+class ChannelRecord:
+    """Channel-level metadata."""
+    __slots__ = ('id', 'title', 'description', 'custom_url', 'published_at', 'country', 'view_count',
+                 'subscriber_count', 'video_count', 'topic_categories', 'thumbnail_url', 'banner_url',
+                 'upload_frequency')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_api(cls, channel):
+        """Build a record from a channels().list item."""
+        snippet = channel['snippet']
+        statistics = channel['statistics']
+        return cls(
+            id=channel['id'],
+            title=snippet['title'],
+            description=snippet['description'],
+            custom_url=snippet.get('customUrl', ''),
+            published_at=snippet['publishedAt'],
+            country=snippet.get('country', 'Unknown'),
+            view_count=int(statistics.get('viewCount', 0)),
+            subscriber_count=int(statistics.get('subscriberCount', 0)),
+            video_count=int(statistics.get('videoCount', 0)),
+            topic_categories=channel.get('topicDetails', {}).get('topicCategories', []),
+            thumbnail_url=snippet['thumbnails'].get('high', {}).get('url', ''),
+            banner_url=channel.get('brandingSettings', {}).get('image', {}).get('bannerExternalUrl', '')
+        )
+
+    @property
+    def url(self):
+        # If a custom URL exists, use it instead
+        if self.custom_url:
+            return f"https://www.youtube.com/{self.custom_url}"
+        return f"https://www.youtube.com/channel/{self.id}"
+
+    @property
+    def published_date(self):
+        return format_iso_date(self.published_at)
+
+    @property
+    def published_time(self):
+        return format_iso_time(self.published_at)
+
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'custom_url': self.custom_url,
+            'url': self.url,
+            'published_at': self.published_at,
+            'published_date': self.published_date,
+            'published_time': self.published_time,
+            'country': self.country,
+            'view_count': self.view_count,
+            'subscriber_count': self.subscriber_count,
+            'video_count': self.video_count,
+            'topic_categories': self.topic_categories,
+            'thumbnail_url': self.thumbnail_url,
+            'banner_url': self.banner_url
+        }
+        if self.upload_frequency is not None:
+            data['upload_frequency'] = self.upload_frequency
+        return data
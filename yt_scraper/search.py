@@ -0,0 +1,329 @@
+"""
+Full-text search over scraped videos and comments.
+
+Scrapes are indexed into SQLite FTS5 tables as they stream in: video titles,
+descriptions and tags in one table, comment texts in another, each row tagged
+with its session and channel. One database holds every session, so a search
+can cover the current scrape or all channels scraped so far.
+
+The session ID is an indexed column, so restricting a search to one session
+is part of the full-text match rather than a scan of every hit. Ranking
+(bm25) runs inside FTS5, and snippets are only built for the top hits.
+
+Each batch of a scrape is inserted in its own short transaction, so several
+scrapes can be indexed at once without holding the write lock for the length
+of a scrape. Searches only see the sessions listed in indexed_sessions,
+which a scrape joins when it is complete.
+"""
+import os
+import re
+import html
+import time
+import sqlite3
+import logging
+import threading
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+SEARCH_DB_PATH = os.environ.get('YT_SEARCH_DB', os.path.join('session_data', 'search.db'))
+SEARCH_MAX_RESULTS = 100
+# Above this many matches, bm25 barely tells hits apart and ranking them all costs
+# far more than the lookup, so the newest matches are returned instead
+RANKED_MATCH_LIMIT = 20000
+SNIPPET_CHARS = 160
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_sessions (
+    session_id TEXT PRIMARY KEY,
+    channel_id TEXT,
+    channel_title TEXT,
+    video_count INTEGER,
+    comment_count INTEGER,
+    indexed_at REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+    title, description, tags, session_id,
+    channel_id UNINDEXED, video_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+    text, session_id,
+    author UNINDEXED, channel_id UNINDEXED, video_id UNINDEXED, video_title UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+-- bm25 column weights: titles count most, then tags; the session column never adds to the score
+INSERT INTO videos_fts (videos_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0, 0.0)');
+INSERT INTO comments_fts (comments_fts, rank) VALUES ('rank', 'bm25(1.0, 0.0)');
+"""
+
+# Per table: the columns returned with a hit, and the text columns snippets are cut from
+SEARCH_TABLES = {
+    'videos': ('videos_fts', ('video_id', 'channel_id', 'session_id', 'title'), ('title', 'description', 'tags')),
+    'comments': ('comments_fts', ('video_id', 'channel_id', 'session_id', 'video_title', 'author'), ('text',))
+}
+
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+
+def connect(db_path=SEARCH_DB_PATH):
+    """Open the search database, creating the schema on first use."""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    # WAL lets searches run while another worker is indexing a scrape
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    with _schema_lock:
+        if db_path not in _schema_ready:
+            conn.executescript(SCHEMA)
+            _schema_ready.add(db_path)
+    return conn
+
+
+def _video_fields(video):
+    """(id, title, description, tags, comments) of a VideoRecord or session dict."""
+    if isinstance(video, dict):
+        return (video.get('id', ''), video.get('title', ''), video.get('description', ''),
+                video.get('tags') or (), video.get('comments') or ())
+    return video.id, video.title, video.description, video.tags, video.comments or ()
+
+
+def _comment_fields(comment):
+    if isinstance(comment, dict):
+        return comment.get('author', ''), comment.get('text', '')
+    return comment.author, comment.text
+
+
+class SearchIndexSink:
+    """Pipeline sink that indexes each batch of a scrape for full-text search.
+
+    Every batch is committed on its own; the session becomes searchable when
+    close() lists it in indexed_sessions, so a search never sees a
+    half-indexed session, and abort() deletes the rows written so far.
+    Indexing problems are logged and never fail the scrape itself.
+    """
+
+    def __init__(self, session_id, channel_data, db_path=SEARCH_DB_PATH):
+        self.session_id = session_id
+        self.channel_id = channel_data.get('id', '')
+        self.channel_title = channel_data.get('title', '')
+        self.video_count = 0
+        self.comment_count = 0
+        try:
+            self._conn = connect(db_path)
+            # Re-indexing a session replaces its rows; it is hidden from searches until close()
+            if _session_indexed(self._conn, session_id):
+                with self._conn:
+                    _delete_session(self._conn, session_id)
+        except sqlite3.Error as e:
+            logger.warning(f"Search indexing disabled for session {session_id}: {e}")
+            self._conn = None
+
+    def write(self, batch):
+        if self._conn is None:
+            return
+        video_rows = []
+        comment_rows = []
+        for video in batch:
+            video_id, title, description, tags, comments = _video_fields(video)
+            video_rows.append((title, description, ' '.join(tags), self.session_id, self.channel_id, video_id))
+            for comment in comments:
+                author, text = _comment_fields(comment)
+                comment_rows.append((text, author, self.session_id, self.channel_id, video_id, title))
+        try:
+            with self._conn:
+                self._conn.executemany('INSERT INTO videos_fts (title, description, tags, session_id, channel_id, '
+                                       'video_id) VALUES (?, ?, ?, ?, ?, ?)', video_rows)
+                self._conn.executemany('INSERT INTO comments_fts (text, author, session_id, channel_id, video_id, '
+                                       'video_title) VALUES (?, ?, ?, ?, ?, ?)', comment_rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Search indexing failed for session {self.session_id}: {e}")
+            self.abort()
+            return
+        self.video_count += len(video_rows)
+        self.comment_count += len(comment_rows)
+
+    def close(self):
+        if self._conn is None:
+            return 0
+        try:
+            with self._conn:
+                self._conn.execute('INSERT OR REPLACE INTO indexed_sessions VALUES (?, ?, ?, ?, ?, ?)',
+                                   (self.session_id, self.channel_id, self.channel_title, self.video_count,
+                                    self.comment_count, time.time()))
+            logger.debug(f"Indexed {self.video_count} videos and {self.comment_count} comments "
+                         f"of session {self.session_id} for search")
+        except sqlite3.Error as e:
+            logger.warning(f"Search indexing failed for session {self.session_id}: {e}")
+            self._delete_rows()
+        finally:
+            self._conn.close()
+            self._conn = None
+        return self.video_count
+
+    def abort(self):
+        if self._conn is None:
+            return
+        try:
+            self._delete_rows()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def _delete_rows(self):
+        # The batches committed so far; left behind, they stay hidden until the janitor removes the session
+        try:
+            with self._conn:
+                _delete_session(self._conn, self.session_id)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not remove the partial search index of session {self.session_id}: {e}")
+
+
+def index_session(session_id, data, db_path=SEARCH_DB_PATH):
+    """Index a stored session's videos and comments (for sessions not indexed while scraping)."""
+    sink = SearchIndexSink(session_id, data.get('channel_data', {}), db_path)
+    sink.write(data.get('videos_data', []))
+    return sink.close()
+
+
+def is_indexed(session_id, db_path=SEARCH_DB_PATH):
+    conn = connect(db_path)
+    try:
+        return _session_indexed(conn, session_id)
+    finally:
+        conn.close()
+
+
+def _session_indexed(conn, session_id):
+    return conn.execute('SELECT 1 FROM indexed_sessions WHERE session_id = ?', (session_id,)).fetchone() is not None
+
+
+def _session_match(session_id):
+    return 'session_id : "' + session_id.replace('"', '""') + '"'
+
+
+# Hits of sessions whose indexing is complete
+_VISIBLE = 'session_id IN (SELECT session_id FROM indexed_sessions)'
+
+
+def _delete_session(conn, session_id):
+    for table in ('videos_fts', 'comments_fts'):
+        conn.execute(f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {table} MATCH ?)",
+                     (_session_match(session_id),))
+    conn.execute('DELETE FROM indexed_sessions WHERE session_id = ?', (session_id,))
+
+
+def remove_sessions(session_ids, db_path=SEARCH_DB_PATH):
+    """Drop expired sessions from the index."""
+    if not session_ids or not os.path.exists(db_path):
+        return
+    conn = connect(db_path)
+    try:
+        with conn:
+            for session_id in session_ids:
+                _delete_session(conn, session_id)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not remove sessions from the search index: {e}")
+    finally:
+        conn.close()
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query: all words must match, the last one as a prefix."""
+    tokens = _TOKEN_PATTERN.findall(text or '')
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _highlight_pattern(text):
+    tokens = _TOKEN_PATTERN.findall(text)
+    words = [re.escape(token) for token in tokens[:-1]] + [re.escape(tokens[-1]) + r'\w*']
+    return re.compile(r'\b(?:' + '|'.join(words) + r')\b', re.IGNORECASE)
+
+
+def make_snippet(texts, pattern, size=SNIPPET_CHARS):
+    """HTML snippet around the first match in the first matching text, matches wrapped in <mark>."""
+    match = None
+    for text in texts:
+        match = pattern.search(text or '')
+        if match:
+            break
+    if match is None:
+        text = next((text for text in texts if text), '')
+        start = 0
+    else:
+        # Start a little before the match, at a word boundary
+        start = max(0, match.start() - size // 4)
+        if start:
+            start = text.find(' ', start, match.start()) + 1 or start
+    excerpt = text[start:start + size]
+    parts = []
+    position = 0
+    for hit in pattern.finditer(excerpt):
+        parts.append(html.escape(excerpt[position:hit.start()]))
+        parts.append(f"<mark>{html.escape(hit.group())}</mark>")
+        position = hit.end()
+    parts.append(html.escape(excerpt[position:]))
+    return ('...' if start else '') + ''.join(parts) + ('...' if start + size < len(text) else '')
+
+
+def _top_hits(conn, table, match, limit):
+    """rowids of the best hits and whether they are ranked by relevance."""
+    matches = conn.execute(f"SELECT count(*) FROM (SELECT 1 FROM {table} WHERE {table} MATCH ? AND {_VISIBLE} "
+                           f"LIMIT ?)", (match, RANKED_MATCH_LIMIT + 1)).fetchone()[0]
+    if matches > RANKED_MATCH_LIMIT:
+        rows = conn.execute(f"SELECT rowid, NULL FROM {table} WHERE {table} MATCH ? AND {_VISIBLE} "
+                            f"ORDER BY rowid DESC LIMIT ?", (match, limit)).fetchall()
+        return rows, False
+    rows = conn.execute(f"SELECT rowid, rank FROM {table} WHERE {table} MATCH ? AND {_VISIBLE} ORDER BY rank LIMIT ?",
+                        (match, limit)).fetchall()
+    return rows, True
+
+
+def search(text, session_id=None, limit=20, db_path=SEARCH_DB_PATH):
+    """Search videos and comments, best matches first.
+
+    Restricted to one session when session_id is given, otherwise across every
+    indexed session. Snippets are HTML with matches wrapped in <mark>. Very
+    broad queries come back newest first instead of ranked, flagged in 'ranked'.
+    """
+    query = build_match_query(text)
+    result = {'query': text, 'videos': [], 'comments': [], 'ranked': {}}
+    if query is None:
+        return result
+    limit = max(1, min(limit, SEARCH_MAX_RESULTS))
+    match = f"{_session_match(session_id)} AND {query}" if session_id else query
+    pattern = _highlight_pattern(text)
+    start = time.perf_counter()
+    conn = connect(db_path)
+    try:
+        for kind, (table, columns, text_columns) in SEARCH_TABLES.items():
+            hits, ranked = _top_hits(conn, table, match, limit)
+            result['ranked'][kind] = ranked
+            if not hits:
+                continue
+            # Plain rowid lookups for the few hits, instead of snippet() over the match
+            rows = conn.execute(
+                f"SELECT rowid, {', '.join(columns + text_columns)} FROM {table} "
+                f"WHERE rowid IN ({', '.join('?' * len(hits))})", [rowid for rowid, _ in hits]).fetchall()
+            rows_by_id = {row[0]: row[1:] for row in rows}
+            for rowid, score in hits:
+                row = rows_by_id[rowid]
+                hit = dict(zip(columns, row))
+                hit['video_url'] = f"https://www.youtube.com/watch?v={hit['video_id']}"
+                hit['snippet'] = make_snippet(row[len(columns):], pattern)
+                hit['score'] = round(-score, 4) if score is not None else None
+                result[kind].append(hit)
+    finally:
+        conn.close()
+    result['took_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return result
@@ -0,0 +1,288 @@
+"""
+Compressed, sharded storage for session files.
+
+Each session is stored as <root>/<aa>/<bb>/<session_id>.json.<codec>, where
+aa/bb come from a hash of the session ID, so no directory grows into one flat
+folder of thousands of files. The record segment and index of the JSON API
+(<session_id>.records / .idx) live next to it.
+
+Payloads are compressed with zstd when the zstandard package is installed,
+gzip otherwise, and encoded with orjson when available. Every write goes to a
+temporary file in the same directory that is renamed into place once complete,
+so a concurrent reader sees either the old or the new session, never half of
+one. Flat, uncompressed <root>/<session_id>.json files written before this
+layout are still read and cleaned up.
+"""
+import os
+import json
+import gzip
+import shutil
+import hashlib
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+CODEC_EXTENSIONS = {
+    'zstd': '.json.zst',
+    'gzip': '.json.gz',
+    'none': '.json'
+}
+# Fast levels: session JSON compresses well even there, and writes sit on the scrape path
+DEFAULT_LEVELS = {'zstd': 3, 'gzip': 3}
+
+SESSION_CODEC = os.environ.get('YT_SESSION_CODEC') or ('zstd' if zstandard else 'gzip')
+if SESSION_CODEC not in CODEC_EXTENSIONS or (SESSION_CODEC == 'zstd' and zstandard is None):
+    logger.warning(f"Session codec {SESSION_CODEC} unavailable, using gzip")
+    SESSION_CODEC = 'gzip'
+SESSION_COMPRESS_LEVEL = int(os.environ.get('YT_SESSION_COMPRESS_LEVEL', DEFAULT_LEVELS.get(SESSION_CODEC, 0)))
+
+# Files kept next to a session's data file
+COMPANION_SUFFIXES = ('.records', '.idx', '.tags')
+TEMP_SUFFIX = '.tmp'
+
+
+def dumps(obj):
+    """Encode to compact JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def loads(payload):
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def shard_dir(root, session_id):
+    """The hashed subdirectory holding a session's files."""
+    digest = hashlib.sha1(session_id.encode('utf-8')).hexdigest()
+    return os.path.join(root, digest[:2], digest[2:4])
+
+
+def session_base(root, session_id):
+    """Path of a session's files without extension, e.g. for its record segment."""
+    return os.path.join(shard_dir(root, session_id), session_id)
+
+
+def session_path(root, session_id, codec=None):
+    """Where a session is written with the given codec (SESSION_CODEC by default)."""
+    return session_base(root, session_id) + CODEC_EXTENSIONS[codec or SESSION_CODEC]
+
+
+def _legacy_path(root, session_id):
+    return os.path.join(root, f"{session_id}.json")
+
+
+def _codec_of(path):
+    for codec, extension in CODEC_EXTENSIONS.items():
+        if extension != '.json' and path.endswith(extension):
+            return codec
+    return 'none'
+
+
+def _candidate_paths(root, session_id):
+    base = session_base(root, session_id)
+    return [base + extension for extension in CODEC_EXTENSIONS.values()] + [_legacy_path(root, session_id)]
+
+
+def find_session_file(root, session_id):
+    """Path of the stored session data, in whichever layout and codec it was written, or None."""
+    for path in _candidate_paths(root, session_id):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class SessionFileWriter:
+    """Binary writer that compresses into a temporary file and renames it into place on commit()."""
+
+    def __init__(self, path, level=None):
+        self.path = path
+        self.codec = _codec_of(path)
+        # Companion files (record segment and index) share this prefix
+        self.base_path = path[:-len(CODEC_EXTENSIONS[self.codec])]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.tmp_path = f"{path}.{os.getpid()}.{os.urandom(4).hex()}{TEMP_SUFFIX}"
+        self._raw = open(self.tmp_path, 'wb')
+        level = SESSION_COMPRESS_LEVEL if level is None else level
+        if self.codec == 'zstd':
+            self._stream = zstandard.ZstdCompressor(level=level).stream_writer(self._raw, closefd=False)
+        elif self.codec == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, filename='', mode='wb', compresslevel=level,
+                                         mtime=0)
+        else:
+            self._stream = self._raw
+
+    def write(self, payload):
+        self._stream.write(payload)
+
+    def commit(self):
+        """Finish the file and atomically replace any previous version of the session."""
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        os.replace(self.tmp_path, self.path)
+        # A session rewritten with another codec must not leave the old file to shadow it
+        for extension in CODEC_EXTENSIONS.values():
+            stale_path = self.base_path + extension
+            if stale_path != self.path and os.path.exists(stale_path):
+                os.remove(stale_path)
+        return os.path.getsize(self.path)
+
+    def discard(self):
+        try:
+            if self._stream is not self._raw:
+                self._stream.close()
+            self._raw.close()
+        finally:
+            try:
+                os.remove(self.tmp_path)
+            except OSError:
+                pass
+
+
+def write_session(root, session_id, data, codec=None, level=None):
+    """Store session data atomically; returns the path written."""
+    writer = SessionFileWriter(session_path(root, session_id, codec), level)
+    try:
+        writer.write(dumps(data))
+    except BaseException:
+        writer.discard()
+        raise
+    writer.commit()
+    return writer.path
+
+
+def read_session_file(path):
+    """Decode a stored session file of any codec."""
+    with open(path, 'rb') as f:
+        payload = f.read()
+    codec = _codec_of(path)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise Exception(f"Session {path} is zstd-compressed but zstandard is not installed")
+        payload = zstandard.ZstdDecompressor().decompressobj().decompress(payload)
+    elif codec == 'gzip':
+        payload = gzip.decompress(payload)
+    return loads(payload)
+
+
+def read_session(root, session_id):
+    """(data, path) of a stored session, or (None, None) when there is none."""
+    path = find_session_file(root, session_id)
+    if path is None:
+        return None, None
+    return read_session_file(path), path
+
+
+def _session_files(root, session_id):
+    companions = [base + suffix for base in (session_base(root, session_id), os.path.join(root, session_id))
+                  for suffix in COMPANION_SUFFIXES]
+    return _candidate_paths(root, session_id) + companions
+
+
+def session_disk_usage(root, session_id):
+    """Bytes on disk of a session's data file and companion files."""
+    total = 0
+    for path in _session_files(root, session_id):
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+def delete_session(root, session_id):
+    """Remove a session's data file in every layout and its companion files; returns how many were removed."""
+    removed = 0
+    for path in _session_files(root, session_id):
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def copy_session(root, source_id, target_id):
+    """Copy a session's data file and companion files to another session ID; returns the new data file path.
+
+    Sessions holding video store references stay small, so this is cheap; the
+    copy's references are added with VideoStore.copy().
+    """
+    source_path = find_session_file(root, source_id)
+    if source_path is None:
+        return None
+    codec = _codec_of(source_path)
+    target_path = session_path(root, target_id, codec)
+    source_base = source_path[:-len(CODEC_EXTENSIONS[codec])]
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    # Companions first, and each through a temporary file, as for writes
+    for source, target in [(source_base + suffix, session_base(root, target_id) + suffix)
+                           for suffix in COMPANION_SUFFIXES] + [(source_path, target_path)]:
+        if not os.path.exists(source):
+            continue
+        tmp_path = f"{target}.{os.getpid()}{TEMP_SUFFIX}"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    return target_path
+
+
+def iter_session_files(root):
+    """(session_id, path) of every stored session data file, sharded or legacy."""
+    if not os.path.isdir(root):
+        return
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith('.json'):
+                yield entry.name[:-len('.json')], entry.path
+            elif entry.is_dir() and len(entry.name) == 2:
+                yield from _iter_shard(entry.path)
+
+
+def iter_temp_files(root):
+    """Paths of the temporary files of session writes under root (left behind by crashed writers)."""
+    if not os.path.isdir(root):
+        return
+    shard_paths = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir() and len(entry.name) == 2:
+                shard_paths.append(entry.path)
+            elif entry.name.endswith(TEMP_SUFFIX) and entry.is_file():
+                # Flat-layout sessions were written next to their data file
+                yield entry.path
+    for path in shard_paths:
+        with os.scandir(path) as shards:
+            leaf_paths = [shard.path for shard in shards if shard.is_dir()]
+        for leaf_path in leaf_paths:
+            with os.scandir(leaf_path) as items:
+                for item in items:
+                    if item.name.endswith(TEMP_SUFFIX) and item.is_file():
+                        yield item.path
+
+
+def _iter_shard(path):
+    with os.scandir(path) as shards:
+        shard_paths = [shard.path for shard in shards if shard.is_dir()]
+    for shard_path in shard_paths:
+        with os.scandir(shard_path) as items:
+            for item in items:
+                extension = CODEC_EXTENSIONS[_codec_of(item.name)]
+                if item.is_file() and item.name.endswith(extension):
+                    yield item.name[:-len(extension)], item.path
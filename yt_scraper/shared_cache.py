@@ -0,0 +1,338 @@
+"""
+Cache storage shared by every worker process.
+
+gunicorn runs several workers, each with its own memory, so a cache kept in a
+worker's memory is cold in every other worker and the hit rate falls as
+workers are added. The caches of yt_scraper (API responses, resolved channel
+IDs, channel metadata) keep their entries in one of these backends instead,
+which all have the same semantics: byte-string values, an optional TTL per
+entry, and bounds on the number of entries and their total size, enforced by
+evicting expired and then least recently used entries.
+
+- SQLiteCache: a SQLite database in WAL mode on local disk, shared by every
+  process of the host (the default),
+- NetworkCache: a cache server shared between hosts, through any client with
+  redis-py's get/set(ex=)/delete/scan_iter calls; a Redis server enforces
+  its own memory limit (maxmemory with an LRU policy),
+- MemoryClient: an in-process stand-in for such a client, for tests and
+  single-process runs, with the same TTL and size bounds.
+
+YT_CACHE_BACKEND selects the backend: 'sqlite', 'memory' or a redis:// URL
+(which needs the optional redis package). open_cache() returns the cache of
+one name, e.g. open_cache('http', ...), once per process.
+"""
+import os
+import math
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from .metrics import CACHE_REQUESTS
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.environ.get('YT_CACHE_BACKEND', 'sqlite')
+CACHE_DB_PATH = os.environ.get('YT_CACHE_DB', os.path.join(os.environ.get('YT_HTTP_CACHE_DIR', 'http_cache'),
+                                                           'shared_cache.db'))
+# Prefix of every key on a cache server, so several apps can share one
+CACHE_KEY_PREFIX = os.environ.get('YT_CACHE_KEY_PREFIX', 'yt:')
+# Access times are only written when they moved by more than this, so reads rarely write
+TOUCH_RESOLUTION = 60
+EVICT_BATCH = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    bytes INTEGER NOT NULL,
+    expires_at REAL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (name, key)
+);
+CREATE INDEX IF NOT EXISTS cache_entries_access ON cache_entries (name, last_access);
+CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (name, expires_at);
+CREATE TABLE IF NOT EXISTS cache_usage (
+    name TEXT PRIMARY KEY,
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+
+class SQLiteCache:
+    """Entries of one cache name in a SQLite database shared by every process of the host."""
+
+    def __init__(self, name, max_entries, max_bytes, default_ttl=None, db_path=CACHE_DB_PATH):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.db_path = db_path
+
+    def _connect(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with _schema_lock:
+            if self.db_path not in _schema_ready:
+                conn.executescript(SCHEMA)
+                _schema_ready.add(self.db_path)
+        return conn
+
+    def get(self, key):
+        """The value stored for key, or None when it is missing or expired."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute('SELECT value, expires_at, last_access FROM cache_entries '
+                                   'WHERE name = ? AND key = ?', (self.name, key)).fetchone()
+                if row is not None and row[1] is not None and row[1] <= now:
+                    with conn:
+                        self._delete(conn, [key])
+                    row = None
+                elif row is not None and now - row[2] >= TOUCH_RESOLUTION:
+                    with conn:
+                        conn.execute('UPDATE cache_entries SET last_access = ? WHERE name = ? AND key = ?',
+                                     (now, self.name, key))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read {self.name} cache entry: {e}")
+            row = None
+        CACHE_REQUESTS.inc(cache=self.name, result='miss' if row is None else 'hit')
+        return None if row is None else bytes(row[0])
+
+    def set(self, key, value, ttl=None):
+        """Store value for key, expiring after ttl seconds (default_ttl when None, never when 0)."""
+        if len(value) > self.max_bytes:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    # Take the write lock first, so usage counts stay consistent across processes
+                    conn.execute('BEGIN IMMEDIATE')
+                    old = conn.execute('SELECT bytes FROM cache_entries WHERE name = ? AND key = ?',
+                                       (self.name, key)).fetchone()
+                    conn.execute('INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?)',
+                                 (self.name, key, value, len(value), now + ttl if ttl else None, now))
+                    conn.execute('INSERT OR IGNORE INTO cache_usage VALUES (?, 0, 0)', (self.name,))
+                    conn.execute('UPDATE cache_usage SET entries = entries + ?, bytes = bytes + ? WHERE name = ?',
+                                 (0 if old else 1, len(value) - (old[0] if old else 0), self.name))
+                    self._evict(conn, now)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write {self.name} cache entry: {e}")
+
+    def delete(self, key):
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    self._delete(conn, [key])
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not delete {self.name} cache entry: {e}")
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM cache_entries WHERE name = ?', (self.name,))
+                conn.execute('DELETE FROM cache_usage WHERE name = ?', (self.name,))
+        finally:
+            conn.close()
+
+    def usage(self):
+        """(entries, bytes) stored under this cache name."""
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT entries, bytes FROM cache_usage WHERE name = ?', (self.name,)).fetchone()
+        finally:
+            conn.close()
+        return tuple(row) if row else (0, 0)
+
+    def __len__(self):
+        return self.usage()[0]
+
+    def _delete(self, conn, keys):
+        removed = 0
+        freed = 0
+        for key in keys:
+            row = conn.execute('SELECT bytes FROM cache_entries WHERE name = ? AND key = ?',
+                               (self.name, key)).fetchone()
+            if row:
+                conn.execute('DELETE FROM cache_entries WHERE name = ? AND key = ?', (self.name, key))
+                removed += 1
+                freed += row[0]
+        if removed:
+            conn.execute('UPDATE cache_usage SET entries = entries - ?, bytes = bytes - ? WHERE name = ?',
+                         (removed, freed, self.name))
+
+    def _evict(self, conn, now):
+        """Drop expired, then least recently used entries while the cache is over its bounds."""
+        entries, total = conn.execute('SELECT entries, bytes FROM cache_usage WHERE name = ?',
+                                      (self.name,)).fetchone()
+        if entries <= self.max_entries and total <= self.max_bytes:
+            return
+        expired = [key for key, in conn.execute('SELECT key FROM cache_entries WHERE name = ? AND expires_at <= ?',
+                                                (self.name, now))]
+        self._delete(conn, expired)
+        while True:
+            entries, total = conn.execute('SELECT entries, bytes FROM cache_usage WHERE name = ?',
+                                          (self.name,)).fetchone()
+            if entries <= self.max_entries and total <= self.max_bytes:
+                return
+            over = max(entries - self.max_entries, 1)
+            oldest = [key for key, in conn.execute('SELECT key FROM cache_entries WHERE name = ? '
+                                                   'ORDER BY last_access LIMIT ?',
+                                                   (self.name, min(over, EVICT_BATCH)))]
+            if not oldest:
+                return
+            self._delete(conn, oldest)
+
+
+class MemoryClient:
+    """In-process stand-in for a cache server client (the redis-py calls NetworkCache makes).
+
+    Bounded by max_entries and max_bytes with least-recently-used eviction,
+    like a Redis server with maxmemory and an LRU policy.
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (value, expires_at), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.time():
+                self._discard(name)
+                return None
+            self._entries.move_to_end(name)
+            return entry[0]
+
+    def set(self, name, value, ex=None):
+        value = bytes(value)
+        with self._lock:
+            self._discard(name)
+            self._entries[name] = (value, time.time() + ex if ex else None)
+            self.total_bytes += len(value)
+            while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                self._discard(next(iter(self._entries)))
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._discard(name) for name in names)
+
+    def scan_iter(self, match=None):
+        prefix = match[:-1] if match and match.endswith('*') else match
+        with self._lock:
+            names = [name for name in self._entries if prefix is None or name.startswith(prefix)]
+        return iter(names)
+
+    def _discard(self, name):
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return 0
+        self.total_bytes -= len(entry[0])
+        return 1
+
+
+class NetworkCache:
+    """Entries of one cache name on a cache server, through a redis-py compatible client."""
+
+    def __init__(self, name, client, max_bytes=None, default_ttl=None, key_prefix=CACHE_KEY_PREFIX):
+        self.name = name
+        self.client = client
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.prefix = f"{key_prefix}{name}:"
+
+    def get(self, key):
+        try:
+            value = self.client.get(self.prefix + key)
+        except Exception as e:
+            # The cache is an optimization; an unreachable server must not fail requests
+            logger.warning(f"Could not read {self.name} cache entry: {e}")
+            value = None
+        CACHE_REQUESTS.inc(cache=self.name, result='miss' if value is None else 'hit')
+        return value
+
+    def set(self, key, value, ttl=None):
+        if self.max_bytes and len(value) > self.max_bytes:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        try:
+            # Servers expire in whole seconds
+            self.client.set(self.prefix + key, value, ex=max(1, math.ceil(ttl)) if ttl else None)
+        except Exception as e:
+            logger.warning(f"Could not write {self.name} cache entry: {e}")
+
+    def delete(self, key):
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Could not delete {self.name} cache entry: {e}")
+
+    def clear(self):
+        names = list(self.client.scan_iter(match=self.prefix + '*'))
+        if names:
+            self.client.delete(*names)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + '*'))
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def open_cache(name, max_entries, max_bytes, default_ttl=None, backend=None):
+    """The cache of this name on the configured backend, created on first use in the process.
+
+    max_entries and max_bytes bound the cache on the SQLite and memory
+    backends; a cache server applies its own limits.
+    """
+    backend = backend or CACHE_BACKEND
+    with _caches_lock:
+        cache = _caches.get((backend, name))
+        if cache is None:
+            if backend == 'sqlite':
+                cache = SQLiteCache(name, max_entries, max_bytes, default_ttl)
+            elif backend == 'memory':
+                cache = NetworkCache(name, MemoryClient(max_entries, max_bytes), max_bytes, default_ttl)
+            elif backend.startswith(('redis://', 'rediss://', 'unix://')):
+                if redis is None:
+                    raise Exception("YT_CACHE_BACKEND is a Redis URL but the redis package is not installed")
+                cache = NetworkCache(name, redis.Redis.from_url(backend), max_bytes, default_ttl)
+            else:
+                raise Exception(f"Unknown cache backend: {backend}")
+            _caches[(backend, name)] = cache
+        return cache
@@ -0,0 +1,261 @@
+"""
+Inverted index from video tag to videos.
+
+A TagIndex is built as detail batches stream into a session and is stored
+next to it (<session>.tags), so tag queries do not load the session file.
+The index is columnar: a sorted array of (lowercased) tag names, per-video
+IDs, views and engagement, and the videos of every tag as one postings array
+sliced by offsets. Queries are NumPy operations over those arrays:
+
+- top-k tags by number of videos, total views or mean engagement,
+- the videos carrying a tag (or all of several tags),
+- the tags most often used together with a tag, and the most frequent pairs.
+
+Indexes of several sessions can be merged to query many channels at once.
+
+File layout: an uncompressed NumPy .npz archive of the arrays above.
+"""
+import os
+import logging
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# One of session_store.COMPANION_SUFFIXES, so it is deleted and counted with its session
+TAG_INDEX_SUFFIX = '.tags'
+TOP_K_ORDERS = ('count', 'views', 'engagement')
+# Mean engagement of tags on fewer videos than this says little, so they are not ranked by it
+MIN_ENGAGEMENT_VIDEOS = 3
+# Pair counting considers the most used tags only, which keeps its counters small
+PAIR_CANDIDATES = 500
+
+
+def normalize_tag(tag):
+    return tag.strip().lower()
+
+
+def _video_fields(video):
+    if isinstance(video, dict):
+        return (video.get('id', ''), video.get('tags') or (), video.get('view_count') or 0,
+                video.get('engagement_rate') or 0)
+    return video.id, video.tags, video.view_count, video.engagement_rate
+
+
+class TagIndex:
+    """Tag -> videos postings with per-tag aggregates, for one session or several merged."""
+
+    def __init__(self, names=None, video_ids=None, views=None, engagement=None, offsets=None, postings=None):
+        self._building = None
+        self._set_arrays(names, video_ids, views, engagement, offsets, postings)
+
+    def _set_arrays(self, names, video_ids, views, engagement, offsets, postings):
+        self.names = np.asarray(names if names is not None else [], dtype=str)
+        self.video_ids = np.asarray(video_ids if video_ids is not None else [], dtype=str)
+        self.views = np.asarray(views if views is not None else [], dtype=np.int64)
+        self.engagement = np.asarray(engagement if engagement is not None else [], dtype=np.float64)
+        self.offsets = np.asarray(offsets if offsets is not None else [0], dtype=np.int64)
+        self.postings = np.asarray(postings if postings is not None else [], dtype=np.uint32)
+        self._aggregates = None
+        self._codes = None
+
+    # Building
+
+    def add(self, video):
+        """Add the next video (session dict or VideoRecord)."""
+        if self._building is None:
+            self._building = {'tags': {}, 'video_ids': [], 'views': [], 'engagement': []}
+        building = self._building
+        video_id, tags, views, engagement = _video_fields(video)
+        position = len(building['video_ids'])
+        building['video_ids'].append(video_id)
+        building['views'].append(views)
+        building['engagement'].append(engagement)
+        for tag in dict.fromkeys(normalize_tag(tag) for tag in tags):
+            if tag:
+                building['tags'].setdefault(tag, []).append(position)
+
+    def finish(self):
+        """Turn the videos added so far into the index arrays."""
+        building = self._building or {'tags': {}, 'video_ids': [], 'views': [], 'engagement': []}
+        names = sorted(building['tags'])
+        lengths = [len(building['tags'][name]) for name in names]
+        postings = [position for name in names for position in building['tags'][name]]
+        self._set_arrays(names, building['video_ids'], building['views'], building['engagement'],
+                         np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))), postings)
+        self._building = None
+        return self
+
+    @classmethod
+    def from_videos(cls, videos):
+        index = cls()
+        for video in videos:
+            index.add(video)
+        return index.finish()
+
+    @classmethod
+    def merge(cls, indexes):
+        """One index over the videos of several indexes (e.g. several channels' sessions)."""
+        indexes = [index for index in indexes if len(index.video_ids)]
+        if not indexes:
+            return cls()
+        names = np.unique(np.concatenate([index.names for index in indexes]))
+        tag_codes, postings = [], []
+        shift = 0
+        for index in indexes:
+            local_to_global = np.searchsorted(names, index.names)
+            tag_codes.append(np.repeat(local_to_global, np.diff(index.offsets)))
+            postings.append(index.postings.astype(np.int64) + shift)
+            shift += len(index.video_ids)
+        tag_codes = np.concatenate(tag_codes)
+        postings = np.concatenate(postings)
+        order = np.argsort(tag_codes, kind='stable')
+        counts = np.bincount(tag_codes, minlength=len(names))
+        return cls(names, np.concatenate([index.video_ids for index in indexes]),
+                   np.concatenate([index.views for index in indexes]),
+                   np.concatenate([index.engagement for index in indexes]),
+                   np.concatenate(([0], np.cumsum(counts))), postings[order])
+
+    # Storage
+
+    def save(self, path):
+        """Write the index atomically to path."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, names=self.names, video_ids=self.video_ids, views=self.views,
+                         engagement=self.engagement, offsets=self.offsets, postings=self.postings)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(arrays['names'], arrays['video_ids'], arrays['views'], arrays['engagement'],
+                       arrays['offsets'], arrays['postings'])
+
+    # Queries
+
+    def __len__(self):
+        return len(self.names)
+
+    def _code(self, tag):
+        """Position of a tag in names, or None."""
+        tag = normalize_tag(tag)
+        code = int(np.searchsorted(self.names, tag))
+        return code if code < len(self.names) and self.names[code] == tag else None
+
+    def _videos_of(self, code):
+        return self.postings[self.offsets[code]:self.offsets[code + 1]]
+
+    def aggregates(self):
+        """(video count, total views, mean engagement) per tag, computed once."""
+        if self._aggregates is None:
+            counts = np.diff(self.offsets)
+            if len(self.postings):
+                starts = self.offsets[:-1]
+                views = np.add.reduceat(self.views[self.postings], starts)
+                engagement = np.add.reduceat(self.engagement[self.postings], starts) / np.maximum(counts, 1)
+            else:
+                views = np.zeros(len(counts), dtype=np.int64)
+                engagement = np.zeros(len(counts))
+            self._aggregates = (counts, views, engagement)
+        return self._aggregates
+
+    def _tag_row(self, code):
+        counts, views, engagement = self.aggregates()
+        return {'tag': str(self.names[code]), 'videos': int(counts[code]), 'views': int(views[code]),
+                'mean_engagement': round(float(engagement[code]), 2)}
+
+    def top_tags(self, limit=20, by='count'):
+        """The limit best tags by number of videos, total views or mean engagement, best first."""
+        if by not in TOP_K_ORDERS:
+            raise ValueError(f"Unknown tag order: {by}")
+        counts, views, engagement = self.aggregates()
+        keys = {'count': counts, 'views': views, 'engagement': engagement}[by].astype(np.float64)
+        if by == 'engagement':
+            keys = np.where(counts >= MIN_ENGAGEMENT_VIDEOS, keys, -np.inf)
+        candidates = np.flatnonzero(keys > -np.inf)
+        if limit and len(candidates) > limit:
+            candidates = candidates[np.argpartition(-keys[candidates], limit - 1)[:limit]]
+        # Best first; ties by name (codes follow the sorted names)
+        candidates = candidates[np.lexsort((candidates, -keys[candidates]))]
+        return [self._tag_row(code) for code in candidates]
+
+    def videos_with(self, *tags):
+        """IDs of the videos carrying every one of the tags, in index order."""
+        matching = None
+        for tag in tags:
+            code = self._code(tag)
+            if code is None:
+                return []
+            positions = self._videos_of(code)
+            matching = positions if matching is None else np.intersect1d(matching, positions, assume_unique=True)
+        if matching is None:
+            return []
+        return self.video_ids[np.sort(matching)].tolist()
+
+    def _posting_tags(self):
+        """Tag code of every posting."""
+        if self._codes is None:
+            self._codes = np.repeat(np.arange(len(self.names)), np.diff(self.offsets))
+        return self._codes
+
+    def co_occurring(self, tag, limit=20):
+        """Tags most often used on the same videos as tag: [{'tag', 'videos'}], most shared first."""
+        code = self._code(tag)
+        if code is None:
+            return []
+        has_tag = np.zeros(len(self.video_ids), dtype=bool)
+        has_tag[self._videos_of(code)] = True
+        shared = np.bincount(self._posting_tags()[has_tag[self.postings]], minlength=len(self.names))
+        shared[code] = 0
+        candidates = np.flatnonzero(shared)
+        if limit and len(candidates) > limit:
+            candidates = candidates[np.argpartition(-shared[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.lexsort((candidates, -shared[candidates]))]
+        return [{'tag': str(self.names[other]), 'videos': int(shared[other])} for other in candidates]
+
+    def top_pairs(self, limit=20, candidates=PAIR_CANDIDATES):
+        """Tag pairs used together on the most videos, among the most used tags: [{'tags', 'videos'}]."""
+        counts = np.diff(self.offsets)
+        if not len(counts):
+            return []
+        chosen = np.flatnonzero(counts > 1)
+        if len(chosen) > candidates:
+            chosen = chosen[np.argpartition(-counts[chosen], candidates - 1)[:candidates]]
+        chosen.sort()
+        size = len(chosen)
+        local = np.full(len(self.names), -1, dtype=np.int64)
+        local[chosen] = np.arange(size)
+        tags = local[self._posting_tags()]
+        keep = tags >= 0
+        videos, tags = self.postings[keep], tags[keep]
+        # Group each video's tags together, in tag order; tags d apart in a group form pairs
+        order = np.lexsort((tags, videos))
+        videos, tags = videos[order], tags[order]
+        pair_counts = np.zeros(size * size, dtype=np.int64)
+        distance = 1
+        while distance < len(videos):
+            same = videos[distance:] == videos[:-distance]
+            if not same.any():
+                break
+            pair_counts += np.bincount(tags[:-distance][same] * size + tags[distance:][same], minlength=size * size)
+            distance += 1
+        found = np.flatnonzero(pair_counts)
+        if limit and len(found) > limit:
+            found = found[np.argpartition(-pair_counts[found], limit - 1)[:limit]]
+        found = found[np.lexsort((found, -pair_counts[found]))]
+        return [{'tags': [str(self.names[chosen[pair // size]]), str(self.names[chosen[pair % size]])],
+                 'videos': int(pair_counts[pair])} for pair in found]
+
+
+def tag_index_path(base_path):
+    return f"{base_path}{TAG_INDEX_SUFFIX}"
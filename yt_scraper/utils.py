@@ -1,13 +1,32 @@
+import os
 import re
 import logging
+import calendar
 import isodate
 from datetime import datetime, timedelta
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qs
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Precompiled parsers for the timestamp and duration forms the API returns
+# (e.g. 2025-04-16T02:00:00Z and PT1H2M3S); anything else falls back to the stdlib/isodate
+ISO_DATETIME_PATTERN = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2})(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:\d{2})?$')
+ISO_DURATION_PATTERN = re.compile(r'P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$')
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+               'October', 'November', 'December')
+DAYS_IN_MONTH = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+VIDEO_ID_PATTERN = re.compile(r'[A-Za-z0-9_-]{11}$')
+PLAYLIST_ID_PATTERN = re.compile(r'[A-Za-z0-9_-]{10,64}$')
+# Video IDs and URLs in a pasted list or uploaded file are separated by whitespace, commas or semicolons
+VIDEO_LIST_SEPARATORS = re.compile(r'[\s,;]+')
+YOUTUBE_HOSTS = ('www.youtube.com', 'youtube.com', 'm.youtube.com', 'youtu.be')
+# Resolved channel IDs of handles, usernames, custom URLs and videos are kept in the
+# client's channel cache for this long; they rarely change and resolving can cost a 100-unit search
+CHANNEL_ID_TTL = int(os.environ.get('YT_CHANNEL_ID_TTL', str(7 * 86400)))
+
 def validate_youtube_url(url):
     """Validate if the provided URL is a valid YouTube URL."""
     if not url:
@@ -23,6 +42,8 @@ def validate_youtube_url(url):
     
     # Check if it's a channel, user, or custom URL
     path = parsed_url.path
+    if path.startswith('/playlist'):
+        return extract_playlist_id(url) is not None
     if path.startswith('/channel/') or path.startswith('/user/') or path.startswith('/c/') or path.startswith('/@'):
         return True
     
@@ -36,6 +57,59 @@ def validate_youtube_url(url):
     
     return False
 
+def extract_playlist_id(url):
+    """Playlist ID of a /playlist?list=... URL, or None for any other URL."""
+    try:
+        parsed_url = urlparse(url)
+    except ValueError:
+        return None
+    if parsed_url.netloc not in YOUTUBE_HOSTS or not parsed_url.path.startswith('/playlist'):
+        return None
+    playlist_id = parse_qs(parsed_url.query).get('list', [None])[0]
+    if playlist_id and PLAYLIST_ID_PATTERN.match(playlist_id):
+        return playlist_id
+    return None
+
+def extract_video_id(value):
+    """Video ID of a bare ID or a watch, youtu.be, shorts, embed or live URL, or None."""
+    value = value.strip()
+    if VIDEO_ID_PATTERN.match(value):
+        return value
+    try:
+        parsed_url = urlparse(value if '://' in value else 'https://' + value)
+    except ValueError:
+        return None
+    if parsed_url.netloc not in YOUTUBE_HOSTS:
+        return None
+    path = parsed_url.path
+    if parsed_url.netloc == 'youtu.be':
+        candidate = path.strip('/').split('/')[0]
+    elif path.startswith('/watch'):
+        candidate = parse_qs(parsed_url.query).get('v', [''])[0]
+    elif path.startswith(('/shorts/', '/embed/', '/live/', '/v/')):
+        candidate = path.split('/')[2]
+    else:
+        return None
+    return candidate if VIDEO_ID_PATTERN.match(candidate) else None
+
+def parse_video_ids(text):
+    """Video IDs in a pasted list or file of IDs and video URLs, in order and without duplicates.
+
+    Returns (video_ids, invalid) where invalid holds the entries that are not
+    a video ID or video URL.
+    """
+    video_ids = {}
+    invalid = []
+    for entry in VIDEO_LIST_SEPARATORS.split(text or ''):
+        if not entry:
+            continue
+        video_id = extract_video_id(entry)
+        if video_id:
+            video_ids[video_id] = None
+        else:
+            invalid.append(entry)
+    return list(video_ids), invalid
+
 def extract_channel_id(youtube_api, url):
     """Extract channel ID from various YouTube URL formats."""
     logger.debug(f"Attempting to extract channel ID from URL: {url}")
@@ -53,19 +127,22 @@ def extract_channel_id(youtube_api, url):
         elif path.startswith('/user/'):
             username = path.split('/user/')[1].split('/')[0]
             logger.debug(f"Username found: {username}, fetching channel ID...")
-            return _get_channel_id_from_username(youtube_api, username)
+            return _cached_channel_id(youtube_api, f"user:{username.lower()}",
+                                      lambda: _get_channel_id_from_username(youtube_api, username))
         
         # Custom URL
         elif path.startswith('/c/'):
             custom_name = path.split('/c/')[1].split('/')[0]
             logger.debug(f"Custom URL found: {custom_name}, fetching channel ID...")
-            return _get_channel_id_from_custom_url(youtube_api, custom_name)
+            return _cached_channel_id(youtube_api, f"custom:{custom_name.lower()}",
+                                      lambda: _get_channel_id_from_custom_url(youtube_api, custom_name))
         
         # Handle @ URLs (new format)
         elif path.startswith('/@'):
             handle = path.split('/@')[1].split('/')[0]
             logger.debug(f"Handle found: {handle}, fetching channel ID...")
-            return _get_channel_id_from_handle(youtube_api, handle)
+            return _cached_channel_id(youtube_api, f"handle:{handle.lower()}",
+                                      lambda: _get_channel_id_from_handle(youtube_api, handle))
         
         # Extract from video URL
         elif '/watch' in path:
@@ -73,17 +150,20 @@ def extract_channel_id(youtube_api, url):
             video_id = query.get('v', [None])[0]
             if video_id:
                 logger.debug(f"Video ID found: {video_id}, fetching channel ID...")
-                return _get_channel_id_from_video(youtube_api, video_id)
+                return _cached_channel_id(youtube_api, f"video:{video_id}",
+                                          lambda: _get_channel_id_from_video(youtube_api, video_id))
         
         # Shortened URL
         elif parsed_url.netloc == 'youtu.be':
             video_id = path.strip('/')
             logger.debug(f"Shortened URL video ID found: {video_id}, fetching channel ID...")
-            return _get_channel_id_from_video(youtube_api, video_id)
+            return _cached_channel_id(youtube_api, f"video:{video_id}",
+                                      lambda: _get_channel_id_from_video(youtube_api, video_id))
         
         # If none of the above, try a search for the URL
         logger.debug("No standard format recognized, trying direct search...")
-        return _search_for_channel(youtube_api, url)
+        return _cached_channel_id(youtube_api, f"search:{url.lower()}",
+                                  lambda: _search_for_channel(youtube_api, url))
     
     except Exception as e:
         logger.error(f"Error extracting channel ID: {e}")
@@ -91,6 +171,20 @@ def extract_channel_id(youtube_api, url):
         logger.error(traceback.format_exc())
         return None
 
+def _cached_channel_id(youtube_api, key, resolve):
+    """Channel ID for key from the client's channel cache, or resolved with resolve() and cached."""
+    cache = getattr(youtube_api, 'channel_cache', None)
+    if cache is None:
+        return resolve()
+    cached = cache.get(f"id:{key}")
+    if cached is not None:
+        logger.debug(f"Channel ID for {key} found in cache")
+        return cached.decode('utf-8')
+    channel_id = resolve()
+    if channel_id:
+        cache.set(f"id:{key}", channel_id.encode('utf-8'), ttl=CHANNEL_ID_TTL)
+    return channel_id
+
 def _get_channel_id_from_username(youtube_api, username):
     """Get channel ID from username."""
     try:
@@ -213,31 +307,119 @@ def format_duration(duration_str):
     if not duration_str:
         return "00:00"
     try:
-        duration = isodate.parse_duration(duration_str)
-        total_seconds = int(duration.total_seconds())
-        
-        hours, remainder = divmod(total_seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        
-        if hours > 0:
-            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        else:
-            return f"{minutes:02d}:{seconds:02d}"
+        return format_seconds(parse_duration_seconds(duration_str))
     except Exception as e:
-        logger.error(f"Error formatting duration '{duration_str}': {e}")
+        logger.warning(f"Error formatting duration '{duration_str}': {e}")
         return "00:00" # Return default on error
 
+@lru_cache(maxsize=4096)
+def parse_duration_seconds(duration_str):
+    """Convert an ISO 8601 duration string (e.g., PT1M30S) to whole seconds."""
+    match = ISO_DURATION_PATTERN.match(duration_str)
+    if match and match.lastindex:
+        weeks, days, hours, minutes, seconds = (float(group) if group else 0 for group in match.groups())
+        return int((((weeks * 7 + days) * 24 + hours) * 60 + minutes) * 60 + seconds)
+    # Years, months and other rare forms
+    return int(isodate.parse_duration(duration_str).total_seconds())
+
+def parse_durations_seconds(duration_strs):
+    """Convert a column of ISO 8601 durations to seconds; unparseable values become 0."""
+    result = []
+    invalid = 0
+    for duration_str in duration_strs:
+        try:
+            result.append(parse_duration_seconds(duration_str) if duration_str else 0)
+        except Exception:
+            result.append(0)
+            invalid += 1
+    if invalid:
+        logger.warning(f"Could not parse {invalid} of {len(result)} durations")
+    return result
+
+def format_durations(duration_strs):
+    """Format a column of ISO 8601 durations as HH:MM:SS or MM:SS."""
+    return [format_seconds(seconds) for seconds in parse_durations_seconds(duration_strs)]
+
+def parse_formatted_duration(duration_str):
+    """Convert a formatted HH:MM:SS or MM:SS duration back to seconds."""
+    seconds = 0
+    for part in (duration_str or '0').split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+def format_seconds(total_seconds):
+    """Format a number of seconds as HH:MM:SS or MM:SS."""
+    hours, remainder = divmod(int(total_seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    else:
+        return f"{minutes:02d}:{seconds:02d}"
+
+@lru_cache(maxsize=65536)
+def split_iso_datetime(iso_datetime_str):
+    """Return the (date, time) display strings for an ISO 8601 datetime, e.g. ('April 16, 2025', '02:00 AM').
+
+    Raises ValueError for invalid timestamps.
+    """
+    match = ISO_DATETIME_PATTERN.match(iso_datetime_str)
+    if match:
+        year, month, day, hour, minute = map(int, match.groups())
+        # Reject impossible dates such as February 30 without building a datetime
+        if not (1 <= month <= 12 and 1 <= day <= DAYS_IN_MONTH[month - 1] and hour < 24 and minute < 60) or (
+                month == 2 and day == 29 and not calendar.isleap(year)):
+            raise ValueError(f"Invalid date: {iso_datetime_str}")
+    else:
+        if iso_datetime_str.endswith('Z'):
+            iso_datetime_str = iso_datetime_str[:-1] + '+00:00'
+        dt_obj = datetime.fromisoformat(iso_datetime_str)
+        year, month, day, hour, minute = dt_obj.year, dt_obj.month, dt_obj.day, dt_obj.hour, dt_obj.minute
+    return (f"{MONTH_NAMES[month - 1]} {day:02d}, {year}",
+            f"{hour % 12 or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}")
+
+def format_iso_datetimes(iso_datetime_strs):
+    """Format a column of ISO 8601 datetimes in one pass.
+
+    Returns a dict mapping each distinct value to its (date, time) display strings.
+    """
+    formatted = {}
+    invalid = 0
+    for value in iso_datetime_strs:
+        if value in formatted:
+            continue
+        if not value:
+            formatted[value] = ("N/A", "N/A")
+            continue
+        try:
+            formatted[value] = split_iso_datetime(value)
+        except (ValueError, TypeError):
+            formatted[value] = ("Invalid Date", "Invalid Time")
+            invalid += 1
+    if invalid:
+        logger.warning(f"Could not parse {invalid} timestamps")
+    return formatted
+
+def format_iso_dates(iso_datetime_strs):
+    """Format a column of ISO 8601 datetimes to dates (e.g., April 16, 2025)."""
+    iso_datetime_strs = list(iso_datetime_strs)
+    formatted = format_iso_datetimes(iso_datetime_strs)
+    return [formatted[value][0] for value in iso_datetime_strs]
+
+def format_iso_times(iso_datetime_strs):
+    """Format a column of ISO 8601 datetimes to times (e.g., 02:00 AM)."""
+    iso_datetime_strs = list(iso_datetime_strs)
+    formatted = format_iso_datetimes(iso_datetime_strs)
+    return [formatted[value][1] for value in iso_datetime_strs]
+
 def format_iso_date(iso_datetime_str):
     """Format an ISO 8601 datetime string to just the date (e.g., April 16, 2025)."""
     if not iso_datetime_str:
         return "N/A"
     try:
-        if iso_datetime_str.endswith('Z'):
-            iso_datetime_str = iso_datetime_str[:-1] + '+00:00'
-        dt_obj = datetime.fromisoformat(iso_datetime_str)
-        return dt_obj.strftime('%B %d, %Y') # Format: April 16, 2025
+        return split_iso_datetime(iso_datetime_str)[0]
     except Exception as e:
-        logger.error(f"Error formatting ISO date '{iso_datetime_str}': {e}")
+        logger.warning(f"Error formatting ISO date '{iso_datetime_str}': {e}")
         return "Invalid Date"
 
 def format_iso_time(iso_datetime_str):
@@ -245,10 +427,7 @@ def format_iso_time(iso_datetime_str):
     if not iso_datetime_str:
         return "N/A"
     try:
-        if iso_datetime_str.endswith('Z'):
-            iso_datetime_str = iso_datetime_str[:-1] + '+00:00'
-        dt_obj = datetime.fromisoformat(iso_datetime_str)
-        return dt_obj.strftime('%I:%M %p') # Format: 02:00 AM
+        return split_iso_datetime(iso_datetime_str)[1]
     except Exception as e:
-        logger.error(f"Error formatting ISO time '{iso_datetime_str}': {e}")
+        logger.warning(f"Error formatting ISO time '{iso_datetime_str}': {e}")
         return "Invalid Time"
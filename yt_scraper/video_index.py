@@ -0,0 +1,189 @@
+"""
+Precomputed sort orders and filters for a session's videos.
+
+A VideoIndex is built once per session, while the scrape streams into the
+session file, and stored with it. It holds one ascending order of video
+positions per sortable field, a tag -> positions index and the summary
+totals, so the results page can sort and filter without re-sorting the
+whole channel on every request.
+"""
+import logging
+from itertools import islice
+from .utils import parse_formatted_duration
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Tags suggested by the results page's tag filter
+TOP_TAGS_LIMIT = 50
+
+# Sort options of the results page -> session video field
+SORT_FIELDS = {
+    'date': 'published_at',
+    'views': 'view_count',
+    'likes': 'like_count',
+    'comments': 'comment_count',
+    'engagement': 'engagement_rate',
+    'duration': 'duration'
+}
+
+
+def _duration_seconds(video):
+    try:
+        return parse_formatted_duration(video.get('duration') or '0')
+    except ValueError:
+        return 0
+
+
+def _bisect(order, keys, value, right=False):
+    """Position in an ascending order of the first key >= value (> value with right=True)."""
+    low, high = 0, len(order)
+    while low < high:
+        middle = (low + high) // 2
+        key = keys[order[middle]]
+        if key < value or (right and key == value):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class VideoIndex:
+    """Sort orders, tag index and summary over the videos of one session."""
+
+    def __init__(self, orders=None, tags=None, durations=None, dates=None, summary=None, top_tags=None):
+        self.orders = orders or {}  # sort option -> video positions, ascending
+        self.tags = tags or {}  # lowercase tag -> video positions, in playlist order
+        self.durations = durations or []  # duration in seconds per video
+        self.dates = dates or []  # YYYY-MM-DD per video
+        self.summary = summary or {}
+        self._top_tags = top_tags  # most used tags, most frequent first
+        self._sort_keys = {sort: [] for sort in SORT_FIELDS}
+
+    @classmethod
+    def from_videos(cls, videos):
+        index = cls()
+        for video in videos:
+            index.add(video)
+        index.finish()
+        return index
+
+    @classmethod
+    def from_session(cls, data):
+        """The index stored with a session, or one rebuilt from its videos (older sessions)."""
+        if 'video_index' in data:
+            stored = data['video_index']
+            return cls(stored['orders'], stored['tags'], stored['durations'], stored['dates'], stored['summary'],
+                       stored.get('top_tags'))
+        return cls.from_videos(data.get('videos_data', []))
+
+    def add(self, video):
+        """Add the next session video dict."""
+        position = len(self.durations)
+        duration = _duration_seconds(video)
+        published_at = video.get('published_at') or ''
+        self.durations.append(duration)
+        self.dates.append(published_at[:10])
+        for sort, field in SORT_FIELDS.items():
+            if sort == 'duration':
+                self._sort_keys[sort].append(duration)
+            elif sort == 'date':
+                self._sort_keys[sort].append(published_at)
+            else:
+                self._sort_keys[sort].append(video.get(field) or 0)
+        for tag in dict.fromkeys(tag.lower() for tag in video.get('tags') or ()):
+            self.tags.setdefault(tag, []).append(position)
+
+    def finish(self):
+        """Sort the collected keys into the per-field orders and total up the summary."""
+        count = len(self.durations)
+        for sort, keys in self._sort_keys.items():
+            self.orders[sort] = sorted(range(count), key=keys.__getitem__)
+        self.summary = {
+            'total_views': sum(self._sort_keys['views']),
+            'total_likes': sum(self._sort_keys['likes']),
+            'total_comments': sum(self._sort_keys['comments']),
+            'avg_engagement': sum(self._sort_keys['engagement']) / count if count else 0
+        }
+        self._top_tags = self._rank_tags()
+        self._sort_keys = {sort: [] for sort in SORT_FIELDS}
+        return self
+
+    def to_dict(self):
+        return {
+            'orders': self.orders,
+            'tags': self.tags,
+            'durations': self.durations,
+            'dates': self.dates,
+            'summary': self.summary,
+            'top_tags': self.top_tags()
+        }
+
+    def __len__(self):
+        return len(self.durations)
+
+    def _rank_tags(self):
+        return sorted(self.tags, key=lambda tag: (-len(self.tags[tag]), tag))[:TOP_TAGS_LIMIT]
+
+    def top_tags(self, limit=TOP_TAGS_LIMIT):
+        """The most used tags, most frequent first, ranked once when the index is finished."""
+        if self._top_tags is None:
+            # Indexes stored before the ranking was
+            self._top_tags = self._rank_tags()
+        return self._top_tags[:limit]
+
+    def _range(self, sort, keys, minimum, maximum):
+        """Positions whose key lies within [minimum, maximum], found by bisecting the field's order."""
+        order = self.orders[sort]
+        start = _bisect(order, keys, minimum) if minimum is not None else 0
+        end = _bisect(order, keys, maximum, right=True) if maximum is not None else len(order)
+        return order[start:end]
+
+    @staticmethod
+    def _slice(order, descending, offset, limit):
+        count = len(order)
+        end = min(offset + limit, count)
+        if descending:
+            return [order[count - 1 - k] for k in range(offset, end)]
+        return list(order[offset:end])
+
+    def query(self, sort=None, descending=True, tag=None, min_duration=None, max_duration=None,
+              published_after=None, published_before=None, offset=0, limit=12):
+        """Return (positions of one page of videos, number of matching videos).
+
+        sort is one of SORT_FIELDS, or None for playlist order. Durations are in
+        seconds and dates are YYYY-MM-DD strings, all bounds inclusive.
+        """
+        count = len(self)
+        if sort is None:
+            order = range(count)
+            descending = False
+        else:
+            order = self.orders[sort]
+
+        # Each filter yields the matching positions, already ordered by some sort option
+        restrictions = []
+        if tag:
+            restrictions.append((None, self.tags.get(tag.strip().lower(), [])))
+        if min_duration is not None or max_duration is not None:
+            restrictions.append(('duration', self._range('duration', self.durations, min_duration, max_duration)))
+        if published_after or published_before:
+            restrictions.append(('date', self._range('date', self.dates, published_after or None,
+                                                     published_before or None)))
+
+        if not restrictions:
+            # The page is a direct slice of the precomputed order
+            return self._slice(order, descending, offset, limit), count
+        if len(restrictions) == 1 and restrictions[0][0] == sort:
+            # A single filter already in the requested order, e.g. a date range sorted by date
+            positions = restrictions[0][1]
+            return self._slice(positions, descending, offset, limit), len(positions)
+
+        matching = None
+        for _, positions in sorted(restrictions, key=lambda restriction: len(restriction[1])):
+            matching = set(positions) if matching is None else matching.intersection(positions)
+
+        walk = reversed(order) if descending else order
+        page = list(islice((position for position in walk if position in matching), offset, offset + limit))
+        return page, len(matching)
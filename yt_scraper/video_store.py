@@ -0,0 +1,274 @@
+"""
+Content-addressed store of session videos, shared by every session.
+
+Session files and record segments hold [video ID, digest] references into
+this store rather than private copies of their videos, so ten analysts
+scraping the same channel on the same day store its videos once:
+
+- every video is stored once under the BLAKE2b digest of its encoded JSON, so
+  the digest doubles as the snapshot version of the video: a later scrape in
+  which nothing changed maps to the same record, one with new statistics to
+  a new one,
+- a video's comments are a record of their own, referenced by the video
+  through 'comments_ref', so a video whose view count moved still shares its
+  comments with earlier snapshots,
+- a table of (session, digest) references tells which records a session
+  uses. Copying a session copies its references; expiring it drops them and
+  deletes the records no other session references any more.
+
+Records are stored in a SQLite database in WAL mode, shared by every worker
+process. Writes and deletions take the write lock first, so a record is
+never collected while another session is adding a reference to it.
+
+The digest is over the record as encoded by this module (orjson when
+installed), so hosts that encode differently store their own copies of the
+same video; they never read each other's records wrongly. Bodies are stored
+compressed with the session codec (zstd or gzip, see session_store); the
+codec is told apart by the frame's magic bytes, so records written by an
+earlier codec, or before records were compressed, still load.
+"""
+import os
+import json
+import gzip
+import sqlite3
+import hashlib
+import logging
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .session_store import SESSION_CODEC, SESSION_COMPRESS_LEVEL
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+VIDEO_STORE_DB_PATH = os.environ.get('YT_VIDEO_STORE_DB', os.path.join('session_data', 'videos.db'))
+DIGEST_SIZE = 16
+# Digests per IN (...) query, well below SQLite's bound parameter limit
+QUERY_BATCH = 500
+COMMENTS_REF = 'comments_ref'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+GZIP_MAGIC = b'\x1f\x8b'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    digest TEXT PRIMARY KEY,
+    body BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS session_refs (
+    session_id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    generation TEXT NOT NULL,
+    PRIMARY KEY (session_id, digest)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS session_refs_digest ON session_refs (digest);
+"""
+
+
+def _encode(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _decode(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _compressor():
+    """A function compressing record bodies with the session codec."""
+    if SESSION_CODEC == 'zstd':
+        return zstandard.ZstdCompressor(level=SESSION_COMPRESS_LEVEL).compress
+    return lambda body: gzip.compress(body, compresslevel=SESSION_COMPRESS_LEVEL, mtime=0)
+
+
+def _decompress(body, decompressor=None):
+    if body[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise Exception('Video store record is zstd-compressed but zstandard is not installed')
+        return (decompressor or zstandard.ZstdDecompressor()).decompress(body)
+    if body[:2] == GZIP_MAGIC:
+        return gzip.decompress(body)
+    # Stored before records were compressed
+    return body
+
+
+def record_digest(body):
+    return hashlib.blake2b(body, digest_size=DIGEST_SIZE).hexdigest()
+
+
+def is_ref(item):
+    """Whether a stored session video is a [video ID, digest] reference rather than the video itself."""
+    return isinstance(item, list)
+
+
+def _batches(items):
+    items = list(items)
+    for start in range(0, len(items), QUERY_BATCH):
+        yield items[start:start + QUERY_BATCH]
+
+
+class VideoStore:
+    """Videos and comment lists stored once by digest, referenced by sessions."""
+
+    def __init__(self, db_path=VIDEO_STORE_DB_PATH):
+        self.db_path = db_path
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self._schema_lock:
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+        return conn
+
+    def put(self, session_id, videos, generation=''):
+        """Store session video dicts for a session; returns ([video ID, digest] refs, bytes newly stored).
+
+        generation tags the references, so that prune() can drop those of an
+        earlier write of the same session.
+        """
+        bodies = {}
+        refs = []
+        for video in videos:
+            if 'comments' in video:
+                comments_body = _encode(video['comments'])
+                comments_digest = record_digest(comments_body)
+                bodies[comments_digest] = comments_body
+                video = {key: value for key, value in video.items() if key != 'comments'}
+                video[COMMENTS_REF] = comments_digest
+            body = _encode(video)
+            digest = record_digest(body)
+            bodies[digest] = body
+            refs.append([video['id'], digest])
+        if not bodies:
+            return refs, 0
+        compress = _compressor()
+        conn = self._connect()
+        try:
+            with conn:
+                # Under the write lock, so a record seen as stored cannot be collected before it is referenced
+                conn.execute('BEGIN IMMEDIATE')
+                stored = set()
+                for batch in _batches(bodies):
+                    stored.update(digest for digest, in conn.execute(
+                        f"SELECT digest FROM records WHERE digest IN ({','.join('?' * len(batch))})", batch))
+                # Only records not stored yet are compressed; the digest is of the uncompressed body
+                new = [(digest, compress(body)) for digest, body in bodies.items() if digest not in stored]
+                conn.executemany('INSERT INTO records VALUES (?, ?)', new)
+                conn.executemany('INSERT OR REPLACE INTO session_refs VALUES (?, ?, ?)',
+                                 [(session_id, digest, generation) for digest in bodies])
+        finally:
+            conn.close()
+        written = sum(len(body) for _, body in new)
+        logger.debug(f"Stored {len(new)} of {len(bodies)} records for session {session_id} ({written} new bytes)")
+        return refs, written
+
+    def _read(self, conn, digests):
+        """The decompressed bodies of digests."""
+        bodies = {}
+        decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+        for batch in _batches(digests):
+            bodies.update((digest, _decompress(body, decompressor)) for digest, body in conn.execute(
+                f"SELECT digest, body FROM records WHERE digest IN ({','.join('?' * len(batch))})", batch))
+        missing = set(digests) - bodies.keys()
+        if missing:
+            raise Exception(f"{len(missing)} records missing from the video store, e.g. {next(iter(missing))}")
+        return bodies
+
+    def get(self, refs):
+        """The session video dicts of [video ID, digest] refs, in that order, with their comments."""
+        if not refs:
+            return []
+        conn = self._connect()
+        try:
+            bodies = self._read(conn, dict.fromkeys(digest for _, digest in refs))
+            videos = [_decode(bodies[digest]) for _, digest in refs]
+            comments_digests = dict.fromkeys(video[COMMENTS_REF] for video in videos if COMMENTS_REF in video)
+            comments = {digest: _decode(body) for digest, body in self._read(conn, comments_digests).items()}
+        finally:
+            conn.close()
+        for video in videos:
+            if COMMENTS_REF in video:
+                video['comments'] = comments[video.pop(COMMENTS_REF)]
+        return videos
+
+    def _collect(self, conn, digests):
+        """Delete the records among digests that no session references any more; returns how many."""
+        collected = 0
+        for batch in _batches(digests):
+            collected += conn.execute(
+                f"DELETE FROM records WHERE digest IN ({','.join('?' * len(batch))}) AND NOT EXISTS "
+                f"(SELECT 1 FROM session_refs WHERE session_refs.digest = records.digest)", batch).rowcount
+        return collected
+
+    def prune(self, session_id, generation):
+        """Drop a session's references from writes other than generation; returns records freed."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                stale = [digest for digest, in conn.execute(
+                    'SELECT digest FROM session_refs WHERE session_id = ? AND generation != ?',
+                    (session_id, generation))]
+                conn.executemany('DELETE FROM session_refs WHERE session_id = ? AND digest = ?',
+                                 [(session_id, digest) for digest in stale])
+                return self._collect(conn, stale)
+        finally:
+            conn.close()
+
+    def release(self, session_ids):
+        """Drop every reference of the sessions and the records left unreferenced; returns records freed."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                digests = set()
+                for session_id in session_ids:
+                    digests.update(digest for digest, in conn.execute(
+                        'SELECT digest FROM session_refs WHERE session_id = ?', (session_id,)))
+                    conn.execute('DELETE FROM session_refs WHERE session_id = ?', (session_id,))
+                freed = self._collect(conn, digests)
+        finally:
+            conn.close()
+        if freed:
+            logger.debug(f"Freed {freed} records of {len(session_ids)} removed sessions")
+        return freed
+
+    def copy(self, source_id, target_id):
+        """Make target_id reference every record of source_id; returns how many references were added."""
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute('INSERT OR IGNORE INTO session_refs SELECT ?, digest, generation FROM session_refs '
+                                    'WHERE session_id = ?', (target_id, source_id)).rowcount
+        finally:
+            conn.close()
+
+    def usage(self):
+        """{'records', 'bytes', 'references'} of the whole store."""
+        conn = self._connect()
+        try:
+            records, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM records').fetchone()
+            references = conn.execute('SELECT COUNT(*) FROM session_refs').fetchone()[0]
+        finally:
+            conn.close()
+        return {'records': records, 'bytes': size, 'references': references}
@@ -0,0 +1,508 @@
+"""
+Scheduled statistics refreshes for a watchlist of channels and videos.
+
+Channels and videos are added to a watchlist kept in SQLite, and a scheduler
+refreshes their statistics continuously instead of on manual scrapes:
+
+- every watched video has a next poll time, and the table's index on it is
+  the priority queue: the videos due soonest are refreshed first,
+- the poll interval is a share of the video's age (POLL_AGE_FACTOR, within
+  MIN_POLL_INTERVAL and MAX_POLL_INTERVAL), so a video uploaded an hour ago
+  is polled every 15 minutes and a year-old one monthly,
+- each videos.list call costs one quota unit for up to 50 IDs, so a call is
+  only made when a video is due, and is then filled up with the next videos
+  in the queue,
+- watched channels are listed every CHANNEL_POLL_INTERVAL for new uploads,
+  which join the queue straight away; the first listing also adds up to
+  `backfill` videos of the channel's back catalogue, whose first polls are
+  queued behind new uploads (FIRST_POLL_SHARE),
+- every call draws from a token bucket refilled at WATCHLIST_DAILY_QUOTA
+  units a day, so the scheduler never spends more than its share of the key's
+  quota and spreads it over the day.
+
+The state is shared by every worker process: videos and channels are leased
+while they are being polled, so schedulers in several workers never poll the
+same ones, and they draw from the same budget. Each refresh is kept in a
+statistics history.
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+WATCHLIST_DB_PATH = os.environ.get('YT_WATCHLIST_DB', os.path.join('session_data', 'watchlist.db'))
+# Key the background scheduler polls with; without one the watchlist is only stored
+WATCHLIST_API_KEY = os.environ.get('YT_WATCHLIST_API_KEY')
+# Quota units a day the scheduler may spend (a key is granted 10000 by default)
+WATCHLIST_DAILY_QUOTA = int(os.environ.get('YT_WATCHLIST_QUOTA', 5000))
+WATCHLIST_INTERVAL = float(os.environ.get('YT_WATCHLIST_INTERVAL', 60))  # seconds between scheduler runs
+CHANNEL_POLL_INTERVAL = int(os.environ.get('YT_WATCHLIST_CHANNEL_INTERVAL', 3600))
+# Videos of a channel's back catalogue added when it is first listed
+WATCHLIST_BACKFILL = int(os.environ.get('YT_WATCHLIST_BACKFILL', 500))
+HISTORY_DAYS = int(os.environ.get('YT_WATCHLIST_HISTORY_DAYS', 90))
+
+BATCH_SIZE = 50
+POLL_AGE_FACTOR = 0.1
+MIN_POLL_INTERVAL = 15 * 60
+MAX_POLL_INTERVAL = 30 * 86400
+# Share of its poll interval after which a listed video is first polled: new uploads come before a back catalogue
+FIRST_POLL_SHARE = 0.01
+# The budget can save up at most this many seconds of its refill for bursts
+BUDGET_BURST_SECONDS = 3600
+# Polled rows are skipped by other schedulers for this long; a crashed poll is retried after it
+LEASE_SECONDS = 600
+# Pages of new uploads listed per channel poll before the rest waits for the next one
+MAX_UPLOAD_PAGES = 4
+HISTORY_PRUNE_INTERVAL = 3600
+# Age buckets of the status summary: (label, maximum age in seconds)
+AGE_BUCKETS = (('day', 86400), ('week', 7 * 86400), ('month', 30 * 86400), ('year', 365 * 86400),
+               ('older', float('inf')))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watched_channels (
+    channel_id TEXT PRIMARY KEY,
+    added_at REAL NOT NULL,
+    next_poll REAL NOT NULL,
+    last_poll REAL,
+    backfill INTEGER NOT NULL,
+    page_token TEXT,
+    newest_upload TEXT
+);
+CREATE INDEX IF NOT EXISTS watched_channels_due ON watched_channels (next_poll);
+CREATE TABLE IF NOT EXISTS watched_videos (
+    video_id TEXT PRIMARY KEY,
+    channel_id TEXT,
+    published_at REAL,
+    added_at REAL NOT NULL,
+    next_poll REAL NOT NULL,
+    last_poll REAL,
+    polls INTEGER NOT NULL DEFAULT 0,
+    view_count INTEGER,
+    like_count INTEGER,
+    comment_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS watched_videos_due ON watched_videos (next_poll);
+CREATE INDEX IF NOT EXISTS watched_videos_channel ON watched_videos (channel_id);
+CREATE TABLE IF NOT EXISTS video_stats (
+    video_id TEXT NOT NULL,
+    polled_at REAL NOT NULL,
+    view_count INTEGER NOT NULL,
+    like_count INTEGER NOT NULL,
+    comment_count INTEGER NOT NULL,
+    PRIMARY KEY (video_id, polled_at)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS quota_budget (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quota_spent (
+    day TEXT PRIMARY KEY,
+    units INTEGER NOT NULL
+);
+"""
+
+
+def poll_interval(age_seconds):
+    """Seconds until a video of this age (None when unknown) is polled again."""
+    if age_seconds is None:
+        return MIN_POLL_INTERVAL
+    return min(max(age_seconds * POLL_AGE_FACTOR, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL)
+
+
+def uploads_playlist_id(channel_id):
+    """A channel's uploads playlist: its ID with the UC prefix replaced by UU."""
+    return 'UU' + channel_id[2:]
+
+
+def _parse_time(value):
+    """Timestamp of an RFC 3339 'YYYY-MM-DDTHH:MM:SS...Z' string, or None."""
+    if not value:
+        return None
+    return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+
+
+def _format_time(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _day(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+
+
+class Watchlist:
+    """Watched channels and videos, their poll queue and the shared quota budget, kept in SQLite."""
+
+    def __init__(self, db_path=WATCHLIST_DB_PATH, daily_quota=WATCHLIST_DAILY_QUOTA):
+        self.db_path = db_path
+        self.daily_quota = daily_quota
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self._schema_lock:
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+        return conn
+
+    # Watching
+
+    def watch_channel(self, channel_id, backfill=WATCHLIST_BACKFILL, now=None):
+        """Watch a channel's uploads, adding up to backfill of its existing videos on the first listing."""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('INSERT OR IGNORE INTO watched_channels VALUES (?, ?, ?, NULL, ?, NULL, NULL)',
+                             (channel_id, now, now, backfill))
+        finally:
+            conn.close()
+
+    def watch_videos(self, video_ids, channel_id=None, now=None):
+        """Watch videos by ID; their publish date (and channel) is filled in on the first poll, which is due now.
+
+        Returns how many were not watched yet.
+        """
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.executemany(
+                    'INSERT OR IGNORE INTO watched_videos (video_id, channel_id, added_at, next_poll) '
+                    'VALUES (?, ?, ?, ?)', [(video_id, channel_id, now, now) for video_id in video_ids]).rowcount
+        finally:
+            conn.close()
+
+    def unwatch(self, channel_ids=(), video_ids=()):
+        """Stop watching channels (and the videos found through them) and videos; returns videos removed."""
+        conn = self._connect()
+        try:
+            with conn:
+                removed = 0
+                for channel_id in channel_ids:
+                    conn.execute('DELETE FROM watched_channels WHERE channel_id = ?', (channel_id,))
+                    removed += conn.execute('DELETE FROM watched_videos WHERE channel_id = ?', (channel_id,)).rowcount
+                for video_id in video_ids:
+                    removed += conn.execute('DELETE FROM watched_videos WHERE video_id = ?', (video_id,)).rowcount
+                return removed
+        finally:
+            conn.close()
+
+    # Budget
+
+    def _take_units(self, conn, units, now):
+        """Draw units from the token bucket inside the caller's write transaction; False when there are too few."""
+        if not self.daily_quota:
+            return False
+        rate = self.daily_quota / 86400
+        capacity = max(rate * BUDGET_BURST_SECONDS, units)
+        row = conn.execute('SELECT tokens, updated_at FROM quota_budget WHERE id = 0').fetchone()
+        tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+        if tokens < units:
+            return False
+        conn.execute('INSERT OR REPLACE INTO quota_budget VALUES (0, ?, ?)', (tokens - units, now))
+        conn.execute('INSERT OR IGNORE INTO quota_spent VALUES (?, 0)', (_day(now),))
+        conn.execute('UPDATE quota_spent SET units = units + ? WHERE day = ?', (units, _day(now)))
+        return True
+
+    def spend(self, units=1, now=None):
+        """Draw units from the budget for a call outside a claim; False when the budget is exhausted."""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                return self._take_units(conn, units, now)
+        finally:
+            conn.close()
+
+    def exhaust_budget(self, now=None):
+        """Empty the budget, e.g. after the API reported the key's quota exceeded."""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO quota_budget VALUES (0, 0, ?)', (now,))
+        finally:
+            conn.close()
+
+    # Scheduling
+
+    def claim_channel(self, now=None):
+        """Lease the channel due soonest, paying for its first page.
+
+        Returns (channel_id, backfill, page_token, newest_upload) or None.
+        """
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                row = conn.execute('SELECT channel_id, backfill, page_token, newest_upload FROM watched_channels '
+                                   'WHERE next_poll <= ? ORDER BY next_poll LIMIT 1', (now,)).fetchone()
+                if row is None or not self._take_units(conn, 1, now):
+                    return None
+                conn.execute('UPDATE watched_channels SET next_poll = ? WHERE channel_id = ?',
+                             (now + LEASE_SECONDS, row[0]))
+                return row
+        finally:
+            conn.close()
+
+    def add_uploads(self, channel_id, videos, now=None):
+        """Watch videos listed from a channel, [(video ID, publishedAt)]; returns how many are new."""
+        now = time.time() if now is None else now
+        rows = []
+        for video_id, published_at in videos:
+            published_at = _parse_time(published_at)
+            age = None if published_at is None else max(0.0, now - published_at)
+            rows.append((video_id, channel_id, published_at, now, now + poll_interval(age) * FIRST_POLL_SHARE))
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.executemany(
+                    'INSERT OR IGNORE INTO watched_videos (video_id, channel_id, published_at, added_at, next_poll) '
+                    'VALUES (?, ?, ?, ?, ?)', rows).rowcount
+        finally:
+            conn.close()
+
+    def finish_channel(self, channel_id, backfill, page_token, newest_upload, now=None):
+        """Record a channel poll; a backfill left unfinished (page_token) continues on the next run."""
+        now = time.time() if now is None else now
+        next_poll = now if page_token else now + CHANNEL_POLL_INTERVAL
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('UPDATE watched_channels SET next_poll = ?, last_poll = ?, backfill = ?, page_token = ?, '
+                             'newest_upload = ? WHERE channel_id = ?',
+                             (next_poll, now, backfill, page_token, newest_upload, channel_id))
+        finally:
+            conn.close()
+
+    def claim_batch(self, now=None):
+        """Lease the BATCH_SIZE videos due soonest, paying for their call, when at least one is due.
+
+        Returns [(video_id, published_at)], empty when nothing is due or the
+        budget is exhausted.
+        """
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                rows = conn.execute('SELECT video_id, published_at, next_poll FROM watched_videos '
+                                    'ORDER BY next_poll LIMIT ?', (BATCH_SIZE,)).fetchall()
+                if not rows or rows[0][2] > now or not self._take_units(conn, 1, now):
+                    return []
+                conn.executemany('UPDATE watched_videos SET next_poll = ? WHERE video_id = ?',
+                                 [(now + LEASE_SECONDS, row[0]) for row in rows])
+                return [(video_id, published_at) for video_id, published_at, _ in rows]
+        finally:
+            conn.close()
+
+    def record_statistics(self, batch, items, now=None):
+        """Store the videos.list items of a claimed batch and schedule each video's next poll by its age.
+
+        Videos missing from items (deleted or made private) stop being
+        watched. Returns how many were refreshed.
+        """
+        now = time.time() if now is None else now
+        updates, history, missing = [], [], []
+        for video_id, published_at in batch:
+            item = items.get(video_id)
+            if item is None:
+                missing.append((video_id,))
+                continue
+            snippet = item.get('snippet', {})
+            if published_at is None:
+                published_at = _parse_time(snippet.get('publishedAt'))
+            statistics = item.get('statistics', {})
+            counts = (int(statistics.get('viewCount', 0)), int(statistics.get('likeCount', 0)),
+                      int(statistics.get('commentCount', 0)))
+            age = None if published_at is None else max(0.0, now - published_at)
+            updates.append((published_at, snippet.get('channelId'), now + poll_interval(age), now) + counts
+                           + (video_id,))
+            history.append((video_id, now) + counts)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('UPDATE watched_videos SET published_at = ?, channel_id = COALESCE(channel_id, ?), '
+                                 'next_poll = ?, last_poll = ?, polls = polls + 1, view_count = ?, like_count = ?, '
+                                 'comment_count = ? WHERE video_id = ?', updates)
+                conn.executemany('INSERT OR REPLACE INTO video_stats VALUES (?, ?, ?, ?, ?)', history)
+                conn.executemany('DELETE FROM watched_videos WHERE video_id = ?', missing)
+        finally:
+            conn.close()
+        if missing:
+            logger.warning(f"Stopped watching {len(missing)} videos the API no longer returns")
+        return len(updates)
+
+    def prune_history(self, now=None):
+        """Delete statistics older than HISTORY_DAYS; returns how many rows."""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute('DELETE FROM video_stats WHERE polled_at < ?',
+                                    (now - HISTORY_DAYS * 86400,)).rowcount
+        finally:
+            conn.close()
+
+    # Reporting
+
+    def status(self, now=None):
+        """Counts, budget and the poll load by video age, as a JSON-ready dict.
+
+        calls_per_day is the videos.list calls the current watchlist needs a
+        day at its poll intervals, to compare with the daily quota.
+        """
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            channels = conn.execute('SELECT COUNT(*) FROM watched_channels').fetchone()[0]
+            due = conn.execute('SELECT COUNT(*) FROM watched_videos WHERE next_poll <= ?', (now,)).fetchone()[0]
+            spent = conn.execute('SELECT units FROM quota_spent WHERE day = ?', (_day(now),)).fetchone()
+            rows = conn.execute('SELECT published_at FROM watched_videos').fetchall()
+        finally:
+            conn.close()
+        buckets = {label: {'videos': 0, 'polls_per_day': 0.0} for label, _ in AGE_BUCKETS}
+        for published_at, in rows:
+            age = None if published_at is None else max(0.0, now - published_at)
+            label = next(label for label, limit in AGE_BUCKETS if (age or 0) <= limit)
+            buckets[label]['videos'] += 1
+            buckets[label]['polls_per_day'] += 86400 / poll_interval(age)
+        polls_per_day = sum(bucket['polls_per_day'] for bucket in buckets.values())
+        for bucket in buckets.values():
+            bucket['polls_per_day'] = round(bucket['polls_per_day'], 1)
+        return {
+            'channels': channels,
+            'videos': len(rows),
+            'due': due,
+            'by_age': buckets,
+            'calls_per_day': round(polls_per_day / BATCH_SIZE, 1),
+            'daily_quota': self.daily_quota,
+            'units_today': spent[0] if spent else 0
+        }
+
+    def history(self, video_id, limit=100):
+        """The latest statistics of a watched video, newest first."""
+        conn = self._connect()
+        try:
+            rows = conn.execute('SELECT polled_at, view_count, like_count, comment_count FROM video_stats '
+                                'WHERE video_id = ? ORDER BY polled_at DESC LIMIT ?', (video_id, limit)).fetchall()
+        finally:
+            conn.close()
+        return [{'polled_at': _format_time(polled_at), 'view_count': views, 'like_count': likes,
+                 'comment_count': comments} for polled_at, views, likes, comments in rows]
+
+
+class WatchlistScheduler:
+    """Polls a Watchlist through a YouTubeAPI, within its budget, from a background thread."""
+
+    def __init__(self, youtube_api, watchlist, interval=WATCHLIST_INTERVAL):
+        self.youtube_api = youtube_api
+        self.watchlist = watchlist
+        self.interval = interval
+        self._last_prune = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll_channel(self, channel_id, backfill, page_token, newest_upload, now):
+        """List a claimed channel's uploads since the last poll, or the next part of its backfill.
+
+        Returns (pages listed, videos added).
+        """
+        playlist_id = uploads_playlist_id(channel_id)
+        # The first listing, and any listing resuming from a page token, adds the back catalogue
+        backfilling = newest_upload is None or page_token is not None
+        previous = newest_upload or ''
+        pages = new = 0
+        while True:
+            videos, next_token = self.youtube_api.get_playlist_page(playlist_id, page_token)
+            pages += 1
+            if page_token is None and videos:
+                newest_upload = max(previous, max(published_at for _, published_at in videos))
+            if backfilling:
+                fresh = videos[:backfill]
+                backfill -= len(fresh)
+                page_token = next_token if backfill > 0 else None
+            else:
+                # The playlist runs newest first: a page reaching an older upload holds all the new ones
+                fresh = [video for video in videos if video[1] > previous]
+                page_token = next_token if len(fresh) == len(videos) and pages < MAX_UPLOAD_PAGES else None
+            new += self.watchlist.add_uploads(channel_id, fresh, now)
+            if not page_token or not self.watchlist.spend(1, now):
+                break
+        if not backfilling and page_token:
+            # Pages of new uploads were left unread: list them again from the top next time
+            newest_upload, page_token = previous or None, None
+        self.watchlist.finish_channel(channel_id, backfill, page_token, newest_upload, now)
+        return pages, new
+
+    def run_once(self, now=None):
+        """Poll every due channel and video the budget allows; returns what was done."""
+        now = time.time() if now is None else now
+        result = {'channel_pages': 0, 'new_videos': 0, 'video_calls': 0, 'videos_refreshed': 0}
+        try:
+            while True:
+                claimed = self.watchlist.claim_channel(now)
+                if claimed is None:
+                    break
+                pages, new = self.poll_channel(*claimed, now)
+                result['channel_pages'] += pages
+                result['new_videos'] += new
+            while True:
+                batch = self.watchlist.claim_batch(now)
+                if not batch:
+                    break
+                snippet = any(published_at is None for _, published_at in batch)
+                items = self.youtube_api.get_video_statistics([video_id for video_id, _ in batch], snippet=snippet)
+                result['video_calls'] += 1
+                result['videos_refreshed'] += self.watchlist.record_statistics(batch, items, now)
+        except Exception as e:
+            # Leased rows are retried once their lease runs out
+            logger.error(f"Watchlist poll failed: {e}")
+            if 'quota' in str(e).lower():
+                self.watchlist.exhaust_budget(now)
+        if now - self._last_prune >= HISTORY_PRUNE_INTERVAL:
+            self._last_prune = now
+            self.watchlist.prune_history(now)
+        if result['channel_pages'] or result['video_calls']:
+            logger.info(f"Watchlist run: {result}")
+        return result
+
+    def start(self):
+        """Start the background poll thread (once per process)."""
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name='watchlist-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error during watchlist run: {e}")
+            if self._stop.wait(self.interval):
+                return